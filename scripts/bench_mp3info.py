@@ -0,0 +1,92 @@
+"""Compare `pytuiplayer.mp3info` with mutagen for reading MP3 durations.
+
+    python scripts/bench_mp3info.py [DIRECTORY] [--files N]
+
+Without DIRECTORY a corpus of N (default 10000) hard links to the bundled
+GTA.mp3 is built in a temporary directory; point it at a real music folder
+for realistic numbers. Each reader is timed over the whole corpus (a
+second pass over the same files, so both run from the page cache), and
+durations are compared file by file.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from pytuiplayer.mp3info import read_mp3_info
+
+BUNDLED = Path(__file__).resolve().parents[1] / "src" / "pytuiplayer" / "GTA.mp3"
+
+
+def build_corpus(directory: Path, count: int) -> list:
+    paths = []
+    for i in range(count):
+        path = directory / f"{i:05d}.mp3"
+        try:
+            os.link(BUNDLED, path)
+        except OSError:
+            shutil.copyfile(BUNDLED, path)
+        paths.append(path)
+    return paths
+
+
+def mutagen_duration(path):
+    from mutagen.mp3 import MP3
+    try:
+        return MP3(path).info.length
+    except Exception:
+        return None
+
+
+def native_duration(path):
+    info = read_mp3_info(path)
+    return info.duration if info else None
+
+
+def timed(reader, paths):
+    for path in paths:  # warm the page cache
+        reader(path)
+    t0 = time.perf_counter()
+    results = [reader(path) for path in paths]
+    return time.perf_counter() - t0, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", nargs="?", type=Path)
+    parser.add_argument("--files", type=int, default=10000)
+    args = parser.parse_args()
+
+    tmp = None
+    if args.directory:
+        paths = sorted(p for p in args.directory.rglob("*") if p.suffix.lower() == ".mp3")[:args.files]
+    else:
+        tmp = tempfile.mkdtemp(prefix="mp3bench-")
+        paths = build_corpus(Path(tmp), args.files)
+    try:
+        native_time, native = timed(native_duration, paths)
+        print(f"files:    {len(paths)}")
+        print(f"mp3info:  {native_time:.3f} s  ({native_time / len(paths) * 1e6:.0f} µs/file)")
+        try:
+            import mutagen  # noqa: F401
+        except ImportError:
+            print("mutagen:  not installed")
+            return
+        mutagen_time, reference = timed(mutagen_duration, paths)
+        print(f"mutagen:  {mutagen_time:.3f} s  ({mutagen_time / len(paths) * 1e6:.0f} µs/file)")
+        print(f"speed-up: {mutagen_time / native_time:.1f}x")
+        both = [(a, b) for a, b in zip(native, reference) if a is not None and b is not None]
+        worst = max((abs(a - b) for a, b in both), default=0.0)
+        print(f"agree:    {len(both)}/{len(paths)}, largest difference {worst * 1000:.1f} ms")
+        missing = sum(1 for a, b in zip(native, reference) if (a is None) != (b is None))
+        if missing:
+            print(f"only one reader handled {missing} files")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Time `pytuiplayer.search_index` on a synthetic library.
+
+    python scripts/bench_search.py [--tracks N] [--queries N]
+
+Builds an index over N (default 200000) made-up tracks (tags are generated,
+no files are read), saves and reloads it, then times random prefix queries
+of one to three words taken from the library, reporting the median and the
+slowest. The first query after loading includes importing NumPy and is
+reported separately.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from pytuiplayer.search_index import SearchIndex
+
+SYLLABLES = "ka lo mi ra ne to su vi da pe ba go ri mu sa le no ti ha ze".split()
+
+
+def build_library(count: int, rng: random.Random) -> dict:
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+    def words(low, high):
+        return " ".join(word() for _ in range(rng.randint(low, high))).title()
+
+    artists = [words(1, 2) for _ in range(max(1, count // 40))]
+    albums = [words(1, 3) for _ in range(max(1, count // 10))]
+    tags = {}
+    for i in range(count):
+        artist, album = rng.choice(artists), rng.choice(albums)
+        tags[f"/music/{artist}/{album}/{i % 20 + 1:02d} {word()}.mp3"] = {
+            "title": words(1, 4), "artist": artist, "album": album}
+    return tags
+
+
+def make_queries(tags: dict, count: int, rng: random.Random) -> list:
+    values = [v for t in tags.values() for v in t.values()]
+    queries = []
+    for _ in range(count):
+        chosen = rng.choice(values).lower().split()
+        # prefixes of up to three words, like someone still typing
+        queries.append(" ".join(w[:rng.randint(2, len(w))] for w in chosen[:3]))
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    tags = build_library(args.tracks, rng)
+    with tempfile.TemporaryDirectory(prefix="searchbench-") as tmp:
+        path = Path(tmp) / "search.idx"
+        index = SearchIndex(path, read_tags=tags.__getitem__)
+        t0 = time.perf_counter()
+        index.update((p, 1, 1) for p in tags)
+        print(f"tracks:   {len(index)}")
+        print(f"build:    {time.perf_counter() - t0:.2f} s")
+        index.save()
+        t0 = time.perf_counter()
+        index = SearchIndex(path).load()
+        print(f"load:     {time.perf_counter() - t0:.2f} s  ({path.stat().st_size / 1e6:.1f} MB)")
+
+    queries = make_queries(tags, args.queries, rng)
+    t0 = time.perf_counter()
+    index.search(queries[0])
+    print(f"first:    {(time.perf_counter() - t0) * 1000:.1f} ms")
+    timings = []
+    for query in queries:
+        t0 = time.perf_counter()
+        index.search(query)
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(f"queries:  {len(timings)}, median {statistics.median(timings):.2f} ms, "
+          f"p99 {sorted(timings)[int(len(timings) * 0.99) - 1]:.2f} ms, max {max(timings):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
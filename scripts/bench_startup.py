@@ -0,0 +1,40 @@
+"""Measure time-to-interactive of MusicPlayerApp headlessly.
+
+Uses the simulated backend so libmpv is not needed:
+
+    PYTUIP_BACKEND=sim python scripts/bench_startup.py [runs]
+"""
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("PYTUIP_BACKEND", "sim")
+
+from pytuiplayer.tui_app import MusicPlayerApp  # noqa: E402
+
+
+async def measure_once():
+    t0 = time.perf_counter()
+    app = MusicPlayerApp()
+    async with app.run_test():
+        interactive = time.perf_counter() - t0
+        # wait until the station loading worker has mounted the whole list
+        loading = [w for w in app.workers if w.group == "stations"]
+        if loading:
+            await app.workers.wait_for_complete(loading)
+        loaded = time.perf_counter() - t0
+        assert len(app.query_one("#station-list").children) == len(app.stations.stations)
+    return interactive, loaded
+
+
+def main(runs: int = 5) -> None:
+    results = [asyncio.run(measure_once()) for _ in range(runs)]
+    tti = sorted(r[0] for r in results)
+    full = sorted(r[1] for r in results)
+    print(f"time-to-interactive median: {tti[len(tti) // 2] * 1000:.1f} ms")
+    print(f"stations loaded median:     {full[len(full) // 2] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -55,27 +55,28 @@ class Skeleton(ast.NodeVisitor):
     def _emit_function(self, node, async_):
         args = []
 
-        for a in node.args.posonlyargs:
-            args.append(self.format_arg(a))
+        # defaults belong to the last positional parameters
+        positional = [self.format_arg(a) for a in node.args.posonlyargs + node.args.args]
+        defaults = [unparse(d) for d in node.args.defaults]
+        for i, default in enumerate(defaults, start=len(positional) - len(defaults)):
+            positional[i] += f" = {default}"
+
+        args.extend(positional[:len(node.args.posonlyargs)])
         if node.args.posonlyargs:
             args.append("/")
-
-        for a in node.args.args:
-            args.append(self.format_arg(a))
+        args.extend(positional[len(node.args.posonlyargs):])
 
         if node.args.vararg:
             args.append("*" + self.format_arg(node.args.vararg))
+        elif node.args.kwonlyargs:
+            args.append("*")
 
-        for a in node.args.kwonlyargs:
-            args.append(self.format_arg(a))
+        for a, default in zip(node.args.kwonlyargs, node.args.kw_defaults):
+            args.append(self.format_arg(a) + (f" = {unparse(default)}" if default else ""))
 
         if node.args.kwarg:
             args.append("**" + self.format_arg(node.args.kwarg))
 
-        defaults = [unparse(d) for d in node.args.defaults]
-        for i, default in enumerate(defaults, start=len(args) - len(defaults)):
-            args[i] += f" = {default}"
-
         ret = f" -> {unparse(node.returns)}" if node.returns else ""
         prefix = "async def" if async_ else "def"
         self.emit(f"{prefix} {node.name}({', '.join(args)}){ret}: ...")
@@ -1,2 +1,4 @@
-def main() -> None:
-    print("Hello from pytuiplayer!")
+def main() -> int:
+    # imported lazily so `import pytuiplayer` stays cheap
+    from pytuiplayer.__main__ import main as _main
+    return _main()
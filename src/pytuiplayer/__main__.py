@@ -1,18 +1,70 @@
 # main.py
-from pytuiplayer.tui_app import MusicPlayerApp
+import argparse
+import os
 
 
-def main() -> int:
+def main(argv=None) -> int:
     """Programmatic entrypoint for tests and CLI.
 
     Returns an exit code integer (0 on success).
+
+    `--profile-startup` runs the app until its first frame is painted, exits,
+    and prints per-phase timings plus the slowest module imports.
     """
-    app = MusicPlayerApp()
-    app.run()
+    parser = argparse.ArgumentParser(prog="pytuiplayer")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report import and startup phase timings up to first paint, then exit",
+    )
+    parser.add_argument(
+        "--network-share",
+        action="store_true",
+        help="tune Local mode browsing for SMB/NFS mounts (same as PYTUIP_NETWORK_SHARE=1)",
+    )
+    parser.add_argument(
+        "--stations",
+        metavar="FILE_OR_URL",
+        help="load radio stations from a JSON list or playlist, local or http(s) (same as PYTUIP_STATIONS)",
+    )
+    parser.add_argument(
+        "--playlist",
+        metavar="FILE_OR_URL",
+        help="start in Local mode with this playlist open, local or http(s) (same as PYTUIP_PLAYLIST)",
+    )
+    args = parser.parse_args(argv)
+    if args.network_share:
+        os.environ["PYTUIP_NETWORK_SHARE"] = "1"
+    if args.stations:
+        os.environ["PYTUIP_STATIONS"] = args.stations
+    if args.playlist:
+        os.environ["PYTUIP_PLAYLIST"] = args.playlist
+
+    profiler = None
+    timer = None
+    if args.profile_startup:
+        from pytuiplayer.startup_profile import ImportTimer, StartupProfiler
+        timer = ImportTimer().install()
+        profiler = StartupProfiler(timer)
+
+    try:
+        from pytuiplayer.tui_app import MusicPlayerApp
+        if profiler:
+            profiler.mark("imports done")
+
+        app = MusicPlayerApp()
+        if profiler:
+            profiler.mark("app constructed")
+            app.startup_profiler = profiler
+        app.run()
+    finally:
+        if timer:
+            timer.uninstall()
+
+    if profiler:
+        print(profiler.report())
     return 0
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
-
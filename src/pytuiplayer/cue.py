@@ -0,0 +1,140 @@
+import os
+import re
+import threading
+from typing import NamedTuple
+
+# CD frames per second, the unit of the last field of INDEX times (mm:ss:ff)
+FRAMES_PER_SECOND = 75
+
+# A track of a CUE sheet is referred to as "<sheet>.cue#<track number>"
+_VIRTUAL = re.compile(r"^(.*\.cue)#(\d+)$", re.IGNORECASE)
+_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+# Parsed sheets by path, as (size, mtime_ns, tracks)
+_sheets = {}
+_sheets_lock = threading.Lock()
+
+
+class CueTrack(NamedTuple):
+    sheet: str
+    number: int
+    file: str  # the audio image this track is part of
+    start: float  # seconds into `file`
+    end: float | None  # None: plays to the end of `file`
+    title: str = ""
+    performer: str = ""
+    album: str = ""
+    genre: str = ""
+    year: int | None = None
+
+    @property
+    def source(self) -> str:
+        return f"{self.sheet}#{self.number}"
+
+    @property
+    def label(self) -> str:
+        title = self.title or f"Track {self.number}"
+        return f"{self.performer} - {title}" if self.performer else title
+
+
+def _seconds(stamp: str) -> float:
+    minutes, seconds, frames = (int(part) for part in stamp.split(":"))
+    return minutes * 60 + seconds + frames / FRAMES_PER_SECOND
+
+
+def parse_cue(path) -> list:
+    """Parse a CUE sheet into `CueTrack`s, in sheet order.
+
+    Only AUDIO tracks with an `INDEX 01` are kept. A track ends where the
+    next one of the same file starts; the last track of each file plays to
+    the file's end. Sheets are read as UTF-8 and, failing that, Latin-1.
+    Raises OSError if the sheet cannot be read.
+    """
+    path = str(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    base = os.path.dirname(path)
+    disc = {"title": "", "performer": "", "genre": "", "year": None}
+    found = []  # [number, file, start, title, performer]
+    current_file = None
+    track = None
+    for line in text.splitlines():
+        tokens = [m.group(2) if m.group(1) is None else m.group(1) for m in _TOKEN.finditer(line)]
+        if not tokens:
+            continue
+        command, args = tokens[0].upper(), tokens[1:]
+        if command == "FILE" and args:
+            current_file = os.path.join(base, args[0])
+            track = None
+        elif command == "TRACK" and len(args) >= 2:
+            track = None
+            if current_file is not None and args[1].upper() == "AUDIO" and args[0].isdigit():
+                track = [int(args[0]), current_file, None, "", ""]
+                found.append(track)
+        elif command in ("TITLE", "PERFORMER") and args:
+            if track is not None:
+                track[3 if command == "TITLE" else 4] = args[0]
+            elif not found:
+                disc[command.lower()] = args[0]
+        elif command == "INDEX" and len(args) >= 2 and track is not None and args[0] == "01":
+            try:
+                track[2] = _seconds(args[1])
+            except ValueError:
+                continue
+        elif command == "REM" and len(args) >= 2 and not found:
+            if args[0].upper() == "GENRE":
+                disc["genre"] = " ".join(args[1:])
+            elif args[0].upper() == "DATE" and args[1][:4].isdigit():
+                disc["year"] = int(args[1][:4])
+    found = [t for t in found if t[2] is not None]
+    tracks = []
+    for i, (number, file, start, title, performer) in enumerate(found):
+        following = found[i + 1] if i + 1 < len(found) else None
+        end = following[2] if following is not None and following[1] == file else None
+        tracks.append(CueTrack(path, number, file, start, end, title, performer or disc["performer"],
+                               disc["title"], disc["genre"], disc["year"]))
+    return tracks
+
+
+def load_cue(path) -> list:
+    """`parse_cue(path)`, cached until the sheet changes on disk."""
+    path = str(path)
+    st = os.stat(path)
+    with _sheets_lock:
+        cached = _sheets.get(path)
+    if cached is not None and cached[:2] == (st.st_size, st.st_mtime_ns):
+        return cached[2]
+    tracks = parse_cue(path)
+    with _sheets_lock:
+        _sheets[path] = (st.st_size, st.st_mtime_ns, tracks)
+    return tracks
+
+
+def iter_cue(path, limit: int | None = None):
+    """Yield `(source, label)` pairs for the tracks of a CUE sheet, like `iter_m3u`."""
+    for track in load_cue(path)[:limit]:
+        yield track.source, track.label
+
+
+def find_track(source):
+    """The `CueTrack` a "<sheet>.cue#<n>" source refers to, or None."""
+    match = _VIRTUAL.match(str(source))
+    if match is None:
+        return None
+    try:
+        tracks = load_cue(match.group(1))
+    except OSError:
+        return None
+    number = int(match.group(2))
+    return next((track for track in tracks if track.number == number), None)
+
+
+def cue_facts(track: CueTrack) -> dict:
+    """Tags of a CUE track in the shape of `smart_playlists.read_facts`."""
+    facts = {"title": track.title, "artist": track.performer, "album": track.album,
+             "genre": track.genre, "year": track.year, "track": track.number}
+    return {key: value for key, value in facts.items() if value}
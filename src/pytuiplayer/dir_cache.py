@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Audio file suffixes shown in Local mode (compared lower-case)
+AUDIO_EXTENSIONS = frozenset({".mp3", ".flac", ".ogg", ".opus", ".m4a", ".wav"})
+
+
+class DirectoryListingCache:
+    """LRU cache of audio file listings, keyed by directory path.
+
+    Each entry remembers the directory's `st_mtime_ns` at the time it was
+    read. `peek()` returns a cached listing without touching the filesystem so
+    revisiting a directory is instant; `refresh()` re-stats the directory and
+    only re-reads it when the mtime changed. At most `max_dirs` directories
+    are kept; the least recently used one is dropped first.
+
+    The instance is shared between the event loop and refresh threads, so all
+    access to the LRU goes through `self._lock`; directory IO happens outside it.
+    """
+
+    def __init__(self, max_dirs: int = 32, extensions=AUDIO_EXTENSIONS, prefetcher=None):
+        """`prefetcher` (a `netfs.DirectoryPrefetcher`) replaces direct
+        `os.scandir` reads in network-share mode."""
+        self.max_dirs = max_dirs
+        self.prefetcher = prefetcher
+        self.extensions = frozenset(e.lower() for e in extensions)
+        self._entries = OrderedDict()  # str(path) -> (mtime_ns, tuple of names)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        with self._lock:
+            return str(path) in self._entries
+
+    def peek(self, path: Path):
+        """Return the cached list of files in `path`, or None if not cached."""
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        return self._to_paths(path, entry[1])
+
+    def load(self, path: Path) -> list:
+        """Read `path` (bypassing the cache), store and return its listing."""
+        mtime = self._mtime(path)
+        names = self._scan(path)
+        self._store(path, mtime, names)
+        return self._to_paths(path, names)
+
+    def get(self, path: Path) -> list:
+        """Return the listing of `path`, reading it only on a cache miss."""
+        cached = self.peek(path)
+        return cached if cached is not None else self.load(path)
+
+    def refresh(self, path: Path):
+        """Revalidate the entry for `path` against the directory mtime.
+
+        Returns `(files, changed)`; `changed` is True when the directory had
+        to be re-read (or was not cached before).
+        """
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        try:
+            mtime = self._mtime(path)
+        except OSError:
+            # directory vanished or became unreadable: forget it
+            with self._lock:
+                self._entries.pop(key, None)
+            return [], entry is not None
+        if entry is not None and entry[0] == mtime:
+            return self._to_paths(path, entry[1]), False
+        if self.prefetcher is not None:
+            # the prefetcher's copy of this directory is stale too
+            self.prefetcher.invalidate(path)
+        names = self._scan(path)
+        self._store(path, mtime, names)
+        changed = entry is None or entry[1] != names
+        return self._to_paths(path, names), changed
+
+    def invalidate(self, path: Path | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(path), None)
+
+    def _store(self, path: Path, mtime: int, names: tuple) -> None:
+        key = str(path)
+        with self._lock:
+            self._entries[key] = (mtime, names)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_dirs:
+                self._entries.popitem(last=False)
+
+    def _mtime(self, path: Path) -> int:
+        return os.stat(path).st_mtime_ns
+
+    def _scan(self, path: Path) -> tuple:
+        names = []
+        scandir = self.prefetcher.scandir if self.prefetcher is not None else os.scandir
+        with scandir(path) as it:
+            for entry in it:
+                # cheap string check first; only matching names pay for is_file()
+                if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                    continue
+                try:
+                    if entry.is_file():
+                        names.append(entry.name)
+                except OSError:
+                    # ignore files we cannot stat or inspect
+                    continue
+        return tuple(names)
+
+    @staticmethod
+    def _to_paths(path: Path, names: tuple) -> list:
+        base = Path(path)
+        return [base / name for name in names]
@@ -0,0 +1,159 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Priorities, most urgent first
+VISIBLE, QUEUED, BACKGROUND = 0, 1, 2
+
+
+def read_track_info(path) -> dict | None:
+    """Return `title`/`artist`/`album`/`duration` known for a local file, or None.
+
+    MP3 durations come from `pytuiplayer.mp3info`; tags (and other formats'
+    durations) from mutagen when it is installed. CUE sheet tracks are
+    described by their sheet.
+    """
+    info = {}
+    if ".cue#" in str(path).lower():
+        from pytuiplayer.cue import find_track
+        track = find_track(path)
+        if track is None:
+            return None
+        end = track.end
+        if end is None:
+            end = (read_track_info(track.file) or {}).get("duration")
+        return {"duration": end - track.start} if end else None
+    if str(path).lower().endswith(".mp3"):
+        from pytuiplayer.mp3info import read_mp3_info
+        mp3 = read_mp3_info(path)
+        if mp3 is not None:
+            info["duration"] = mp3.duration
+    try:
+        from mutagen import File as MutagenFile
+        tags = MutagenFile(str(path), easy=True)
+    except ImportError:
+        tags = None
+    except Exception:
+        tags = None
+    if tags:
+        for key in ("title", "artist", "album"):
+            value = (tags.get(key) or [None])[0]
+            if value:
+                info[key] = value
+        length = getattr(getattr(tags, "info", None), "length", None)
+        if length and "duration" not in info:
+            info["duration"] = float(length)
+    return info or None
+
+
+def display_label(info: dict, label: str, tagged: bool = False) -> str:
+    """Row label for enriched `info`: "Artist - Title (m:ss)".
+
+    `label` is kept as the name when `tagged` (it came from the playlist)
+    or when the file has no title tag.
+    """
+    if not tagged and info.get("title"):
+        label = f"{info['artist']} - {info['title']}" if info.get("artist") else info["title"]
+    duration = info.get("duration")
+    if duration:
+        minutes, seconds = divmod(int(duration), 60)
+        label = f"{label}  ({minutes}:{seconds:02d})"
+    return label
+
+
+class EnrichmentScheduler:
+    """Read metadata for list rows in a bounded thread pool, most urgent rows first.
+
+    Rows are added with a key (their position) and source. `prioritise()`
+    moves rows on screen to the front and upcoming queue entries after
+    them. Rows that lose those priorities, for example because they were
+    scrolled away from, go back to the background order, so they no longer
+    hold up the new visible rows. The heap uses lazy deletion: a
+    reprioritised row gets a new entry, and stale entries are skipped when
+    popped. At most `workers` reads run at once. Results are collected and
+    handed out in batches by `drain()`, so the UI can update many labels in
+    one pass.
+    """
+
+    def __init__(self, read=None, workers: int = 4):
+        self._read = read or read_track_info
+        self._workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enrich")
+        self._heap = []
+        self._priority = {}  # key -> priority of its pending read
+        self._sources = {}  # key -> source, for pending rows
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._results = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def add(self, key, source, priority: int = BACKGROUND) -> None:
+        with self._lock:
+            self._sources[key] = source
+            self._push(key, priority)
+            self._pump()
+
+    def prioritise(self, visible=(), queued=()) -> None:
+        with self._lock:
+            wanted = {}
+            for key in visible:
+                if key in self._priority:
+                    wanted[key] = VISIBLE
+            for key in queued:
+                if key in self._priority and key not in wanted:
+                    wanted[key] = QUEUED
+            for key, priority in list(self._priority.items()):
+                if priority != BACKGROUND and key not in wanted:
+                    self._push(key, BACKGROUND)
+            for key, priority in wanted.items():
+                if self._priority[key] != priority:
+                    self._push(key, priority)
+            self._pump()
+
+    def _push(self, key, priority: int) -> None:
+        self._priority[key] = priority
+        heapq.heappush(self._heap, (priority, next(self._seq), key))
+
+    def _pump(self) -> None:
+        # called with the lock held
+        while not self._closed and self._in_flight < self._workers and self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            if self._priority.get(key) != priority:
+                continue  # superseded by a later push, or already read
+            del self._priority[key]
+            source = self._sources.pop(key)
+            self._in_flight += 1
+            self._pool.submit(self._run, key, source)
+
+    def _run(self, key, source) -> None:
+        try:
+            result = self._read(source)
+        except Exception as exc:
+            print(f"[ERROR] Could not read metadata for {source}: {exc}")
+            result = None
+        with self._lock:
+            self._in_flight -= 1
+            if self._closed:
+                return
+            self._results.append((key, result))
+            self._pump()
+
+    def drain(self) -> list:
+        """Return and clear the `(key, info)` results collected so far."""
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._priority) + self._in_flight
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._heap.clear()
+            self._priority.clear()
+            self._sources.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,345 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+import wave
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+from pytuiplayer.storage import data_dir
+
+# Decoded window: `WINDOW` seconds from `WINDOW_START` (earlier for short tracks)
+RATE = 11025
+WINDOW_START = 30.0
+WINDOW = 20.0
+
+# 16 time segments x 12 pitch classes
+SEGMENTS = 16
+DIMENSIONS = SEGMENTS * 12
+
+# Random-hyperplane signature, split into LSH bands
+SIGNATURE_BITS = 96
+BANDS = 8
+BAND_BITS = SIGNATURE_BITS // BANDS
+
+# Cosine similarity above which two fingerprints count as the same recording
+MATCH = 0.9
+# Buckets with more members than this are too generic to be useful
+MAX_BUCKET = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    vector BLOB
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    key INTEGER NOT NULL,
+    track_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_key ON bands (band, key);
+CREATE INDEX IF NOT EXISTS bands_track ON bands (track_id);
+"""
+
+
+def decode_window(path, start: float, seconds: float = WINDOW, rate: int = RATE):
+    """Return `seconds` of mono float32 audio from `start`, resampled to `rate`.
+
+    16-bit WAV is read directly, anything else through `ffmpeg`. Raises
+    OSError if the file cannot be decoded.
+    """
+    import numpy as np
+    if str(path).lower().endswith(".wav"):
+        with wave.open(str(path), "rb") as w:
+            channels, width, native = w.getnchannels(), w.getsampwidth(), w.getframerate()
+            if width != 2:
+                raise OSError("only 16-bit WAV is read without ffmpeg")
+            first = int(start * native)
+            w.setpos(first if first < w.getnframes() else 0)
+            data = w.readframes(int(seconds * native))
+        samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels).mean(axis=1) / 32768.0
+        if native != rate and len(samples):
+            grid = np.arange(int(len(samples) * rate / native)) * (native / rate)
+            samples = np.interp(grid, np.arange(len(samples)), samples)
+        return samples.astype(np.float32)
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise OSError("ffmpeg not found")
+    try:
+        proc = subprocess.run(
+            [ffmpeg, "-v", "error", "-nostdin", "-ss", f"{start:.2f}", "-t", f"{seconds:.2f}", "-i", str(path),
+             "-f", "f32le", "-ac", "1", "-ar", str(rate), "-"],
+            capture_output=True, timeout=120,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise OSError(f"ffmpeg timed out: {exc}") from exc
+    data = proc.stdout
+    return np.frombuffer(data[:len(data) - len(data) % 4], dtype="<f4")
+
+
+def chroma_vector(samples, rate: int = RATE, fft_size: int = 4096):
+    """Unit-length fingerprint vector of a mono block, or None for silence.
+
+    Spectral power between 55 Hz and 5 kHz is folded into 12 pitch classes
+    per frame (chroma), averaged over `SEGMENTS` stretches of the window,
+    then centred and normalised so vectors compare by cosine similarity.
+    Chroma follows the harmony rather than the exact spectrum, which keeps
+    it stable across encoders, bitrates and small level changes.
+    """
+    import numpy as np
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < fft_size * SEGMENTS // 2:
+        return None
+    hop = fft_size // 2
+    frames = np.lib.stride_tricks.sliding_window_view(samples, fft_size)[::hop]
+    power = np.abs(np.fft.rfft(frames * np.hanning(fft_size).astype(np.float32), axis=1)) ** 2
+    freqs = np.fft.rfftfreq(fft_size, 1 / rate)
+    used = (freqs >= 55) & (freqs <= 5000)
+    pitch = np.round(12 * np.log2(freqs[used] / 440.0)).astype(int) % 12
+    fold = np.zeros((used.sum(), 12), dtype=np.float32)
+    fold[np.arange(len(pitch)), pitch] = 1
+    chroma = power[:, used] @ fold
+    totals = chroma.sum(axis=1, keepdims=True)
+    chroma = np.divide(chroma, totals, out=np.zeros_like(chroma), where=totals > 0)
+    segments = np.stack([part.mean(axis=0) for part in np.array_split(chroma, SEGMENTS)])
+    vector = np.sqrt(segments).ravel()
+    vector -= vector.mean()
+    norm = float(np.linalg.norm(vector))
+    if norm < 1e-6:
+        return None
+    return (vector / norm).astype(np.float32)
+
+
+def fingerprint_file(path, start: float = WINDOW_START):
+    """Fingerprint vector (float16 bytes) of one file, or None. Runs in worker processes."""
+    try:
+        vector = chroma_vector(decode_window(path, start))
+    except (OSError, ValueError, EOFError, wave.Error) as exc:
+        print(f"[ERROR] Fingerprinting failed for {path}: {exc}")
+        return None
+    return None if vector is None else vector.astype("<f2").tobytes()
+
+
+def window_start(duration) -> float:
+    """Start of the decoded window: `WINDOW_START`, or centred in shorter tracks."""
+    if not duration or duration >= WINDOW_START + WINDOW:
+        return WINDOW_START
+    return max(0.0, (duration - WINDOW) / 2)
+
+
+def _planes():
+    import numpy as np
+    # fixed seed: signatures must stay comparable across runs
+    return np.random.default_rng(0x5EED).standard_normal((SIGNATURE_BITS, DIMENSIONS)).astype(np.float32)
+
+
+def band_keys(vector, planes) -> list:
+    """LSH keys of a vector: its random-hyperplane signature cut into `BANDS` integers."""
+    import numpy as np
+    bits = (planes @ vector) > 0
+    weights = 1 << np.arange(BAND_BITS)
+    return [int(bits[b * BAND_BITS:(b + 1) * BAND_BITS] @ weights) for b in range(BANDS)]
+
+
+class FingerprintIndex:
+    """Fingerprints of the library in SQLite, with LSH buckets for near-duplicate lookup.
+
+    Each track row keeps the `size`/`mtime_ns` it was fingerprinted at, so
+    runs are incremental and an interrupted run resumes where it stopped.
+    Tracks that could not be decoded are kept with a NULL vector so they
+    are not retried until the file changes. Candidate pairs come from
+    tracks sharing any band key and are confirmed by cosine similarity,
+    one bucket at a time, so the fingerprints never have to fit in memory.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else data_dir() / "fingerprints.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._planes = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def needs(self, path, size: int, mtime_ns: int) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns FROM tracks WHERE path = ?", (str(path),)).fetchone()
+        return row != (size, mtime_ns)
+
+    def store(self, path, size: int, mtime_ns: int, vector) -> None:
+        """Record the fingerprint of `path` (float16 bytes, or None if it failed)."""
+        import numpy as np
+        if self._planes is None:
+            self._planes = _planes()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO tracks (path, size, mtime_ns, vector) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+                "vector = excluded.vector",
+                (str(path), size, mtime_ns, vector),
+            )
+            track_id = self._db.execute("SELECT id FROM tracks WHERE path = ?", (str(path),)).fetchone()[0]
+            self._db.execute("DELETE FROM bands WHERE track_id = ?", (track_id,))
+            if vector is not None:
+                keys = band_keys(np.frombuffer(vector, dtype="<f2").astype(np.float32), self._planes)
+                self._db.executemany("INSERT INTO bands VALUES (?, ?, ?)",
+                                     [(band, key, track_id) for band, key in enumerate(keys)])
+
+    def commit(self) -> None:
+        with self._lock:
+            self._db.commit()
+
+    def prune(self, keep) -> int:
+        """Forget tracks whose path is not in `keep` (an iterable of paths)."""
+        with self._lock:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS keep (path TEXT PRIMARY KEY)")
+            self._db.execute("DELETE FROM keep")
+            self._db.executemany("INSERT OR IGNORE INTO keep VALUES (?)", ((str(p),) for p in keep))
+            stale = "SELECT id FROM tracks WHERE path NOT IN (SELECT path FROM keep)"
+            self._db.execute(f"DELETE FROM bands WHERE track_id IN ({stale})")
+            removed = self._db.execute(f"DELETE FROM tracks WHERE id IN ({stale})").rowcount
+            self._db.commit()
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM tracks WHERE vector IS NOT NULL").fetchone()[0]
+
+    def _vectors(self, ids):
+        import numpy as np
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._db.execute(f"SELECT id, path, vector FROM tracks WHERE id IN ({marks})", ids).fetchall()
+        if not rows:
+            return [], [], np.zeros((0, DIMENSIONS), dtype=np.float32)
+        matrix = np.stack([np.frombuffer(v, dtype="<f2") for _, _, v in rows]).astype(np.float32)
+        return [r[0] for r in rows], [r[1] for r in rows], matrix
+
+    def similar(self, path, threshold: float = MATCH) -> list:
+        """Return `(path, similarity)` of tracks matching `path`, best first."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM tracks WHERE path = ?", (str(path),)).fetchone()
+            if row is None:
+                return []
+            ids = [r[0] for r in self._db.execute(
+                "SELECT DISTINCT b.track_id FROM bands a JOIN bands b ON a.band = b.band AND a.key = b.key "
+                "WHERE a.track_id = ?", (row[0],))]
+        ids, paths, matrix = self._vectors(ids)
+        if row[0] not in ids:
+            return []
+        scores = matrix @ matrix[ids.index(row[0])]
+        found = [(p, float(s)) for i, p, s in zip(ids, paths, scores) if i != row[0] and s >= threshold]
+        return sorted(found, key=lambda item: -item[1])
+
+    def duplicates(self, threshold: float = MATCH, should_stop=None) -> list:
+        """Group tracks that are the same recording; returns lists of paths, largest group first."""
+        should_stop = should_stop or (lambda: False)
+        parent = {}
+
+        def find(x):
+            while parent.get(x, x) != x:
+                parent[x] = parent.get(parent[x], parent[x])
+                x = parent[x]
+            return x
+
+        with self._lock:
+            buckets = self._db.execute(
+                "SELECT group_concat(track_id) FROM bands GROUP BY band, key "
+                "HAVING count(*) > 1 AND count(*) <= ?", (MAX_BUCKET,)).fetchall()
+        for (members,) in buckets:
+            if should_stop():
+                return []
+            ids, _, matrix = self._vectors([int(x) for x in members.split(",")])
+            scores = matrix @ matrix.T
+            for i in range(len(ids)):
+                for j in range(i + 1, len(ids)):
+                    if scores[i, j] >= threshold:
+                        a, b = find(ids[i]), find(ids[j])
+                        if a != b:
+                            parent[max(a, b)] = min(a, b)
+        groups = {}
+        for track_id in set(parent) | set(parent.values()):
+            groups.setdefault(find(track_id), []).append(track_id)
+        result = []
+        for members in groups.values():
+            _, paths, _ = self._vectors(members)
+            result.append(sorted(paths))
+        return sorted(result, key=lambda g: (-len(g), g))
+
+
+def fingerprint_library(index, fingerprints: FingerprintIndex, workers: int | None = None,
+                        should_stop=None, progress=None) -> int:
+    """Fingerprint library tracks that are new or changed; returns how many were stored.
+
+    Tracks come from `LibraryIndex.tracks()`; at most a few jobs per worker
+    are in flight at a time so memory stays flat on very large libraries,
+    and results are committed every 50 tracks. `progress(done)` is called
+    after each commit. Tracks no longer in the library are pruned at the end.
+    """
+    from pytuiplayer.loudness import analysis_available, process_pool
+    should_stop = should_stop or (lambda: False)
+    if not analysis_available():
+        return 0
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    seen = []
+
+    def pending():
+        for path, size, mtime, duration in index.tracks():
+            seen.append(path)
+            if not has_ffmpeg and not path.lower().endswith(".wav"):
+                continue
+            if fingerprints.needs(path, size, mtime):
+                yield path, size, mtime, duration
+
+    stored = 0
+    workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+    with process_pool(workers) as pool:
+        jobs = {}
+        todo = pending()
+        while True:
+            while len(jobs) < workers * 4:
+                item = next(todo, None)
+                if item is None:
+                    break
+                path, size, mtime, duration = item
+                try:
+                    future = pool.submit(fingerprint_file, path, window_start(duration))
+                except RuntimeError as exc:
+                    # a worker died (BrokenProcessPool); the rest is left for the next run
+                    print(f"[ERROR] Fingerprint pool unavailable: {exc}")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    fingerprints.commit()
+                    return stored
+                jobs[future] = (path, size, mtime)
+            if not jobs:
+                break
+            done, _ = wait(jobs, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, size, mtime = jobs.pop(future)
+                try:
+                    vector = future.result()
+                except Exception as exc:
+                    # the worker died; leave the track for the next run
+                    print(f"[ERROR] Fingerprint worker failed for {path}: {exc}")
+                    continue
+                fingerprints.store(path, size, mtime, vector)
+                stored += 1
+                if stored % 50 == 0:
+                    fingerprints.commit()
+                    if progress is not None:
+                        progress(stored)
+            if should_stop():
+                pool.shutdown(wait=False, cancel_futures=True)
+                fingerprints.commit()
+                return stored
+    fingerprints.commit()
+    fingerprints.prune(seen)
+    return stored
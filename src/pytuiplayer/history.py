@@ -0,0 +1,292 @@
+import heapq
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+from pytuiplayer.storage import atomic_write_text, data_dir
+
+INDEX_VERSION = 1
+
+_STOP = object()
+
+
+class HistoryLog:
+    """Append-only listening history with an aggregated, compacted index.
+
+    Every play start and stop is one JSON line in `history.jsonl` under
+    `data_dir()`. Lines are written by a background thread that batches
+    whatever arrived within `flush_interval` seconds and fsyncs at most every
+    `fsync_interval` seconds, so playback never waits on the disk. A torn
+    last line after a crash is skipped when reading.
+
+    Per-source totals (`plays`, listened `secs`, `last` play time, `kind`,
+    `label`) are kept in memory and snapshotted to `history-index.json`
+    together with the log offset they cover, so loading replays only the
+    log tail and queries never scan the log.
+    """
+
+    def __init__(self, path: Path | None = None, flush_interval: float = 1.0,
+                 fsync_interval: float = 5.0, compact_every: int = 500, clock=time.monotonic):
+        self.path = Path(path) if path is not None else data_dir() / "history.jsonl"
+        self.index_path = self.path.with_name(self.path.stem + "-index.json")
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.clock = clock
+        self._stats = {}  # source -> {"kind", "label", "plays", "secs", "last"}
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._pending = 0  # events recorded but not yet written
+        self._since_snapshot = 0
+        self._current = None  # (source, kind, started, paused_at, paused_total)
+        self._writer = None
+        self._last_t = 0.0
+        self._listeners = []
+
+    def load(self) -> "HistoryLog":
+        """Read the index snapshot and replay the log written after it."""
+        stats, offset = {}, 0
+        try:
+            data = json.loads(self.index_path.read_text())
+            if data.get("version") == INDEX_VERSION:
+                stats, offset = data["stats"], data["offset"]
+        except (OSError, ValueError, KeyError):
+            pass
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            size = 0
+        if size < offset:
+            # the log was replaced; the snapshot no longer describes it
+            stats, offset = {}, 0
+        replayed = 0
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(stats, event)
+                    replayed += 1
+        except OSError:
+            pass
+        with self._lock:
+            self._stats = stats
+            self._since_snapshot = replayed
+        return self
+
+    # recording
+
+    def start(self, source, label: str | None = None, kind: str = "local") -> None:
+        """Record the start of a play, ending the previous one."""
+        self.stop()
+        source = str(source)
+        self._current = [source, kind, self.clock(), None, 0.0]
+        self._record({"ev": "start", "src": source, "kind": kind, "label": label})
+
+    def pause(self) -> None:
+        if self._current is not None and self._current[3] is None:
+            self._current[3] = self.clock()
+
+    def resume(self) -> None:
+        if self._current is not None and self._current[3] is not None:
+            self._current[4] += self.clock() - self._current[3]
+            self._current[3] = None
+
+    def stop(self) -> None:
+        """Record how long the current play was listened to (paused time excluded)."""
+        if self._current is None:
+            return
+        self.resume()
+        source, kind, started, _, paused = self._current
+        self._current = None
+        secs = round(max(0.0, self.clock() - started - paused), 1)
+        self._record({"ev": "stop", "src": source, "kind": kind, "secs": secs})
+
+    def close(self) -> None:
+        """Stop the current play, write everything and fsync."""
+        self.stop()
+        if self._writer is not None:
+            self._events.put(_STOP)
+            self._writer.join(timeout=5)
+            self._writer = None
+
+    def _record(self, event: dict) -> None:
+        with self._lock:
+            # strictly increasing, so "recently played" has no ties
+            self._last_t = max(round(time.time(), 3), round(self._last_t + 0.001, 3))
+            event["t"] = self._last_t
+            self._apply(self._stats, event)
+            self._pending += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="pytuip-history", daemon=True)
+                self._writer.start()
+            entry = dict(self._stats[event["src"]])
+        self._events.put(event)
+        for listener in self._listeners:
+            try:
+                listener(event["src"], entry)
+            except Exception as exc:
+                print(f"[ERROR] History listener failed: {exc}")
+
+    def add_listener(self, callback) -> None:
+        """Call `callback(source, entry)` after every recorded event."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    @staticmethod
+    def _apply(stats: dict, event: dict) -> None:
+        entry = stats.setdefault(event["src"], {"kind": event.get("kind"), "label": None,
+                                                "plays": 0, "secs": 0.0, "last": 0.0})
+        if event.get("ev") == "start":
+            entry["plays"] += 1
+            entry["last"] = event.get("t", 0.0)
+            if event.get("label"):
+                entry["label"] = event["label"]
+        elif event.get("ev") == "stop":
+            entry["secs"] += event.get("secs", 0.0)
+
+    # background writer
+
+    def _write_loop(self) -> None:
+        last_sync = time.monotonic()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            f = open(self.path, "a+b")
+            self._drop_torn_line(f)
+        except OSError as exc:
+            print(f"[ERROR] Cannot open history log {self.path}: {exc}")
+            return
+        with f:
+            done = False
+            unsynced = False
+            while not done:
+                try:
+                    batch = [self._events.get(timeout=self.fsync_interval)]
+                except queue.Empty:
+                    # quiet period: make what was written durable
+                    if unsynced:
+                        self._fsync(f)
+                        unsynced = False
+                    continue
+                # collect everything that arrives within flush_interval
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1] is not _STOP:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._events.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                done = batch[-1] is _STOP
+                lines = [json.dumps(e, separators=(",", ":")) + "\n" for e in batch if e is not _STOP]
+                try:
+                    f.write("".join(lines).encode("utf-8"))
+                    f.flush()
+                    unsynced = True
+                except OSError as exc:
+                    print(f"[ERROR] Failed to write history: {exc}")
+                if done or time.monotonic() - last_sync >= self.fsync_interval:
+                    self._fsync(f)
+                    unsynced = False
+                    last_sync = time.monotonic()
+                with self._lock:
+                    self._pending -= len(lines)
+                    self._since_snapshot += len(lines)
+                    due = self._pending == 0 and (done or self._since_snapshot >= self.compact_every)
+                if due:
+                    self._snapshot(f.tell())
+
+    @staticmethod
+    def _drop_torn_line(f) -> None:
+        """Cut a last line left incomplete by a crash, so the next event does
+        not land on the end of it and get lost with it."""
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 4096)
+            f.seek(start)
+            block = f.read(pos - start)
+            if pos == end and block.endswith(b"\n"):
+                return
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+    @staticmethod
+    def _fsync(f) -> None:
+        try:
+            os.fsync(f.fileno())
+        except OSError as exc:
+            print(f"[ERROR] Failed to sync history: {exc}")
+
+    def _snapshot(self, offset: int) -> None:
+        with self._lock:
+            if self._pending:
+                return
+            text = json.dumps({"version": INDEX_VERSION, "offset": offset, "stats": self._stats},
+                              separators=(",", ":"))
+            self._since_snapshot = 0
+        try:
+            atomic_write_text(self.index_path, text)
+        except OSError as exc:
+            print(f"[ERROR] Failed to save history index {self.index_path}: {exc}")
+
+    # queries
+
+    def entry(self, source) -> dict | None:
+        """`plays`/`secs`/`last`/`kind`/`label` of one source, or None if never played."""
+        with self._lock:
+            entry = self._stats.get(str(source))
+            return dict(entry) if entry is not None else None
+
+    def stats(self, kind: str | None = None) -> dict:
+        """Return `{source: entry}` for every source (of `kind`)."""
+        return dict(self._entries(kind))
+
+    def _entries(self, kind):
+        with self._lock:
+            return [(src, dict(e)) for src, e in self._stats.items() if kind is None or e["kind"] == kind]
+
+    def most_played(self, limit: int = 10, kind: str | None = None) -> list:
+        """Return `(source, entry)` pairs with the most plays (ties: most recent first)."""
+        return heapq.nlargest(limit, self._entries(kind), key=lambda item: (item[1]["plays"], item[1]["last"]))
+
+    def recently_played(self, limit: int = 10, kind: str | None = None) -> list:
+        return heapq.nlargest(limit, self._entries(kind), key=lambda item: item[1]["last"])
+
+    def listening_time(self, kind: str | None = "radio") -> dict:
+        """Return `{source: seconds listened}`, per station by default."""
+        return {src: e["secs"] for src, e in self._entries(kind)}
+
+    def favourites(self, limit: int = 5, kind: str | None = None) -> list:
+        """Sources to surface at the top of a list: most played, then most recent."""
+        ranked = [src for src, _ in self.most_played(limit, kind)]
+        for src, _ in self.recently_played(limit, kind):
+            if src not in ranked:
+                ranked.append(src)
+        return ranked
+
+
+def promote(items, key, ranked) -> tuple:
+    """Split `items` into `(promoted, rest)`.
+
+    `promoted` holds the items whose `key(item)` is in `ranked`, in `ranked`
+    order; `rest` keeps the original order, so lists stay stable between
+    refreshes.
+    """
+    rank = {source: i for i, source in enumerate(ranked)}
+    promoted, rest = [], []
+    for item in items:
+        (promoted if key(item) in rank else rest).append(item)
+    promoted.sort(key=lambda item: rank[key(item)])
+    return promoted, rest
@@ -0,0 +1,100 @@
+import re
+import time
+from collections import OrderedDict, deque
+
+# `key='value';` pairs of a metadata block; a value may itself contain quotes
+# ("Guns N' Roses"), so it only ends at a quote followed by the next key or
+# the block's zero padding
+_FIELD = re.compile(rb"(\w+)='(.*?)';(?=\w+=|\0|\Z)", re.DOTALL)
+
+
+def parse_metadata(block) -> dict:
+    """Fields of an ICY metadata block (any bytes-like object, searched in
+    place), e.g. `{"StreamTitle": "Artist - Title", "StreamUrl": ""}`."""
+    return {key.decode("ascii"): value.decode("utf-8", errors="replace").strip()
+            for key, value in _FIELD.findall(block)}
+
+
+class IcyDemuxer:
+    """Splits an ICY stream into audio and metadata as it is read.
+
+    A station asked for `Icy-MetaData` sends a metadata block after every
+    `metaint` bytes of audio: one length byte (times 16) and that many bytes
+    of `key='value';` fields. `feed()` takes the stream in chunks of any size
+    and yields `(audio, None)` with memoryview slices of the chunk (no copy)
+    and `(None, fields)` for each non-empty metadata block. Only a block
+    split between two chunks is gathered, in a small buffer of its own.
+    """
+
+    def __init__(self, metaint: int):
+        self.metaint = metaint
+        self._until_meta = metaint  # audio bytes before the next block
+        self._meta_left = None  # block bytes still to come, None before its length byte
+        self._partial = bytearray()
+
+    def feed(self, chunk):
+        view = memoryview(chunk)
+        if not self.metaint:
+            if view:
+                yield view, None
+            return
+        pos, end = 0, len(view)
+        while pos < end:
+            if self._until_meta:
+                n = min(self._until_meta, end - pos)
+                yield view[pos:pos + n], None
+                self._until_meta -= n
+                pos += n
+            elif self._meta_left is None:
+                self._meta_left = view[pos] * 16
+                pos += 1
+                if not self._meta_left:  # no change since the last block
+                    self._meta_left = None
+                    self._until_meta = self.metaint
+            else:
+                n = min(self._meta_left, end - pos)
+                if n == self._meta_left and not self._partial:
+                    block = view[pos:pos + n]  # whole block in this chunk
+                else:
+                    self._partial += view[pos:pos + n]
+                    block = self._partial
+                self._meta_left -= n
+                pos += n
+                if self._meta_left:
+                    continue
+                fields = parse_metadata(block)
+                self._partial = bytearray()
+                self._meta_left = None
+                self._until_meta = self.metaint
+                if fields:
+                    yield None, fields
+
+
+class TitleHistory:
+    """The last `size` stream titles of each of the last `stations` stations,
+    as `(time, title)`, oldest first."""
+
+    def __init__(self, size: int = 50, stations: int = 20):
+        self.size = size
+        self.stations = stations
+        self._titles = OrderedDict()
+
+    def add(self, station: str, title: str, when: float | None = None) -> bool:
+        """Record `title` on `station`; False when it is already the current one."""
+        titles = self._titles.get(station)
+        if titles is None:
+            titles = self._titles[station] = deque(maxlen=self.size)
+            while len(self._titles) > self.stations:
+                self._titles.popitem(last=False)
+        self._titles.move_to_end(station)
+        if titles and titles[-1][1] == title:
+            return False
+        titles.append((time.time() if when is None else when, title))
+        return True
+
+    def titles(self, station: str) -> list:
+        return list(self._titles.get(station, ()))
+
+    def current(self, station: str) -> str | None:
+        titles = self._titles.get(station)
+        return titles[-1][1] if titles else None
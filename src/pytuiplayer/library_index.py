@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from pytuiplayer.dir_cache import AUDIO_EXTENSIONS
+from pytuiplayer.playlists import CUE_EXTENSIONS, PLAYLIST_EXTENSIONS, SMART_PLAYLIST_EXTENSIONS
+from pytuiplayer.storage import atomic_write_text, cache_dir
+
+# Directory names never worth walking for music
+SKIP_DIRS = frozenset({"node_modules", "__pycache__", "site-packages", "venv", ".venv"})
+
+INDEX_VERSION = 1
+
+
+def is_skipped_dir(name: str) -> bool:
+    return name.startswith(".") or name in SKIP_DIRS
+
+
+def read_duration(path: Path):
+    """Return the duration of an audio file in seconds, or None if unknown.
+
+    MP3 headers are parsed directly (`pytuiplayer.mp3info`); other formats
+    use mutagen when it is installed (imported lazily).
+    """
+    if str(path).lower().endswith(".mp3"):
+        from pytuiplayer.mp3info import read_mp3_info
+        info = read_mp3_info(path)
+        if info is not None:
+            return info.duration
+    try:
+        from mutagen import File as MutagenFile
+    except ImportError:
+        return None
+    try:
+        info = MutagenFile(str(path))
+        length = getattr(getattr(info, "info", None), "length", None)
+        return float(length) if length else None
+    except Exception:
+        return None
+
+
+class LibraryIndex:
+    """Persistent per-directory summary of the music library.
+
+    For every walked directory the index keeps its `st_mtime_ns`, the audio
+    files it contains directly (`name -> [size, mtime_ns, duration]`, plus
+    `[lufs, peak]` or None once loudness has been analysed), its CUE sheets
+    (`name -> [size, mtime_ns, [[track number, duration], ...]]`), the
+    number of playlists, its sub-directories and the aggregated track count
+    and duration of the whole subtree. It is stored as JSON under
+    `cache_dir()` and shared between the walker thread and the UI, so access
+    goes through a lock.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else cache_dir() / "library.json"
+        self._dirs = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load(self) -> "LibraryIndex":
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return self
+        if data.get("version") == INDEX_VERSION:
+            with self._lock:
+                self._dirs = data.get("dirs", {})
+        return self
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            text = json.dumps({"version": INDEX_VERSION, "dirs": self._dirs}, separators=(",", ":"))
+            self._dirty = False
+        try:
+            atomic_write_text(self.path, text)
+        except OSError as exc:
+            print(f"[ERROR] Failed to save library index {self.path}: {exc}")
+
+    def get(self, directory) -> dict | None:
+        with self._lock:
+            return self._dirs.get(str(directory))
+
+    def put(self, directory, record: dict) -> None:
+        with self._lock:
+            key = str(directory)
+            if self._dirs.get(key) != record:
+                self._dirs[key] = record
+                self._dirty = True
+
+    def remove_under(self, root, keep: set) -> None:
+        """Forget directories below `root` that are not in `keep`."""
+        prefix = str(root).rstrip(os.sep) + os.sep
+        with self._lock:
+            stale = [k for k in self._dirs if (k == str(root) or k.startswith(prefix)) and k not in keep]
+            for key in stale:
+                del self._dirs[key]
+            if stale:
+                self._dirty = True
+
+    def summary(self, directory):
+        """Return `(tracks, duration, playlists)` for a subtree, or None if not walked yet."""
+        record = self.get(directory)
+        if record is None:
+            return None
+        return record["total_tracks"], record["total_duration"], record["total_playlists"]
+
+    def tracks(self):
+        """Yield `(path, size, mtime_ns, duration)` for every indexed audio file."""
+        with self._lock:
+            items = list(self._dirs.items())
+        for directory, record in items:
+            for name, entry in record["files"].items():
+                size, mtime, duration = entry[:3]
+                yield os.path.join(directory, name), size, mtime, duration
+
+    def cue_tracks(self):
+        """Yield `(source, size, mtime_ns, duration)` for every track of the
+        indexed CUE sheets; `source` is "<sheet>.cue#<n>" and size/mtime are
+        the sheet's."""
+        with self._lock:
+            items = list(self._dirs.items())
+        for directory, record in items:
+            for name, (size, mtime, tracks) in record.get("cues", {}).items():
+                sheet = os.path.join(directory, name)
+                for number, duration in tracks:
+                    yield f"{sheet}#{number}", size, mtime, duration
+
+    def missing_loudness(self):
+        """Yield paths of indexed audio files whose loudness has not been analysed."""
+        with self._lock:
+            items = list(self._dirs.items())
+        for directory, record in items:
+            for name, entry in record["files"].items():
+                if len(entry) < 4:
+                    yield os.path.join(directory, name)
+
+    def get_loudness(self, path):
+        """Return `(lufs, peak)` for an analysed file, or None."""
+        directory, name = os.path.split(str(path))
+        with self._lock:
+            entry = self._dirs.get(directory, {}).get("files", {}).get(name)
+            if entry is None or len(entry) < 4 or not entry[3]:
+                return None
+            return tuple(entry[3])
+
+    def set_loudness(self, path, result) -> None:
+        """Store `(lufs, peak)` (or None when analysis failed) for an indexed file."""
+        directory, name = os.path.split(str(path))
+        with self._lock:
+            entry = self._dirs.get(directory, {}).get("files", {}).get(name)
+            if entry is None:
+                return
+            del entry[3:]
+            entry.append(list(result) if result else None)
+            self._dirty = True
+
+
+class LibraryWalker:
+    """Walk a directory tree and keep a `LibraryIndex` up to date.
+
+    Directories whose mtime is unchanged since the last walk are not listed
+    again (their cached files and sub-directories are reused), so a re-walk of
+    an unchanged library costs one `stat` per directory. Durations are only
+    read for new or modified files.
+
+    A walk cancelled through `should_stop` leaves the records it did not get
+    to as they were (`stopped` is then True).
+    """
+
+    def __init__(self, index: LibraryIndex, duration_reader=read_duration):
+        self.index = index
+        self.duration_reader = duration_reader
+        self.rescanned = 0
+        self.stopped = False
+
+    def walk(self, root: Path, should_stop=None) -> LibraryIndex:
+        self.rescanned = 0
+        seen = set()
+        *_, self.stopped = self._visit(str(root), seen, should_stop or (lambda: False))
+        # directories not reached are unknown, not gone
+        if not self.stopped:
+            self.index.remove_under(root, seen)
+        return self.index
+
+    def _visit(self, directory: str, seen: set, should_stop):
+        """`(tracks, duration, playlists, stopped)` under `directory`, recorded
+        in the index unless the walk was stopped before the totals were complete."""
+        seen.add(directory)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return 0, 0.0, 0, False
+        record = self.index.get(directory)
+        # records written before CUE sheets were indexed are listed once more
+        if record is not None and record["mtime"] == mtime and "cues" in record:
+            files, subdirs, playlists, cues = record["files"], record["subdirs"], record["playlists"], record["cues"]
+        else:
+            files, subdirs, playlists, cues = self._list(directory, record)
+            self.rescanned += 1
+
+        tracks = len(files)
+        duration = sum(f[2] or 0.0 for f in files.values())
+        total_playlists = playlists
+        for name in subdirs:
+            if should_stop():
+                return tracks, duration, total_playlists, True
+            t, d, p, stopped = self._visit(os.path.join(directory, name), seen, should_stop)
+            if stopped:
+                return tracks, duration, total_playlists, True
+            tracks += t
+            duration += d
+            total_playlists += p
+
+        self.index.put(directory, {
+            "mtime": mtime,
+            "files": files,
+            "subdirs": subdirs,
+            "playlists": playlists,
+            "cues": cues,
+            "total_tracks": tracks,
+            "total_duration": duration,
+            "total_playlists": total_playlists,
+        })
+        return tracks, duration, total_playlists, False
+
+    def _list(self, directory: str, previous: dict | None):
+        old_files = previous["files"] if previous else {}
+        old_cues = previous.get("cues", {}) if previous else {}
+        files, subdirs, playlists, cues = {}, [], 0, {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_skipped_dir(entry.name):
+                                subdirs.append(entry.name)
+                            continue
+                        ext = os.path.splitext(entry.name)[1].lower()
+                        if ext in PLAYLIST_EXTENSIONS or ext in SMART_PLAYLIST_EXTENSIONS:
+                            playlists += 1
+                        elif ext in CUE_EXTENSIONS:
+                            playlists += 1
+                            st = entry.stat()
+                            old = old_cues.get(entry.name)
+                            if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                                cues[entry.name] = old
+                            else:
+                                cues[entry.name] = [st.st_size, st.st_mtime_ns, self._cue_durations(entry.path)]
+                        elif ext in AUDIO_EXTENSIONS:
+                            st = entry.stat()
+                            old = old_files.get(entry.name)
+                            if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                                files[entry.name] = old
+                            else:
+                                duration = self.duration_reader(Path(entry.path))
+                                files[entry.name] = [st.st_size, st.st_mtime_ns, duration]
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        subdirs.sort()
+        return files, subdirs, playlists, cues
+
+    def _cue_durations(self, sheet: str) -> list:
+        """`[track number, duration]` of every track of a CUE sheet; the last
+        track of each image needs the image's own duration."""
+        from pytuiplayer.cue import parse_cue
+        tracks = []
+        lengths = {}
+        for track in parse_cue(sheet):
+            end = track.end
+            if end is None:
+                if track.file not in lengths:
+                    lengths[track.file] = self.duration_reader(Path(track.file))
+                end = lengths[track.file]
+            tracks.append([track.number, end - track.start if end else None])
+        return tracks
@@ -0,0 +1,286 @@
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import wave
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker
+
+# Loudness every track is normalised to (LUFS), and the largest correction
+TARGET_LUFS = -18.0
+MAX_GAIN_DB = 12.0
+
+SAMPLE_RATE = 48000
+ABSOLUTE_GATE = -70.0
+
+
+def _biquad_power(freqs, fs, b, a):
+    """|H(f)|^2 of a biquad at `freqs` (Hz)."""
+    import numpy as np
+    z = np.exp(-1j * 2 * np.pi * freqs / fs)
+    h = (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+    return np.abs(h) ** 2
+
+
+def k_weighting_power(freqs, fs: int = SAMPLE_RATE):
+    """Power response of the BS.1770 K-weighting filter (high shelf + RLB high-pass).
+
+    The biquads are designed for `fs` the way libebur128 does it, which gives
+    the coefficients tabulated in BS.1770 at 48 kHz.
+    """
+    # stage 1: high shelf, about +4 dB above 1.7 kHz
+    k = math.tan(math.pi * 1681.974450955533 / fs)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    # stage 2: RLB high-pass at about 38 Hz
+    k = math.tan(math.pi * 38.13547087602444 / fs)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    pass_b = (1.0, -2.0, 1.0)
+    pass_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+    return _biquad_power(freqs, fs, shelf_b, shelf_a) * _biquad_power(freqs, fs, pass_b, pass_a)
+
+
+class LoudnessMeter:
+    """Integrated loudness and sample peak of a stream of PCM chunks (EBU R128-style).
+
+    Chunks are float arrays shaped `(frames, channels)`. Each 100 ms sub-block
+    is weighted in the frequency domain: the rFFT power of the block times the
+    K-weighting power response gives the block's weighted mean square (by
+    Parseval), for all blocks of a chunk in one vectorised step. Gating then
+    runs over 400 ms blocks made of 4 consecutive sub-blocks.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        import numpy as np
+        self.sample_rate = sample_rate
+        self.block = sample_rate // 10
+        freqs = np.fft.rfftfreq(self.block, 1 / sample_rate)
+        weights = np.full(len(freqs), 2.0)
+        weights[0] = 1.0
+        if self.block % 2 == 0:
+            weights[-1] = 1.0
+        self._weights = weights * k_weighting_power(freqs, sample_rate) / self.block ** 2
+        self._energies = []
+        self._rest = None
+        self.peak = 0.0
+
+    def feed(self, samples) -> None:
+        import numpy as np
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.ndim == 1:
+            samples = samples[:, None]
+        if self._rest is not None:
+            samples = np.concatenate([self._rest, samples])
+        if len(samples):
+            self.peak = max(self.peak, float(np.abs(samples).max()))
+        count = len(samples) // self.block
+        self._rest = samples[count * self.block:]
+        if not count:
+            return
+        blocks = samples[:count * self.block].reshape(count, self.block, -1)
+        spectrum = np.abs(np.fft.rfft(blocks, axis=1)) ** 2
+        # weighted mean square per block, summed over channels (L/R weight 1)
+        self._energies.append(np.einsum("bfc,f->b", spectrum, self._weights))
+
+    def integrated(self) -> float | None:
+        """Gated integrated loudness in LUFS, or None for silence / too little audio."""
+        import numpy as np
+        if not self._energies:
+            return None
+        sub = np.concatenate(self._energies)
+        if len(sub) < 4:
+            return None
+        blocks = np.lib.stride_tricks.sliding_window_view(sub, 4).mean(axis=1)
+        with np.errstate(divide="ignore"):
+            levels = -0.691 + 10 * np.log10(blocks)
+        gated = blocks[levels > ABSOLUTE_GATE]
+        if not len(gated):
+            return None
+        relative = -0.691 + 10 * math.log10(gated.mean()) - 10
+        gated = blocks[(levels > ABSOLUTE_GATE) & (levels > relative)]
+        return -0.691 + 10 * math.log10(gated.mean())
+
+
+def iter_pcm(path, chunk_frames: int = SAMPLE_RATE * 10):
+    """Yield float32 `(frames, channels)` chunks of a file decoded at `SAMPLE_RATE`.
+
+    WAV files are read with the standard library; anything else is decoded
+    by an `ffmpeg` subprocess. Raises OSError when no decoder is available.
+    """
+    import numpy as np
+    if str(path).lower().endswith(".wav"):
+        with wave.open(str(path), "rb") as w:
+            channels, width = w.getnchannels(), w.getsampwidth()
+            if width != 2 or w.getframerate() != SAMPLE_RATE:
+                raise OSError("only 16-bit 48 kHz WAV is read without ffmpeg")
+            while True:
+                data = w.readframes(chunk_frames)
+                if not data:
+                    return
+                yield np.frombuffer(data, dtype="<i2").reshape(-1, channels) / 32768.0
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise OSError("ffmpeg not found")
+    proc = subprocess.Popen(
+        [ffmpeg, "-v", "error", "-nostdin", "-i", str(path), "-f", "f32le", "-ac", "2",
+         "-ar", str(SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        chunk_bytes = chunk_frames * 2 * 4
+        while True:
+            data = proc.stdout.read(chunk_bytes)
+            if not data:
+                break
+            usable = len(data) - len(data) % 8
+            yield np.frombuffer(data[:usable], dtype="<f4").reshape(-1, 2)
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def analyze_file(path):
+    """Return `(integrated_lufs, peak)` for a file, or None if it cannot be analysed.
+
+    Runs in worker processes; errors are reported and swallowed there.
+    """
+    try:
+        meter = LoudnessMeter()
+        for chunk in iter_pcm(path):
+            meter.feed(chunk)
+        lufs = meter.integrated()
+    except (OSError, ValueError, EOFError, wave.Error) as exc:
+        print(f"[ERROR] Loudness analysis failed for {path}: {exc}")
+        return None
+    if lufs is None:
+        return None
+    return round(lufs, 2), round(meter.peak, 4)
+
+
+def track_gain(lufs: float, peak: float, target: float = TARGET_LUFS) -> float:
+    """Gain in dB that brings a track to `target`, without pushing its peak over 0 dBFS."""
+    gain = target - lufs
+    if peak > 0:
+        gain = min(gain, -20 * math.log10(peak))
+    return max(-MAX_GAIN_DB, min(MAX_GAIN_DB, gain))
+
+
+def analysis_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """A spawn-context process pool, safe to create from a worker thread of the app.
+
+    multiprocessing starts its resource tracker on first use and hands it
+    the fd of `sys.stderr`; while the app runs that is Textual's capture,
+    which has no fd, so the tracker is started against the real stderr.
+    """
+    captured = sys.stderr
+    try:
+        sys.stderr = sys.__stderr__
+        resource_tracker.ensure_running()
+    finally:
+        sys.stderr = captured
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def analyze_library(index, workers: int | None = None, should_stop=None) -> int:
+    """Analyse indexed tracks that have no loudness yet; returns how many were stored.
+
+    Files are decoded and measured in a process pool (spawned, so the pool
+    is safe to start from a worker thread). Results go into `index` via
+    `LibraryIndex.set_loudness` and the index is saved every 50 tracks.
+    """
+    should_stop = should_stop or (lambda: False)
+    pending = list(index.missing_loudness())
+    if shutil.which("ffmpeg") is None:
+        # without a decoder only WAV can be read; leave the rest for later
+        pending = [p for p in pending if p.lower().endswith(".wav")]
+    if not pending or not analysis_available():
+        return 0
+    stored = 0
+    workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+    with process_pool(workers) as pool:
+        # a few tracks per worker in flight, so stopping leaves little queued
+        jobs = {}
+        todo = iter(pending)
+        while not should_stop():
+            while len(jobs) < workers * 4:
+                path = next(todo, None)
+                if path is None:
+                    break
+                try:
+                    jobs[pool.submit(analyze_file, path)] = path
+                except RuntimeError as exc:
+                    # a worker died (BrokenProcessPool); the rest is left for the next run
+                    print(f"[ERROR] Loudness pool unavailable: {exc}")
+                    todo = iter(())
+                    break
+            if not jobs:
+                break
+            done, _ = wait(jobs, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = jobs.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    print(f"[ERROR] Loudness worker failed for {path}: {exc}")
+                    continue
+                # failures are stored too, so they are not retried on every scan
+                index.set_loudness(path, result)
+                stored += 1
+                if stored % 50 == 0:
+                    index.save()
+        pool.shutdown(wait=False, cancel_futures=True)
+    index.save()
+    return stored
+
+
+class RadioLoudness:
+    """Slowly adapting gain for radio from a running loudness estimate.
+
+    `update()` takes short-term loudness readings (e.g. mpv's ebur128
+    `lavfi.r128.S` metadata, about once per second), keeps an exponential
+    moving average with a `time_constant` in seconds, and moves the gain
+    towards `target - estimate` by at most `slew_db` per update, so level
+    changes between programmes are corrected without audible pumping.
+    Readings below `silence` are ignored.
+    """
+
+    def __init__(self, target: float = TARGET_LUFS, time_constant: float = 20.0,
+                 slew_db: float = 0.5, max_gain: float = 9.0, silence: float = -50.0):
+        self.target = target
+        self.time_constant = time_constant
+        self.slew_db = slew_db
+        self.max_gain = max_gain
+        self.silence = silence
+        self.reset()
+
+    def reset(self) -> None:
+        self.estimate = None
+        self.gain = 0.0
+
+    def update(self, loudness: float | None, dt: float = 1.0) -> float:
+        if loudness is not None and loudness > self.silence:
+            if self.estimate is None:
+                self.estimate = loudness
+            else:
+                k = 1 - math.exp(-dt / self.time_constant)
+                self.estimate += k * (loudness - self.estimate)
+        if self.estimate is not None:
+            wanted = max(-self.max_gain, min(self.max_gain, self.target - self.estimate))
+            step = max(-self.slew_db * dt, min(self.slew_db * dt, wanted - self.gain))
+            self.gain += step
+        return self.gain
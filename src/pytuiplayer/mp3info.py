@@ -0,0 +1,178 @@
+import mmap
+import os
+import struct
+from typing import NamedTuple
+
+# Bitrates in kbps by (MPEG-1?, layer), indexed by the header's bitrate field
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version field (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+# How far past the ID3v2 tag to look for the first frame
+_SYNC_SEARCH = 64 * 1024
+
+
+class Mp3Info(NamedTuple):
+    duration: float  # seconds, without encoder delay and padding when known
+    bitrate: int  # bits per second (average for VBR)
+    sample_rate: int
+    channels: int
+    vbr: bool
+    encoder_delay: int = 0  # samples, from the LAME tag
+    encoder_padding: int = 0
+    encoder: str = ""
+
+
+class _Frame(NamedTuple):
+    mpeg1: bool
+    layer: int
+    bitrate: int
+    sample_rate: int
+    channels: int
+    length: int
+    samples: int
+
+
+def _parse_header(header: int):
+    """Decode a 32-bit frame header, or return None if it is not a valid one."""
+    if header >> 21 != 0x7FF:
+        return None
+    version = (header >> 19) & 3
+    layer = 4 - ((header >> 17) & 3)
+    bitrate_index = (header >> 12) & 15
+    rate_index = (header >> 10) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (header >> 9) & 1
+    channels = 1 if (header >> 6) & 3 == 3 else 2
+    if layer == 1:
+        length, samples = (12 * bitrate // sample_rate + padding) * 4, 384
+    elif layer == 3 and not mpeg1:
+        length, samples = 72 * bitrate // sample_rate + padding, 576
+    else:
+        length, samples = 144 * bitrate // sample_rate + padding, 1152
+    return _Frame(mpeg1, layer, bitrate, sample_rate, channels, length, samples)
+
+
+def _id3v2_size(data) -> int:
+    """Bytes taken by ID3v2 tags at the start of the file (there can be several)."""
+    offset = 0
+    while data[offset:offset + 3] == b"ID3" and len(data) >= offset + 10:
+        flags = data[offset + 5]
+        b = data[offset + 6:offset + 10]
+        size = (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+        offset += 10 + size + (10 if flags & 0x10 else 0)
+    return offset
+
+
+def _first_frame(data, start: int):
+    """Return `(offset, frame)` of the first frame confirmed by the frame after it."""
+    end = min(len(data) - 4, start + _SYNC_SEARCH)
+    pos = data.find(b"\xff", start, end)
+    while pos != -1:
+        frame = _parse_header(struct.unpack_from(">I", data, pos)[0])
+        if frame is not None:
+            following = pos + frame.length
+            if following + 4 > len(data):
+                return pos, frame
+            after = _parse_header(struct.unpack_from(">I", data, following)[0])
+            if after is not None and after.sample_rate == frame.sample_rate and after.layer == frame.layer:
+                return pos, frame
+        pos = data.find(b"\xff", pos + 1, end)
+    return None
+
+
+def _xing(data, pos: int, frame: _Frame):
+    """Frame count and LAME fields from a Xing/Info tag in the first frame, if any."""
+    if frame.mpeg1:
+        offset = pos + 4 + (32 if frame.channels == 2 else 17)
+    else:
+        offset = pos + 4 + (17 if frame.channels == 2 else 9)
+    tag = data[offset:offset + 4]
+    if tag not in (b"Xing", b"Info"):
+        return None
+    flags = struct.unpack_from(">I", data, offset + 4)[0]
+    cursor = offset + 8
+    frames = None
+    if flags & 1:
+        frames = struct.unpack_from(">I", data, cursor)[0]
+        cursor += 4
+    cursor += (4 if flags & 2 else 0) + (100 if flags & 4 else 0) + (4 if flags & 8 else 0)
+    delay = padding = 0
+    encoder = ""
+    lame = data[cursor:cursor + 24]
+    if len(lame) == 24 and lame[:4] in (b"LAME", b"Lavf", b"Lavc", b"L3.9"):
+        encoder = lame[:9].decode("latin-1").strip("\0 ")
+        packed = int.from_bytes(lame[21:24], "big")
+        delay, padding = packed >> 12, packed & 0xFFF
+    return frames, tag == b"Xing", delay, padding, encoder
+
+
+def _vbri(data, pos: int):
+    """Frame count and delay from a Fraunhofer VBRI tag, if any."""
+    offset = pos + 4 + 32
+    if data[offset:offset + 4] != b"VBRI":
+        return None
+    _, delay, _, _, frames = struct.unpack_from(">HHHII", data, offset + 4)
+    return frames, delay
+
+
+def parse_mp3(data) -> Mp3Info | None:
+    """Parse MP3 stream info from a bytes-like object (typically an mmap)."""
+    start = _id3v2_size(data)
+    found = _first_frame(data, start)
+    if found is None:
+        return None
+    pos, frame = found
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    audio_bytes = end - pos
+    xing = _xing(data, pos, frame)
+    vbri = None if xing is not None else _vbri(data, pos)
+    frames, vbr, delay, padding, encoder = None, False, 0, 0, ""
+    if xing is not None:
+        frames, vbr, delay, padding, encoder = xing
+        # the tag frame itself carries no audio
+        audio_bytes -= frame.length
+    elif vbri is not None:
+        frames, delay = vbri
+        vbr, encoder = True, "VBRI"
+        audio_bytes -= frame.length
+    if frames:
+        samples = frames * frame.samples - delay - padding
+        duration = max(0, samples) / frame.sample_rate
+        bitrate = int(audio_bytes * 8 / (frames * frame.samples / frame.sample_rate))
+        if not vbr:
+            bitrate = frame.bitrate
+    else:
+        # no tag: assume constant bitrate over the rest of the file
+        duration = audio_bytes * 8 / frame.bitrate
+        bitrate = frame.bitrate
+    return Mp3Info(duration, bitrate, frame.sample_rate, frame.channels, vbr, delay, padding, encoder)
+
+
+def read_mp3_info(path) -> Mp3Info | None:
+    """Return `Mp3Info` for an MP3 file, or None if it is not one.
+
+    The file is mapped rather than read, so only the pages holding the
+    ID3v2 header, the first frames and the ID3v1 trailer are touched.
+    """
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < 4:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return parse_mp3(data)
+    except (OSError, ValueError, struct.error):
+        return None
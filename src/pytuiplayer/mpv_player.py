@@ -1,34 +1,85 @@
-import mpv
+mpv = None  # python-mpv, imported on first use by `_load_mpv`
+
+
+def _load_mpv():
+    """Import python-mpv on demand.
+
+    Raises ImportError/OSError like a module-level `import mpv` would
+    (python-mpv raises OSError when libmpv itself is missing).
+    """
+    global mpv
+    if mpv is None:
+        import mpv as _mpv
+        mpv = _mpv
+    return mpv
 
 
 class MPVPlayer:
-    def __init__(self, player=None, player_factory=None, **factory_kwargs):
+    def __init__(self, player=None, player_factory=None, backend=None, **factory_kwargs):
         """Create an MPVPlayer.
 
         - If `player` is provided, use it directly (useful for testing).
         - Else if `player_factory` is provided, call it with `**factory_kwargs` to
           obtain a player instance.
-        - Else construct a real `mpv.MPV` using reasonable defaults.
+        - Else if `backend` is "sim", use the in-process `SimulatedMPV`,
+          passing `**factory_kwargs` through (e.g. `clock=`, `manifest=`).
+        - Else construct a real `mpv.MPV` using reasonable defaults; this
+          raises (ImportError/OSError) when python-mpv or libmpv is missing.
+
+        Apart from an explicit `player`, the underlying player is created on
+        first use so that importing and loading libmpv stays off the startup
+        path.
         """
-        if player is not None:
-            self.player = player
-        elif player_factory is not None:
-            self.player = player_factory(**factory_kwargs)
-        else:
-            self.player = mpv.MPV(
-                ytdl=False,
-                input_default_bindings=True,
-                input_vo_keyboard=True,
-                log_handler=print,
-                loglevel="debug",
-            )
-
-    def play(self, source: str):
+        self._player = player
+        self._volume = None
+        self.gain_db = 0.0
+        self.current_source = None
+        self._player_factory = player_factory
+        self._backend = backend
+        self._factory_kwargs = factory_kwargs
+
+    @property
+    def player(self):
+        if self._player is None:
+            self._player = self._create_player()
+        return self._player
+
+    @player.setter
+    def player(self, value):
+        self._player = value
+
+    def _create_player(self):
+        if self._player_factory is not None:
+            return self._player_factory(**self._factory_kwargs)
+        if self._backend == "sim":
+            from pytuiplayer.sim_player import SimulatedMPV
+            return SimulatedMPV(**self._factory_kwargs)
+        return _load_mpv().MPV(
+            ytdl=False,
+            input_default_bindings=True,
+            input_vo_keyboard=True,
+            log_handler=print,
+            loglevel="debug",
+        )
+
+    def play(self, source: str, start: float | None = None):
         """
         Play a local file OR a URL / radio stream
+
+        `start` begins playback at that many seconds (used to resume a session).
         """
         print(f"[MPV] Playing: {source}")
+        self.current_source = source
+        if not start:
+            self.player.play(source)
+            return
+        loadfile = getattr(self.player, "loadfile", None)
+        if loadfile is not None:
+            # libmpv applies the start option before the file is opened
+            loadfile(source, start=str(start))
+            return
         self.player.play(source)
+        self.seek_absolute(start)
 
     def pause(self):
         self.player.pause = True
@@ -37,10 +88,41 @@ class MPVPlayer:
         self.player.pause = False
 
     def stop(self):
+        self.current_source = None
         self.player.stop()
 
     def set_volume(self, volume: int):
-        self.player.volume = volume
+        self._volume = volume
+        self._apply_volume()
+
+    def set_gain(self, db: float):
+        """Set a normalisation gain in dB on top of the user volume."""
+        if abs(db - self.gain_db) < 0.01:
+            return
+        self.gain_db = db
+        if self._volume is not None:
+            self._apply_volume()
+
+    def _apply_volume(self):
+        # mpv's volume is cubic (amplitude = (volume/100) ** 3), so a gain of
+        # `db` scales it by 10 ** (db / 60); 130 is mpv's default volume-max
+        volume = self._volume * 10 ** (self.gain_db / 60) if self.gain_db else self._volume
+        self.player.volume = min(130, volume)
+
+    def enable_loudness_meter(self, enabled: bool = True):
+        """Insert (or remove) an ebur128 filter whose readings `get_loudness()` returns."""
+        try:
+            self.player["af"] = "@loudness:lavfi=[ebur128=metadata=1]" if enabled else ""
+        except Exception:
+            return
+
+    def get_loudness(self):
+        """Short-term loudness (LUFS) reported by the ebur128 filter, or None."""
+        try:
+            meta = self.player["af-metadata/loudness"]
+            return float(meta["lavfi.r128.S"])
+        except Exception:
+            return None
         
     def is_paused(self):
         try:
@@ -86,6 +168,15 @@ class MPVPlayer:
         except Exception:
             return
 
+    def observe(self, name: str, handler) -> bool:
+        """Call `handler(value)` whenever mpv property `name` changes, on
+        mpv's event thread; False when the player cannot report changes."""
+        try:
+            self.player.observe_property(name, lambda _name, value: handler(value))
+            return True
+        except Exception:
+            return False
+
     def get_time_pos(self):
         try:
             return getattr(self.player, "time_pos", None)
@@ -98,3 +189,10 @@ class MPVPlayer:
         except Exception:
             return None
 
+    def is_idle(self):
+        """True when nothing is loaded (never started, stopped, or end of file)."""
+        try:
+            return bool(getattr(self.player, "idle_active", False))
+        except Exception:
+            return False
+
@@ -0,0 +1,91 @@
+from pathlib import Path
+
+from rich.text import Text
+from textual.widgets import DirectoryTree
+
+from pytuiplayer.dir_cache import AUDIO_EXTENSIONS
+from pytuiplayer.library_index import is_skipped_dir
+from pytuiplayer.playlists import CUE_EXTENSIONS, PLAYLIST_EXTENSIONS, SMART_PLAYLIST_EXTENSIONS
+
+# Files listed in the browser
+SHOWN_EXTENSIONS = AUDIO_EXTENSIONS | PLAYLIST_EXTENSIONS | SMART_PLAYLIST_EXTENSIONS | CUE_EXTENSIONS
+
+
+def format_total(tracks: int, duration: float) -> str:
+    if not duration:
+        return f"{tracks}"
+    minutes, seconds = divmod(int(duration), 60)
+    hours, minutes = divmod(minutes, 60)
+    length = f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+    return f"{tracks} · {length}"
+
+
+def filter_music_paths(paths, index=None, is_dir=DirectoryTree._safe_is_dir) -> list:
+    """Keep audio/playlist files and directories that may contain music.
+
+    A directory is dropped when its name is hidden or known junk, or when
+    `index` has walked it and found neither tracks nor playlists.
+    """
+    shown = []
+    for path in paths:
+        if is_dir(path):
+            if is_skipped_dir(path.name):
+                continue
+            summary = index.summary(path) if index is not None else None
+            if summary is not None and summary[0] == 0 and summary[2] == 0:
+                continue
+            shown.append(path)
+        elif path.suffix.lower() in SHOWN_EXTENSIONS:
+            shown.append(path)
+    return shown
+
+
+class MusicDirectoryTree(DirectoryTree):
+    """A `DirectoryTree` that only shows music.
+
+    Files are limited to supported audio and playlist types. Directories are
+    hidden when the `LibraryIndex` knows their subtree holds no music; hidden
+    and known junk directories (`node_modules`, caches, ...) are never shown.
+    Directories not walked yet stay visible until the background walker has
+    reached them. Walked directories show their track count and total
+    duration.
+    """
+
+    def __init__(self, path, *, index=None, prefetcher=None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.index = index
+        # network-share mode: directory reads go through a DirectoryPrefetcher
+        # and entry types come from its cached listings instead of a stat each
+        self.prefetcher = prefetcher
+        self._known_dirs = set()
+
+    def filter_paths(self, paths):
+        return filter_music_paths(paths, self.index, self._safe_is_dir)
+
+    def _safe_is_dir(self, path) -> bool:
+        if self.prefetcher is not None:
+            return str(path) in self._known_dirs
+        return DirectoryTree._safe_is_dir(path)
+
+    def _directory_content(self, location, worker):
+        if self.prefetcher is None:
+            yield from super()._directory_content(location, worker)
+            return
+        for entry in self.prefetcher.listdir(location):
+            if worker.is_cancelled:
+                return
+            if entry.is_dir():
+                self._known_dirs.add(entry.path)
+            yield Path(entry.path)
+        # the user is likely to open a neighbour next
+        self.prefetcher.prefetch_around(location)
+
+    def render_label(self, node, base_style, style):
+        label = super().render_label(node, base_style, style)
+        data = node.data
+        if self.index is None or data is None or not node.allow_expand:
+            return label
+        summary = self.index.summary(Path(data.path))
+        if summary and summary[0]:
+            label = Text.assemble(label, (f"  ({format_total(summary[0], summary[1])})", "dim"))
+        return label
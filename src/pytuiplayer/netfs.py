@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CachedEntry:
+    """A directory entry captured during a single `os.scandir` pass.
+
+    Only the name and the entry type are kept; both come from the directory
+    read itself (`d_type` / the SMB directory listing), so answering
+    `is_dir()`/`is_file()` later never goes back to the server.
+    """
+
+    __slots__ = ("name", "path", "_is_dir")
+
+    def __init__(self, name: str, path: str, is_dir: bool):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._is_dir
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return not self._is_dir
+
+    def __repr__(self) -> str:
+        return f"CachedEntry({self.path!r}, is_dir={self._is_dir})"
+
+
+class _EntryIterator:
+    """Context-manager iterator over cached entries, shaped like `os.scandir()`."""
+
+    def __init__(self, entries):
+        self._entries = entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class DirectoryPrefetcher:
+    """Directory reader tuned for high-latency network filesystems (SMB/NFS).
+
+    - Each directory is read with one `scandir` pass and kept as a list of
+      `CachedEntry` (LRU of `max_dirs` directories).
+    - `prefetch()` reads the given directories in a bounded thread pool so
+      that expanding a sibling or child later is served from memory.
+    - Paths that fail to read are remembered in a negative cache for
+      `negative_ttl` seconds instead of being retried on every access.
+
+    `scandir` is injectable (see `SlowFS`) so behaviour on slow mounts can be
+    tested without a real network share.
+    """
+
+    def __init__(self, scandir=os.scandir, max_workers: int = 4, max_dirs: int = 256,
+                 negative_ttl: float = 60.0, clock=time.monotonic):
+        self._scandir = scandir
+        self.max_dirs = max_dirs
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._listings = OrderedDict()  # path -> list[CachedEntry]
+        self._failed = {}  # path -> expiry time
+        self._inflight = {}  # path -> Future
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pytuip-prefetch")
+
+    def listdir(self, path) -> list:
+        """Return cached entries for `path`, reading it once if needed.
+
+        Unreadable paths (and paths in the negative cache) give an empty list.
+        """
+        key = os.fspath(path)
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached is not None:
+                self._listings.move_to_end(key)
+                return cached
+            if self._is_negative(key):
+                return []
+            future = self._inflight.get(key)
+        if future is not None:
+            # a prefetch is already reading it; share the result
+            try:
+                return future.result()
+            except Exception:
+                return []
+        return self._read(key)
+
+    def scandir(self, path):
+        """Drop-in for `os.scandir` backed by `listdir()`."""
+        return _EntryIterator(self.listdir(path))
+
+    def is_unreadable(self, path) -> bool:
+        with self._lock:
+            return self._is_negative(os.fspath(path))
+
+    def prefetch(self, paths) -> list:
+        """Queue background reads for `paths` not cached yet; returns the futures."""
+        futures = []
+        with self._lock:
+            for path in paths:
+                key = os.fspath(path)
+                if key in self._listings or key in self._inflight or self._is_negative(key):
+                    continue
+                future = self._pool.submit(self._read, key)
+                self._inflight[key] = future
+                futures.append(future)
+        return futures
+
+    def prefetch_around(self, path) -> list:
+        """Prefetch the sub-directories of `path` and of its parent (its siblings)."""
+        targets = [e.path for e in self.listdir(path) if e.is_dir()]
+        parent = os.path.dirname(os.fspath(path).rstrip(os.sep))
+        if parent:
+            targets += [e.path for e in self.listdir(parent) if e.is_dir()]
+        return self.prefetch(targets)
+
+    def invalidate(self, path=None) -> None:
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+                self._failed.clear()
+            else:
+                key = os.fspath(path)
+                self._listings.pop(key, None)
+                self._failed.pop(key, None)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _is_negative(self, key: str) -> bool:
+        expiry = self._failed.get(key)
+        if expiry is None:
+            return False
+        if expiry <= self.clock():
+            del self._failed[key]
+            return False
+        return True
+
+    def _read(self, key: str) -> list:
+        entries = []
+        try:
+            with self._scandir(key) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append(CachedEntry(entry.name, os.path.join(key, entry.name), is_dir))
+        except OSError:
+            with self._lock:
+                self._failed[key] = self.clock() + self.negative_ttl
+                self._inflight.pop(key, None)
+            return []
+        with self._lock:
+            self._listings[key] = entries
+            self._listings.move_to_end(key)
+            while len(self._listings) > self.max_dirs:
+                self._listings.popitem(last=False)
+            self._inflight.pop(key, None)
+        return entries
+
+
+class SlowFS:
+    """`os.scandir` replacement that adds a fixed latency per directory read.
+
+    Simulates a network mount without FUSE: every call sleeps `latency`
+    seconds before delegating and is counted in `calls`.
+    """
+
+    def __init__(self, latency: float = 0.005, scandir=os.scandir):
+        self.latency = latency
+        self._scandir = scandir
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return self._scandir(path)
@@ -0,0 +1,340 @@
+import os
+import random
+import threading
+from bisect import bisect_right
+
+from pytuiplayer.dir_cache import AUDIO_EXTENSIONS
+from pytuiplayer.library_index import is_skipped_dir
+
+REPEAT_MODES = ("off", "all", "one")
+
+
+class FeistelPermutation:
+    """A pseudo-random permutation of `range(n)` computed on demand.
+
+    A 4-round Feistel network over the smallest even number of bits that
+    covers `n` is a bijection on that power-of-two domain; values that fall
+    outside `range(n)` are fed through again (cycle walking) until they land
+    inside it. The domain is at most 4n, so that loop is short on average.
+    Both directions are O(1) and nothing proportional to `n` is allocated.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, n: int, seed: int):
+        self.n = n
+        bits = max(2, (max(n - 1, 1)).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(32) for _ in range(self.ROUNDS)]
+
+    def _f(self, value: int, key: int) -> int:
+        x = (value ^ key) * 0x9E3779B1 & 0xFFFFFFFF
+        x ^= x >> 15
+        x = x * 0x85EBCA6B & 0xFFFFFFFF
+        x ^= x >> 13
+        return x & self._mask
+
+    def _encrypt(self, x: int) -> int:
+        left, right = x >> self._half, x & self._mask
+        for key in self._keys:
+            left, right = right, left ^ self._f(right, key)
+        return (left << self._half) | right
+
+    def _decrypt(self, x: int) -> int:
+        left, right = x >> self._half, x & self._mask
+        for key in reversed(self._keys):
+            left, right = right ^ self._f(left, key), left
+        return (left << self._half) | right
+
+    def __call__(self, i: int) -> int:
+        x = self._encrypt(i)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+    def inverse(self, j: int) -> int:
+        x = self._decrypt(j)
+        while x >= self.n:
+            x = self._decrypt(x)
+        return x
+
+
+class _ShuffledRange:
+    """Play order for queue indices `start .. start+length-1`.
+
+    `first` (a local index) is moved to the front of the order by swapping
+    two positions, so turning shuffle on keeps the current track current.
+    """
+
+    __slots__ = ("start", "length", "perm", "_swap")
+
+    def __init__(self, start: int, length: int, seed: int, first: int | None = None):
+        self.start = start
+        self.length = length
+        self.perm = FeistelPermutation(length, seed)
+        self._swap = self.perm.inverse(first) if first is not None else 0
+
+    def _swapped(self, p: int) -> int:
+        if p == 0:
+            return self._swap
+        if p == self._swap:
+            return 0
+        return p
+
+    def index_at(self, position: int) -> int:
+        return self.start + self.perm(self._swapped(position - self.start))
+
+
+class PlayQueue:
+    """Ordered list of tracks to play, with shuffle and repeat.
+
+    Entries are compact references: the source (path or URL string) and an
+    optional label, never widgets. Next/previous move a cursor over the play
+    order in constant time. With shuffle on, the play order is a lazily
+    computed permutation (`FeistelPermutation`), so shuffling a million
+    tracks allocates nothing per track. Entries enqueued while shuffled get
+    their own shuffled range after the existing ones.
+
+    The queue is filled from worker threads (`extend()` accepts any
+    iterable, e.g. `iter_directory_tracks()` or `iter_m3u()`), so access goes
+    through a lock.
+    """
+
+    def __init__(self, seed: int | None = None):
+        self._sources = []
+        self._labels = {}  # index -> label, only for entries that have one
+        self._pos = -1  # position in play order of the current entry
+        self._shuffle = False
+        self._ranges = []  # _ShuffledRange list covering all indices when shuffled
+        self._starts = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.repeat = "off"
+        # bumped on every change so views know when to redraw
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    @property
+    def shuffle(self) -> bool:
+        return self._shuffle
+
+    def entry(self, index: int):
+        """Return `(source, label)` for a queue index (`label` may be None)."""
+        return self._sources[index], self._labels.get(index)
+
+    @property
+    def current_index(self) -> int | None:
+        with self._lock:
+            if self._pos < 0 or not self._sources:
+                return None
+            return self._index_at(self._pos)
+
+    def current(self):
+        index = self.current_index
+        return None if index is None else self.entry(index)
+
+    def append(self, source, label: str | None = None) -> None:
+        self.extend([(source, label)])
+
+    def extend(self, entries) -> int:
+        """Append entries (sources or `(source, label)` pairs) and return how many."""
+        sources, labels = [], {}
+        for entry in entries:
+            if isinstance(entry, tuple):
+                source, label = entry
+            else:
+                source, label = entry, None
+            if label:
+                labels[len(sources)] = label
+            sources.append(os.fspath(source))
+        if not sources:
+            return 0
+        with self._lock:
+            start = len(self._sources)
+            self._sources.extend(sources)
+            for offset, label in labels.items():
+                self._labels[start + offset] = label
+            if self._shuffle:
+                self._add_range(start, len(sources))
+            self.version += 1
+        return len(sources)
+
+    def replace(self, entries, start_index: int | None = None) -> int:
+        """Replace the queue with `entries`, optionally making `start_index` current."""
+        with self._lock:
+            self._sources = []
+            self._labels = {}
+            self._pos = -1
+            self._ranges, self._starts = [], []
+        count = self.extend(entries)
+        if start_index is not None:
+            self.jump(start_index)
+        return count
+
+    def clear(self) -> None:
+        self.replace([])
+
+    def jump(self, index: int):
+        """Make queue index `index` current and return its entry."""
+        with self._lock:
+            if not 0 <= index < len(self._sources):
+                return None
+            if self._shuffle:
+                # restart the shuffled order from the chosen track
+                self._reshuffle(first=index)
+                self._pos = 0
+            else:
+                self._pos = index
+            self.version += 1
+        return self.entry(index)
+
+    def next(self, auto: bool = False):
+        """Advance and return the new current entry, or None at the end.
+
+        `auto` is for end-of-track advances: with repeat "one" it replays the
+        current entry, whereas an explicit next always moves on.
+        """
+        with self._lock:
+            n = len(self._sources)
+            if not n:
+                return None
+            if auto and self.repeat == "one" and self._pos >= 0:
+                index = self._index_at(self._pos)
+            elif self._pos + 1 < n:
+                self._pos += 1
+                index = self._index_at(self._pos)
+            elif self.repeat != "off":
+                if self._shuffle:
+                    # a fresh order for the next round
+                    self._reshuffle()
+                self._pos = 0
+                index = self._index_at(0)
+            else:
+                return None
+            self.version += 1
+        return self.entry(index)
+
+    def prev(self):
+        """Step back and return the new current entry (stays on the first one)."""
+        with self._lock:
+            n = len(self._sources)
+            if not n:
+                return None
+            if self._pos > 0:
+                self._pos -= 1
+            elif self.repeat == "all":
+                self._pos = n - 1
+            else:
+                self._pos = 0
+            index = self._index_at(self._pos)
+            self.version += 1
+        return self.entry(index)
+
+    def set_shuffle(self, enabled: bool) -> None:
+        """Turn shuffle on or off, keeping the current entry current."""
+        with self._lock:
+            if enabled == self._shuffle:
+                return
+            current = self._index_at(self._pos) if self._pos >= 0 and self._sources else None
+            self._shuffle = enabled
+            if enabled:
+                self._reshuffle(first=current)
+                self._pos = 0 if current is not None else -1
+            else:
+                self._ranges, self._starts = [], []
+                self._pos = current if current is not None else -1
+            self.version += 1
+
+    def cycle_repeat(self) -> str:
+        """Switch to the next repeat mode (off → all → one) and return it."""
+        self.repeat = REPEAT_MODES[(REPEAT_MODES.index(self.repeat) + 1) % len(REPEAT_MODES)]
+        self.version += 1
+        return self.repeat
+
+    def upcoming(self, limit: int):
+        """Yield `(index, source, label)` for the current entry and up to `limit - 1` after it."""
+        with self._lock:
+            n = len(self._sources)
+            first = max(self._pos, 0)
+            indices = [self._index_at(p) for p in range(first, min(first + limit, n))]
+        for index in indices:
+            source, label = self.entry(index)
+            yield index, source, label
+
+    def snapshot(self, limit: int | None = None) -> dict:
+        """Return the queue as a JSON-friendly dict (see `restore`).
+
+        With `limit`, only up to `limit` entries starting at the current one
+        are kept, which bounds the size of a saved session.
+        """
+        with self._lock:
+            current = self._index_at(self._pos) if self._pos >= 0 and self._sources else None
+            first = 0
+            if limit is not None and len(self._sources) > limit:
+                first = current or 0
+            sources = self._sources[first:first + limit] if limit is not None else list(self._sources)
+            labels = {str(i - first): label for i, label in self._labels.items() if first <= i < first + len(sources)}
+            return {
+                "sources": sources,
+                "labels": labels,
+                "current": None if current is None else current - first,
+                "shuffle": self._shuffle,
+                "repeat": self.repeat,
+            }
+
+    def restore(self, data: dict) -> None:
+        """Load a `snapshot()`; a shuffled queue gets a fresh order starting at its current entry."""
+        labels = {int(i): label for i, label in data.get("labels", {}).items()}
+        self.set_shuffle(False)
+        self.replace([(source, labels.get(i)) for i, source in enumerate(data.get("sources", []))])
+        if data.get("repeat") in REPEAT_MODES:
+            self.repeat = data["repeat"]
+        if data.get("current") is not None:
+            self.jump(data["current"])
+        self.set_shuffle(bool(data.get("shuffle")))
+
+    # caller holds the lock for the helpers below
+
+    def _index_at(self, position: int) -> int:
+        if not self._shuffle:
+            return position
+        return self._ranges[bisect_right(self._starts, position) - 1].index_at(position)
+
+    def _add_range(self, start: int, length: int, first: int | None = None) -> None:
+        self._ranges.append(_ShuffledRange(start, length, self._rng.getrandbits(64), first))
+        self._starts.append(start)
+
+    def _reshuffle(self, first: int | None = None) -> None:
+        self._ranges, self._starts = [], []
+        if self._sources:
+            self._add_range(0, len(self._sources), first)
+
+
+def iter_directory_tracks(root, extensions=AUDIO_EXTENSIONS):
+    """Yield audio file paths below `root` in sorted order, one directory at a time.
+
+    Only one directory listing is held in memory, so enqueueing a large tree
+    starts filling the queue immediately. Hidden and junk directories are
+    skipped like in the library walk.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda e: e.name.lower())
+    except OSError:
+        return
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                if not is_skipped_dir(entry.name):
+                    subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in extensions:
+                yield entry.path
+        except OSError:
+            continue
+    for path in subdirs:
+        yield from iter_directory_tracks(path, extensions)
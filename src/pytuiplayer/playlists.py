@@ -0,0 +1,225 @@
+import io
+import re
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import unquote, urljoin, urlparse
+
+# Sources with these prefixes are handed to mpv as-is instead of being
+# treated as filesystem paths.
+URL_PREFIXES = ("http://", "https://", "rtmp://", "ftp://")
+
+# Playlist files recognised in Local mode (compared lower-case)
+PLAYLIST_EXTENSIONS = frozenset({".m3u", ".m3u8", ".pls", ".xspf"})
+# Smart playlist definitions: a rule, materialised from the library
+SMART_PLAYLIST_EXTENSIONS = frozenset({".smart"})
+# CUE sheets: one audio image split into tracks (see `pytuiplayer.cue`)
+CUE_EXTENSIONS = frozenset({".cue"})
+
+# Bytes read from the start of a file to tell its format
+SNIFF_BYTES = 1024
+
+_ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+
+
+class PlaylistEntry(NamedTuple):
+    source: str
+    title: str | None = None
+    duration: float | None = None  # seconds
+    group: str | None = None  # `#EXTGRP` / `group-title`
+    attributes: dict | None = None  # e.g. `tvg-logo`, `tvg-id` from `#EXTINF`
+
+    @property
+    def label(self) -> str:
+        return self.title or Path(self.source).name or self.source
+
+
+def _source(location: str, base) -> str:
+    """A playlist location as a URL or a path (relative ones joined to `base`, not resolved).
+
+    `base` is the playlist's directory, or its URL for a downloaded playlist.
+    """
+    if location.startswith(URL_PREFIXES):
+        return location
+    if isinstance(base, str):
+        return urljoin(base, location)
+    if location.startswith("file://"):
+        location = unquote(urlparse(location).path)
+    candidate = Path(location)
+    return str(candidate) if candidate.is_absolute() else str(base / candidate)
+
+
+def _text(stream):
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace")
+
+
+def parse_m3u(stream, base: Path):
+    """Entries of an (extended) M3U/M3U8 playlist.
+
+    `#EXTINF:<seconds> key="value" ...,<title>` gives the next entry its
+    title, duration (-1: unknown) and attributes (`tvg-*`, `group-title`);
+    `#EXTGRP:<group>` its group. Other `#` lines are ignored.
+    """
+    info = None
+    group = None
+    for raw in _text(stream):
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#EXTINF"):
+            head, _, title = line[len("#EXTINF:"):].partition(",")
+            # a comma inside a quoted attribute is not the title separator
+            while head.count('"') % 2 and title:
+                extra, _, title = title.partition(",")
+                head = f"{head},{extra}"
+            attributes = dict(_ATTRIBUTE.findall(head))
+            try:
+                duration = float(head.split(None, 1)[0]) if head.strip() else None
+            except ValueError:
+                duration = None
+            info = (title.strip() or None, duration if duration and duration > 0 else None, attributes)
+            continue
+        if line.startswith("#EXTGRP:"):
+            group = line[len("#EXTGRP:"):].strip() or None
+            continue
+        if line.startswith("#"):
+            continue
+        title, duration, attributes = info or (None, None, {})
+        yield PlaylistEntry(_source(line, base), title, duration,
+                            attributes.get("group-title") or group, attributes or None)
+        info = None
+        group = None
+
+
+def parse_pls(stream, base: Path):
+    """Entries of a PLS playlist (`FileN=`, `TitleN=`, `LengthN=`).
+
+    An entry is yielded once a key of a later entry appears, so only the
+    entry being read is kept in memory; entries are expected in order.
+    """
+    current = None  # [number, file, title, length]
+
+    def entry(fields):
+        number, location, title, length = fields
+        return PlaylistEntry(_source(location, base), title, length if length and length > 0 else None)
+
+    for raw in _text(stream):
+        key, sep, value = raw.strip().partition("=")
+        match = re.fullmatch(r"(file|title|length)(\d+)", key.strip().lower()) if sep else None
+        if match is None:
+            continue
+        field, number = match.group(1), int(match.group(2))
+        if current is None or number != current[0]:
+            if current is not None and current[1]:
+                yield entry(current)
+            current = [number, None, None, None]
+        value = value.strip()
+        if field == "file":
+            current[1] = value
+        elif field == "title":
+            current[2] = value or None
+        else:
+            try:
+                current[3] = float(value)
+            except ValueError:
+                pass
+    if current is not None and current[1]:
+        yield entry(current)
+
+
+def parse_xspf(stream, base: Path):
+    """Entries of an XSPF playlist, read with `iterparse`; each `<track>` is
+    discarded once yielded, so memory use does not grow with the playlist."""
+    from xml.etree.ElementTree import ParseError, iterparse
+    open_elements = []
+    try:
+        for event, element in iterparse(stream, events=("start", "end")):
+            if event == "start":
+                open_elements.append(element)
+                continue
+            open_elements.pop()
+            if element.tag.rpartition("}")[2] != "track":
+                continue
+            fields = {child.tag.rpartition("}")[2]: (child.text or "").strip() for child in element}
+            if fields.get("location"):
+                try:
+                    duration = float(fields["duration"]) / 1000 if fields.get("duration") else None
+                except ValueError:
+                    duration = None
+                title = fields.get("title") or None
+                if title and fields.get("creator"):
+                    title = f"{fields['creator']} - {title}"
+                attributes = {k: fields[k] for k in ("creator", "album", "image") if fields.get(k)}
+                yield PlaylistEntry(_source(fields["location"], base), title, duration, None, attributes or None)
+            if open_elements:
+                open_elements[-1].remove(element)
+    except ParseError as exc:
+        print(f"[ERROR] Bad XSPF playlist: {exc}")
+
+
+def _sniff_m3u(head: str) -> bool:
+    return head.startswith("#EXTM3U")
+
+
+def _sniff_pls(head: str) -> bool:
+    return head.lower().startswith("[playlist]")
+
+
+def _sniff_xspf(head: str) -> bool:
+    return head.startswith("<") and "xspf.org/ns/0" in head
+
+
+# Formats by name: (parser, sniff(head text) -> bool, extensions). New ones
+# can be added with `register_format`.
+FORMATS = {
+    "m3u": (parse_m3u, _sniff_m3u, (".m3u", ".m3u8")),
+    "pls": (parse_pls, _sniff_pls, (".pls",)),
+    "xspf": (parse_xspf, _sniff_xspf, (".xspf",)),
+}
+
+
+def register_format(name: str, parser, sniff=None, extensions=()) -> None:
+    """Add a playlist format: `parser(binary stream, base directory)` yields
+    `PlaylistEntry`s, `sniff(head)` recognises the first `SNIFF_BYTES`."""
+    FORMATS[name] = (parser, sniff or (lambda head: False), tuple(extensions))
+
+
+def sniff_format(head: bytes, suffix: str = "") -> str:
+    """Name of the format of a playlist starting with `head`; the file
+    suffix decides when the content is not conclusive, then plain M3U."""
+    text = head.decode("utf-8", errors="replace").lstrip("\ufeff \t\r\n")
+    for name, (_, sniff, _) in FORMATS.items():
+        if sniff(text):
+            return name
+    for name, (_, _, extensions) in FORMATS.items():
+        if suffix.lower() in extensions:
+            return name
+    return "m3u"
+
+
+def iter_playlist(path: Path, limit: int | None = None, base=None):
+    """Yield the `PlaylistEntry`s of an M3U, PLS or XSPF playlist, whatever
+    its extension says, reading it as it goes.
+
+    Relative locations are joined to the playlist directory but not
+    resolved, so no filesystem IO happens per entry; `base` (the URL of a
+    downloaded copy) replaces that directory. Stops after `limit` entries
+    when given. Raises OSError if the playlist cannot be opened.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        name = sniff_format(f.read(SNIFF_BYTES), path.suffix)
+        f.seek(0)
+        parser = FORMATS[name][0]
+        for count, entry in enumerate(parser(f, path.parent if base is None else base), 1):
+            yield entry
+            if limit and count >= limit:
+                return
+
+
+def iter_m3u(path: Path, limit: int | None = None, base=None):
+    """Yield `(source, label)` pairs from a local playlist (see `iter_playlist`).
+
+    Entries without a title are labelled by file name.
+    """
+    for entry in iter_playlist(path, limit, base):
+        yield entry.source, entry.label
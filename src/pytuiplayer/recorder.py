@@ -0,0 +1,148 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pytuiplayer.storage import data_dir
+
+# Bytes gathered in memory before each write to disk
+WRITE_BUFFER = 1 << 20
+
+# Recording file extensions by (a part of) the station's content type
+_EXTENSIONS = (("mpeg", ".mp3"), ("mp3", ".mp3"), ("aac", ".aac"), ("ogg", ".ogg"), ("opus", ".opus"), ("flac", ".flac"))
+_UNSAFE = re.compile(r'[\x00-\x1f/\\:*?"<>|]+')
+
+
+def recordings_dir() -> Path:
+    """Where recordings go: `PYTUIP_RECORD_DIR`, else `<data>/recordings`."""
+    base = os.getenv("PYTUIP_RECORD_DIR")
+    return Path(base) if base else data_dir() / "recordings"
+
+
+def split_title(title: str):
+    """`(artist, title)` from an ICY "Artist - Title"; artist is None without a separator."""
+    artist, sep, song = title.partition(" - ")
+    if sep and artist.strip() and song.strip():
+        return artist.strip(), song.strip()
+    return None, title.strip()
+
+
+def tag_recording(path: Path, title: str | None, station: str) -> None:
+    """Write ID3 tags (title, artist, station as album) to an MP3 recording.
+
+    Other formats are raw streams without a tag container and are left as
+    they are; so is everything when mutagen is not installed.
+    """
+    if path.suffix != ".mp3":
+        return
+    try:
+        from mutagen.id3 import ID3, TALB, TIT2, TPE1
+    except ImportError:
+        return
+    tags = ID3()
+    artist, song = split_title(title or "")
+    if song:
+        tags.add(TIT2(encoding=3, text=song))
+    if artist:
+        tags.add(TPE1(encoding=3, text=artist))
+    tags.add(TALB(encoding=3, text=station))
+    try:
+        tags.save(path)
+    except Exception as exc:
+        print(f"[ERROR] Could not tag {path}: {exc}")
+
+
+class StreamRecorder:
+    """Records a `StationStream` to disk, one file per song.
+
+    Used as a sink of the stream (see `StationStream.add_sink`): the audio
+    is copied as it arrives, without re-encoding, into a file with a
+    `WRITE_BUFFER` write buffer, so disk writes are few and large. A new
+    file starts at every `StreamTitle` change (the audio before the first
+    title belongs to it). Finished files are named and tagged from their
+    title on a separate thread so the stream is never held up. The first
+    and last files are usually partial songs.
+    """
+
+    def __init__(self, station: str, directory=None):
+        self.station = station
+        self.directory = Path(directory) if directory is not None else recordings_dir()
+        self.directory = self.directory / (_UNSAFE.sub("_", station).strip(" .") or "station")
+        self.saved = []  # finished recordings, oldest first
+        self.error = None
+        self._extension = ".bin"
+        self._title = None
+        self._file = None
+        self._path = None
+        self._started = None
+        self._count = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._finisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pytuip-recorder")
+
+    # StationStream sink, called on its reading thread
+
+    def start(self, stream) -> None:
+        self._extension = next((ext for kind, ext in _EXTENSIONS if kind in stream.content_type), ".bin")
+        self._title = stream.title
+
+    def write(self, view) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if self._file is None:
+                self._open()
+            self._file.write(view)
+
+    def title(self, text: str) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if self._title is not None:
+                self._finish()
+            self._title = text
+
+    def stop(self, error) -> None:
+        self.error = error
+        self.close()
+
+    def _open(self) -> None:
+        self._count += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # named once its title is certain, see `_close_file`
+        self._path = self.directory / f".{id(self):x}-{self._count:03d}.part"
+        self._started = time.strftime("%Y-%m-%d %H.%M.%S")
+        self._file = open(self._path, "wb", buffering=WRITE_BUFFER)
+
+    def _finish(self) -> None:
+        if self._file is None:
+            return
+        job = (self._file, self._path, self._title, self._count, self._started)
+        self._file = self._path = None
+        self._finisher.submit(self._close_file, *job)
+
+    def _close_file(self, file, part, title, number, started) -> None:
+        name = _UNSAFE.sub("_", title or started).strip(" .")[:120] or "untitled"
+        path = self.directory / f"{number:03d} - {name}{self._extension}"
+        n = 1
+        while path.exists():
+            n += 1
+            path = self.directory / f"{number:03d} - {name} ({n}){self._extension}"
+        try:
+            file.close()
+            os.replace(part, path)
+        except OSError as exc:
+            print(f"[ERROR] Could not finish recording {part}: {exc}")
+            return
+        tag_recording(path, title, self.station)
+        self.saved.append(path)
+
+    def close(self, wait: bool = False) -> None:
+        """Finish the file being written and stop recording."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._finish()
+        self._finisher.shutdown(wait=wait)
@@ -0,0 +1,205 @@
+import hashlib
+import http.client
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from pytuiplayer.storage import atomic_write_bytes, atomic_write_text, cache_dir
+
+# Seconds before a connect or read gives up
+TIMEOUT = 10.0
+# Redirects followed before a fetch fails
+MAX_REDIRECTS = 5
+# Idle keep-alive connections kept per host
+MAX_IDLE_PER_HOST = 4
+
+# Cached files keep a suffix so `update_stations` and the playlist parser
+# see them as what they are: from the URL path, else from the content type
+_SUFFIXES = (".json", ".m3u", ".m3u8", ".pls", ".xspf")
+_CONTENT_TYPES = (("json", ".json"), ("mpegurl", ".m3u"), ("scpls", ".pls"), ("xspf", ".xspf"))
+
+# Errors of a keep-alive connection the server has already closed
+_STALE = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, reused per (scheme, host, port).
+
+    `open()` hands out an idle connection (or a new one) for the length of
+    one request; it goes back to the pool once its response has been read
+    to the end, otherwise it is closed. Thread-safe.
+    """
+
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST, timeout: float = TIMEOUT):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle = {}  # (scheme, host, port) -> [HTTPConnection]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise OSError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return parts.scheme, parts.hostname, port
+
+    def _connect(self, key):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key, conn) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def open(self, url: str, headers=None, method: str = "GET"):
+        """Send one request and yield its `http.client.HTTPResponse`.
+
+        A reused connection the server dropped meanwhile is replaced and the
+        request sent once more. Raises OSError or `http.client.HTTPException`.
+        """
+        key = self._key(url)
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        headers = {"User-Agent": "pytuiplayer", **(headers or {})}
+        conn, reused = self._acquire(key)
+        try:
+            try:
+                conn.request(method, target, headers=headers)
+                response = conn.getresponse()
+            except _STALE:
+                if not reused:
+                    raise
+                conn.close()
+                conn = self._connect(key)
+                conn.request(method, target, headers=headers)
+                response = conn.getresponse()
+            yield response
+        except BaseException:
+            conn.close()
+            raise
+        if response.isclosed() and not response.will_close:
+            self._release(key, conn)
+        else:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class RemoteCache:
+    """Local copies of remote playlists and station lists.
+
+    Each URL is stored under `<cache>/remote` with the `ETag` and
+    `Last-Modified` it was served with. `cached()` answers from disk only,
+    so callers can show the last copy at once; `fetch()` revalidates it with
+    a conditional GET and downloads the body only when it changed.
+    """
+
+    def __init__(self, directory=None, pool: ConnectionPool | None = None):
+        self.directory = Path(directory) if directory is not None else cache_dir() / "remote"
+        self.pool = pool or ConnectionPool()
+
+    def _meta_path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]}.meta"
+
+    def _meta(self, url: str) -> dict | None:
+        try:
+            meta = json.loads(self._meta_path(url).read_text())
+        except (OSError, ValueError):
+            return None
+        return meta if isinstance(meta, dict) and meta.get("url") == url else None
+
+    def cached(self, url: str) -> Path | None:
+        """The stored copy of `url`, or None if it was never fetched."""
+        meta = self._meta(url)
+        if meta is None:
+            return None
+        path = self.directory / meta["file"]
+        return path if path.exists() else None
+
+    def fetch(self, url: str) -> tuple:
+        """Revalidate `url` and return `(path of the local copy, changed)`.
+
+        When the server cannot be reached the stored copy is returned
+        unchanged; without one, OSError is raised.
+        """
+        meta = self._meta(url)
+        stored = self.cached(url)
+        headers = {}
+        if stored is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            status, response_headers, body = self._get(url, headers)
+        except (OSError, http.client.HTTPException) as exc:
+            if stored is None:
+                raise OSError(f"Could not fetch {url}: {exc}") from exc
+            print(f"[ERROR] Could not refresh {url}: {exc}; using the cached copy.")
+            return stored, False
+        if status == 304 and stored is not None:
+            return stored, False
+        file = self._meta_path(url).stem + _suffix(url, response_headers.get("content-type", ""))
+        path = self.directory / file
+        atomic_write_bytes(path, body)
+        atomic_write_text(self._meta_path(url), json.dumps({
+            "url": url,
+            "file": file,
+            "etag": response_headers.get("etag"),
+            "last_modified": response_headers.get("last-modified"),
+            "fetched": time.time(),
+        }))
+        if stored is not None and stored != path:
+            stored.unlink(missing_ok=True)
+        return path, True
+
+    def _get(self, url: str, headers: dict):
+        """GET `url`, following redirects; returns (status, lower-case headers, body)."""
+        for _ in range(MAX_REDIRECTS + 1):
+            with self.pool.open(url, headers) as response:
+                body = response.read()
+                response_headers = {name.lower(): value for name, value in response.getheaders()}
+                status = response.status
+            if status in (301, 302, 303, 307, 308) and response_headers.get("location"):
+                url = urljoin(url, response_headers["location"])
+                continue
+            if status >= 400:
+                raise OSError(f"HTTP {status} {response.reason}")
+            return status, response_headers, body
+        raise OSError(f"Too many redirects for {url}")
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def _suffix(url: str, content_type: str) -> str:
+    suffix = Path(urlsplit(url).path).suffix.lower()
+    if suffix in _SUFFIXES:
+        return suffix
+    content_type = content_type.lower()
+    return next((ext for kind, ext in _CONTENT_TYPES if kind in content_type), "")
@@ -0,0 +1,341 @@
+import json
+import os
+import re
+import struct
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+
+from pytuiplayer.storage import atomic_write_bytes, cache_dir
+
+INDEX_VERSION = 1
+_MAGIC = b"PTSI"
+_HEADER = struct.Struct("<4sBI")  # magic, version, length of the JSON part
+
+# Field weights for ranking: a match in the title counts most
+FIELDS = ("title", "artist", "album", "path")
+_WEIGHTS = (8, 6, 4, 1)
+# Ranking key: score first, shorter documents first among equal scores
+_LENGTH_BITS = 16
+_SEP = " \x1f "
+
+# Rebuild the postings once this share of documents has been replaced
+_COMPACT_RATIO = 0.25
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case `text`, drop accents and reduce it to space-separated words."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_WORD.findall(text))
+
+
+def _doc_grams(text: str) -> set:
+    """Trigrams of every word, prefixed with the index of the field they occur in."""
+    grams = set()
+    for field, value in enumerate(text.split(_SEP)):
+        for word in value.split():
+            padded = f" {word} "
+            grams.update(f"{field}{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return grams
+
+
+def _query_grams(token: str) -> set:
+    # tokens match word prefixes, so only the leading pad is used
+    padded = f" {token}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def read_tags(path) -> dict:
+    """Title/artist/album tags of a file via mutagen, or {} without it."""
+    try:
+        from mutagen import File as MutagenFile
+        tags = MutagenFile(str(path), easy=True)
+    except Exception:
+        return {}
+    if not tags:
+        return {}
+    found = {}
+    for key in ("title", "artist", "album"):
+        value = (tags.get(key) or [None])[0]
+        if value:
+            found[key] = str(value)
+    return found
+
+
+class SearchIndex:
+    """Trigram index over library metadata for search-as-you-type.
+
+    Every track is a document with four fields: title, artist, album and
+    its last path components. The fields are normalised and stored as one
+    string. Each word contributes its trigrams, keyed by field and padded
+    with a space so a word's start is its own gram, to posting lists of
+    document ids (`array('I')`, ascending). Every query token must start a
+    word of the document. A token scores the weight of the best field it
+    matches, and results are ranked by total score, then by shorter text.
+
+    With NumPy, a query scatters each posting list into dense per-document
+    arrays, so its cost is a few vector passes over the ids. Only the
+    top-ranked candidates are checked against the stored text, which
+    weeds out longer tokens whose trigrams occur in different words.
+    Without NumPy, the shortest posting list is scanned and every
+    candidate is checked.
+
+    Updates are incremental: unchanged files (same size and mtime) are
+    skipped. A changed file gets a new id and its old id is tombstoned.
+    The postings are rebuilt once tombstones make up a quarter of the ids.
+    The index is saved as one binary file, with a JSON header for the
+    documents and raw uint32 posting lists.
+    """
+
+    def __init__(self, path: Path | None = None, read_tags=read_tags):
+        self.path = Path(path) if path is not None else cache_dir() / "search.idx"
+        self.read_tags = read_tags
+        self._reset([])
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _reset(self, docs) -> None:
+        self._docs = []  # id -> [path, text, size, mtime_ns], or None once removed
+        self._by_path = {}
+        self._postings = {}
+        self._lengths = array("I")
+        self._alive = bytearray()
+        for doc in docs:
+            self._add(*doc)
+
+    def __len__(self) -> int:
+        return len(self._by_path)
+
+    # -- building --------------------------------------------------------
+
+    def _add(self, path: str, text: str, size: int, mtime: int) -> None:
+        doc_id = len(self._docs)
+        self._docs.append([path, text, size, mtime])
+        self._by_path[path] = doc_id
+        self._lengths.append(min(len(text), (1 << _LENGTH_BITS) - 1))
+        self._alive.append(1)
+        for gram in _doc_grams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(doc_id)
+
+    def _remove(self, path: str) -> None:
+        doc_id = self._by_path.pop(path)
+        self._docs[doc_id] = None
+        self._alive[doc_id] = 0
+
+    @staticmethod
+    def document_text(path: str, tags: dict) -> str:
+        parts = Path(path).parts[-3:]
+        location = " ".join(parts[:-1] + (os.path.splitext(parts[-1])[0],)) if parts else ""
+        values = [tags.get("title", ""), tags.get("artist", ""), tags.get("album", ""), location]
+        return _SEP.join(normalize(v) for v in values)
+
+    def update(self, tracks, should_stop=None) -> int:
+        """Index new and changed tracks and forget missing ones; returns how many changed.
+
+        `tracks` yields `(path, size, mtime_ns, ...)` like `LibraryIndex.tracks()`.
+        Tags are read outside the lock, so searches keep working meanwhile.
+        """
+        should_stop = should_stop or (lambda: False)
+        seen = set()
+        changed = 0
+        for track in tracks:
+            if should_stop():
+                return changed
+            path, size, mtime = track[0], track[1], track[2]
+            seen.add(path)
+            doc_id = self._by_path.get(path)
+            if doc_id is not None and self._docs[doc_id][2:] == [size, mtime]:
+                continue
+            text = self.document_text(path, self.read_tags(path))
+            with self._lock:
+                if doc_id is not None:
+                    self._remove(path)
+                self._add(path, text, size, mtime)
+                self._dirty = True
+            changed += 1
+        with self._lock:
+            for path in [p for p in self._by_path if p not in seen]:
+                self._remove(path)
+                self._dirty = True
+                changed += 1
+            if len(self._docs) - len(self._by_path) > len(self._docs) * _COMPACT_RATIO:
+                self._reset([doc for doc in self._docs if doc is not None])
+        return changed
+
+    # -- querying --------------------------------------------------------
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """Return up to `limit` `(path, score)` pairs for `query`, best first.
+
+        Every query word must start a word of the track's title, artist,
+        album or path. Words of a single character are ignored, and a query
+        made only of such words returns nothing.
+        """
+        tokens = [t for t in dict.fromkeys(normalize(query).split()) if len(t) > 1]
+        if not tokens:
+            return []
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            with self._lock:
+                return self._search_scan(tokens, limit)
+        with self._lock:
+            return self._search_dense(tokens, limit)
+
+    def _field_postings(self, token: str, field: int):
+        lists = [self._postings.get(f"{field}{gram}") for gram in _query_grams(token)]
+        return None if any(p is None for p in lists) else lists
+
+    def _search_dense(self, tokens, limit: int) -> list:
+        import numpy as np
+        n = len(self._docs)
+        total = np.zeros(n, dtype=np.int32)
+        mask = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        for token in tokens:
+            token_score = np.zeros(n, dtype=np.int32)
+            # lowest weight first, so the best matching field wins
+            for field in sorted(range(len(FIELDS)), key=lambda f: _WEIGHTS[f]):
+                lists = self._field_postings(token, field)
+                if lists is None:
+                    continue
+                if len(lists) == 1:
+                    hits = np.frombuffer(lists[0], dtype=np.uint32)
+                else:
+                    counts = np.zeros(n, dtype=np.uint8)
+                    for postings in lists:
+                        counts[np.frombuffer(postings, dtype=np.uint32)] += 1
+                    hits = counts == len(lists)
+                token_score[hits] = _WEIGHTS[field]
+            mask &= token_score > 0
+            total += token_score
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return []
+        keys = self._keys(total[candidates].astype(np.int64),
+                          np.frombuffer(self._lengths, dtype=np.uint32)[candidates].astype(np.int64),
+                          candidates.astype(np.int64))
+        # tokens longer than two letters have several grams, which may come
+        # from different words or fields: the best candidates are checked
+        # and rescored from their text until no unchecked one can rank higher
+        exact = any(len(t) > 2 for t in tokens)
+        needles = [" " + t for t in tokens]
+        take = limit * 4
+        while True:
+            best_unchecked = None
+            if take < len(candidates):
+                order = np.argpartition(-keys, take)
+                top = order[:take]
+                best_unchecked = keys[order[take]]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.argsort(-keys[top])]
+            found = []
+            for i in top:
+                if len(found) >= limit and found[limit - 1][0] >= keys[i]:
+                    break
+                doc_id = int(candidates[i])
+                doc = self._docs[doc_id]
+                if not exact:
+                    found.append((int(keys[i]), doc[0], int(total[doc_id])))
+                    continue
+                if not self._matches(doc[1], needles):
+                    continue
+                score = self._score(doc[1], needles)
+                found.append((self._keys(score, self._lengths[doc_id], doc_id), doc[0], score))
+                found.sort(reverse=True)
+            else:
+                # rescoring only lowers keys: an unchecked candidate may
+                # still outrank the last one found
+                if best_unchecked is not None and (len(found) < limit or best_unchecked > found[limit - 1][0]):
+                    take *= 4
+                    continue
+            return [(path, score) for _, path, score in found[:limit]]
+
+    @staticmethod
+    def _keys(score, length, doc_id):
+        # higher score first, then shorter text, then older document
+        return (score << (_LENGTH_BITS + 32)) - (length << 32) - doc_id
+
+    @staticmethod
+    def _matches(text: str, needles) -> bool:
+        text = " " + text
+        return all(n in text for n in needles)
+
+    def _search_scan(self, tokens, limit: int) -> list:
+        lists = []
+        for token in tokens:
+            field_lists = [self._field_postings(token, field) for field in range(len(FIELDS))]
+            field_lists = [min(fl, key=len) for fl in field_lists if fl is not None]
+            if not field_lists:
+                return []
+            lists.append(field_lists)
+        # candidates: the token whose (per-field) posting lists are shortest
+        shortest = min(lists, key=lambda fl: sum(len(p) for p in fl))
+        candidates = sorted(set().union(*shortest))
+        needles = [" " + t for t in tokens]
+        scored = []
+        for doc_id in candidates:
+            doc = self._docs[doc_id]
+            if doc is None or not self._matches(doc[1], needles):
+                continue
+            score = self._score(doc[1], needles)
+            scored.append((self._keys(score, self._lengths[doc_id], doc_id), doc[0], score))
+        scored.sort(reverse=True)
+        return [(path, score) for _, path, score in scored[:limit]]
+
+    @staticmethod
+    def _score(text: str, needles) -> int:
+        score = 0
+        fields = [" " + value for value in text.split(_SEP)]
+        for needle in needles:
+            score += max((w for w, field in zip(_WEIGHTS, fields) if needle in field), default=0)
+        return score
+
+    # -- persistence -----------------------------------------------------
+
+    def load(self) -> "SearchIndex":
+        try:
+            data = self.path.read_bytes()
+            magic, version, length = _HEADER.unpack_from(data)
+            if magic != _MAGIC or version != INDEX_VERSION:
+                return self
+            header = json.loads(data[_HEADER.size:_HEADER.size + length])
+            blob = memoryview(data)[_HEADER.size + length:]
+        except (OSError, ValueError, struct.error):
+            return self
+        postings = {}
+        for gram, offset, count in header["grams"]:
+            postings[gram] = array("I")
+            postings[gram].frombytes(blob[offset * 4:(offset + count) * 4])
+        docs = header["docs"]
+        with self._lock:
+            self._docs = docs
+            self._by_path = {doc[0]: i for i, doc in enumerate(docs) if doc is not None}
+            self._lengths = array("I", (min(len(d[1]), (1 << _LENGTH_BITS) - 1) if d else 0 for d in docs))
+            self._alive = bytearray(1 if d else 0 for d in docs)
+            self._postings = postings
+        return self
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            grams, blobs, offset = [], [], 0
+            for gram, postings in self._postings.items():
+                grams.append([gram, offset, len(postings)])
+                blobs.append(postings.tobytes())
+                offset += len(postings)
+            header = json.dumps({"docs": self._docs, "grams": grams}, separators=(",", ":")).encode()
+            self._dirty = False
+        data = _HEADER.pack(_MAGIC, INDEX_VERSION, len(header)) + header + b"".join(blobs)
+        try:
+            atomic_write_bytes(self.path, data)
+        except OSError as exc:
+            print(f"[ERROR] Failed to save search index {self.path}: {exc}")
@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from pytuiplayer.storage import atomic_write_text, data_dir
+
+SESSION_VERSION = 1
+
+
+class SessionStore:
+    """Last session state (mode, selection, queue, position, volume) as one JSON file.
+
+    The state is a plain dict built by the app. `save()` writes atomically and
+    skips the write when nothing changed since the last save, so it can be
+    called periodically at no cost. `load()` returns None for a missing,
+    unreadable or outdated file; a fresh start is always a valid fallback.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else data_dir() / "session.json"
+        self._last_text = None
+
+    def load(self) -> dict | None:
+        try:
+            text = self.path.read_text()
+            data = json.loads(text)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != SESSION_VERSION:
+            return None
+        self._last_text = text
+        return data
+
+    def save(self, state: dict) -> bool:
+        """Write `state`; returns False if it was unchanged or could not be written."""
+        text = json.dumps(dict(state, version=SESSION_VERSION), separators=(",", ":"), sort_keys=True)
+        if text == self._last_text:
+            return False
+        try:
+            atomic_write_text(self.path, text)
+        except OSError as exc:
+            print(f"[ERROR] Failed to save session {self.path}: {exc}")
+            return False
+        self._last_text = text
+        return True
@@ -0,0 +1,332 @@
+import bisect
+import json
+import time
+from pathlib import Path
+
+from pytuiplayer.playlists import URL_PREFIXES
+
+
+class ManualClock:
+    """A clock that only moves when told to.
+
+    Pass an instance as `clock=` to `SimulatedMPV` so tests and benchmarks can
+    drive the playback timeline deterministically with `advance()`.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> float:
+        self.now += float(seconds)
+        return self.now
+
+
+class SimTrack:
+    """Timeline description for one simulated source.
+
+    - `duration`: length in seconds, or None for an endless stream.
+    - `titles`: list of (position, title) pairs emitted as ICY title changes.
+    - `stalls`: list of (position, seconds) buffering stalls; playback holds
+      at `position` for `seconds` of clock time.
+    - `fail_at`: position at which a network failure ends playback.
+    - `loudness`: short-term loudness (LUFS) reported while a loudness
+      meter filter is active (see `MPVPlayer.enable_loudness_meter`).
+    """
+
+    def __init__(self, duration=None, titles=None, stalls=None, fail_at=None, loudness=None):
+        self.duration = duration
+        self.loudness = loudness
+        self.titles = sorted((float(t), str(title)) for t, title in (titles or []))
+        self.stalls = sorted((float(t), float(length)) for t, length in (stalls or []))
+        self.fail_at = fail_at
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimTrack":
+        return cls(
+            duration=data.get("duration"),
+            titles=data.get("titles"),
+            stalls=data.get("stalls"),
+            fail_at=data.get("fail_at"),
+            loudness=data.get("loudness"),
+        )
+
+
+class SimulatedMPV:
+    """In-process null backend exposing the subset of `mpv.MPV` used by `MPVPlayer`.
+
+    Nothing is decoded; a playback timeline is simulated from an injectable
+    `clock` (defaults to `time.monotonic`). Sources are looked up in
+    `manifest` (a dict of source -> SimTrack/dict, or a path to a JSON file
+    with the same shape). Unknown URLs behave like endless streams and unknown
+    files last `default_duration` seconds.
+
+    State is advanced lazily whenever a property is read, so the backend
+    costs nothing while nobody is looking at it.
+    """
+
+    def __init__(self, clock=None, manifest=None, default_duration: float = 180.0, **_ignored):
+        self.clock = clock or time.monotonic
+        self.manifest = self._load_manifest(manifest)
+        self.default_duration = default_duration
+        self.volume = 50
+        self.af = ""
+        self.events = []
+        self._callbacks = []
+        self._observers = {}
+        self._reset()
+
+    # -- setup -------------------------------------------------------------
+
+    def _load_manifest(self, manifest) -> dict:
+        if manifest is None:
+            return {}
+        if isinstance(manifest, (str, Path)):
+            try:
+                manifest = json.loads(Path(manifest).read_text())
+            except (OSError, json.JSONDecodeError) as exc:
+                print(f"[ERROR] Failed to read simulation manifest {manifest}: {exc}")
+                return {}
+        tracks = {}
+        for source, spec in manifest.items():
+            tracks[str(source)] = spec if isinstance(spec, SimTrack) else SimTrack.from_dict(spec)
+        return tracks
+
+    def _reset(self):
+        self.source = None
+        self.track = None
+        self._pos = 0.0
+        self._last = self.clock()
+        self._paused = False
+        self._stall_left = 0.0
+        self._stall_idx = 0
+        self._title_idx = -1
+        self._idle = True
+        self.eof_reached = False
+        self.last_error = None
+
+    def register_event_callback(self, callback):
+        """Register `callback(event: dict)`; mirrors python-mpv's hook of the same name."""
+        self._callbacks.append(callback)
+
+    def observe_property(self, name: str, handler):
+        """Call `handler(name, value)` when property `name` changes; like
+        python-mpv, though only "metadata" changes are reported here."""
+        self._observers.setdefault(name, []).append(handler)
+
+    def _emit(self, name: str, **data):
+        event = {"event": name, "time": self.clock(), **data}
+        self.events.append(event)
+        for cb in list(self._callbacks):
+            try:
+                cb(event)
+            except Exception:
+                continue
+        if name == "metadata":
+            for handler in list(self._observers.get("metadata", ())):
+                try:
+                    handler("metadata", {"icy-title": data["title"]})
+                except Exception:
+                    continue
+
+    # -- timeline ----------------------------------------------------------
+
+    def _track_for(self, source: str) -> SimTrack:
+        if source in self.manifest:
+            return self.manifest[source]
+        if source.startswith(URL_PREFIXES):
+            return SimTrack(duration=None)
+        return SimTrack(duration=self.default_duration)
+
+    def _sync(self):
+        """Advance the simulated timeline up to the current clock time."""
+        now = self.clock()
+        dt = now - self._last
+        self._last = now
+        if self.track is None or self._idle or self._paused or dt <= 0:
+            return
+        track = self.track
+        while dt > 0 and not self._idle:
+            if self._stall_left > 0:
+                used = min(dt, self._stall_left)
+                self._stall_left -= used
+                dt -= used
+                if self._stall_left <= 0:
+                    self._emit("buffering", active=False, position=self._pos)
+                continue
+            # next point on the media timeline where something happens
+            limits = []
+            if self._stall_idx < len(track.stalls):
+                limits.append(track.stalls[self._stall_idx][0])
+            if track.fail_at is not None:
+                limits.append(float(track.fail_at))
+            if track.duration is not None:
+                limits.append(float(track.duration))
+            target = min(limits) if limits else None
+            step = dt if target is None else min(dt, max(0.0, target - self._pos))
+            self._pos += step
+            dt -= step
+            self._update_title()
+            if target is None or self._pos < target:
+                continue
+            if track.fail_at is not None and self._pos >= float(track.fail_at):
+                self._finish("error", error="network")
+            elif track.duration is not None and self._pos >= float(track.duration):
+                self._pos = float(track.duration)
+                self.eof_reached = True
+                self._finish("eof")
+            else:
+                _, length = track.stalls[self._stall_idx]
+                self._stall_idx += 1
+                self._stall_left = length
+                self._emit("buffering", active=True, position=self._pos)
+
+    def _update_title(self):
+        titles = self.track.titles
+        idx = self._title_idx
+        while idx + 1 < len(titles) and titles[idx + 1][0] <= self._pos:
+            idx += 1
+        if idx != self._title_idx:
+            self._title_idx = idx
+            self._emit("metadata", title=titles[idx][1])
+
+    def _finish(self, reason: str, error=None):
+        self._idle = True
+        self._stall_left = 0.0
+        self.last_error = error
+        self._emit("end-file", reason=reason, source=self.source, error=error)
+
+    # -- mpv.MPV surface ---------------------------------------------------
+
+    def play(self, source: str):
+        if self.track is not None and not self._idle:
+            self._sync()
+            self._finish("stop")
+        self._reset()
+        self.source = str(source)
+        self.track = self._track_for(self.source)
+        self._idle = False
+        self._emit("start-file", source=self.source)
+        self._update_title()
+
+    def stop(self):
+        self._sync()
+        if self.track is not None and not self._idle:
+            self._finish("stop")
+        self._reset()
+
+    @property
+    def pause(self) -> bool:
+        return self._paused
+
+    @pause.setter
+    def pause(self, value):
+        # settle elapsed time under the old pause state first
+        self._sync()
+        self._paused = bool(value)
+
+    @property
+    def time_pos(self):
+        self._sync()
+        if self.track is None or (self._idle and not self.eof_reached):
+            return None
+        return self._pos
+
+    @time_pos.setter
+    def time_pos(self, seconds):
+        self._seek_to(float(seconds))
+
+    @property
+    def idle_active(self) -> bool:
+        self._sync()
+        return self._idle
+
+    @property
+    def duration(self):
+        if self.track is None:
+            return None
+        return self.track.duration
+
+    @property
+    def paused_for_cache(self) -> bool:
+        self._sync()
+        return self._stall_left > 0
+
+    @property
+    def media_title(self):
+        title = self.icy_title
+        if title:
+            return title
+        return Path(self.source).name if self.source else None
+
+    @property
+    def icy_title(self):
+        self._sync()
+        if self.track is None or self._title_idx < 0:
+            return None
+        return self.track.titles[self._title_idx][1]
+
+    @property
+    def metadata(self) -> dict:
+        title = self.icy_title
+        return {"icy-title": title} if title else {}
+
+    def get_property(self, name: str):
+        if name == "af-metadata/loudness":
+            return self._loudness_metadata()
+        attr = name.replace("-", "_")
+        return getattr(self, attr, None)
+
+    # python-mpv style item access (`player["af"] = ...`)
+    def __getitem__(self, name: str):
+        return self.get_property(name)
+
+    def __setitem__(self, name: str, value):
+        setattr(self, name.replace("-", "_"), value)
+
+    def _loudness_metadata(self):
+        self._sync()
+        if "ebur128" not in self.af or self._idle or self.track is None or self.track.loudness is None:
+            return None
+        return {"lavfi.r128.S": f"{float(self.track.loudness):.1f}"}
+
+    def _seek_to(self, target: float):
+        self._sync()
+        if self.track is None or self._idle:
+            return
+        if self.track.duration is not None:
+            target = min(target, float(self.track.duration))
+        self._pos = max(0.0, target)
+        self._stall_left = 0.0
+        # stalls behind the new position are considered already buffered
+        stalls = self.track.stalls
+        self._stall_idx = 0
+        while self._stall_idx < len(stalls) and stalls[self._stall_idx][0] < self._pos:
+            self._stall_idx += 1
+        # jump straight to the title in effect at the new position; only a
+        # different title is reported as a metadata change
+        idx = bisect.bisect_right(self.track.titles, (self._pos, chr(0x10FFFF))) - 1
+        if idx != self._title_idx:
+            self._title_idx = idx
+            if idx >= 0:
+                self._emit("metadata", title=self.track.titles[idx][1])
+        if self.track.duration is not None and self._pos >= float(self.track.duration):
+            self.eof_reached = True
+            self._finish("eof")
+
+    def seek(self, amount, reference: str = "relative"):
+        if reference == "absolute":
+            self._seek_to(float(amount))
+        else:
+            self._sync()
+            self._seek_to(self._pos + float(amount))
+
+    def command(self, name: str, *args):
+        if name == "seek" and args:
+            self.seek(args[0], args[1] if len(args) > 1 else "relative")
+        elif name == "stop":
+            self.stop()
+        elif name == "loadfile" and args:
+            self.play(args[0])
@@ -0,0 +1,712 @@
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from pytuiplayer.storage import atomic_write_text, cache_dir
+
+TABLE_VERSION = 3
+
+# Tag fields compared as (case-insensitive) text, and numeric columns
+TEXT_FIELDS = ("title", "artist", "album", "genre")
+NUMBER_FIELDS = ("year", "bitrate", "track", "duration")
+# `path` is text too, but it is not a tag; `plays` comes from the history
+FIELDS = TEXT_FIELDS + NUMBER_FIELDS + ("path", "plays")
+
+_UNITS = {
+    "hour": 3600, "hours": 3600, "day": 86400, "days": 86400, "week": 7 * 86400,
+    "weeks": 7 * 86400, "month": 30 * 86400, "months": 30 * 86400,
+    "year": 365 * 86400, "years": 365 * 86400,
+}
+_OPERATORS = {"≥": ">=", "≤": "<=", "≠": "!=", "==": "="}
+_TOKEN = re.compile(r'\s*(?:(>=|<=|!=|==|[=<>~()≥≤≠])|"([^"]*)"|\'([^\']*)\'|([^\s=<>!~()≥≤≠"\']+))')
+_KEYWORDS = {"and", "or", "not", ")"}
+
+
+class RuleError(ValueError):
+    """A smart playlist rule that cannot be parsed."""
+
+
+def read_facts(path) -> dict:
+    """Tags (`title`/`artist`/`album`/`genre`/`year`/`track`) and `bitrate` (kbps) of a file.
+
+    CUE sheet tracks ("<sheet>.cue#<n>") take their tags from the sheet.
+    """
+    facts = {}
+    if ".cue#" in str(path).lower():
+        from pytuiplayer.cue import cue_facts, find_track
+        track = find_track(path)
+        return cue_facts(track) if track is not None else facts
+    if str(path).lower().endswith(".mp3"):
+        from pytuiplayer.mp3info import read_mp3_info
+        info = read_mp3_info(path)
+        if info is not None:
+            facts["bitrate"] = info.bitrate / 1000
+    try:
+        from mutagen import File as MutagenFile
+        tags = MutagenFile(str(path), easy=True)
+    except Exception:
+        tags = None
+    if not tags:
+        return facts
+    for key in ("title", "artist", "album", "genre"):
+        value = (tags.get(key) or [None])[0]
+        if value:
+            facts[key] = str(value)
+    match = re.match(r"\d{4}", str((tags.get("date") or [""])[0]))
+    if match:
+        facts["year"] = int(match.group())
+    match = re.match(r"\s*(\d+)", str((tags.get("tracknumber") or [""])[0]))
+    if match:
+        facts["track"] = int(match.group(1))
+    bitrate = getattr(getattr(tags, "info", None), "bitrate", None)
+    if bitrate and "bitrate" not in facts:
+        facts["bitrate"] = bitrate / 1000
+    return facts
+
+
+# -- rules -----------------------------------------------------------------
+
+
+def parse_rule(text: str):
+    """Parse a rule such as ``genre = jazz and not played in 30 days``.
+
+    Conditions are ``FIELD OP VALUE`` (text fields take ``=``, ``!=`` and
+    ``~`` for "contains", `path` only ``~``; numbers take ``=``, ``!=``,
+    ``<``, ``<=``, ``>``, ``>=``),
+    ``played in N days`` and ``added in N days`` (also ``this week``,
+    ``today``, ...), combined with ``and``, ``or``, ``not`` and parentheses.
+    Returns a small tuple tree; raises `RuleError`.
+    """
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise RuleError(f"unexpected {text[pos:pos + 10]!r}")
+        op, double, single, word = match.groups()
+        if op is not None:
+            tokens.append(("op", _OPERATORS.get(op, op)))
+        elif word is not None:
+            tokens.append(("word", word))
+        else:
+            tokens.append(("text", double if double is not None else single))
+        pos = match.end()
+    if not tokens:
+        raise RuleError("empty rule")
+    parser = _Parser(tokens)
+    node = parser.expression()
+    if parser.pos < len(tokens):
+        raise RuleError(f"unexpected {tokens[parser.pos][1]!r}")
+    return node
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        if self.pos >= len(self.tokens):
+            return None
+        kind, value = self.tokens[self.pos]
+        return value.lower() if kind == "word" else value if kind == "op" else None
+
+    def take(self) -> str:
+        if self.pos >= len(self.tokens):
+            raise RuleError("rule ends too early")
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def expect(self, *words) -> str:
+        found = self.peek()
+        if found not in words:
+            raise RuleError(f"expected {' or '.join(words)}, got {found or 'the end'}")
+        return self.take()
+
+    def expression(self):
+        node = self.term()
+        while self.peek() == "or":
+            self.take()
+            node = ("or", node, self.term())
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.peek() == "and":
+            self.take()
+            node = ("and", node, self.factor())
+        return node
+
+    def factor(self):
+        word = self.peek()
+        if word == "not":
+            self.take()
+            return ("not", self.factor())
+        if word == "(":
+            self.take()
+            node = self.expression()
+            self.expect(")")
+            return node
+        if word in ("played", "added"):
+            self.take()
+            return (word, self.span())
+        if word == "never":
+            self.take()
+            self.expect("played")
+            return ("cmp", "plays", "=", 0.0)
+        if word not in FIELDS:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+            raise RuleError(f"unknown field {found!r}" if found else "rule ends too early")
+        field = self.take().lower()
+        op = self.expect("=", "!=", "~", "<", "<=", ">", ">=")
+        if field == "path":
+            if op != "~":
+                raise RuleError("path only supports ~")
+            return ("cmp", field, op, self.text_value())
+        if field in TEXT_FIELDS:
+            if op not in ("=", "!=", "~"):
+                raise RuleError(f"{field} only supports =, != and ~")
+            return ("cmp", field, op, self.text_value())
+        if op == "~":
+            raise RuleError(f"{field} is a number")
+        return ("cmp", field, op, self.number_value(field))
+
+    def text_value(self) -> str:
+        if self.pos < len(self.tokens) and self.tokens[self.pos][0] == "text":
+            return self.take().casefold()
+        # unquoted values run up to the next keyword
+        words = []
+        while self.pos < len(self.tokens) and self.tokens[self.pos][0] == "word" and self.peek() not in _KEYWORDS:
+            words.append(self.take())
+        if not words:
+            raise RuleError("missing value")
+        return " ".join(words).casefold()
+
+    def number_value(self, field: str) -> float:
+        raw = self.take().lower()
+        try:
+            if field == "duration" and ":" in raw:
+                minutes, seconds = raw.split(":", 1)
+                return int(minutes) * 60 + float(seconds)
+            if field == "bitrate":
+                raw = raw.removesuffix("kbps").removesuffix("k")
+            return float(raw)
+        except ValueError:
+            raise RuleError(f"{raw!r} is not a number for {field}") from None
+
+    def span(self) -> float:
+        word = self.take().lower()
+        if word == "today":
+            return 86400.0
+        if word == "this":
+            return float(_UNITS[self.expect("hour", "day", "week", "month", "year").lower()])
+        if word not in ("in", "within", "last"):
+            raise RuleError("expected in N days, this week or today")
+        count = self.take()
+        try:
+            count = float(count)
+        except ValueError:
+            raise RuleError(f"{count!r} is not a number") from None
+        unit = self.take().lower()
+        if unit not in _UNITS:
+            raise RuleError(f"unknown unit {unit!r}")
+        return count * _UNITS[unit]
+
+
+def _compare(value, op: str, wanted) -> bool:
+    if op == "~":
+        return wanted in value
+    if op == "=":
+        return value == wanted
+    if op == "!=":
+        return value != wanted
+    if op == "<":
+        return value < wanted
+    if op == "<=":
+        return value <= wanted
+    if op == ">":
+        return value > wanted
+    return value >= wanted
+
+
+def matches(node, values: dict, now: float) -> bool:
+    """Evaluate `node` for one track; `values` holds its fields plus `added` and `last`."""
+    kind = node[0]
+    if kind == "and":
+        return matches(node[1], values, now) and matches(node[2], values, now)
+    if kind == "or":
+        return matches(node[1], values, now) or matches(node[2], values, now)
+    if kind == "not":
+        return not matches(node[1], values, now)
+    if kind == "played":
+        return values["last"] > 0 and now - values["last"] <= node[1]
+    if kind == "added":
+        return now - values["added"] <= node[1]
+    _, field, op, wanted = node
+    value = values.get(field)
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        # unknown: only "is not" holds, and only for text
+        return op == "!=" and field in TEXT_FIELDS
+    return _compare(value, op, wanted)
+
+
+def _time_conditions(node, found=None) -> list:
+    found = [] if found is None else found
+    if node[0] in ("and", "or"):
+        _time_conditions(node[1], found)
+        _time_conditions(node[2], found)
+    elif node[0] == "not":
+        _time_conditions(node[1], found)
+    elif node[0] in ("played", "added"):
+        found.append(node)
+    return found
+
+
+def next_change(node, values: dict, now: float):
+    """When the time conditions of `node` next flip for this track, or None."""
+    times = []
+    for kind, span in _time_conditions(node):
+        start = values["last"] if kind == "played" else values["added"]
+        if start > 0 and start + span > now:
+            times.append(start + span)
+    return min(times, default=None)
+
+
+# -- track table -----------------------------------------------------------
+
+
+class TrackTable:
+    """Column store of per-track facts that smart playlists are evaluated on.
+
+    Rows are added from `LibraryIndex.tracks()` by `update()`, which reads
+    tags only for new or changed files. Text tags are stored casefolded as
+    codes into a per-field vocabulary (`array('i')`), numbers as
+    `array('d')` with NaN for unknown, so a whole column can be viewed by
+    NumPy without copying. A removed track keeps its row (marked dead in
+    `alive`), so a file that comes back gets it again; dead rows are
+    dropped when the table is saved and loaded.
+
+    A track's `added` time is when the table first saw it (`clock()`), kept
+    when the file changes, so copies that preserve file times and
+    retagged files are dated right; only tracks found while the table is
+    first filled are dated by their mtime.
+    """
+
+    def __init__(self, path: Path | None = None, read_facts=read_facts, clock=time.time):
+        self.path = Path(path) if path is not None else cache_dir() / "tracks.json"
+        self.read_facts = read_facts
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._dirty = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self.paths = []  # row -> path
+        self.rows = {}  # path -> row, dead rows included
+        self._stamps = []  # row -> (size, mtime_ns), None once removed
+        self.added = array("d")  # seconds since the epoch: when the track was first seen
+        self.numbers = {field: array("d") for field in NUMBER_FIELDS}
+        self.codes = {field: array("i") for field in TEXT_FIELDS}
+        self.vocab = {field: [""] for field in TEXT_FIELDS}
+        self._vocab_ids = {field: {"": 0} for field in TEXT_FIELDS}
+        self.alive = bytearray()
+        self._count = 0
+        self._joined = {}  # field -> (entries covered, text, start offsets), see `containing`
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _code(self, field: str, value) -> int:
+        value = str(value or "").casefold()
+        ids = self._vocab_ids[field]
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(self.vocab[field])
+            self.vocab[field].append(value)
+        return code
+
+    def _store(self, path: str, size: int, mtime: int, duration, facts: dict, added: float) -> None:
+        row = self.rows.get(path)
+        if row is None:
+            row = len(self.paths)
+            self.paths.append(path)
+            self.rows[path] = row
+            self._stamps.append(None)
+            self.added.append(added)
+            self.alive.append(0)
+            for column in self.numbers.values():
+                column.append(math.nan)
+            for column in self.codes.values():
+                column.append(0)
+        if not self.alive[row]:
+            self.alive[row] = 1
+            self._count += 1
+        self._stamps[row] = (size, mtime)
+        facts = dict(facts, duration=duration)
+        for field, column in self.numbers.items():
+            value = facts.get(field)
+            column[row] = math.nan if value is None else float(value)
+        for field, column in self.codes.items():
+            column[row] = self._code(field, facts.get(field))
+
+    def update(self, tracks, should_stop=None) -> tuple:
+        """Add new and changed tracks and drop missing ones.
+
+        Returns `(changed, removed)` lists of paths. `tracks` yields
+        `(path, size, mtime_ns, duration)`.
+        """
+        should_stop = should_stop or (lambda: False)
+        changed, seen = [], set()
+        # the first fill dates the whole library: its mtimes say more than "now"
+        filling = not self.paths
+        now = self.clock()
+        for path, size, mtime, duration in tracks:
+            if should_stop():
+                return changed, []
+            seen.add(path)
+            row = self.rows.get(path)
+            if row is not None and self._stamps[row] == (size, mtime):
+                continue
+            facts = self.read_facts(path)
+            with self.lock:
+                self._store(path, size, mtime, duration, facts, mtime / 1e9 if filling else now)
+                self._dirty = True
+            changed.append(path)
+        with self.lock:
+            removed = [path for path, row in self.rows.items() if self.alive[row] and path not in seen]
+            for path in removed:
+                row = self.rows[path]
+                self.alive[row] = 0
+                self._stamps[row] = None
+                self._count -= 1
+                self._dirty = True
+        return changed, removed
+
+    def values(self, path: str) -> dict | None:
+        """Fields of a live track for `matches()`, without `plays`/`last` (hold `lock`)."""
+        row = self.rows.get(path)
+        if row is None or not self.alive[row]:
+            return None
+        values = {field: self.vocab[field][self.codes[field][row]] for field in TEXT_FIELDS}
+        values.update({field: self.numbers[field][row] for field in NUMBER_FIELDS})
+        values["path"] = path.casefold()
+        values["added"] = self.added[row]
+        return values
+
+    def tags(self, path: str) -> dict:
+        """Title/artist/album of an indexed track (casefolded), e.g. for `SearchIndex`."""
+        with self.lock:
+            row = self.rows.get(str(path))
+            if row is None or not self.alive[row]:
+                return {}
+            return {field: self.vocab[field][self.codes[field][row]] for field in ("title", "artist", "album")}
+
+    def containing(self, field: str, wanted: str):
+        """Indices into `vocab[field]` (rows for `path`) whose text contains `wanted`.
+
+        The entries are joined into one string, cached until more are
+        added, so a lookup is one regex scan instead of a loop over
+        every entry. Needs NumPy; hold `lock`.
+        """
+        import numpy as np
+        entries = self.paths if field == "path" else self.vocab[field]
+        cached = self._joined.get(field)
+        if cached is None or cached[0] != len(entries):
+            values = [p.casefold() for p in entries] if field == "path" else entries
+            lengths = np.fromiter((len(v) + 1 for v in values), dtype=np.int64, count=len(values))
+            starts = np.cumsum(lengths) - lengths
+            cached = self._joined[field] = (len(entries), "\0".join(values), starts)
+        _, text, starts = cached
+        found = np.fromiter((m.start() for m in re.finditer(re.escape(wanted), text)), dtype=np.int64)
+        return np.searchsorted(starts, found, side="right") - 1
+
+    def load(self) -> "TrackTable":
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return self
+        version = data.get("version")
+        if version not in (2, TABLE_VERSION):
+            return self
+        with self.lock:
+            self._reset()
+            for path, size, mtime, duration, *facts in data["rows"]:
+                # version 2 tables had no first-seen time; the mtime stood in
+                added = facts.pop(0) if version == TABLE_VERSION else mtime / 1e9
+                known = dict(zip(TEXT_FIELDS + ("year", "bitrate", "track"), facts))
+                self._store(path, size, mtime, duration, {k: v for k, v in known.items() if v not in (None, "")}, added)
+        return self
+
+    def save(self) -> None:
+        with self.lock:
+            if not self._dirty:
+                return
+            rows = []
+            for path, row in self.rows.items():
+                if not self.alive[row]:
+                    continue
+                size, mtime = self._stamps[row]
+                numbers = [None if math.isnan(self.numbers[f][row]) else self.numbers[f][row] for f in NUMBER_FIELDS]
+                rows.append([path, size, mtime, numbers[-1], self.added[row]]
+                            + [self.vocab[f][self.codes[f][row]] for f in TEXT_FIELDS] + numbers[:-1])
+            self._dirty = False
+        try:
+            atomic_write_text(self.path, json.dumps({"version": TABLE_VERSION, "rows": rows}, separators=(",", ":")))
+        except OSError as exc:
+            print(f"[ERROR] Failed to save track table {self.path}: {exc}")
+
+
+# -- materialised views ----------------------------------------------------
+
+
+def _mask(node, table: TrackTable, plays, last, now: float):
+    """Evaluate `node` over every row at once (NumPy; call with `table.lock` held)."""
+    import numpy as np
+    kind = node[0]
+    if kind == "and":
+        return _mask(node[1], table, plays, last, now) & _mask(node[2], table, plays, last, now)
+    if kind == "or":
+        return _mask(node[1], table, plays, last, now) | _mask(node[2], table, plays, last, now)
+    if kind == "not":
+        return ~_mask(node[1], table, plays, last, now)
+    if kind == "played":
+        return (last > 0) & (now - last <= node[1])
+    if kind == "added":
+        return now - np.frombuffer(table.added, dtype=np.float64) <= node[1]
+    _, field, op, wanted = node
+    if field == "path":
+        hits = np.zeros(len(table.paths), dtype=bool)
+        hits[table.containing("path", wanted)] = True
+        return hits
+    if field in TEXT_FIELDS:
+        # decide per vocabulary entry, then look every row's code up
+        hits = np.zeros(len(table.vocab[field]), dtype=bool)
+        if op == "~":
+            hits[table.containing(field, wanted)] = True
+        elif wanted in table._vocab_ids[field]:
+            hits[table._vocab_ids[field][wanted]] = True
+        if op == "!=":
+            hits = ~hits
+            hits[0] = True
+        else:
+            hits[0] = False
+        return hits[np.frombuffer(table.codes[field], dtype=np.int32)]
+    column = plays if field == "plays" else np.frombuffer(table.numbers[field], dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        if op == "=":
+            return column == wanted
+        if op == "!=":
+            return (column != wanted) & ~np.isnan(column)
+        if op == "<":
+            return column < wanted
+        if op == "<=":
+            return column <= wanted
+        if op == ">":
+            return column > wanted
+        return column >= wanted
+
+
+class SmartPlaylist:
+    """A rule and the rows of a `TrackTable` currently matching it."""
+
+    def __init__(self, path: Path, text: str, table: TrackTable, mtime: int = 0):
+        self.path = Path(path)
+        self.name = self.path.stem
+        self.text = text
+        self.rule = parse_rule(text)
+        self.table = table
+        self.mtime = mtime
+        self._rows = bytearray()  # row -> 1 while it matches
+        self.count = 0
+        self.version = 0  # bumped whenever the members change
+        self._expiry = []  # heap of (time, path) when a time condition flips
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, path) -> bool:
+        row = self.table.rows.get(str(path))
+        return row is not None and row < len(self._rows) and bool(self._rows[row])
+
+    def paths(self) -> list:
+        """Member paths in path order."""
+        paths = self.table.paths
+        return sorted(paths[row] for row in range(len(self._rows)) if self._rows[row])
+
+    def entries(self) -> list:
+        """`(source, label)` pairs of the members, in path order."""
+        return [(path, os.path.basename(path)) for path in self.paths()]
+
+    def _set(self, row: int, member: bool) -> None:
+        if row >= len(self._rows):
+            if not member:
+                return
+            self._rows.extend(bytes(row + 1 - len(self._rows)))
+        if member != bool(self._rows[row]):
+            self._rows[row] = member
+            self.count += 1 if member else -1
+            self.version += 1
+
+
+class SmartPlaylists:
+    """Smart playlists materialised from a `TrackTable` and kept current.
+
+    Opening a definition evaluates its rule over the whole table once
+    (column-wise with NumPy, row by row without). After that only what
+    changed is looked at again: rows the scanner added or changed, tracks
+    that were just played (`played()`, a `HistoryLog` listener), and tracks
+    whose "played in"/"added in" window ran out, which wait in a heap
+    ordered by that time (`expire()`).
+    """
+
+    def __init__(self, table: TrackTable, history=None, clock=time.time):
+        self.table = table
+        self.history = history
+        self.clock = clock
+        self._playlists = {}  # definition path -> SmartPlaylist
+        self._lock = threading.Lock()
+        # per-row `plays` and `last` from the history, joined once and then
+        # kept current by `played()`
+        self._plays = array("d")
+        self._last = array("d")
+
+    def open(self, path) -> SmartPlaylist:
+        """Load (or reload, if the file changed) a `.smart` definition and materialise it.
+
+        The file holds the rule; lines starting with `#` are comments.
+        Raises `RuleError` for a bad rule and OSError if it cannot be read.
+        """
+        path = Path(path)
+        mtime = path.stat().st_mtime_ns
+        with self._lock:
+            playlist = self._playlists.get(str(path))
+            if playlist is not None and playlist.mtime == mtime:
+                return playlist
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        text = " ".join(line for line in (raw.strip() for raw in lines) if line and not line.startswith("#"))
+        playlist = SmartPlaylist(path, text, self.table, mtime)
+        self.evaluate(playlist)
+        with self._lock:
+            self._playlists[str(path)] = playlist
+        return playlist
+
+    def evaluate(self, playlist: SmartPlaylist) -> None:
+        """Recompute the members of `playlist` from scratch."""
+        now = self.clock()
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        table = self.table
+        with table.lock:
+            self._join_history()
+            if np is None:
+                rows, expiry = bytearray(len(table.paths)), []
+                for path, row in table.rows.items():
+                    values = self._values(path)
+                    if values is None:
+                        continue
+                    rows[row] = matches(playlist.rule, values, now)
+                    when = next_change(playlist.rule, values, now)
+                    if when is not None:
+                        expiry.append((when, path))
+            else:
+                plays = np.frombuffer(self._plays, dtype=np.float64)
+                last = np.frombuffer(self._last, dtype=np.float64)
+                alive = np.frombuffer(table.alive, dtype=np.uint8).astype(bool)
+                mask = _mask(playlist.rule, table, plays, last, now) & alive
+                rows = bytearray(mask.view(np.uint8))
+                expiry = []
+                for kind, span in _time_conditions(playlist.rule):
+                    start = last if kind == "played" else np.frombuffer(table.added, dtype=np.float64)
+                    flips = start + span
+                    due = np.flatnonzero((start > 0) & (flips > now) & alive)
+                    expiry.extend(zip(flips[due].tolist(), [table.paths[row] for row in due.tolist()]))
+        heapq.heapify(expiry)
+        with self._lock:
+            playlist._rows = rows
+            playlist.count = rows.count(1)
+            playlist._expiry = expiry
+            playlist.version += 1
+
+    def _join_history(self) -> None:
+        # call with the table lock held: extend the history columns to new rows
+        start = len(self._plays)
+        count = len(self.table.paths) - start
+        if count <= 0:
+            return
+        self._plays.extend([0.0] * count)
+        self._last.extend([0.0] * count)
+        if self.history is None:
+            return
+        if start == 0:
+            entries = self.history.stats(kind="local").items()
+        else:
+            entries = ((path, self.history.entry(path)) for path in self.table.paths[start:])
+        for path, entry in entries:
+            row = self.table.rows.get(path)
+            if entry is not None and row is not None:
+                self._plays[row], self._last[row] = entry["plays"], entry["last"]
+
+    def _values(self, path: str) -> dict | None:
+        # call with the table lock held
+        values = self.table.values(path)
+        if values is not None:
+            row = self.table.rows[path]
+            values["plays"] = self._plays[row] if row < len(self._plays) else 0.0
+            values["last"] = self._last[row] if row < len(self._last) else 0.0
+        return values
+
+    def _reevaluate(self, paths, now: float) -> None:
+        with self._lock:
+            playlists = list(self._playlists.values())
+        if not playlists:
+            return
+        for path in paths:
+            with self.table.lock:
+                self._join_history()
+                row = self.table.rows.get(path)
+                values = self._values(path)
+            if row is None:
+                continue
+            with self._lock:
+                for playlist in playlists:
+                    if values is None:
+                        playlist._set(row, False)
+                        continue
+                    playlist._set(row, matches(playlist.rule, values, now))
+                    when = next_change(playlist.rule, values, now)
+                    if when is not None:
+                        heapq.heappush(playlist._expiry, (when, path))
+
+    def tracks_changed(self, changed, removed=()) -> None:
+        """Re-check tracks the scanner added, changed or removed."""
+        self._reevaluate(list(changed) + list(removed), self.clock())
+
+    def played(self, source, entry) -> None:
+        """`HistoryLog` listener: a play changes `plays` and `last` of one track."""
+        source = str(source)
+        with self.table.lock:
+            row = self.table.rows.get(source)
+            if row is None or row >= len(self._plays):
+                return
+            self._plays[row], self._last[row] = entry["plays"], entry["last"]
+        self._reevaluate([source], self.clock())
+
+    def expire(self) -> None:
+        """Re-check tracks whose time window has run out since the last call."""
+        now = self.clock()
+        due = set()
+        with self._lock:
+            for playlist in self._playlists.values():
+                while playlist._expiry and playlist._expiry[0][0] <= now:
+                    due.add(heapq.heappop(playlist._expiry)[1])
+        if due:
+            self._reevaluate(due, now)
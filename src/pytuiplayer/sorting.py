@@ -0,0 +1,153 @@
+import locale
+from array import array
+
+# Sort orders of `#local-list` and the columns each compares, in order.
+# "order" keeps the listing/playlist order; ties keep it too (the sort is stable).
+SORTS = {
+    "order": (),
+    "artist": ("artist", "album", "track", "title"),
+    "album": ("album", "track", "title"),
+    "track": ("track", "title"),
+    "duration": ("duration", "title"),
+    "added": ("added", "title"),
+}
+GROUPS = (None, "album", "artist")
+
+TEXT_COLUMNS = ("title", "artist", "album")
+_UNKNOWN_NAMES = {"album": "Unknown album", "artist": "Unknown artist"}
+
+_collate = None
+
+
+def collation_key(text: str):
+    """Locale-aware sort key of `text` (`locale.strxfrm` of its casefolded form)."""
+    global _collate
+    if _collate is None:
+        try:
+            locale.setlocale(locale.LC_COLLATE, "")
+        except locale.Error:
+            pass  # the "C" locale still gives code point order
+        _collate = locale.strxfrm
+    return _collate(text.casefold())
+
+
+def _ranks(values: list) -> tuple:
+    """Collation rank of each value in `values` (unknown, "", last; values
+    that collate equally share a rank) and the name shown for each rank."""
+    ids = {}
+    codes = array("I", (ids.setdefault(value, len(ids)) for value in values))
+    names = list(ids)
+    keys = [(name == "", collation_key(name)) for name in names]
+    rank_of = array("I", bytes(4 * len(names)))
+    shown, previous = [], None
+    for code in sorted(range(len(names)), key=keys.__getitem__):
+        if keys[code] != previous:
+            previous = keys[code]
+            shown.append(names[code])
+        rank_of[code] = len(shown) - 1
+    return array("I", (rank_of[code] for code in codes)), shown
+
+
+def _number(value, limit: int, missing: int) -> int:
+    if value is None or value != value:  # None or NaN
+        return missing
+    return min(max(int(value), 0), limit)
+
+
+class ListSorter:
+    """Precomputed sort keys for the rows of one list.
+
+    Each row's columns are reduced once to small integers: text becomes its
+    collation rank among the list's values, numbers are clamped, unknown
+    values sort last. A sort order packs its columns, then the row number,
+    into one integer per row (cached), so sorting is one sort of plain
+    integers without comparing strings.
+
+    `rows` yields `(facts, label)`: facts as from `TrackTable.values()` (or
+    None for a track that is not in the table), label the name shown, used
+    as the title when there is no title tag.
+    """
+
+    def __init__(self, rows):
+        nan = float("nan")
+        titles, artists, albums, tracks, durations, added = [], [], [], [], [], []
+        for facts, label in rows:
+            if facts is None:
+                titles.append(label.casefold())
+                artists.append("")
+                albums.append("")
+                tracks.append(nan)
+                durations.append(nan)
+                added.append(nan)
+                continue
+            titles.append(facts["title"] or label.casefold())
+            artists.append(facts["artist"])
+            albums.append(facts["album"])
+            tracks.append(facts["track"])
+            durations.append(facts["duration"])
+            added.append(facts["added"])
+        self.size = len(titles)
+        self.names = {}
+        self.columns = {
+            "track": array("I", (_number(v, 0xFFFE, 0xFFFF) for v in tracks)),
+            "duration": array("I", (_number(v, 0xFFFFFE, 0xFFFFFF) for v in durations)),
+        }
+        for field, values in zip(TEXT_COLUMNS, (titles, artists, albums)):
+            self.columns[field], self.names[field] = _ranks(values)
+        # newest first: seconds before the newest track
+        newest = max((value for value in added if value == value), default=0.0)
+        self.columns["added"] = array("I", (_number(newest - value, 0xFFFFFFFE, 0xFFFFFFFF) for value in added))
+        self._sorted = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _columns(self, sort: str, group: str | None) -> tuple:
+        columns = SORTS[sort]
+        if group is not None and columns[:1] != (group,):
+            columns = (group,) + columns
+        return columns
+
+    def keys(self, sort: str, group: str | None = None):
+        """Packed sort key of every row for `sort` within `group`s."""
+        columns = self._columns(sort, group)
+        widths = [max(self.columns[c], default=0).bit_length() for c in columns]
+        keys = [0] * self.size
+        for column, width in zip(columns, widths):
+            values = self.columns[column]
+            keys = [(key << width) | value for key, value in zip(keys, values)]
+        return array("Q", keys) if sum(widths) <= 64 else keys
+
+    def order(self, sort: str, group: str | None = None) -> list:
+        """Row numbers in display order."""
+        columns = self._columns(sort, group)
+        if not columns:
+            return list(range(self.size))
+        packed = self._sorted.get(columns)
+        if packed is None:
+            # the row number in the low bits keeps equal keys in list order
+            shift = self.size.bit_length()
+            packed = self._sorted[columns] = [
+                (key << shift) | row for row, key in enumerate(self.keys(sort, group))]
+        packed.sort()
+        mask = (1 << self.size.bit_length()) - 1
+        return [key & mask for key in packed]
+
+    def groups(self, order: list, group: str) -> list:
+        """`(start, end)` slices of `order` sharing the same `group` value."""
+        column = self.columns[group]
+        bounds = [0]
+        for position in range(1, len(order)):
+            if column[order[position]] != column[order[position - 1]]:
+                bounds.append(position)
+        bounds.append(len(order))
+        return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)] if order else []
+
+    def group_name(self, group: str, row: int) -> str:
+        """Display name of `row`'s `group` (album or artist)."""
+        return self.names[group][self.columns[group][row]] or _UNKNOWN_NAMES[group]
+
+    def total_duration(self, rows) -> tuple:
+        """`(tracks with a known duration, their total seconds)` of `rows`."""
+        known = [self.columns["duration"][row] for row in rows if self.columns["duration"][row] != 0xFFFFFF]
+        return len(known), float(sum(known))
@@ -0,0 +1,202 @@
+import math
+import shutil
+import subprocess
+import threading
+import zlib
+
+from pytuiplayer.playlists import URL_PREFIXES
+
+# Rows of a bar, from empty to full
+BAR_CHARS = " ▁▂▃▄▅▆▇█"
+
+
+class SpectrumAnalyzer:
+    """Log-spaced band levels and RMS/peak of the most recent PCM block.
+
+    The block is split into `fft_size` frames with 50 % overlap, all frames
+    are windowed and transformed in one `rfft` call, and FFT bins are summed
+    into bands with `np.add.reduceat` over precomputed band edges. Levels are
+    returned in 0..1 over a `floor_db`..0 dB range, with a falling decay so
+    bars do not flicker.
+    """
+
+    def __init__(self, sample_rate: int = 22050, fft_size: int = 1024, bands: int = 24,
+                 fmin: float = 40.0, floor_db: float = -70.0, decay: float = 0.6):
+        import numpy as np
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.floor_db = floor_db
+        self.decay = decay
+        self._window = np.hanning(fft_size).astype(np.float32)
+        # normalise so a full-scale sine reads 0 dB in its band
+        self._scale = 4.0 / float(self._window.sum()) ** 2
+        nyquist = sample_rate / 2
+        edges = np.geomspace(fmin, nyquist, bands + 1)
+        bins = np.unique(np.clip(np.round(edges / nyquist * (fft_size // 2)).astype(int), 1, fft_size // 2))
+        self._starts = bins[:-1]
+        self._stop = bins[-1]
+        self.bands = len(self._starts)
+        self._levels = np.zeros(self.bands, dtype=np.float32)
+
+    def analyze(self, samples):
+        """Return `(levels, rms_db, peak)` for a 1-D block of at least `fft_size` samples."""
+        import numpy as np
+        samples = np.asarray(samples, dtype=np.float32)
+        hop = self.fft_size // 2
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.fft_size)[::hop]
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        power = power.mean(axis=0)[:self._stop] * self._scale
+        band_power = np.add.reduceat(power, self._starts)
+        with np.errstate(divide="ignore"):
+            db = 10 * np.log10(band_power)
+        levels = np.clip((db - self.floor_db) / -self.floor_db, 0.0, 1.0)
+        # bars rise immediately and fall off gradually
+        self._levels = np.maximum(levels, self._levels * self.decay).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        rms_db = 20 * math.log10(rms) if rms > 0 else self.floor_db
+        return self._levels, max(rms_db, self.floor_db), float(np.abs(samples).max())
+
+
+def render_bars(levels, rows: int = 3, width: int = 2) -> str:
+    """Draw `levels` (0..1) as `rows` lines of block characters, `width` columns per band."""
+    steps = len(BAR_CHARS) - 1
+    lines = []
+    for row in range(rows - 1, -1, -1):
+        line = []
+        for level in levels:
+            filled = level * rows * steps - row * steps
+            line.append(BAR_CHARS[int(max(0, min(steps, filled)))] * width)
+        lines.append("".join(line))
+    return "\n".join(lines)
+
+
+class PcmRing:
+    """Fixed-size ring of the most recent mono float32 samples, filled from a reader thread."""
+
+    def __init__(self, capacity: int):
+        import numpy as np
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self._written = 0
+        self._lock = threading.Lock()
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def write(self, samples) -> None:
+        n = len(samples)
+        cap = len(self._buf)
+        with self._lock:
+            # only the last `cap` samples survive; they go where they would
+            # have ended up had all `n` been written
+            skipped = max(0, n - cap)
+            samples = samples[skipped:]
+            n -= skipped
+            start = (self._written + skipped) % cap
+            first = min(n, cap - start)
+            self._buf[start:start + first] = samples[:first]
+            self._buf[:n - first] = samples[first:]
+            self._written += n + skipped
+
+    def latest(self, n: int):
+        """Return a copy of the last `n` samples, or None if fewer were written."""
+        import numpy as np
+        with self._lock:
+            if self._written < n:
+                return None
+            end = self._written % len(self._buf)
+            return np.roll(self._buf, -end)[-n:].copy()
+
+
+class SimPcmSource:
+    """PCM tap for the simulated backend: synthesises audio for the current position.
+
+    The signal (a few harmonics whose pitch depends on the source, with a
+    slow amplitude envelope) is a pure function of the playback position, so
+    it behaves like a decoded stream: it moves while playing, freezes while
+    paused and stops at end of file.
+    """
+
+    def __init__(self, mpv_player, sample_rate: int = 22050):
+        self.mpv = mpv_player
+        self.sample_rate = sample_rate
+
+    def read(self, frames: int):
+        import numpy as np
+        player = self.mpv.player
+        pos = self.mpv.get_time_pos()
+        if pos is None or self.mpv.is_idle():
+            return None
+        base = 110.0 * (1 + zlib.crc32(str(player.source).encode()) % 4)
+        t = pos - frames / self.sample_rate + np.arange(frames, dtype=np.float64) / self.sample_rate
+        envelope = 0.5 + 0.4 * np.sin(2 * np.pi * 0.2 * t)
+        signal = sum(np.sin(2 * np.pi * base * k * t) / k for k in (1, 2, 3, 5, 8))
+        return (0.3 * envelope * signal).astype(np.float32)
+
+
+class FfmpegPcmSource:
+    """Side-channel PCM tap for local files played by mpv.
+
+    A second `ffmpeg -re` process decodes the current file from the current
+    position in real time into a `PcmRing`; it is restarted when the track
+    changes or playback drifts by more than `resync` seconds (seeks), and
+    stopped while paused or idle. Streams (URLs) are not tapped, since that
+    would open a second connection.
+    """
+
+    def __init__(self, mpv_player, sample_rate: int = 22050, resync: float = 1.0):
+        self.mpv = mpv_player
+        self.sample_rate = sample_rate
+        self.resync = resync
+        self._ring = PcmRing(sample_rate * 2)
+        self._proc = None
+        self._source = None
+        self._start_pos = 0.0
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which("ffmpeg") is not None
+
+    def read(self, frames: int):
+        source = getattr(self.mpv, "current_source", None)
+        pos = self.mpv.get_time_pos()
+        if (source is None or pos is None or self.mpv.is_idle() or self.mpv.is_paused()
+                or str(source).startswith(URL_PREFIXES)):
+            self.close()
+            return None
+        decoded = self._start_pos + self._ring.written / self.sample_rate
+        if self._proc is None or source != self._source or abs(decoded - pos) > self.resync:
+            self._start(source, pos)
+            return None
+        return self._ring.latest(frames)
+
+    def _start(self, source, pos: float) -> None:
+        self.close()
+        self._ring = PcmRing(self.sample_rate * 2)
+        self._source, self._start_pos = source, pos
+        try:
+            self._proc = subprocess.Popen(
+                ["ffmpeg", "-v", "error", "-nostdin", "-re", "-ss", f"{pos:.2f}", "-i", str(source),
+                 "-f", "f32le", "-ac", "1", "-ar", str(self.sample_rate), "-"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            )
+        except OSError as exc:
+            print(f"[ERROR] Cannot start PCM tap: {exc}")
+            self._proc = None
+            return
+        threading.Thread(target=self._pump, args=(self._proc, self._ring), daemon=True).start()
+
+    @staticmethod
+    def _pump(proc, ring) -> None:
+        import numpy as np
+        while True:
+            data = proc.stdout.read(4096)
+            if not data:
+                return
+            ring.write(np.frombuffer(data[:len(data) - len(data) % 4], dtype="<f4"))
+
+    def close(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
@@ -0,0 +1,114 @@
+import sys
+import time
+
+# Import-time budget for `import pytuiplayer.tui_app` (cumulative, in ms). Almost
+# all of it is Textual itself; see README "Startup profiling". Enforced by
+# src/tests/test_startup_profile.py together with LAZY_MODULES.
+IMPORT_BUDGET_MS = 750
+
+# Optional/heavy modules that must not be imported before first paint. They are
+# loaded on first use (tag reading, playlist parsing, libmpv). Textual imports
+# its DirectoryTree module itself, so for Local mode browsing only building the
+# tree is deferred (see `MusicPlayerApp._ensure_local_panels`).
+LAZY_MODULES = (
+    "mutagen",
+    "mpv",
+    "pytuiplayer.playlists",
+    "pytuiplayer.sim_player",
+)
+
+
+class ImportTimer:
+    """`sys.meta_path` hook recording how long each module takes to execute.
+
+    Only modules loaded while the timer is installed are measured. For each
+    module both the cumulative time (including nested imports) and the self
+    time are kept, similar to `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.timings = {}  # name -> [cumulative_s, self_s]
+        self._stack = []
+        self._resolving = set()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        try:
+            sys.meta_path.remove(self)
+        except ValueError:
+            pass
+
+    def find_spec(self, name, path=None, target=None):
+        if name in self._resolving:
+            return None
+        self._resolving.add(name)
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._resolving.discard(name)
+        # builtin/frozen importers are shared classes; only wrap per-module loaders
+        loader = getattr(spec, "loader", None)
+        if loader is None or isinstance(loader, type) or not hasattr(loader, "exec_module"):
+            return spec
+        self._wrap(loader, name)
+        return spec
+
+    def _wrap(self, loader, name):
+        original = loader.exec_module
+        timer = self
+
+        def exec_module(module):
+            timer._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                original(module)
+            finally:
+                total = time.perf_counter() - start
+                children = timer._stack.pop()
+                timer.timings[name] = [total, total - children]
+                if timer._stack:
+                    timer._stack[-1] += total
+
+        try:
+            loader.exec_module = exec_module
+        except Exception:
+            pass
+
+    def slowest(self, limit: int = 15):
+        """Return [(name, cumulative_ms, self_ms)] sorted by self time."""
+        rows = [(name, c * 1000, s * 1000) for name, (c, s) in self.timings.items()]
+        rows.sort(key=lambda r: r[2], reverse=True)
+        return rows[:limit]
+
+
+class StartupProfiler:
+    """Collects named phase timestamps from process start up to first paint."""
+
+    def __init__(self, import_timer=None):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.import_timer = import_timer
+
+    def mark(self, phase: str):
+        self.phases.append((phase, (time.perf_counter() - self.start) * 1000))
+
+    def report(self, limit: int = 15) -> str:
+        lines = ["Startup profile (ms since main())", ""]
+        for phase, ms in self.phases:
+            lines.append(f"  {ms:9.1f}  {phase}")
+        if self.import_timer is not None:
+            rows = self.import_timer.slowest(limit)
+            lines += ["", f"Slowest imports (top {len(rows)} by self time)", "       self  cumulative  module"]
+            for name, cumulative, own in rows:
+                lines.append(f"  {own:9.1f}  {cumulative:10.1f}  {name}")
+        return "\n".join(lines)
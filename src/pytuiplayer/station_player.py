@@ -1,6 +1,24 @@
 import json
 from pathlib import Path
 
+def stations_from_playlist(path: Path) -> list:
+    """Station dicts (`name`, `url`, plus `group`/`logo` when the playlist
+    has them) for the stream entries of an M3U, PLS or XSPF playlist."""
+    from pytuiplayer.playlists import URL_PREFIXES, iter_playlist
+    stations = []
+    for entry in iter_playlist(path):
+        if not entry.source.startswith(URL_PREFIXES):
+            continue
+        station = {"name": entry.title or entry.source, "url": entry.source}
+        attributes = entry.attributes or {}
+        if entry.group:
+            station["group"] = entry.group
+        if attributes.get("tvg-logo") or attributes.get("image"):
+            station["logo"] = attributes.get("tvg-logo") or attributes["image"]
+        stations.append(station)
+    return stations
+
+
 class StationPlayer:
     def __init__(self, mpv_player, stations=None):
         self.mpv = mpv_player
@@ -14,17 +32,28 @@ class StationPlayer:
         return json.loads(path.read_text())
 
     def update_stations(self, new_file: Path) -> bool:
-        """Update stations from `new_file`.
+        """Update stations from `new_file`: our JSON list, or an M3U/PLS/XSPF
+        playlist as exported by radio directories (see `stations_from_playlist`).
 
         Returns True if stations were successfully updated, False otherwise (keeps
         previous stations on failure).
         """
         try:
+            if Path(new_file).suffix.lower() != ".json":
+                stations = stations_from_playlist(new_file)
+                if not stations:
+                    print(f"[ERROR] No stations in {new_file}, keeping previous stations.")
+                    return False
+                self.stations = stations
+                return True
             self.stations = json.loads(new_file.read_text())
             return True
         except FileNotFoundError:
             print(f"[ERROR] Stations file {new_file} not found, keeping previous stations.")
             return False
+        except OSError as exc:
+            print(f"[ERROR] Failed to read stations file {new_file}: {exc}. Keeping previous stations.")
+            return False
         except json.JSONDecodeError as exc:
             print(f"[ERROR] Failed to parse stations file {new_file}: {exc}. Keeping previous stations.")
             return False
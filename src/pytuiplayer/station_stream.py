@@ -0,0 +1,120 @@
+import http.client
+import threading
+
+from pytuiplayer.icy import IcyDemuxer
+from pytuiplayer.remote import ConnectionPool
+
+# Most bytes read from the station at once
+CHUNK_SIZE = 16 * 1024
+# Assumed bitrate (kbit/s) when the station does not announce one with `icy-br`
+DEFAULT_BITRATE = 320
+
+
+class StationStream:
+    """One connection to a radio station, read on a background thread.
+
+    ICY metadata is requested and taken out of the audio. Sinks added with
+    `add_sink` are called on the reading thread:
+
+    - `start(stream)` once connected (`byte_rate`, `content_type` are set),
+      or right away for a sink added later;
+    - `write(view)` with each piece of audio, a memoryview of a buffer that
+      is reused for the next read (copy it to keep it);
+    - `title(text)` when the `StreamTitle` changes, at the exact byte;
+    - `stop(error)` when the stream ends (`error` None after `close()`).
+
+    Listeners added with `add_listener` only hear of title changes.
+    """
+
+    def __init__(self, url: str, pool: ConnectionPool | None = None):
+        self.url = url
+        self.byte_rate = DEFAULT_BITRATE * 125
+        self.rate_announced = False  # `byte_rate` is from `icy-br`, not assumed
+        self.content_type = ""
+        self.title = None
+        self.error = None
+        self.connected = False
+        self._sinks = ()
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pool = pool or ConnectionPool(timeout=30.0)
+        threading.Thread(target=self._run, name="pytuip-station", daemon=True).start()
+
+    def add_sink(self, sink) -> None:
+        with self._lock:
+            # started before it can be written to
+            if self.connected:
+                sink.start(self)
+            self._sinks = self._sinks + (sink,)
+
+    def remove_sink(self, sink) -> None:
+        with self._lock:
+            self._sinks = tuple(s for s in self._sinks if s is not sink)
+
+    def has_sinks(self) -> bool:
+        return bool(self._sinks)
+
+    def add_listener(self, callback) -> None:
+        """Call `callback(title)` on the reading thread at every `StreamTitle` change."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _run(self) -> None:
+        error = None
+        try:
+            with self._pool.open(self.url, {"Icy-MetaData": "1"}) as response:
+                if response.status != 200:
+                    raise OSError(f"HTTP {response.status} {response.reason}")
+                bitrate = response.getheader("icy-br", "").split(",")[0].strip()
+                if bitrate.isdigit() and int(bitrate) > 0:
+                    self.byte_rate = int(bitrate) * 125
+                    self.rate_announced = True
+                self.content_type = (response.getheader("Content-Type") or "").lower()
+                with self._lock:
+                    self.connected = True
+                    sinks = self._sinks
+                for sink in sinks:
+                    sink.start(self)
+                metaint = response.getheader("icy-metaint", "")
+                self._copy(response, int(metaint) if metaint.isdigit() else 0)
+        except (OSError, ValueError, http.client.HTTPException) as exc:
+            if not self._closed:
+                error = self.error = str(exc)
+                print(f"[ERROR] Stream of {self.url} stopped: {exc}")
+        finally:
+            for sink in self._sinks:
+                sink.stop(error)
+
+    def _copy(self, response, metaint: int) -> None:
+        buffer = memoryview(bytearray(CHUNK_SIZE))
+        demuxer = IcyDemuxer(metaint)
+        while not self._closed:
+            # whatever has arrived, metadata blocks included: the demuxer
+            # slices the audio out of the buffer without copying it
+            n = response.readinto1(buffer)
+            if not n:
+                raise OSError("the station closed the stream")
+            for audio, fields in demuxer.feed(buffer[:n]):
+                if audio is not None:
+                    for sink in self._sinks:
+                        sink.write(audio)
+                elif fields.get("StreamTitle") and fields["StreamTitle"] != self.title:
+                    self._set_title(fields["StreamTitle"])
+
+    def _set_title(self, title: str) -> None:
+        self.title = title
+        for sink in self._sinks:
+            sink.title(title)
+        for listener in list(self._listeners):
+            try:
+                listener(title)
+            except Exception as exc:
+                print(f"[ERROR] Stream title listener failed: {exc}")
+
+    def close(self) -> None:
+        self._closed = True
@@ -0,0 +1,60 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def cache_dir() -> Path:
+    """Directory for rebuildable caches (library index, waveforms, ...).
+
+    `PYTUIP_CACHE_DIR` overrides the default `$XDG_CACHE_HOME/pytuiplayer`
+    (or `~/.cache/pytuiplayer`). The directory is created on demand.
+    """
+    base = os.getenv("PYTUIP_CACHE_DIR")
+    if base:
+        path = Path(base)
+    else:
+        path = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "pytuiplayer"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def data_dir() -> Path:
+    """Directory for user state that must survive restarts (history, session).
+
+    `PYTUIP_DATA_DIR` overrides the default `$XDG_DATA_HOME/pytuiplayer`
+    (or `~/.local/share/pytuiplayer`). The directory is created on demand.
+    """
+    base = os.getenv("PYTUIP_DATA_DIR")
+    if base:
+        path = Path(base)
+    else:
+        path = Path(os.getenv("XDG_DATA_HOME") or Path.home() / ".local" / "share") / "pytuiplayer"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write `data` to `path` so readers see either the old or the new file.
+
+    The data goes to a temporary file in the same directory, is fsynced and
+    then renamed over `path`.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
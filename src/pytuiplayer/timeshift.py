@@ -0,0 +1,258 @@
+import mmap
+import statistics
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pytuiplayer.station_stream import CHUNK_SIZE, StationStream
+from pytuiplayer.storage import cache_dir
+
+# Seconds of audio handed to the player at once when it starts at the live edge
+LIVE_MARGIN = 4.0
+# Without `icy-br` the byte rate is measured: the median of the bytes received
+# per RATE_INTERVAL over the last RATE_SAMPLES intervals, once there are
+# RATE_MIN_SAMPLES of them (the median leaves out the burst sent on connect)
+RATE_INTERVAL = 1.0
+RATE_SAMPLES = 15
+RATE_MIN_SAMPLES = 5
+
+
+class RingBuffer:
+    """Fixed-size byte ring in a memory-mapped (anonymous) file on disk.
+
+    Offsets are absolute: the number of bytes written before that byte.
+    Only the last `capacity` bytes are kept, so memory and disk use stay
+    flat however long the stream runs. One writer thread; any number of
+    readers, which wait at the end of the data for more.
+    """
+
+    def __init__(self, capacity: int, directory=None):
+        self.capacity = capacity
+        self._file = tempfile.TemporaryFile(prefix="timeshift-", dir=directory)
+        self._file.truncate(capacity)
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+        self._written = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    @property
+    def oldest(self) -> int:
+        """Offset of the oldest byte still in the ring."""
+        return max(0, self._written - self.capacity)
+
+    def write(self, data) -> None:
+        data = memoryview(data)
+        n = len(data)
+        cap = self.capacity
+        if n > cap:
+            data = data[n - cap:]
+        start = (self._written + n - len(data)) % cap
+        first = min(len(data), cap - start)
+        with self._cond:
+            if self._closed:
+                return
+            self._map[start:start + first] = data[:first]
+            self._map[:len(data) - first] = data[first:]
+            self._written += n
+            self._cond.notify_all()
+
+    def read(self, offset: int, size: int, timeout: float | None = None):
+        """Return `(offset, data)`: up to `size` bytes from `offset`, waiting
+        up to `timeout` seconds when there is nothing new yet.
+
+        An offset that has been overwritten already moves up to the oldest
+        byte kept. `data` is empty on timeout or once the ring is closed.
+        """
+        with self._cond:
+            if offset >= self._written and not self._closed:
+                self._cond.wait_for(lambda: offset < self._written or self._closed, timeout)
+            if self._closed:
+                return offset, b""
+        while True:
+            offset = max(offset, self.oldest)
+            end = min(self._written, offset + size)
+            start = offset % self.capacity
+            count = max(0, min(end - offset, self.capacity - start))
+            try:
+                data = self._map[start:start + count]
+            except ValueError:
+                return offset, b""  # closed meanwhile
+            # the writer may have lapped us while copying
+            if offset >= self.oldest:
+                return offset, data
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._map.close()
+        self._file.close()
+
+
+class Timeshift:
+    """Pause and rewind a live station.
+
+    The station's `StationStream` (`stream`, which other sinks such as the
+    recorder can share) is recorded into a `RingBuffer` holding `window`
+    seconds; the player is pointed at a local HTTP server that streams the
+    buffer from any offset (`url()`), so it can lag behind the live edge by
+    up to the whole window. ICY titles are kept by offset, so `title_at()`
+    names the song at the playing position.
+
+    Offsets and the player's seconds are converted with `byte_rate`: the
+    station's announced bitrate, or else the rate the stream arrives at,
+    measured as it plays. The buffer is sized from the (higher) assumed
+    rate until then, so it holds at least `window` seconds either way.
+    """
+
+    def __init__(self, url: str, window: float = 1800.0, stream: StationStream | None = None):
+        self.station = url
+        self.window = window
+        self.byte_rate = None
+        self.ring = None
+        self.titles = deque()  # (offset, title), oldest first
+        self.play_start = None  # offset the player's current stream starts at
+        self.error = None
+        self._rates = deque(maxlen=RATE_SAMPLES)
+        self._measure = None  # (monotonic time, bytes written) of the current interval
+        self._ready = threading.Event()
+        self._closed = False
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="pytuip-timeshift-server", daemon=True).start()
+        self.stream = stream or StationStream(url)
+        self.stream.add_sink(self)
+
+    def url(self, offset: int | None = None) -> str:
+        """Local URL of the buffer from `offset`; None starts near the live edge."""
+        port = self._server.server_address[1]
+        return f"http://127.0.0.1:{port}/{'live' if offset is None else int(offset)}"
+
+    # StationStream sink, called on its reading thread
+
+    def start(self, stream) -> None:
+        self.byte_rate = stream.byte_rate
+        self.ring = RingBuffer(int(self.window * self.byte_rate), cache_dir())
+        if not stream.rate_announced:
+            self._measure = (time.monotonic(), 0)
+        self._ready.set()
+
+    def write(self, view) -> None:
+        self.ring.write(view)
+        if self._measure is not None:
+            self._measure_rate()
+        # titles older than the buffer are dropped (keep the one in force)
+        titles = self.titles
+        while len(titles) > 1 and titles[1][0] <= self.ring.oldest:
+            titles.popleft()
+
+    def _measure_rate(self) -> None:
+        started, written = self._measure
+        now = time.monotonic()
+        if now - started < RATE_INTERVAL:
+            return
+        self._rates.append((self.ring.written - written) / (now - started))
+        self._measure = (now, self.ring.written)
+        if len(self._rates) >= RATE_MIN_SAMPLES:
+            rate = statistics.median(self._rates)
+            if rate > 0:
+                self.byte_rate = int(rate)
+
+    def title(self, text: str) -> None:
+        self.titles.append((self.ring.written, text))
+
+    def stop(self, error) -> None:
+        self.error = error
+        self._ready.set()
+
+    def _handler(self):
+        timeshift = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if not timeshift._ready.wait(30) or timeshift.ring is None:
+                    self.send_error(502, timeshift.error or "station not available")
+                    return
+                ring = timeshift.ring
+                wanted = self.path.strip("/")
+                if wanted.isdigit():
+                    offset = int(wanted)
+                else:
+                    offset = ring.written - int(LIVE_MARGIN * timeshift.byte_rate)
+                offset = min(max(offset, ring.oldest), ring.written)
+                timeshift.play_start = offset
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.end_headers()
+                try:
+                    while not timeshift._closed:
+                        offset, data = ring.read(offset, CHUNK_SIZE, timeout=1.0)
+                        if data:
+                            self.wfile.write(data)
+                            offset += len(data)
+                except OSError:
+                    # the player went away (stop, seek, another station)
+                    return
+
+        return Handler
+
+    def live_offset(self) -> int:
+        return self.ring.written if self.ring is not None else 0
+
+    def buffered(self) -> float:
+        """Seconds of audio in the buffer."""
+        if self.ring is None:
+            return 0.0
+        return (self.ring.written - self.ring.oldest) / self.byte_rate
+
+    def position(self, time_pos: float | None) -> int | None:
+        """Buffer offset the player is at, `time_pos` seconds into its stream."""
+        if self.play_start is None or self.ring is None:
+            return None
+        return min(self.ring.written, self.play_start + int((time_pos or 0) * self.byte_rate))
+
+    def behind(self, time_pos: float | None) -> float:
+        """Seconds between the playing position and the live edge."""
+        offset = self.position(time_pos)
+        if offset is None:
+            return 0.0
+        return max(0.0, (self.ring.written - offset) / self.byte_rate)
+
+    def offset_for(self, time_pos: float | None, delta: float) -> int:
+        """Offset `delta` seconds from the playing position, kept inside the buffer."""
+        offset = self.position(time_pos)
+        if offset is None or self.ring is None:
+            return 0
+        target = offset + int(delta * self.byte_rate)
+        return min(max(target, self.ring.oldest), self.ring.written)
+
+    def title_at(self, offset: int | None) -> str | None:
+        """The stream title in force at `offset`."""
+        title = None
+        for start, text in list(self.titles):
+            if offset is not None and start > offset:
+                break
+            title = text
+        return title
+
+    def close(self) -> None:
+        """Stop the buffer; the stream is closed too unless another sink uses it."""
+        self._closed = True
+        self.stream.remove_sink(self)
+        if not self.stream.has_sinks():
+            self.stream.close()
+        self._server.shutdown()
+        self._server.server_close()
+        if self.ring is not None:
+            self.ring.close()
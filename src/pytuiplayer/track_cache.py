@@ -0,0 +1,226 @@
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from pytuiplayer.remote import ConnectionPool
+from pytuiplayer.storage import cache_dir
+
+# Bytes read from the network per write to disk
+CHUNK_SIZE = 256 * 1024
+# Default size cap of the cache (PYTUIP_TRACK_CACHE_MB overrides it in the app)
+DEFAULT_MAX_BYTES = 1 << 30
+# Partial downloads untouched for this long are deleted at startup (seconds)
+PART_MAX_AGE = 7 * 24 * 3600
+
+
+class TrackCache:
+    """Size-capped LRU disk cache of remote tracks (`http(s)://` playlist entries).
+
+    - `prefetch(urls)` downloads tracks ahead of playback, at most
+      `max_workers` at a time, in the order given.
+    - `path(url)` is the local copy of a completely downloaded track (and
+      marks it as recently used), or None.
+    - An interrupted download keeps its `.part` file and is resumed with a
+      `Range` request, guarded by `If-Range` so a changed file starts over.
+      At startup, parts older than `PART_MAX_AGE` and the oldest parts
+      beyond `max_track_bytes` in total are deleted.
+    - Once the cache grows past `max_bytes` the least recently used tracks
+      are deleted, except the one `pin()`ned as playing.
+
+    Responses without a `Content-Length` (live streams) and tracks larger
+    than `max_track_bytes` are not cached.
+    """
+
+    def __init__(self, directory=None, max_bytes: int = DEFAULT_MAX_BYTES, max_workers: int = 2,
+                 pool: ConnectionPool | None = None):
+        self.directory = Path(directory) if directory is not None else cache_dir() / "tracks"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_track_bytes = max_bytes // 4
+        self._pool = pool or ConnectionPool()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pytuip-tracks")
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # file name -> size, least recently used first
+        self._size = 0
+        self._inflight = {}  # url -> Future
+        self._uncacheable = set()  # urls of live streams and oversized tracks
+        self._pinned = None  # file name of the track playing
+        self._closed = False
+        self._scan()
+
+    def _scan(self) -> None:
+        found, parts, metas = [], [], set()
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    if entry.name.endswith(".json"):
+                        metas.add(entry.name)
+                        continue
+                    st = entry.stat()
+                    if entry.name.endswith(".part"):
+                        parts.append((st.st_mtime, entry.name, st.st_size))
+                    else:
+                        found.append((st.st_mtime, entry.name, st.st_size))
+        except OSError:
+            return
+        for _, name, size in sorted(found):
+            self._files[name] = size
+            self._size += size
+        self._expire_parts(parts, metas)
+
+    def _expire_parts(self, parts, metas) -> None:
+        # abandoned downloads are outside the LRU; keep the newest ones that
+        # fit in one track's worth of bytes and are younger than PART_MAX_AGE
+        budget = self.max_track_bytes
+        cutoff = time.time() - PART_MAX_AGE
+        stale = []
+        for mtime, name, size in sorted(parts, reverse=True):
+            if mtime < cutoff or size > budget:
+                stale.append(name)
+            else:
+                budget -= size
+                metas.discard(name + ".json")
+        # and the resume info of parts that are gone
+        stale += [name[:-len(".json")] for name in metas if name.endswith(".part.json")]
+        for name in stale:
+            for path in (self.directory / name, self.directory / f"{name}.json"):
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+    def _name(self, url: str) -> str:
+        # keep the extension so mpv and tag readers see the format
+        suffix = Path(urlsplit(url).path).suffix.lower()
+        if not (suffix[1:].isalnum() and len(suffix) <= 6):
+            suffix = ""
+        return self._key(url) + suffix
+
+    def path(self, url: str) -> Path | None:
+        """The cached copy of `url`, or None if it is not (completely) downloaded."""
+        name = self._name(url)
+        with self._lock:
+            if name not in self._files:
+                return None
+            self._files.move_to_end(name)
+        path = self.directory / name
+        try:
+            # the mtime is the LRU order across restarts; given explicitly, as
+            # the file system's own timestamps are too coarse to order by
+            now = time.time_ns()
+            os.utime(path, ns=(now, now))
+        except OSError:
+            with self._lock:
+                self._size -= self._files.pop(name, 0)
+            return None
+        return path
+
+    def pin(self, url: str | None) -> None:
+        """Keep `url` (the track playing) out of eviction; None releases it."""
+        with self._lock:
+            self._pinned = self._name(url) if url else None
+
+    def prefetch(self, urls) -> None:
+        """Download the tracks of `urls` that are not cached or on their way."""
+        for url in urls:
+            if not url.startswith(("http://", "https://")):
+                continue
+            with self._lock:
+                if (self._closed or url in self._inflight or url in self._uncacheable
+                        or self._name(url) in self._files):
+                    continue
+                self._inflight[url] = self._executor.submit(self._download, url)
+
+    def is_downloading(self, url: str) -> bool:
+        with self._lock:
+            return url in self._inflight
+
+    def _download(self, url: str) -> None:
+        key = self._key(url)
+        part = self.directory / f"{key}.part"
+        meta_path = self.directory / f"{key}.part.json"
+        try:
+            try:
+                have = part.stat().st_size
+                validator = json.loads(meta_path.read_text()).get("validator")
+            except (OSError, ValueError):
+                have, validator = 0, None
+            headers = {}
+            if have and validator:
+                headers = {"Range": f"bytes={have}-", "If-Range": validator}
+            with self._pool.open(url, headers) as response:
+                if response.status == 206 and headers:
+                    mode = "ab"
+                elif response.status == 200:
+                    have, mode = 0, "wb"
+                else:
+                    raise OSError(f"HTTP {response.status} {response.reason}")
+                length = response.getheader("Content-Length")
+                total = have + int(length) if length and length.isdigit() else None
+                if total is None or response.getheader("icy-metaint") or total > self.max_track_bytes:
+                    with self._lock:
+                        self._uncacheable.add(url)
+                    return
+                validator = response.getheader("ETag") or response.getheader("Last-Modified")
+                meta_path.write_text(json.dumps({"url": url, "validator": validator}))
+                buffer = memoryview(bytearray(CHUNK_SIZE))
+                with open(part, mode) as f:
+                    while not self._closed:
+                        n = response.readinto(buffer)
+                        if not n:
+                            break
+                        f.write(buffer[:n])
+            if self._closed or part.stat().st_size != total:
+                return  # the part is resumed next time
+            name = self._name(url)
+            os.replace(part, self.directory / name)
+            meta_path.unlink(missing_ok=True)
+            with self._lock:
+                self._size += total - self._files.pop(name, 0)
+                self._files[name] = total
+            self._evict()
+        except (OSError, http.client.HTTPException) as exc:
+            print(f"[ERROR] Could not cache {url}: {exc}")
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _evict(self) -> None:
+        victims = []
+        with self._lock:
+            for name in list(self._files):
+                if self._size <= self.max_bytes:
+                    break
+                if name == self._pinned:
+                    continue
+                self._size -= self._files.pop(name)
+                victims.append(name)
+        for name in victims:
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                pass
+
+    @property
+    def size(self) -> int:
+        """Bytes of completely downloaded tracks in the cache."""
+        return self._size
+
+    def close(self, wait: bool = False) -> None:
+        """Stop downloading; partial downloads are kept for resuming."""
+        self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._pool.close()
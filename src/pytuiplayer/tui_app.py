@@ -2,10 +2,12 @@ from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, Button, Label, ListView, ListItem, DirectoryTree, RadioSet, RadioButton
 from textual.binding import Binding
 from textual.containers import Horizontal, Vertical
+from textual.css.query import NoMatches
 from pathlib import Path
 import os
 from pytuiplayer.mpv_player import MPVPlayer
 from pytuiplayer.station_player import StationPlayer
+from pytuiplayer.dir_cache import AUDIO_EXTENSIONS, DirectoryListingCache
 import json
 from textual.widgets import Static
 from textual.message import Message
@@ -127,10 +129,29 @@ class NowPlayingMessage(Message):
         self.source = source
         self.state = state
 
+
+class StreamTitleChanged(Message):
+    """The playing station's `StreamTitle` changed; posted from the thread
+    that read it (`station` is None when mpv reported it)."""
+
+    def __init__(self, station: str | None, title: str):
+        super().__init__()
+        self.station = station
+        self.title = title
+
+
 class ProgressBar(Static):
     progress = reactive(0.0)
     duration = reactive(0.0)
     meta = reactive("")
+    # (seconds behind the live edge, seconds buffered) of a timeshifted
+    # station, see `pytuiplayer.timeshift`; None otherwise
+    live = reactive(None)
+    # Per-bucket peaks (bytes, 0-255) of the current local track, see `pytuiplayer.waveform`
+    waveform = reactive(None)
+
+    WIDTH = 160
+    WAVE_CHARS = "▁▂▃▄▅▆▇█"
 
     def _fmt_mmss(self, seconds: float | None) -> str:
         if not seconds or seconds <= 0:
@@ -139,6 +160,8 @@ class ProgressBar(Static):
         return f"{m:02d}:{s:02d}"
 
     def render(self) -> str:
+        if self.live is not None:
+            return self._render_live()
         # Unknown duration -> if we have radio metadata, show it on the progress area
         if not self.duration or self.duration <= 0:
             if self.meta:
@@ -154,14 +177,127 @@ class ProgressBar(Static):
         except ZeroDivisionError:
             ratio = 0.0
 
-        filled = int(ratio * 160)
-        bar = "█" * filled + "░" * (160 - filled)
-
+        filled = int(ratio * self.WIDTH)
         elapsed = self._fmt_mmss(self.progress)
         total = self._fmt_mmss(self.duration)
+        if self.waveform:
+            return self._render_waveform(filled, f" {elapsed} / {total}")
+
+        bar = "█" * filled + "░" * (self.WIDTH - filled)
 
         return f"[{bar}] {elapsed} / {total}"
 
+    def _render_live(self) -> str:
+        """The timeshift buffer, filled up to the playing position, which is
+        shown relative to the live edge."""
+        behind, buffered = self.live
+        ratio = max(0.0, min(1.0, (buffered - behind) / buffered)) if buffered > 0 else 1.0
+        filled = int(ratio * self.WIDTH)
+        bar = "█" * filled + "░" * (self.WIDTH - filled)
+        where = f"-{self._fmt_mmss(behind)}" if behind >= 1 else "LIVE"
+        meta = f" · {self.meta}" if self.meta else ""
+        return f"[{bar}] {where} / {self._fmt_mmss(buffered)}{meta}"
+
+    def _render_waveform(self, filled: int, suffix: str):
+        """Draw the track's peaks as block characters, dimmed past the playhead."""
+        from rich.text import Text
+        peaks = self.waveform
+        n = len(peaks)
+        steps = len(self.WAVE_CHARS) - 1
+        columns = []
+        for col in range(self.WIDTH):
+            lo = col * n // self.WIDTH
+            hi = max(lo + 1, (col + 1) * n // self.WIDTH)
+            columns.append(self.WAVE_CHARS[max(peaks[lo:hi]) * steps // 255])
+        wave = "".join(columns)
+        text = Text("[")
+        text.append(wave[:filled])
+        text.append(wave[filled:], style="dim")
+        text.append("]" + suffix)
+        return text
+
+
+class SpectrumMeter(Static):
+    """Spectrum bars and RMS level of the playing audio, drawn at a fixed frame rate.
+
+    PCM comes from `source` (an object with `read(frames)`, see
+    `pytuiplayer.spectrum`). Each tick analyses the latest block with a
+    vectorised FFT. A tick is dropped when the previous frame has not been
+    painted yet, or to pay back a frame that overran the budget, so slow
+    terminals see fewer frames rather than a backlog. The timer is paused
+    while the widget is hidden, and ticks return early while nothing is
+    playing. `frame_ms`, `avg_frame_ms` and `dropped_frames` are kept for
+    profiling.
+    """
+
+    FPS = 15
+
+    def __init__(self, source=None, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.analyzer = None
+        self.frame_ms = 0.0
+        self.avg_frame_ms = 0.0
+        self.frames = 0
+        self.dropped_frames = 0
+        self._text = ""
+        self._painting = False
+        self._skip = 0
+        self._timer = None
+
+    def on_mount(self) -> None:
+        self._timer = self.set_interval(1 / self.FPS, self._tick, pause=not self.display)
+
+    def on_show(self) -> None:
+        if self._timer is not None:
+            self._timer.resume()
+
+    def on_hide(self) -> None:
+        if self._timer is not None:
+            self._timer.pause()
+
+    def _tick(self) -> None:
+        if self._painting or self._skip:
+            self._skip = max(0, self._skip - 1)
+            self.dropped_frames += 1
+            return
+        if self.source is None:
+            return
+        import time
+        start = time.perf_counter()
+        try:
+            if self.analyzer is None:
+                from pytuiplayer.spectrum import SpectrumAnalyzer
+                self.analyzer = SpectrumAnalyzer(sample_rate=getattr(self.source, "sample_rate", 22050))
+            samples = self.source.read(self.analyzer.fft_size * 2)
+        except ImportError:
+            self._text = "Spectrum needs NumPy"
+            self.source = None
+            self.refresh()
+            return
+        if samples is None:
+            # paused, idle or no tap for this source: keep the last frame
+            return
+        from pytuiplayer.spectrum import render_bars
+        levels, rms_db, peak = self.analyzer.analyze(samples)
+        self._text = f"{render_bars(levels)}\nRMS {rms_db:6.1f} dB  peak {peak:4.2f}"
+        self._painting = True
+        self.refresh()
+        self.call_after_refresh(self._painted)
+        self.frame_ms = (time.perf_counter() - start) * 1000
+        self.avg_frame_ms = self.frame_ms if not self.frames else 0.9 * self.avg_frame_ms + 0.1 * self.frame_ms
+        self.frames += 1
+        # a frame that took longer than the budget costs the following ticks
+        self._skip = int(self.frame_ms * self.FPS / 1000)
+        if os.getenv("PYTUIP_DEBUG"):
+            self.border_subtitle = f"{self.avg_frame_ms:.1f} ms/frame · {self.dropped_frames} dropped"
+
+    def _painted(self) -> None:
+        self._painting = False
+
+    def render(self) -> str:
+        return self._text
+
 
 class VolumeIndicator(Static):
     volume = reactive(50)
@@ -171,6 +307,39 @@ class VolumeIndicator(Static):
         return f"Volume: {vol}"
 
 
+class GroupHeader(ListItem):
+    """A collapsible album/artist header in `#local-list` above its `rows`.
+
+    The title is asked from `describe` the first time the header is drawn,
+    so only the headers scrolled into view are worked out.
+    """
+
+    def __init__(self, rows, describe):
+        super().__init__(_GroupTitle())
+        self.data = None
+        self.rows = rows
+        self.expanded = False
+        self._describe = describe
+        self._title = None
+
+    def title(self) -> str:
+        if self._title is None:
+            self._title = self._describe()
+        return f"{'▾' if self.expanded else '▸'} {self._title}"
+
+    def toggle(self) -> None:
+        self.expanded = not self.expanded
+        for item in self.rows:
+            item.display = self.expanded
+            item.disabled = not self.expanded
+        self.query_one(_GroupTitle).refresh()
+
+
+class _GroupTitle(Static):
+    def render(self) -> str:
+        return self.parent.title()
+
+
 class MusicPlayerApp(App):
     CSS_PATH = "musicplayer_tui.css"
     BINDINGS = [
@@ -181,24 +350,104 @@ class MusicPlayerApp(App):
         Binding("s", "stop", "Stop"),
         Binding("h", "seek_backward", "Seek -5s"),
         Binding("l", "seek_forward", "Seek +5s"),
+        Binding("L", "go_live", description="Live"),
+        Binding("R", "toggle_recording", description="Record"),
         Binding("1", "seek_to_10", description="Seek to 10%"),
         Binding("5", "seek_to_50", description="Seek to 50%"),
         Binding("9", "seek_to_90", description="Seek to 90%"),
         Binding("+", "volume_up", description="Volume +"),
         Binding("-", "volume_down", description="Volume -"),
         Binding("m", "toggle_mute", description="Mute toggle"),
+        Binding("n", "next_track", description="Next"),
+        Binding("b", "prev_track", description="Previous"),
+        Binding("z", "toggle_shuffle", description="Shuffle"),
+        Binding("r", "cycle_repeat", description="Repeat"),
+        Binding("e", "enqueue", description="Enqueue"),
+        Binding("u", "toggle_queue", description="Queue"),
+        Binding("v", "toggle_spectrum", description="Spectrum"),
+        Binding("d", "toggle_duplicates", description="Duplicates"),
+        Binding("/", "focus_search", description="Search"),
+        Binding("o", "cycle_sort", description="Sort"),
+        Binding("g", "cycle_grouping", description="Group"),
     ]
 
     # Maximum number of playlist items to load by default (safety for very large M3U files)
     MAX_PLAYLIST_ITEMS = 2000
 
+    # Seconds between background re-walks of the music library (Local mode)
+    LIBRARY_RESCAN_INTERVAL = 300
+
+    # Entries shown in the queue view (the queue itself is unbounded)
+    QUEUE_VIEW_SIZE = 50
+    # Queue entries after the current one whose waveforms are generated ahead
+    WAVEFORM_LOOKAHEAD = 3
+    # Queue entries after the current one whose remote tracks are downloaded ahead
+    TRACK_PREFETCH_LOOKAHEAD = 3
+    # Seconds between batched label updates from the metadata readers
+    ENRICH_INTERVAL = 0.1
+
+    # Seconds `h`/`l` move within a timeshifted station
+    TIMESHIFT_STEP = 5
+
+    # Seconds between checks for the end of a playing CUE sheet track
+    CUE_WATCH_INTERVAL = 0.1
+
+    # Seconds between checks of the smart playlist on screen
+    SMART_REFRESH_INTERVAL = 1.0
+
+    # Seconds of typing pause before a search runs, and how many results are listed
+    SEARCH_DEBOUNCE = 0.15
+    SEARCH_LIMIT = 200
+
+    # Seconds between session snapshots, and the most queue entries saved
+    SESSION_SAVE_INTERVAL = 30
+    SESSION_QUEUE_LIMIT = 10000
+
     def __init__(self):
         super().__init__()
-        self.mpv = MPVPlayer()
+        # PYTUIP_BACKEND=sim selects the simulated backend (headless demo mode);
+        # PYTUIP_SIM_MANIFEST optionally points it at a JSON timeline manifest.
+        sim_kwargs = {}
+        if os.getenv("PYTUIP_SIM_MANIFEST"):
+            sim_kwargs["manifest"] = os.getenv("PYTUIP_SIM_MANIFEST")
+        self.mpv = MPVPlayer(backend=os.getenv("PYTUIP_BACKEND") or None, **sim_kwargs)
         self.stations = None
         self.currently_playing = None
         self.option_mode = "radio"  # default
-        self.stations_file = Path(__file__).parent / "stations.json"
+        # PYTUIP_STATIONS (or --stations) names another station list: a file
+        # or an http(s) URL, fetched through `remote` (see `load_stations`)
+        stations_source = os.getenv("PYTUIP_STATIONS")
+        if stations_source and stations_source.startswith(("http://", "https://")):
+            self.stations_file = stations_source
+        else:
+            self.stations_file = Path(stations_source) if stations_source else Path(__file__).parent / "stations.json"
+        # PYTUIP_PLAYLIST (or --playlist): a playlist file or URL opened in Local mode
+        self.start_playlist = os.getenv("PYTUIP_PLAYLIST") or None
+        # Timeshift of the playing station (see `play_station`):
+        # PYTUIP_TIMESHIFT_MINUTES of it are kept to pause and rewind, 0 turns
+        # it off. Off by default with the simulated backend, which cannot play
+        # the buffer's local stream.
+        default_minutes = "0" if os.getenv("PYTUIP_BACKEND") == "sim" else "30"
+        try:
+            self.timeshift_minutes = float(os.getenv("PYTUIP_TIMESHIFT_MINUTES", default_minutes))
+        except ValueError:
+            self.timeshift_minutes = float(default_minutes)
+        self._timeshift = None
+        # Recording of the playing station (see `action_toggle_recording`),
+        # and the stream it reads when the station is not timeshifted
+        self._recorder = None
+        self._record_stream = None
+        # Stream titles as they change: from the timeshift's connection, or
+        # from mpv's metadata events (`_metadata_player` is the player
+        # observed); the last ones heard on each station are kept
+        from pytuiplayer.icy import TitleHistory
+        self.title_history = TitleHistory()
+        self._metadata_player = None
+
+        # Downloaded playlists and station lists (see `remote`), and remote
+        # playlist tracks (see `track_cache`; PYTUIP_TRACK_CACHE_MB=0 disables it)
+        self._remote = None
+        self._track_cache = None
         self.current_title = "Nothing playing"
 
         # Volume state
@@ -209,6 +458,91 @@ class MusicPlayerApp(App):
         # Playlist loading controls (can be overridden in tests or by callers)
         self.max_playlist_items = self.MAX_PLAYLIST_ITEMS
         self.playlist_batch_size = 200
+        self.station_batch_size = 50
+
+        # Network-share mode (PYTUIP_NETWORK_SHARE=1 or --network-share): batch
+        # directory reads, prefetch neighbours and cache unreadable paths.
+        self.network_share = bool(os.getenv("PYTUIP_NETWORK_SHARE"))
+        self.prefetcher = None
+        if self.network_share:
+            from pytuiplayer.netfs import DirectoryPrefetcher
+            self.prefetcher = DirectoryPrefetcher()
+
+        # Recently viewed directory listings (LRU, revalidated by mtime)
+        self.dir_cache = DirectoryListingCache(prefetcher=self.prefetcher)
+        self._local_list_dir = None
+
+        # Local-mode panels are composed lazily (see `_ensure_local_panels`)
+        self._local_panels_mounted = False
+        self.library_index = None
+        # Per-track tags and the full-text index over them, loaded by the first scan
+        self.track_table = None
+        self.search_index = None
+        # Smart playlists (see `load_smart_playlist`); `_smart_view` is the
+        # one shown in `#local-list`
+        self.smart_playlists = None
+        self._smart_view = None
+        self._smart_shown = None
+        self._smart_timer = None
+        # Order and grouping of `#local-list` (see `_arrange_local_list`);
+        # `_local_items` are its rows in the order they were listed
+        self.local_sort = "order"
+        self.local_group = None
+        self._local_items = []
+        self._local_sorter = None
+        self._local_headers = []
+
+        # Play queue (see `queue`); entries are plain (source, label) pairs
+        self._queue = None
+        self._session_queue = None  # saved queue, restored after first paint
+        self._track_started = False
+        self._queue_view_version = None
+
+        # Listening history (see `history`); stations are listed in
+        # `_station_order` so frequently played ones can come first
+        self._history = None
+        self._station_order = []
+
+        # Loudness normalisation (PYTUIP_NORMALIZE=0 turns it off): analysed
+        # gain per local track, a slowly adapting gain for radio
+        self.normalize = os.getenv("PYTUIP_NORMALIZE", "1") != "0"
+        self._radio_loudness = None
+
+        # Waveform overviews of local tracks, generated in a worker process
+        # for the current track and the next queue entries
+        self._waveforms = None
+        self._waveform_path = None
+
+        # Tags and durations of playlist rows, read in the background (see
+        # `_start_enrichment`)
+        self._enricher = None
+        self._enrich_timer = None
+        self._enrich_items = []
+        self._enrich_rows = {}
+        self._enrich_totals = [0, 0.0]
+        self._enrich_view = None
+        self._enrich_title = "Local Music List"
+
+        # The CUE sheet track playing (see `_play_cue_track`), and the timer
+        # that moves on at its end
+        self._cue_track = None
+        self._cue_timer = None
+
+        # Set by `__main__.main(["--profile-startup"])`
+        self.startup_profiler = None
+
+        # Last session: restored here, before stations and lists are loaded,
+        # so "play" can resume right away (see `_resume_playback`)
+        from pytuiplayer.session import SessionStore
+        self.session_store = SessionStore()
+        self._playing = None  # {"kind", "source", "label"} of what is playing
+        self._resume = None
+        self._session_local_dir = None
+        self._restore_selection = {}  # list id -> [item id, scroll_y], applied once
+        self._saved_lists = {}  # last known [item id, scroll_y] per list
+        self._restore_session(self.session_store.load())
+        if self.start_playlist:
+            self.option_mode = "local"
 
 
     def compose(self) -> ComposeResult:
@@ -218,6 +552,10 @@ class MusicPlayerApp(App):
 
         yield NowPlaying(id="now-playing")
         yield ProgressBar(id="progress")
+        # hidden until toggled with "v"; costs nothing while hidden
+        meter = SpectrumMeter(id="spectrum")
+        meter.display = False
+        yield meter
             
         # Playback controls
         with Horizontal(id="controls"):    
@@ -232,8 +570,8 @@ class MusicPlayerApp(App):
             # Left sidebar: options
             with Vertical(id="sidebar") as sidebar: 
                 yield RadioSet(
-                    RadioButton("Radio", id="radio-option", value=True),
-                    RadioButton("Local", id="local-option", value=False),
+                    RadioButton("Radio", id="radio-option", value=self.option_mode == "radio"),
+                    RadioButton("Local", id="local-option", value=self.option_mode == "local"),
                     id="option-set"
                 )
                 sidebar.border_title = "Mode Selection"
@@ -242,64 +580,256 @@ class MusicPlayerApp(App):
             with Vertical(id="content"):
                 with ListView(id="station-list") as station_list:
                     station_list.border_title = "Radio Stations"    
-                with DirectoryTree(str(Path.home()), id="directory-tree") as dir_tree:
-                    dir_tree.border_title = "Music Browser"
-                with ListView(id="local-list") as local_list:
-                    local_list.border_title = "Local Music List"
-
+                # `#directory-tree` and `#local-list` are only needed in Local
+                # mode; see `_ensure_local_panels`.
+        self._profile_mark("composed")
+
+    @property
+    def queue(self):
+        """The `PlayQueue`, created on first use to keep its imports off startup
+        (with the last session's queue, see `on_ready`)."""
+        if self._queue is None:
+            from pytuiplayer.play_queue import PlayQueue
+            self._queue = PlayQueue()
+            saved, self._session_queue = self._session_queue, None
+            if saved:
+                try:
+                    self._queue.restore(saved)
+                except (TypeError, ValueError, AttributeError) as exc:
+                    print(f"[ERROR] Ignoring invalid saved queue: {exc}")
+        return self._queue
+
+    @property
+    def remote(self):
+        """The `RemoteCache` for downloaded playlists, created on first use."""
+        if self._remote is None:
+            from pytuiplayer.remote import RemoteCache
+            self._remote = RemoteCache()
+        return self._remote
+
+    @property
+    def track_cache(self):
+        """The `TrackCache` for remote tracks, created on first use; None when disabled."""
+        if self._track_cache is None:
+            try:
+                megabytes = int(os.getenv("PYTUIP_TRACK_CACHE_MB", "1024"))
+            except ValueError:
+                megabytes = 1024
+            if megabytes <= 0:
+                return None
+            from pytuiplayer.track_cache import TrackCache
+            self._track_cache = TrackCache(max_bytes=megabytes << 20)
+        return self._track_cache
+
+    def _prefetch_tracks(self, source: str) -> None:
+        """Download `source` and the next remote queue entries into the track cache."""
+        cache = self.track_cache
+        if cache is None:
+            return
+        wanted = [source]
+        if self._queue is not None:
+            wanted += [str(s) for _, s, _ in self._queue.upcoming(self.TRACK_PREFETCH_LOOKAHEAD + 1)]
+        cache.prefetch(dict.fromkeys(wanted))
+
+    @property
+    def history(self):
+        """The `HistoryLog`, loaded on first use."""
+        if self._history is None:
+            from pytuiplayer.history import HistoryLog
+            self._history = HistoryLog().load()
+        return self._history
+
+    def _history_event(self, name: str) -> None:
+        """Forward stop/pause/resume to the history log if anything was played."""
+        if self._history is not None:
+            getattr(self._history, name)()
+
+    def _profile_mark(self, phase: str) -> None:
+        if self.startup_profiler is not None:
+            self.startup_profiler.mark(phase)
+
+    async def _ensure_local_panels(self) -> None:
+        """Mount `#search-box`, `#directory-tree` and `#local-list` the first time they are needed.
+
+        Building the tree reads the home directory, so it is deferred until the
+        user switches to Local mode. Once mounted the panels are kept and only
+        hidden/shown afterwards.
+        """
+        if self._local_panels_mounted:
+            return
+        try:
+            self.query_one("#local-list")
+            self._local_panels_mounted = True
+            return
+        except Exception:
+            pass
+        from textual.widgets import Input
+        from pytuiplayer.library_index import LibraryIndex
+        from pytuiplayer.music_tree import MusicDirectoryTree
+        self.library_index = LibraryIndex().load()
+        dir_tree = MusicDirectoryTree(
+            str(Path.home()), index=self.library_index, prefetcher=self.prefetcher, id="directory-tree"
+        )
+        dir_tree.border_title = "Music Browser"
+        local_list = ListView(id="local-list")
+        local_list.border_title = "Local Music List"
+        search_box = Input(id="search-box", placeholder="Search library…  (/)")
+        await self.query_one("#content").mount(search_box, dir_tree, local_list)
+        self._local_panels_mounted = True
+        # Walk the library in the background; unchanged directories cost one
+        # stat each, so re-walking periodically keeps counts current.
+        self._start_library_scan()
+        self.set_interval(self.LIBRARY_RESCAN_INTERVAL, self._start_library_scan)
+
+    def _start_library_scan(self) -> None:
+        self.run_worker(self._scan_library, thread=True, group="library-scan", exclusive=True)
+
+    def _scan_library(self) -> None:
+        """Worker thread: refresh `self.library_index` and redraw the tree if anything changed."""
+        from textual.worker import get_current_worker
+        from pytuiplayer.library_index import LibraryWalker
+        worker = get_current_worker()
+        walker = LibraryWalker(self.library_index)
+        walker.walk(Path.home(), should_stop=lambda: worker.is_cancelled)
+        if walker.stopped:
+            return  # the next scan takes over; nothing half-done is saved
+        self.library_index.save()
+        self._update_library_tables(lambda: worker.is_cancelled)
+        if self.normalize:
+            from pytuiplayer.loudness import analyze_library
+            analyze_library(self.library_index, should_stop=lambda: worker.is_cancelled)
+        if walker.rescanned and not worker.is_cancelled:
+            try:
+                self.call_from_thread(self.query_one("#directory-tree", DirectoryTree).reload)
+            except Exception:
+                pass
 
+    def _update_library_tables(self, should_stop) -> None:
+        """Worker thread: bring the track table, smart playlists and search index
+        up to date with `self.library_index`; only new and changed files are read."""
+        from pytuiplayer.search_index import SearchIndex
+        from pytuiplayer.smart_playlists import TrackTable
+        if self.track_table is None:
+            self.track_table = TrackTable().load()
+        if self.search_index is None:
+            # tags come from the track table, so each file is read once
+            self.search_index = SearchIndex(read_tags=self.track_table.tags).load()
+        from itertools import chain
+        try:
+            tracks = chain(self.library_index.tracks(), self.library_index.cue_tracks())
+            changed, removed = self.track_table.update(tracks, should_stop=should_stop)
+            if self.smart_playlists is not None:
+                self.smart_playlists.tracks_changed(changed, removed)
+            tracks = chain(self.library_index.tracks(), self.library_index.cue_tracks())
+            self.search_index.update(tracks, should_stop=should_stop)
+        except Exception as exc:
+            print(f"[ERROR] Failed to update the library tables: {exc}")
+        if not should_stop():
+            self.track_table.save()
+            self.search_index.save()
+
+    def _apply_mode_visibility(self, radio: bool) -> None:
+        """Show the widgets of the active mode and hide the others.
+
+        Uses both `display` (sends Hide/Show events) and `visible` for
+        compatibility. Local panels that were not mounted yet are skipped.
+        """
+        station = self.query_one("#station-list")
+        panels = []
+        for selector in ("#search-box", "#local-list", "#directory-tree"):
+            try:
+                panels.append(self.query_one(selector))
+            except Exception:
+                continue
+        shown, hidden = ([station], panels) if radio else (panels, [station])
+        for w in shown:
+            try: w.display = True
+            except Exception: pass
+            w.visible = True
+            w.disabled = False
+        for w in hidden:
+            try: w.display = False
+            except Exception: pass
+            w.visible = False
+            w.disabled = True
 
     async def on_mount(self) -> None:
         self.title = "Music Player"
-        await self.load_stations(self.stations_file)
-        # initialize player volume (we keep internal volume handling but hide UI controls)
-        try:
-            self.mpv.set_volume(self.volume)
-        except Exception:
-            pass
+        # Paint first: stations are read and mounted in batches by a worker
+        # so the list fills in progressively instead of delaying startup.
+        self.run_worker(self.load_stations(self.stations_file), group="stations", exclusive=True)
         self.update_volume_ui()
         # progress update and metadata polling
         self.set_interval(0.5, self.update_progress)
         self.set_interval(1.0, self._refresh_metadata)
+        self.set_interval(1.0, self._update_radio_gain)
+        self.set_interval(self.SESSION_SAVE_INTERVAL, self._save_session)
 
-        # Ensure only the active list is visible at startup. Use both `display`
-        # (sends Hide/Show events) and `visible` for compatibility.
-        try:
-            station = self.query_one("#station-list")
-            local = self.query_one("#local-list")
-            tree = self.query_one("#directory-tree")
-            if self.option_mode == "radio":
-                try: station.display = True
-                except Exception: pass
-                station.visible = True
-                station.disabled = False
-
-                for w in (local, tree):
-                    try: w.display = False
-                    except Exception: pass
-                    w.visible = False
-                    w.disabled = True
-            else:
-                try: local.display = True
-                except Exception: pass
-                local.visible = True
-                local.disabled = False
-                try: tree.display = True
-                except Exception: pass
-                tree.visible = True
-                tree.disabled = False
-
-                try: station.display = False
-                except Exception: pass
-                station.visible = False
-                station.disabled = True
+        # Ensure only the active list is visible at startup.
+        try:
+            if self.option_mode != "radio":
+                await self._ensure_local_panels()
+                if self.start_playlist:
+                    self.run_worker(self.open_playlist(self.start_playlist), group="local-restore")
+                else:
+                    self.run_worker(self.load_local_files(self._session_local_dir or Path.home()), group="local-restore")
+            self._apply_mode_visibility(self.option_mode == "radio")
         except Exception:
             pass
-        # Initialize Now Playing display from internal state
+        # Initialize Now Playing display from internal state; a restored
+        # session shows its track as paused until "play" resumes it
         try:
-            self.update_now_playing(self.current_title, "", "⏹")
+            self.update_now_playing(self.current_title, "", "⏸" if self._resume else "⏹")
         except Exception:
             pass
+        self._profile_mark("mounted")
+
+    def on_ready(self) -> None:
+        """Called once the first frame has been painted."""
+        self._profile_mark("first paint")
+        if self.startup_profiler is not None:
+            self.exit()
+            return
+        if self._session_queue:
+            _ = self.queue
+        # Initialize player volume only now: the player (and libmpv) is created
+        # on first use, which keeps it off the startup path.
+        try:
+            getattr(self.mpv, "player", None)
+        except (ImportError, OSError) as exc:
+            # stdout is captured while the app runs, so report it in the UI
+            self.update_now_playing("Playback unavailable: libmpv not found", "", "⚠")
+            self.notify(
+                f"Could not load libmpv ({exc}). Install mpv, or set PYTUIP_BACKEND=sim for the demo backend.",
+                severity="error",
+                timeout=30,
+            )
+            return
+        try:
+            self.mpv.set_volume(0 if self.muted else self.volume)
+        except Exception:
+            pass
+
+    async def action_quit(self) -> None:
+        self._save_session(wait=True)
+        await super().action_quit()
+
+    def on_unmount(self) -> None:
+        self._save_session(wait=True)
+        if self._history is not None:
+            self._history.close()
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        if self._waveforms is not None:
+            self._waveforms.shutdown()
+        if self._enricher is not None:
+            self._enricher.close()
+        if self._remote is not None:
+            self._remote.close()
+        if self._track_cache is not None:
+            self._track_cache.close()
+        self._stop_recording()
+        self._stop_timeshift()
 
     def update_volume_ui(self):
         try:
@@ -350,18 +880,42 @@ class MusicPlayerApp(App):
 
 
     async def load_stations(self, path: Path):
+        """Load the station list from `path` (a file or an http(s) URL) and show it.
+
+        A URL is served from its cached copy, or the bundled list until the
+        first download, and revalidated in the background.
+        """
+        import asyncio
+        # read the history index off the event loop; it orders the list
+        await asyncio.to_thread(lambda: self.history)
+        if isinstance(path, str):
+            cached = await asyncio.to_thread(self.remote.cached, path)
+            self.stations = StationPlayer(self.mpv)
+            if cached is not None:
+                self.stations.update_stations(cached)
+            await self.load_stations_ui()
+            self._restore_list_position("station-list")
+            self.run_worker(self._refresh_remote_stations(path), group="remote-stations", exclusive=True)
+            return
         try:
             with open(path, "r") as f:
                 self.stations = StationPlayer(self.mpv, stations=json.load(f))
         except FileNotFoundError:
             default_file = Path(__file__).parent / "stations.json"
-            self.stations = StationPlayer(self.mpv, stations=json.load(default_file))
-        station_list = self.query_one("#station-list", ListView)
-        station_list.clear()
-        for idx, station in enumerate(self.stations.stations):
-            item = ListItem(Label(f"{idx}: {station['name']}"))
-            item.data = station
-            await station_list.mount(item)
+            self.stations = StationPlayer(self.mpv, stations=json.loads(default_file.read_text()))
+        await self.load_stations_ui()
+        self._restore_list_position("station-list")
+
+    async def _refresh_remote_stations(self, url: str) -> None:
+        """Revalidate a remote station list and show it again if it changed."""
+        import asyncio
+        try:
+            path, changed = await asyncio.to_thread(self.remote.fetch, url)
+        except OSError as exc:
+            self.notify(f"Could not fetch stations: {exc}", severity="warning")
+            return
+        if changed and self.stations.update_stations(path):
+            await self.load_stations_ui()
 
     async def on_radio_set_changed(self, event):
         radio = event.pressed.id == "radio-option"
@@ -369,38 +923,22 @@ class MusicPlayerApp(App):
 
         if self.option_mode != new_mode:
             self.mpv.stop()
+            self._stop_recording()
+            self._stop_timeshift()
+            self._playing = None
+            self._track_started = False
+            self._history_event("stop")
             self.current_title = "Nothing playing"
             self.update_now_playing("Nothing playing", "", "⏹")
 
         self.option_mode = new_mode
 
+        if not radio:
+            await self._ensure_local_panels()
+
         # Use display/visible/disabled so Textual will emit Hide/Show events
         try:
-            station = self.query_one("#station-list")
-            local = self.query_one("#local-list")
-            tree = self.query_one("#directory-tree")
-            if radio:
-                try: station.display = True
-                except Exception: pass
-                station.visible = True
-                station.disabled = False
-
-                for w in (local, tree):
-                    try: w.display = False
-                    except Exception: pass
-                    w.visible = False
-                    w.disabled = True
-            else:
-                for w in (local, tree):
-                    try: w.display = True
-                    except Exception: pass
-                    w.visible = True
-                    w.disabled = False
-
-                try: station.display = False
-                except Exception: pass
-                station.visible = False
-                station.disabled = True
+            self._apply_mode_visibility(radio)
         except Exception:
             # fallback to previous behavior if query fails
             self.query_one("#station-list").visible = radio
@@ -415,76 +953,176 @@ class MusicPlayerApp(App):
     async def load_local_files(self, path: Path):
         """Populate `#local-list` with local music files (case-insensitive).
 
-        We iterate `path.iterdir()` to support uppercase or mixed-case extensions
-        instead of relying on a single glob pattern.
+        Listings come from `self.dir_cache`: a directory seen recently is shown
+        straight from the cache and revalidated against its mtime in the
+        background; otherwise it is read once with `os.scandir`.
         """
-        local_list = self.query_one("#local-list", ListView)
-        local_list.clear()
-        for file in path.iterdir():
-            # simple case-insensitive suffix check
+        self._local_list_dir = Path(path)
+        cached = self.dir_cache.peek(path)
+        if cached is not None:
+            await self._show_local_files(cached)
             try:
-                if file.suffix.lower() == ".mp3":
-                    item = ListItem(Label(file.name))
-                    item.data = file
-                    await local_list.mount(item)
+                self.run_worker(self._revalidate_local_files(path), group="dir-refresh", exclusive=True)
             except Exception:
-                # ignore files we cannot stat or inspect
-                continue
+                # no running app (unit tests); the cached listing stays
+                pass
+            return
+        try:
+            files = self.dir_cache.load(path)
+        except OSError:
+            files = []
+        await self._show_local_files(files)
 
-    async def load_m3u(self, path: Path):
-        """Load a local M3U playlist into `#local-list` in batches.
+    async def _show_local_files(self, files: list):
+        """Replace `#local-list` with `files`, mounting them in batches.
 
-        - Supports `#EXTINF` metadata lines and resolves relative paths against
-          the playlist file location.
+        Files played most often or most recently are listed first (marked ★).
+        """
+        from pytuiplayer.history import promote
+        local_list = self.query_one("#local-list", ListView)
+        local_list.clear()
+        local_list.border_title = "Local Music List"
+        self._stop_enrichment()
+        self._leave_smart_view()
+        promoted, rest = promote(files, str, self.history.favourites(kind="local"))
+        batch = []
+        items = []
+        for position, file in enumerate(promoted + rest):
+            mark = "★ " if position < len(promoted) else ""
+            item = ListItem(Label(mark + file.name))
+            item.data = file
+            batch.append(item)
+            items.append(item)
+            if len(batch) >= self.playlist_batch_size:
+                await local_list.mount(*batch)
+                batch = []
+        if batch:
+            await local_list.mount(*batch)
+        await self._list_local_items(items)
+        self._restore_list_position("local-list")
+
+    async def _revalidate_local_files(self, path: Path):
+        """Re-check a cached directory off the event loop and redisplay it if it changed."""
+        import asyncio
+        files, changed = await asyncio.to_thread(self.dir_cache.refresh, path)
+        # only redraw if the list still shows this directory
+        if changed and self._local_list_dir == Path(path):
+            await self._show_local_files(files)
+
+    async def load_m3u(self, path: Path, base=None):
+        """Load a local M3U, PLS or XSPF playlist into `#local-list` in batches.
+
+        - Supports `#EXTINF` metadata lines (and PLS/XSPF titles) and resolves
+          relative paths against the playlist file location.
         - Mounts items in batches and yields to the event loop between batches
           to avoid blocking the UI when playlists are large.
         - Respects `self.max_playlist_items` to avoid loading excessively large
           playlists by default.
+
+        `base` is the URL a downloaded playlist came from; its relative
+        entries are resolved against it.
         """
         local_list = self.query_one("#local-list", ListView)
         local_list.clear()
-
-        base = path.parent
+        local_list.border_title = "Local Music List"
+        self._local_list_dir = None
+        self._leave_smart_view()
+        self._local_items = []
+
+        # parsing lives in a separate module that is only imported on first use;
+        # the format (M3U, PLS, XSPF) is told from the file's content
+        from pytuiplayer.playlists import iter_m3u
         try:
-            with open(path, "r", encoding="utf-8", errors="replace") as f:
-                # read lines into memory (OK for typical playlists); we need the
-                # data available after file context closes
-                lines = [l.strip() for l in f if l.strip()]
+            # collect tuples of (source, label) where source may be URL or string path
+            entries = list(iter_m3u(path, self.max_playlist_items, base))
         except Exception:
             return
+        await self._show_playlist_entries(entries, "Local Music List")
 
-        entries = []  # collect tuples of (source, label) where source may be URL or string path
-        metadata_next = None
-        for line in lines:
-            if line.startswith("#EXTINF"):
-                parts = line.split(",", 1)
-                metadata_next = parts[1].strip() if len(parts) > 1 else None
-                continue
-            if line.startswith("#"):
-                continue
-            # Determine whether this is a URL or a local file path. Avoid
-            # resolving local paths at load time to prevent unnecessary IO.
-            if line.startswith(("http://", "https://", "rtmp://", "ftp://")):
-                source = line
-            else:
-                candidate = Path(line)
-                if candidate.is_absolute():
-                    source = str(candidate)
-                else:
-                    # keep a relative/combined path string; resolution is deferred
-                    source = str(base / candidate)
+    async def open_playlist(self, source) -> None:
+        """Open a playlist in `#local-list`: a local file, or an http(s) URL."""
+        from pytuiplayer.playlists import URL_PREFIXES
+        if isinstance(source, str) and source.startswith(URL_PREFIXES):
+            await self.load_remote_playlist(source)
+        else:
+            await self.load_m3u(Path(source))
 
-            label = metadata_next or Path(source).name
-            metadata_next = None
-            entries.append((source, label))
+    async def load_remote_playlist(self, url: str) -> None:
+        """Show a playlist downloaded from `url` in `#local-list`.
 
-            # enforce a hard limit if configured
-            if self.max_playlist_items and len(entries) >= self.max_playlist_items:
-                break
+        The cached copy is listed at once; the download is revalidated with a
+        conditional GET in the background and relisted only when the server
+        sends a new version and the list still shows this playlist.
+        """
+        import asyncio
+        name = Path(url.split("?", 1)[0]).name or url
+        cached = await asyncio.to_thread(self.remote.cached, url)
+        local_list = self.query_one("#local-list", ListView)
+        if cached is not None:
+            await self.load_m3u(cached, base=url)
+        else:
+            local_list.clear()
+            local_list.border_title = f"{name} · downloading…"
+            self._local_list_dir = None
+            self._leave_smart_view()
+            self._stop_enrichment()
+            await self._list_local_items([])
+        shown = self._local_items
+        try:
+            path, changed = await asyncio.to_thread(self.remote.fetch, url)
+        except OSError as exc:
+            if self._local_items is shown:
+                local_list.border_title = f"{name} · {exc}"
+            return
+        if changed and self._local_items is shown:
+            await self.load_m3u(path, base=url)
 
+    async def load_cue(self, path: Path) -> None:
+        """List the tracks of a CUE sheet in `#local-list`.
+
+        Each row is a "<sheet>.cue#<n>" entry; playing it seeks into the
+        sheet's audio image (see `_play_cue_track`).
+        """
+        from pytuiplayer.cue import load_cue
+        local_list = self.query_one("#local-list", ListView)
+        local_list.clear()
+        self._local_list_dir = None
+        self._leave_smart_view()
+        self._local_items = []
+        try:
+            tracks = load_cue(path)[:self.max_playlist_items]
+        except OSError as exc:
+            local_list.border_title = f"CUE · {Path(path).stem} · {exc.strerror or exc}"
+            return
+        title = f"CUE · {next((t.album for t in tracks if t.album), Path(path).stem)}"
+        local_list.border_title = title
+        await self._show_playlist_entries([(t.source, t.label) for t in tracks], title)
+
+    @staticmethod
+    async def _mount_batch(list_view, batch, current=None) -> bool:
+        """Mount `batch` into `list_view` in one call; False (with the batch
+        taken out again) when `current()` says the list moved on meanwhile."""
+        if current is not None and not current():
+            return False
+        if batch:
+            await list_view.mount(*batch)
+        if current is not None and not current():
+            await list_view.remove_children(batch)
+            return False
+        return True
+
+    async def _show_playlist_entries(self, entries, title: str, current=None) -> None:
+        """Mount `(source, label)` pairs into the (cleared) `#local-list` in
+        batches, then enrich them; `title` heads the list's border.
+
+        `current()`, when given, is checked after every await: once it is
+        False the list shows something else and nothing more is mounted.
+        """
+        local_list = self.query_one("#local-list", ListView)
         # Mount in batches and yield to the event loop between batches
         import asyncio
         batch = []
+        mounted = []
         count = 0
         for candidate, label in entries:
             item = ListItem(Label(label))
@@ -497,27 +1135,296 @@ class MusicPlayerApp(App):
             except Exception:
                 pass
             batch.append(item)
+            mounted.append(item)
             count += 1
             if len(batch) >= self.playlist_batch_size:
-                for it in batch:
-                    await local_list.mount(it)
+                if not await self._mount_batch(local_list, batch, current):
+                    return
                 batch = []
                 # yield control so UI remains responsive
                 await asyncio.sleep(0)
         # mount any remaining items
-        for it in batch:
-            await local_list.mount(it)
+        if not await self._mount_batch(local_list, batch, current):
+            return
+        await self._list_local_items(mounted)
+        if current is not None and not current():
+            return
+        self._start_enrichment(mounted, title)
+
+    def _smart_manager(self):
+        """The `SmartPlaylists` over `self.track_table`, created on first use
+        and fed by the listening history (call once the table is loaded)."""
+        if self.smart_playlists is None:
+            from pytuiplayer.smart_playlists import SmartPlaylists
+            self.smart_playlists = SmartPlaylists(self.track_table, self.history)
+            self.history.add_listener(self.smart_playlists.played)
+        return self.smart_playlists
+
+    async def load_smart_playlist(self, path: Path) -> None:
+        """Show the tracks matching a `.smart` definition in `#local-list`.
+
+        The playlist stays on screen as a live view: `_refresh_smart_playlist`
+        redraws it when scans, plays or the clock change its members.
+        """
+        import asyncio
+        from pytuiplayer.smart_playlists import RuleError
+        path = Path(path)
+        local_list = self.query_one("#local-list", ListView)
+        local_list.clear()
+        self._stop_enrichment()
+        self._local_list_dir = None
+        self._local_items = []
+        self._smart_view = path
+        self._smart_shown = None
+        if self._smart_timer is None:
+            self._smart_timer = self.set_interval(self.SMART_REFRESH_INTERVAL, self._refresh_smart_playlist)
+        if self.track_table is None:
+            # shown by `_refresh_smart_playlist` once the first scan loaded the table
+            local_list.border_title = f"Smart · {path.stem} · waiting for the library scan"
+            return
+        manager = self._smart_manager()
+        try:
+            playlist = await asyncio.to_thread(manager.open, path)
+        except (OSError, RuleError) as exc:
+            local_list.border_title = f"Smart · {path.stem} · {exc}"
+            self._smart_view = None
+            return
+        if self._smart_view == path:
+            await self._show_smart_playlist(playlist)
+
+    def _leave_smart_view(self) -> None:
+        """Another list replaces the smart playlist: stop its redraws."""
+        self._smart_view = None
+        self.workers.cancel_group(self, "smart")
+
+    async def _show_smart_playlist(self, playlist) -> None:
+        def current():
+            return self._smart_view == playlist.path
+
+        if not current():
+            return  # the list has moved on
+        local_list = self.query_one("#local-list", ListView)
+        # a redraw keeps the scroll position and the highlighted track
+        scroll_y = local_list.scroll_offset.y
+        highlighted = getattr(local_list.highlighted_child, "data", None)
+        highlighted = highlighted if isinstance(highlighted, dict) else {}
+        local_list.clear()
+        self._smart_shown = (playlist, playlist.version)
+        entries = playlist.entries()[:self.max_playlist_items]
+        local_list.border_title = f"Smart · {playlist.name} · {len(entries)}"
+        await self._show_playlist_entries(entries, f"Smart · {playlist.name}", current)
+        if not current():
+            return
+        for i, item in enumerate(local_list.children):
+            if highlighted and self._item_id(item.data) == highlighted.get("source"):
+                local_list.index = i
+                break
+        if scroll_y:
+            self.call_after_refresh(local_list.scroll_to, y=scroll_y, animate=False)
+
+    def _refresh_smart_playlist(self) -> None:
+        """Timer: expire time windows and redraw the smart playlist on screen if it changed."""
+        if self._smart_view is None:
+            return
+        if self._smart_shown is None:
+            if self.track_table is not None and not any(w.group == "smart" for w in self.workers):
+                self.run_worker(self.load_smart_playlist(self._smart_view), group="smart", exclusive=True)
+            return
+        self.smart_playlists.expire()
+        playlist, version = self._smart_shown
+        if playlist.version != version:
+            self.run_worker(self._show_smart_playlist(playlist), group="smart", exclusive=True)
+
+    async def _list_local_items(self, items) -> None:
+        """Remember `items`, the rows just mounted into `#local-list`, and put
+        them in the chosen order."""
+        for row, item in enumerate(items):
+            item._row = row
+        self._local_items = items
+        self._local_sorter = None
+        self._local_headers = []
+        if self.local_sort != "order" or self.local_group is not None:
+            await self._arrange_local_list()
+
+    async def _arrange_local_list(self) -> None:
+        """Order `#local-list` by `local_sort` and, with `local_group` set,
+        put its rows under collapsed album/artist headers.
+
+        Sort keys are built once per list (`sorting.ListSorter`); rows are
+        moved rather than rebuilt, so labels filled in by the enrichment stay.
+        """
+        import asyncio
+        from functools import partial
+        local_list = self.query_one("#local-list", ListView)
+        items = self._local_items
+        local_list.border_subtitle = " · ".join(
+            ([f"by {self.local_sort}"] if self.local_sort != "order" else [])
+            + ([f"grouped by {self.local_group}"] if self.local_group else []))
+        if self.local_sort == "order" and self.local_group is None:
+            order = range(len(items))
+        else:
+            if self._local_sorter is None:
+                sorter = await asyncio.to_thread(self._build_sorter, items)
+                if items is not self._local_items:
+                    return  # the list was replaced meanwhile
+                self._local_sorter = sorter
+            order = self._local_sorter.order(self.local_sort, self.local_group)
+        highlighted = local_list.highlighted_child
+        if self._local_headers:
+            await local_list.remove_children(self._local_headers)
+        headers = []
+        if self.local_group is not None:
+            for start, end in self._local_sorter.groups(order, self.local_group):
+                rows = order[start:end]
+                header = GroupHeader([items[row] for row in rows],
+                                     partial(self._describe_group, self._local_sorter, self.local_group, rows))
+                header._sort_key = 2 * start
+                headers.append(header)
+        for position, row in enumerate(order):
+            item = items[row]
+            item._sort_key = 2 * position + 1
+            item.display = self.local_group is None
+            item.disabled = self.local_group is not None
+        self._local_headers = headers
+        if headers:
+            await local_list.mount(*headers)
+        local_list.sort_children(key=lambda child: getattr(child, "_sort_key", 0))
+        local_list.index = None
+        if highlighted in local_list.children and highlighted.display:
+            local_list.index = local_list.children.index(highlighted)
+        elif local_list.children:
+            local_list.index = 0
+
+    def _build_sorter(self, items):
+        from pytuiplayer.sorting import ListSorter
+        rows = []
+        for item in items:
+            source, label = self._queue_entry(item.data)
+            rows.append((source, label or Path(source).name))
+        table = self.track_table
+        if table is None:
+            return ListSorter((None, label) for _, label in rows)
+        with table.lock:
+            return ListSorter([(table.values(source), label) for source, label in rows])
+
+    @staticmethod
+    def _describe_group(sorter, group: str, rows) -> str:
+        from pytuiplayer.music_tree import format_total
+        _, total = sorter.total_duration(rows)
+        return f"{sorter.group_name(group, rows[0])} · {format_total(len(rows), total)}"
+
+    def _start_enrichment(self, items, title: str = "Local Music List") -> None:
+        """Read tags and durations of the local entries in `items` (the rows of
+        `#local-list`) in the background, rows on screen first."""
+        self._stop_enrichment()
+        from pytuiplayer.enrich import EnrichmentScheduler
+        from pytuiplayer.playlists import URL_PREFIXES
+        enricher = EnrichmentScheduler()
+        self._enrich_title = title
+        self._enrich_items = items
+        self._enrich_rows = {}
+        self._enrich_totals = [0, 0.0]
+        self._enrich_view = None
+        for row, item in enumerate(items):
+            source = str((getattr(item, "data", None) or {}).get("source", ""))
+            if source and not source.startswith(URL_PREFIXES):
+                self._enrich_rows[source] = row
+        self._enricher = enricher
+        for source, row in self._enrich_rows.items():
+            enricher.add(row, source)
+        self._prioritise_enrichment()
+        try:
+            if self._enrich_timer is None:
+                self._enrich_timer = self.set_interval(self.ENRICH_INTERVAL, self._apply_enrichment)
+            else:
+                self._enrich_timer.resume()
+        except Exception:
+            # no running app (unit tests)
+            pass
+
+    def _stop_enrichment(self) -> None:
+        if self._enricher is not None:
+            self._enricher.close()
+            self._enricher = None
+        if self._enrich_timer is not None:
+            self._enrich_timer.pause()
+
+    def _prioritise_enrichment(self) -> None:
+        """Put the rows on screen, then upcoming queue entries, ahead of the rest."""
+        try:
+            view = self.query_one("#local-list", ListView)
+            top = int(view.scroll_offset.y)
+            height = view.scrollable_content_region.height
+        except Exception:
+            return
+        queue_version = self._queue.version if self._queue is not None else None
+        state = (top, height, queue_version, len(self._local_headers), self.local_sort, self.local_group)
+        if state == self._enrich_view:
+            return
+        self._enrich_view = state
+        # rows are one line high (see `ListItem` in the stylesheet); rows of
+        # collapsed groups are hidden
+        shown = view.children
+        if self.local_group is not None:
+            shown = [child for child in shown if child.display]
+        visible = [getattr(child, "_row", None) for child in shown[top:top + height]]
+        visible = [row for row in visible if row is not None and row < len(self._enrich_items)]
+        queued = []
+        if self._queue is not None:
+            for _, source, _ in self._queue.upcoming(self.QUEUE_VIEW_SIZE):
+                row = self._enrich_rows.get(str(source))
+                if row is not None:
+                    queued.append(row)
+        self._enricher.prioritise(visible=visible, queued=queued)
+
+    def _apply_enrichment(self) -> None:
+        """Timer: update the labels of rows read since the last tick in one batch."""
+        if self._enricher is None:
+            return
+        from pytuiplayer.enrich import display_label
+        from pytuiplayer.music_tree import format_total
+        self._prioritise_enrichment()
+        # checked before draining: a read finishing in between would be lost
+        finished = not self._enricher.pending()
+        results = self._enricher.drain()
+        for row, info in results:
+            if not info:
+                continue
+            item = self._enrich_items[row]
+            label = getattr(item, "_meta_label", "")
+            source = str(item.data.get("source", ""))
+            try:
+                item.query_one(Label).update(display_label(info, label, tagged=label != Path(source).name))
+            except Exception:
+                continue
+            if info.get("duration"):
+                self._enrich_totals[0] += 1
+                self._enrich_totals[1] += info["duration"]
+        if results:
+            tracks, total = self._enrich_totals
+            try:
+                self.query_one("#local-list", ListView).border_title = f"{self._enrich_title} · {format_total(tracks, total)}"
+            except Exception:
+                pass
+        if finished:
+            self._stop_enrichment()
 
     async def on_button_pressed(self, event: Button.Pressed) -> None:
         button_id = event.button.id
         if button_id == "play":
+            if self._resume_playback():
+                return
             self.mpv.unpause()
+            self._history_event("resume")
             self.update_now_playing(self.current_title, self.option_mode, "▶")
         elif button_id == "pause":
             self.mpv.pause()
+            self._history_event("pause")
             self.update_now_playing(self.current_title, self.option_mode, "⏸")
         elif button_id == "stop":
             self.mpv.stop()
+            self._playing = None
+            self._history_event("stop")
             self.update_now_playing("Nothing playing", "", "⏹")
 
 
@@ -529,19 +1436,29 @@ class MusicPlayerApp(App):
             if station:
                 idx = self.stations.stations.index(station)
                 await self.play_station(station, idx)
+        elif list_id == "duplicates-list":
+            path = getattr(item, "data", None)
+            if path:
+                self.play_local(Path(path))
         elif list_id == "local-list" and self.option_mode == "local":
+            if isinstance(item, GroupHeader):
+                item.toggle()
+                return
             file_path = getattr(item, "data", None)
             if file_path:
-                # support the new dictionary-shaped data added by load_m3u
-                # while remaining backwards compatible with a plain Path/str
-                if isinstance(file_path, dict):
-                    self.play_local(file_path)
-                else:
-                    self.play_local(file_path)
+                # queue the whole list from the selected item onwards
+                items = getattr(event.list_view, "children", None) or [item]
+                items = [it for it in items if not isinstance(it, GroupHeader)]
+                entries = [self._queue_entry(getattr(it, "data", None)) for it in items]
+                entries = [e for e in entries if e is not None]
+                start = next((i for i, it in enumerate(items) if it is item), 0)
+                self.queue.replace(entries, start_index=start)
+                self._play_entry(self.queue.current())
 
     async def on_directory_tree_file_selected(self, event: DirectoryTree.FileSelected) -> None:
+        from pytuiplayer.playlists import CUE_EXTENSIONS, PLAYLIST_EXTENSIONS, SMART_PLAYLIST_EXTENSIONS
         path = Path(event.path)
-        if self.option_mode == "radio" and path.suffix.lower() == ".json":
+        if self.option_mode == "radio" and (path.suffix.lower() == ".json" or path.suffix.lower() in PLAYLIST_EXTENSIONS):
             # Try updating stations from the selected file. If successful, refresh the
             # station list UI; otherwise surface a simple notification in the
             # NowPlaying widget.
@@ -551,7 +1468,7 @@ class MusicPlayerApp(App):
                 self.update_now_playing(f"Loaded stations from {path.name}", "", "⏺")
             else:
                 self.update_now_playing("Failed to load stations", "", "⚠")
-        elif self.option_mode == "local" and path.suffix.lower() == ".mp3":
+        elif self.option_mode == "local" and path.suffix.lower() in AUDIO_EXTENSIONS:
             # If a user clicks a file in the directory tree while in Local mode,
             # play it immediately (expected behavior) rather than only setting a
             # flag.
@@ -560,8 +1477,12 @@ class MusicPlayerApp(App):
             except Exception:
                 # Surface a basic notification on failure
                 self.update_now_playing("Failed to play file", "", "⚠")
-        elif self.option_mode == "local" and path.suffix.lower() == ".m3u":
-            # Load an M3U playlist into the local list
+        elif self.option_mode == "local" and path.suffix.lower() in SMART_PLAYLIST_EXTENSIONS:
+            await self.load_smart_playlist(path)
+        elif self.option_mode == "local" and path.suffix.lower() in CUE_EXTENSIONS:
+            await self.load_cue(path)
+        elif self.option_mode == "local" and path.suffix.lower() in PLAYLIST_EXTENSIONS:
+            # Load an M3U/PLS/XSPF playlist into the local list
             try:
                 await self.load_m3u(path)
                 self.update_now_playing(f"Loaded playlist {path.name}", "", "⏺")
@@ -569,13 +1490,36 @@ class MusicPlayerApp(App):
                 self.update_now_playing("Failed to load playlist", "", "⚠")
 
     async def load_stations_ui(self):
-        """Populate the `#station-list` ListView from the current `self.stations` data."""
+        """Populate the `#station-list` ListView from the current `self.stations` data.
+
+        Items are mounted in batches of `station_batch_size`, yielding to the
+        event loop in between so the list fills in while the UI stays live.
+        Stations played most often or most recently are listed first (marked ★).
+        """
+        import asyncio
+        from pytuiplayer.history import promote
         station_list = self.query_one("#station-list", ListView)
         station_list.clear()
-        for idx, station in enumerate(self.stations.stations):
-            item = ListItem(Label(f"{idx}: {station['name']}"))
+        promoted, rest = promote(
+            list(enumerate(self.stations.stations)),
+            lambda pair: pair[1].get("url"),
+            self.history.favourites(kind="radio"),
+        )
+        self._station_order = [idx for idx, _ in promoted + rest]
+        batch = []
+        for position, (idx, station) in enumerate(promoted + rest):
+            mark = "★ " if position < len(promoted) else ""
+            group = f"  · {station['group']}" if station.get("group") else ""
+            item = ListItem(Label(f"{mark}{idx}: {station['name']}{group}"))
             item.data = station
-            await station_list.mount(item)
+            batch.append(item)
+            if len(batch) >= self.station_batch_size:
+                await station_list.mount(*batch)
+                batch = []
+                # yield control so the UI can paint the partial list
+                await asyncio.sleep(0)
+        if batch:
+            await station_list.mount(*batch)
             
     def update_now_playing(self, title: str, source: str, state: str):
         # Keep internal state even if the NowPlaying widget is not available.
@@ -619,8 +1563,44 @@ class MusicPlayerApp(App):
                 print(f"[PYTUIP DEBUG] NowPlaying widget not mounted: {e}")
             return
 
+    def _observe_metadata(self) -> bool:
+        """Have mpv report stream title changes (`on_stream_title_changed`);
+        False when the player cannot, and `_refresh_metadata` polls instead."""
+        player = getattr(self.mpv, "player", None)
+        if player is None or not hasattr(self.mpv, "observe"):
+            return False
+        if self._metadata_player is not player:
+            if not self.mpv.observe("metadata", self._on_mpv_metadata):
+                return False
+            self._metadata_player = player
+        return True
+
+    def _on_mpv_metadata(self, value) -> None:
+        # on mpv's event thread
+        title = (value or {}).get("icy-title") if isinstance(value, dict) else None
+        if title:
+            self.post_message(StreamTitleChanged(None, title))
+
+    def on_stream_title_changed(self, message: StreamTitleChanged) -> None:
+        source = (self._playing or {}).get("source")
+        if self.currently_playing != "radio" or message.station not in (None, source):
+            return  # a station played before
+        self.title_history.add(source, message.title)
+        if self._timeshift_active():
+            # heard at the live edge: shown when playback gets there
+            behind = self._timeshift.behind(self.mpv.get_time_pos())
+            self.set_timer(max(0.05, behind), self._refresh_metadata)
+            return
+        self._show_stream_title(message.title)
+
+    def _show_stream_title(self, title: str) -> None:
+        if title != self.current_title:
+            self.current_title = title
+            self.update_now_playing(title, "Radio ● REC" if self._recorder is not None else "Radio", "▶")
+
     def _refresh_metadata(self):
-        # Poll MPV for stream metadata (icy-title / media-title) when radio is playing
+        # Stream title of the playing station, where change events do not
+        # cover it: the timeshift position, or players that cannot report
         try:
             if self.option_mode != "radio":
                 return
@@ -630,8 +1610,17 @@ class MusicPlayerApp(App):
             meta = None
             if player is None:
                 return
+            if self._timeshift_active():
+                # the buffer strips ICY metadata and knows the title at any
+                # position, which moves on pause and rewind
+                ts = self._timeshift
+                meta = ts.title_at(ts.position(self.mpv.get_time_pos()))
+                if not meta:
+                    return
+            elif self._metadata_player is player:
+                return  # mpv reports changes
             # try property API
-            if hasattr(player, "get_property"):
+            elif hasattr(player, "get_property"):
                 try:
                     meta = player.get_property("icy-title") or player.get_property("media-title")
                 except Exception:
@@ -639,22 +1628,43 @@ class MusicPlayerApp(App):
             # try attribute fallback
             if not meta:
                 meta = getattr(player, "media_title", None) or getattr(player, "title", None)
-            if meta and meta != self.current_title:
-                self.current_title = meta
-                self.update_now_playing(meta, "Radio", "▶")
+            if meta:
+                if not self._timeshift_active():
+                    self.title_history.add((self._playing or {}).get("source"), meta)
+                self._show_stream_title(meta)
         except Exception:
             return
 
     def update_progress(self):
+        self._advance_queue_if_finished()
+        if self._stale_queue_view() is not None:
+            self.run_worker(self._refresh_queue_view(), group="queue-view", exclusive=True)
         try:
             pos = self.mpv.get_time_pos()
             dur = self.mpv.get_duration()
         except Exception:
             return
+        track = self._cue_track
+        if track is not None and getattr(self.mpv, "current_source", None) == track.file:
+            # a CUE track shows its own part of the image
+            end = track.end if track.end is not None else dur
+            pos = max(0.0, (pos or 0) - track.start)
+            dur = max(0.0, (end or 0) - track.start)
 
-        bar = self.query_one(ProgressBar)
+        try:
+            bar = self.query_one(ProgressBar)
+        except NoMatches:
+            # the interval can fire once more while the screen is torn down
+            return
         bar.progress = pos or 0
         bar.duration = dur or 0
+        if self._timeshift_active():
+            from pytuiplayer.timeshift import LIVE_MARGIN
+            behind = self._timeshift.behind(pos)
+            # starting "live" hands the player a few seconds of buffer
+            bar.live = (0.0 if behind <= LIVE_MARGIN + 1 else behind, self._timeshift.buffered())
+        else:
+            bar.live = None
         # show radio metadata on the progress area when duration unknown
         try:
             if getattr(self, "option_mode", "radio") == "radio" and getattr(self, "currently_playing", None) == "radio":
@@ -681,23 +1691,30 @@ class MusicPlayerApp(App):
             pass
 
     def action_toggle_play(self):
+        if self._resume_playback():
+            return
         if self.mpv.is_paused():
             self.mpv.unpause()
+            self._history_event("resume")
             self.update_now_playing(
                 self.current_title, self.option_mode, "▶"
             )
         else:
             self.mpv.pause()
+            self._history_event("pause")
             self.update_now_playing(
                 self.current_title, self.option_mode, "⏸"
             )
 
     def action_play(self):
         """Explicit play command (bound to 'p')."""
+        if self._resume_playback():
+            return
         try:
             self.mpv.unpause()
         except Exception:
             pass
+        self._history_event("resume")
         self.update_now_playing(self.current_title, self.option_mode, "▶")
 
     def action_pause(self):
@@ -706,32 +1723,124 @@ class MusicPlayerApp(App):
             self.mpv.pause()
         except Exception:
             pass
+        self._history_event("pause")
         self.update_now_playing(self.current_title, self.option_mode, "⏸")
 
     def action_stop(self):
         self.mpv.stop()
+        self._stop_recording()
+        self._stop_timeshift()
+        self._track_started = False
+        self._playing = None
+        self._history_event("stop")
         self.current_title = "Nothing playing"
 
         bar = self.query_one(ProgressBar)
         bar.progress = 0
         bar.duration = 0
+        bar.waveform = None
 
         self.update_now_playing("Nothing playing", "", "⏹")
 
     def action_seek_forward(self):
+        if self._timeshift_seek(self.TIMESHIFT_STEP):
+            return
         self.mpv.seek(5)
 
     def action_seek_backward(self):
+        if self._timeshift_seek(-self.TIMESHIFT_STEP):
+            return
         self.mpv.seek(-5)
 
+    def action_go_live(self):
+        """Catch a timeshifted station up to the live edge."""
+        if self._timeshift_active():
+            self._mpv_play(self._timeshift.url())
+
+    def _timeshift_active(self) -> bool:
+        ts = self._timeshift
+        return ts is not None and ts.ring is not None and self.currently_playing == "radio"
+
+    def _timeshift_seek(self, delta: float | None = None, fraction: float | None = None) -> bool:
+        """Move within the timeshift buffer by `delta` seconds, or to `fraction`
+        of it; False when no station is being timeshifted.
+
+        The player is pointed at the buffer from the new offset (live
+        streams cannot seek); past the live edge it goes live.
+        """
+        if not self._timeshift_active():
+            return False
+        from pytuiplayer.timeshift import LIVE_MARGIN
+        ts = self._timeshift
+        ring = ts.ring
+        if fraction is not None:
+            offset = ring.oldest + int((ring.written - ring.oldest) * fraction)
+        else:
+            offset = ts.offset_for(self.mpv.get_time_pos(), delta)
+        if ring.written - offset <= LIVE_MARGIN * ts.byte_rate:
+            self._mpv_play(ts.url())
+        else:
+            self._mpv_play(ts.url(offset))
+        return True
+
+    def action_toggle_recording(self) -> None:
+        """Start or stop recording the playing station, one file per song
+        (see `pytuiplayer.recorder`)."""
+        if self._recorder is not None:
+            directory = self._recorder.directory
+            self._stop_recording()
+            self.notify(f"Recording saved in {directory}")
+            self.update_now_playing(self.current_title, "Radio", "▶")
+            return
+        url = (self._playing or {}).get("source") or ""
+        if self.currently_playing != "radio" or not url.startswith(("http://", "https://")):
+            self.notify("Play a station to record it", severity="warning")
+            return
+        from pytuiplayer.recorder import StreamRecorder
+        self._recorder = StreamRecorder(self._playing.get("label") or url)
+        if self._timeshift is not None:
+            # share the timeshift's connection: the same bytes, no second download
+            stream = self._timeshift.stream
+        else:
+            from pytuiplayer.station_stream import StationStream
+            stream = self._record_stream = StationStream(url)
+        stream.add_sink(self._recorder)
+        self.notify(f"Recording to {self._recorder.directory}")
+        self.update_now_playing(self.current_title, "Radio ● REC", "▶")
+
+    def _stop_recording(self) -> None:
+        recorder = self._recorder
+        if recorder is None:
+            return
+        self._recorder = None
+        if self._timeshift is not None:
+            self._timeshift.stream.remove_sink(recorder)
+        if self._record_stream is not None:
+            self._record_stream.remove_sink(recorder)
+            self._record_stream.close()
+            self._record_stream = None
+        recorder.close()
+
+    def _stop_timeshift(self) -> None:
+        if self._timeshift is not None:
+            self._timeshift.close()
+            self._timeshift = None
+
     def _seek_to_percent(self, percent: float):
         """Seek to a percentage of the current duration (0.0-1.0)."""
+        if self._timeshift_seek(fraction=percent):
+            return
         try:
             dur = self.mpv.get_duration()
+            offset = 0
+            track = self._cue_track
+            if dur and track is not None and getattr(self.mpv, "current_source", None) == track.file:
+                offset = track.start
+                dur = (track.end if track.end is not None else dur) - track.start
             if not dur or dur <= 0:
                 # no-op when duration is unknown
                 return
-            target = int(dur * percent)
+            target = int(offset + dur * percent)
             # prefer absolute seek if available
             if hasattr(self.mpv, "seek_absolute"):
                 self.mpv.seek_absolute(target)
@@ -752,8 +1861,25 @@ class MusicPlayerApp(App):
         self._seek_to_percent(0.90)
 
     async def play_station(self, station, idx):
-        self.stations.play(idx)
+        """Play station `idx`; with timeshift on, through a buffer that can be
+        paused and rewound (see `pytuiplayer.timeshift`)."""
+        self._stop_recording()
+        self._stop_timeshift()
+        url = station.get("url") or ""
+        if self.timeshift_minutes > 0 and url.startswith(("http://", "https://")):
+            from pytuiplayer.timeshift import Timeshift
+            self._timeshift = Timeshift(url, self.timeshift_minutes * 60)
+            self._timeshift.stream.add_listener(lambda title: self.post_message(StreamTitleChanged(url, title)))
+            self._mpv_play(self._timeshift.url())
+        else:
+            self._observe_metadata()
+            self.stations.play(idx)
         self.currently_playing = "radio"
+        self._apply_normalization(None)
+        self._show_waveform(None)
+        self.history.start(station.get("url"), station["name"], kind="radio")
+        self._playing = {"kind": "radio", "source": station.get("url"), "label": station["name"]}
+        self._resume = None
         # show station name until stream metadata arrives
         self.current_title = station["name"]
         self.update_now_playing(
@@ -761,10 +1887,11 @@ class MusicPlayerApp(App):
         )
 
         list_view = self.query_one("#station-list", ListView)
-        list_view.index = idx
+        # the list may be reordered by `load_stations_ui`
+        list_view.index = self._station_order.index(idx) if idx in self._station_order else idx
 
-    def play_local(self, path):
-        """Play a local file or URL.
+    def play_local(self, path, start: float | None = None):
+        """Play a local file or URL, optionally from `start` seconds.
 
         Accepts either:
         - a dict: {"source": <str>, "meta": <label>} (as produced by load_m3u),
@@ -791,15 +1918,35 @@ class MusicPlayerApp(App):
         else:
             source_str = str(source)
 
-        # If it looks like a URL, hand straight to mpv
+        if ".cue#" in source_str.lower():
+            from pytuiplayer.cue import find_track
+            track = find_track(source_str)
+            if track is not None:
+                self._play_cue_track(track, meta_label, start)
+                return
+        self._cue_track = None
+
+        # If it looks like a URL, hand it to mpv; http(s) tracks are played
+        # from the track cache once downloaded, and fetched ahead otherwise
         if source_str.startswith(("http://", "https://", "rtmp://", "ftp://")):
+            cached = None
+            cache = self.track_cache if source_str.startswith(("http://", "https://")) else None
+            if cache is not None:
+                cached = cache.path(source_str)
+                cache.pin(source_str)
+                self._prefetch_tracks(source_str)
             try:
-                self.mpv.play(source_str)
+                self._mpv_play(str(cached) if cached is not None else source_str, start)
             except Exception:
                 pass
             self.currently_playing = "local"
+            self._apply_normalization(source_str)
+            self._show_waveform(str(cached) if cached is not None else None)
             # prefer playlist-provided metadata when available
             title = meta_label or Path(source_str).name
+            self.history.start(source_str, title, kind="local")
+            self._playing = {"kind": "local", "source": source_str, "label": meta_label}
+            self._resume = None
             self.current_title = title
             try:
                 self.update_now_playing(title, "Local File", "▶")
@@ -815,11 +1962,11 @@ class MusicPlayerApp(App):
             except Exception:
                 # resolution failed; keep as-is
                 pass
-            self.mpv.play(str(source_path))
+            self._mpv_play(str(source_path), start)
         except Exception:
             try:
                 # best-effort: pass string to mpv
-                self.mpv.play(source_str)
+                self._mpv_play(source_str, start)
             except Exception:
                 # can't play this source
                 try:
@@ -829,6 +1976,8 @@ class MusicPlayerApp(App):
                 return
 
         self.currently_playing = "local"
+        self._apply_normalization(source_str)
+        self._show_waveform(str(source_path) if source_path is not None else source_str)
 
         # Determine title: prefer playlist metadata, then tags via mutagen, then filename stem
         title = None
@@ -856,12 +2005,75 @@ class MusicPlayerApp(App):
             except Exception:
                 title = source_str
 
+        self.history.start(source_str, title, kind="local")
+        self._playing = {"kind": "local", "source": source_str, "label": meta_label}
+        self._resume = None
         self.current_title = title
         try:
             self.update_now_playing(title, "Local File", "▶")
         except Exception:
             pass
 
+    def _play_cue_track(self, track, label=None, start=None, seek: bool = True) -> None:
+        """Play a CUE sheet track: seek within its audio image when that is
+        already loaded, otherwise open the image at the track's start.
+
+        With `seek=False` (from `_watch_cue_track`) only the now-playing
+        state changes, for a track that starts where the playing one ended.
+        """
+        if seek:
+            position = max(start or 0.0, track.start)
+            if getattr(self.mpv, "current_source", None) == track.file and not self.mpv.is_idle():
+                self.mpv.seek_absolute(position)
+            else:
+                self._mpv_play(track.file, position)
+        self._cue_track = track
+        self.currently_playing = "local"
+        self._apply_normalization(track.file)
+        self._show_waveform(None)
+        title = label or track.label
+        self.history.start(track.source, title, kind="local")
+        self._playing = {"kind": "local", "source": track.source, "label": label}
+        self._resume = None
+        self.current_title = title
+        try:
+            self.update_now_playing(title, "Local File", "▶")
+            if self._cue_timer is None and self.is_running:
+                self._cue_timer = self.set_interval(self.CUE_WATCH_INTERVAL, self._watch_cue_track)
+        except Exception:
+            pass
+
+    def _watch_cue_track(self) -> None:
+        """Timer: at the end of a CUE track, go on with the next queue entry.
+
+        The next track of the same image usually starts where this one ends;
+        then mpv is left alone and only the now-playing state moves on, so
+        there is no gap and nothing is re-opened or re-buffered.
+        """
+        track = self._cue_track
+        if track is None or track.end is None or getattr(self.mpv, "current_source", None) != track.file:
+            return
+        position = self.mpv.get_time_pos()
+        if position is None or position < track.end:
+            return
+        entry = None
+        if self._queue is not None and self._queue.current_index is not None:
+            entry = self._queue.next(auto=True)
+        if entry is None:
+            self._cue_track = None
+            self.mpv.stop()
+            self.currently_playing = None
+            self._playing = None
+            self._history_event("stop")
+            self.update_now_playing("End of queue", "", "⏹")
+            return
+        from pytuiplayer.cue import find_track
+        following = find_track(entry[0])
+        if following is not None and following.file == track.file and abs(following.start - track.end) < 0.5:
+            self._play_cue_track(following, entry[1], seek=False)
+        else:
+            self._play_entry(entry)
+
     def action_play_playlist(self) -> None:
         """Start playback from the first item in the local playlist, if any."""
         try:
@@ -883,9 +2095,11 @@ class MusicPlayerApp(App):
             self.update_now_playing("Invalid playlist item", "", "⚠")
             return
 
-        # play and set the UI index if available
+        # queue the whole list and play it from the start
+        entries = [self._queue_entry(getattr(it, "data", None)) for it in items]
+        self.queue.replace([e for e in entries if e is not None], start_index=0)
         try:
-            self.play_local(data)
+            self._play_entry(self.queue.current())
         except Exception:
             self.update_now_playing("Failed to play playlist item", "", "⚠")
             return
@@ -895,4 +2109,527 @@ class MusicPlayerApp(App):
         except Exception:
             pass
 
+    @staticmethod
+    def _queue_entry(data):
+        """Turn list item data (a Path/str or a load_m3u dict) into a `(source, label)` pair."""
+        if data is None:
+            return None
+        if isinstance(data, dict):
+            return str(data.get("source")), data.get("meta")
+        return str(data), None
+
+    def _play_entry(self, entry) -> None:
+        if entry is None:
+            return
+        source, label = entry
+        self.play_local({"source": source, "meta": label})
+        self._track_started = False
+
+    def _advance_queue_if_finished(self) -> None:
+        """Play the next queue entry once the current local track has ended."""
+        if self._queue is None or self.currently_playing != "local":
+            return
+        if self._queue.current_index is None:
+            return
+        try:
+            idle = self.mpv.is_idle()
+        except Exception:
+            return
+        if not idle:
+            self._track_started = True
+            return
+        # idle before the track ever started means it is still loading
+        if not self._track_started:
+            return
+        self._track_started = False
+        entry = self._queue.next(auto=True)
+        if entry is None:
+            self.currently_playing = None
+            self._playing = None
+            self._history_event("stop")
+            self.update_now_playing("End of queue", "", "⏹")
+            return
+        self._play_entry(entry)
+
+    def action_next_track(self) -> None:
+        entry = self.queue.next()
+        if entry is None:
+            self.notify("End of queue")
+            return
+        self._play_entry(entry)
+
+    def action_prev_track(self) -> None:
+        entry = self.queue.prev()
+        if entry is not None:
+            self._play_entry(entry)
+
+    def action_toggle_shuffle(self) -> None:
+        self.queue.set_shuffle(not self.queue.shuffle)
+        self.notify(f"Shuffle {'on' if self.queue.shuffle else 'off'}")
+
+    def action_cycle_repeat(self) -> None:
+        self.notify(f"Repeat {self.queue.cycle_repeat()}")
+
+    def action_enqueue(self) -> None:
+        """Add the focused tree node or highlighted list item to the end of the queue.
+
+        Directories and playlists are streamed into the queue by a worker
+        thread, so large ones do not block the UI.
+        """
+        from pytuiplayer.playlists import CUE_EXTENSIONS, PLAYLIST_EXTENSIONS, SMART_PLAYLIST_EXTENSIONS
+        focused = self.focused
+        if getattr(focused, "id", None) == "directory-tree":
+            node = focused.cursor_node
+            path = getattr(getattr(node, "data", None), "path", None)
+            if path is None:
+                return
+            path = Path(path)
+            if path.is_dir():
+                from pytuiplayer.play_queue import iter_directory_tracks
+                self._enqueue_stream(iter_directory_tracks(path), path.name)
+            elif path.suffix.lower() in PLAYLIST_EXTENSIONS:
+                from pytuiplayer.playlists import iter_m3u
+                self._enqueue_stream(iter_m3u(path), path.name)
+            elif path.suffix.lower() in CUE_EXTENSIONS:
+                from pytuiplayer.cue import iter_cue
+                self._enqueue_stream(iter_cue(path), path.name)
+            elif path.suffix.lower() in SMART_PLAYLIST_EXTENSIONS:
+                if self.track_table is None:
+                    self.notify("The library has not been scanned yet")
+                    return
+                self._enqueue_stream(self._smart_entries(path), path.name)
+            elif path.suffix.lower() in AUDIO_EXTENSIONS:
+                self.queue.append(str(path))
+                self.notify(f"Queued {path.name}")
+        elif getattr(focused, "id", None) == "local-list":
+            item = focused.highlighted_child
+            entry = self._queue_entry(getattr(item, "data", None))
+            if entry is not None:
+                self.queue.append(*entry)
+                self.notify(f"Queued {entry[1] or Path(entry[0]).name}")
+
+    def _smart_entries(self, path: Path):
+        """Yield the current members of a smart playlist (for `_enqueue_stream`)."""
+        from pytuiplayer.smart_playlists import RuleError
+        manager = self._smart_manager()
+
+        def entries():
+            try:
+                yield from manager.open(path).entries()
+            except RuleError as exc:
+                print(f"[ERROR] Bad smart playlist {path}: {exc}")
+        return entries()
+
+    def _enqueue_stream(self, entries, name: str) -> None:
+        def work():
+            from itertools import islice
+            added = 0
+            try:
+                while True:
+                    chunk = list(islice(entries, 500))
+                    if not chunk:
+                        break
+                    added += self.queue.extend(chunk)
+            except OSError as exc:
+                print(f"[ERROR] Failed to enqueue {name}: {exc}")
+            self.call_from_thread(self.notify, f"Queued {added} tracks from {name}")
+
+        self.run_worker(work, thread=True, group="enqueue")
+
+    async def action_toggle_queue(self) -> None:
+        """Show or hide the queue view (mounted on first use)."""
+        try:
+            view = self.query_one("#queue-list", ListView)
+        except NoMatches:
+            view = ListView(id="queue-list")
+            await self.query_one("#content").mount(view)
+            self._queue_view_version = None
+            await self._refresh_queue_view()
+            return
+        view.display = not view.display
+        self._queue_view_version = None
+        await self._refresh_queue_view()
+
+    def action_focus_search(self) -> None:
+        if self.option_mode != "local":
+            return
+        try:
+            self.query_one("#search-box").focus()
+        except NoMatches:
+            return
+
+    def action_cycle_sort(self) -> None:
+        """Sort `#local-list` by the next order: listed, artist, album, track, duration, added."""
+        from pytuiplayer.sorting import SORTS
+        sorts = list(SORTS)
+        self.local_sort = sorts[(sorts.index(self.local_sort) + 1) % len(sorts)]
+        self._rearrange_local_list()
+
+    def action_cycle_grouping(self) -> None:
+        """Group `#local-list` by album, by artist, or not at all."""
+        from pytuiplayer.sorting import GROUPS
+        self.local_group = GROUPS[(GROUPS.index(self.local_group) + 1) % len(GROUPS)]
+        self._rearrange_local_list()
+
+    def _rearrange_local_list(self) -> None:
+        if self.option_mode != "local" or not self._local_panels_mounted:
+            return
+        self.run_worker(self._arrange_local_list(), group="arrange", exclusive=True)
+
+    def on_input_changed(self, event) -> None:
+        if event.input.id != "search-box":
+            return
+        # exclusive: a newer query cancels the one still waiting or running
+        self.run_worker(self._search_library(event.value), group="search", exclusive=True)
+
+    def on_input_submitted(self, event) -> None:
+        from pytuiplayer.playlists import URL_PREFIXES
+        if event.input.id == "search-box" and event.value.strip().startswith(URL_PREFIXES):
+            # a playlist URL typed into the search box opens that playlist
+            self.run_worker(self.load_remote_playlist(event.value.strip()), group="search", exclusive=True)
+            return
+        if event.input.id == "search-box":
+            try:
+                self.query_one("#local-list").focus()
+            except NoMatches:
+                return
 
+    async def _search_library(self, query: str) -> None:
+        """Worker: show the library tracks matching `query` in `#local-list`.
+
+        Waits for a pause in typing first; a cancelled (stale) query never
+        touches the list. An empty query goes back to the directory shown
+        before the search.
+        """
+        import asyncio
+        await asyncio.sleep(self.SEARCH_DEBOUNCE)
+        if query.strip().startswith(("http://", "https://")):
+            return  # a playlist URL, opened on Enter
+        if not query.strip():
+            if self._local_list_dir is not None:
+                await self.load_local_files(self._local_list_dir)
+            return
+        index = self.search_index
+        if index is None:
+            self.query_one("#local-list", ListView).border_title = "Search · indexing library…"
+            return
+        results = await asyncio.to_thread(index.search, query, self.SEARCH_LIMIT)
+        await self._show_search_results(query, results)
+
+    async def _show_search_results(self, query: str, results: list) -> None:
+        local_list = self.query_one("#local-list", ListView)
+        local_list.clear()
+        self._stop_enrichment()
+        self._leave_smart_view()
+        local_list.border_title = f"Search “{query.strip()}” · {len(results)} found"
+        batch = []
+        for path, _ in results:
+            path = Path(path)
+            item = ListItem(Label(f"{path.name}  ·  {path.parent.name}"))
+            item.data = path
+            batch.append(item)
+        if batch:
+            await local_list.mount(*batch)
+        await self._list_local_items(batch)
+        local_list.index = 0 if batch else None
+
+    async def action_toggle_duplicates(self) -> None:
+        """Show or hide the duplicates view; showing it fingerprints new tracks first."""
+        try:
+            view = self.query_one("#duplicates-list", ListView)
+        except NoMatches:
+            view = ListView(id="duplicates-list")
+            view.border_title = "Duplicates"
+            await self.query_one("#content").mount(view)
+        else:
+            view.display = not view.display
+            if not view.display:
+                self.workers.cancel_group(self, "fingerprint")
+                return
+        self.run_worker(self._find_duplicates, thread=True, group="fingerprint", exclusive=True)
+
+    def _find_duplicates(self) -> None:
+        """Worker thread: fingerprint new or changed tracks, then group duplicates."""
+        from textual.worker import get_current_worker
+        from pytuiplayer.loudness import analysis_available
+        worker = get_current_worker()
+        if not analysis_available():
+            self.call_from_thread(self._set_duplicates_title, "Duplicates · needs NumPy")
+            return
+        from pytuiplayer.fingerprint import FingerprintIndex, fingerprint_library
+        from pytuiplayer.library_index import LibraryIndex
+        index = self.library_index if self.library_index is not None else LibraryIndex().load()
+        stop = lambda: worker.is_cancelled  # noqa: E731
+        self.call_from_thread(self._set_duplicates_title, "Duplicates · fingerprinting…")
+        fingerprints = FingerprintIndex()
+        try:
+            fingerprint_library(
+                index, fingerprints, should_stop=stop,
+                progress=lambda n: self.call_from_thread(self._set_duplicates_title, f"Duplicates · fingerprinted {n}"),
+            )
+            groups = fingerprints.duplicates(should_stop=stop)
+        finally:
+            fingerprints.close()
+        if not worker.is_cancelled:
+            self.call_from_thread(self._show_duplicates, groups)
+
+    def _set_duplicates_title(self, title: str) -> None:
+        try:
+            self.query_one("#duplicates-list", ListView).border_title = title
+        except NoMatches:
+            return
+
+    async def _show_duplicates(self, groups) -> None:
+        try:
+            view = self.query_one("#duplicates-list", ListView)
+        except NoMatches:
+            return
+        view.border_title = f"Duplicates ({len(groups)} groups)"
+        await view.clear()
+        items = []
+        for group in groups:
+            items.append(ListItem(Label(f"── {len(group)} copies ──"), disabled=True))
+            for path in group:
+                item = ListItem(Label("  " + path))
+                item.data = path
+                items.append(item)
+        await view.mount(*items)
+
+    def _stale_queue_view(self) -> ListView | None:
+        """The queue view when it is shown and behind the queue, else None."""
+        if self._queue is None:
+            return None
+        try:
+            view = self.query_one("#queue-list", ListView)
+        except Exception:
+            return None
+        if not view.display or self._queue_view_version == self._queue.version:
+            return None
+        return view
+
+    async def _refresh_queue_view(self) -> None:
+        """Redraw the visible part of the queue when it has changed."""
+        view = self._stale_queue_view()
+        if view is None:
+            return
+        self._queue_view_version = self._queue.version
+        queue = self._queue
+        current = queue.current_index
+        flags = [f"repeat {queue.repeat}"] + (["shuffle"] if queue.shuffle else [])
+        view.border_title = f"Queue ({len(queue)}) · {' · '.join(flags)}"
+        await view.clear()
+        items = []
+        for index, source, label in queue.upcoming(self.QUEUE_VIEW_SIZE):
+            marker = "▶ " if index == current else "  "
+            items.append(ListItem(Label(marker + (label or Path(source).name))))
+        await view.mount(*items)
+
+    def _mpv_play(self, source: str, start: float | None = None) -> None:
+        if start:
+            self.mpv.play(source, start=start)
+        else:
+            self.mpv.play(source)
+
+    @staticmethod
+    def _item_id(data):
+        """Stable ID of a list item: station URL, playlist entry source or file path."""
+        if data is None:
+            return None
+        if isinstance(data, dict):
+            return data.get("url") or data.get("source")
+        return str(data)
+
+    def _restore_session(self, state) -> None:
+        """Apply a saved session to the app state (no widgets or files are touched)."""
+        if not state:
+            return
+        try:
+            self.volume = int(state.get("volume", self.volume))
+            self.muted = bool(state.get("muted", False))
+            self._prev_volume = int(state.get("prev_volume", self.volume))
+            if state.get("mode") in ("radio", "local"):
+                self.option_mode = state["mode"]
+            if state.get("local_dir"):
+                self._session_local_dir = Path(state["local_dir"])
+            self._restore_selection = dict(state.get("lists") or {})
+            self._saved_lists = dict(self._restore_selection)
+            # restored with the queue itself, which imports the library
+            # modules; not before first paint
+            self._session_queue = state.get("queue") or None
+            playing = state.get("playing")
+            if playing and playing.get("source") and playing.get("kind") == self.option_mode:
+                self._resume = playing
+                self.current_title = playing.get("label") or Path(playing["source"]).stem
+        except (TypeError, ValueError, AttributeError) as exc:
+            print(f"[ERROR] Ignoring invalid session state: {exc}")
+
+    def _session_state(self) -> dict:
+        # lists that are gone (app shutting down) keep their last known position
+        lists = self._saved_lists
+        for list_id in ("station-list", "local-list"):
+            try:
+                view = self.query_one(f"#{list_id}", ListView)
+            except Exception:
+                continue
+            if list_id in self._restore_selection:
+                continue  # not populated yet
+            item = view.highlighted_child
+            lists[list_id] = [self._item_id(getattr(item, "data", None)), round(view.scroll_y)]
+
+        playing = self._resume
+        if self._playing is not None:
+            playing = dict(self._playing)
+            if playing["kind"] == "local":
+                playing["position"] = self.mpv.get_time_pos()
+        return {
+            "mode": self.option_mode,
+            "volume": self.volume,
+            "muted": self.muted,
+            "prev_volume": self._prev_volume,
+            "local_dir": str(self._local_list_dir) if self._local_list_dir else None,
+            "lists": dict(lists),
+            "queue": (self._queue.snapshot(self.SESSION_QUEUE_LIMIT) if self._queue is not None and len(self._queue)
+                      else self._session_queue if self._queue is None else None),
+            "playing": playing,
+        }
+
+    def _save_session(self, wait: bool = False) -> None:
+        """Snapshot the session; written by a worker thread unless `wait`."""
+        try:
+            state = self._session_state()
+        except Exception as exc:
+            print(f"[ERROR] Failed to collect session state: {exc}")
+            return
+        if wait:
+            self.session_store.save(state)
+        else:
+            self.run_worker(lambda: self.session_store.save(state), thread=True, group="session", exclusive=True)
+
+    def _restore_list_position(self, list_id: str) -> None:
+        """Re-select the item (and scroll offset) a restored session had in `list_id`."""
+        saved = self._restore_selection.pop(list_id, None)
+        if not saved:
+            return
+        item_id, scroll_y = saved
+        try:
+            view = self.query_one(f"#{list_id}", ListView)
+            for i, item in enumerate(view.children):
+                if item_id is not None and self._item_id(getattr(item, "data", None)) == item_id:
+                    view.index = i
+                    break
+            if scroll_y:
+                self.call_after_refresh(view.scroll_to, y=scroll_y, animate=False)
+        except Exception:
+            return
+
+    def _resume_playback(self) -> bool:
+        """Start what the previous session was playing; False if there is nothing to resume."""
+        resume = self._resume
+        if resume is None or self.currently_playing is not None:
+            return False
+        self._resume = None
+        if resume["kind"] == "radio":
+            stations = self.stations.stations if self.stations else []
+            for idx, station in enumerate(stations):
+                if station.get("url") == resume["source"]:
+                    self.run_worker(self.play_station(station, idx), group="resume")
+                    return True
+            # stations not loaded yet: play the saved stream directly
+            self.mpv.play(resume["source"])
+            self.currently_playing = "radio"
+            self.history.start(resume["source"], resume.get("label"), kind="radio")
+            self._playing = {"kind": "radio", "source": resume["source"], "label": resume.get("label")}
+            self.update_now_playing(resume.get("label") or resume["source"], "Radio", "▶")
+            return True
+        self.play_local({"source": resume["source"], "meta": resume.get("label")}, start=resume.get("position"))
+        return True
+
+    def _apply_normalization(self, source) -> None:
+        """Set the loudness gain for a new local track (`source`) or radio stream (None)."""
+        if not self.normalize:
+            return
+        from pytuiplayer.loudness import RadioLoudness, track_gain
+        try:
+            if source is None:
+                if self._radio_loudness is None:
+                    self._radio_loudness = RadioLoudness()
+                self._radio_loudness.reset()
+                self.mpv.enable_loudness_meter(True)
+                self.mpv.set_gain(0.0)
+                return
+            self.mpv.enable_loudness_meter(False)
+            loudness = self.library_index.get_loudness(source) if self.library_index is not None else None
+            self.mpv.set_gain(track_gain(*loudness) if loudness else 0.0)
+        except Exception:
+            return
+
+    def _update_radio_gain(self) -> None:
+        """Feed the stream's short-term loudness to the radio gain estimate (1 Hz)."""
+        if not self.normalize or self._radio_loudness is None or self.currently_playing != "radio":
+            return
+        try:
+            self.mpv.set_gain(self._radio_loudness.update(self.mpv.get_loudness(), dt=1.0))
+        except Exception:
+            return
+
+    def _show_waveform(self, path) -> None:
+        """Show the cached waveform of local file `path` (None clears it) and
+        queue generation for it and the next few queue entries."""
+        self._waveform_path = path
+        try:
+            bar = self.query_one(ProgressBar)
+        except Exception:
+            bar = None
+        if path is None:
+            if bar is not None:
+                bar.waveform = None
+            return
+        from pytuiplayer.loudness import analysis_available
+        if not analysis_available():
+            return
+        if self._waveforms is None:
+            from pytuiplayer.waveform import WaveformCache, WaveformScheduler
+            self._waveforms = WaveformScheduler(WaveformCache(), on_ready=self._on_waveform_ready)
+        cached = self._waveforms.cache.get(path)
+        if bar is not None:
+            bar.waveform = cached[0] if cached else None
+        wanted = [path]
+        if self._queue is not None:
+            for _, source, _ in self._queue.upcoming(self.WAVEFORM_LOOKAHEAD + 1):
+                if not str(source).startswith(("http://", "https://", "rtmp://", "ftp://")):
+                    wanted.append(str(source))
+        # only existing files; missing ones would just fail in the worker
+        self._waveforms.request(p for p in dict.fromkeys(wanted) if os.path.isfile(p))
+
+    def _on_waveform_ready(self, path, waveform) -> None:
+        # runs on a pool thread
+        try:
+            self.call_from_thread(self._waveform_ready, path, waveform)
+        except Exception:
+            return
+
+    def _waveform_ready(self, path, waveform) -> None:
+        if path != self._waveform_path:
+            return
+        try:
+            self.query_one(ProgressBar).waveform = waveform[0]
+        except Exception:
+            return
+
+    def _pcm_source(self):
+        """PCM tap for the spectrum meter: synthesised for the simulated backend,
+        an ffmpeg side decoder for local files otherwise (None without ffmpeg)."""
+        if os.getenv("PYTUIP_BACKEND") == "sim":
+            from pytuiplayer.spectrum import SimPcmSource
+            return SimPcmSource(self.mpv)
+        from pytuiplayer.spectrum import FfmpegPcmSource
+        return FfmpegPcmSource(self.mpv) if FfmpegPcmSource.available() else None
+
+    def action_toggle_spectrum(self) -> None:
+        meter = self.query_one("#spectrum", SpectrumMeter)
+        if meter.source is None and not meter.display:
+            meter.source = self._pcm_source()
+            if meter.source is None:
+                self.notify("No PCM tap available (install ffmpeg)", severity="warning")
+                return
+        meter.display = not meter.display
@@ -9,42 +9,151 @@ class NowPlaying(Static):
 class NowPlayingMessage(Message):
     def __init__(self, sender, title: str, source: str, state: str): ...
 
+class StreamTitleChanged(Message):
+    def __init__(self, station: str | None, title: str): ...
+
 class ProgressBar(Static):
     def _fmt_mmss(self, seconds: float | None) -> str: ...
     def render(self) -> str: ...
+    def _render_live(self) -> str: ...
+    def _render_waveform(self, filled: int, suffix: str): ...
+
+class SpectrumMeter(Static):
+    def __init__(self, source = None, **kwargs): ...
+    def on_mount(self) -> None: ...
+    def on_show(self) -> None: ...
+    def on_hide(self) -> None: ...
+    def _tick(self) -> None: ...
+    def _painted(self) -> None: ...
+    def render(self) -> str: ...
 
 class VolumeIndicator(Static):
     def render(self) -> str: ...
 
+class GroupHeader(ListItem):
+    def __init__(self, rows, describe): ...
+    def title(self) -> str: ...
+    def toggle(self) -> None: ...
+
+class _GroupTitle(Static):
+    def render(self) -> str: ...
+
 class MusicPlayerApp(App):
-    def __init__(self) -> None: ...
+    def __init__(self): ...
     def compose(self) -> ComposeResult: ...
+    def queue(self): ...
+    def remote(self): ...
+    def track_cache(self): ...
+    def _prefetch_tracks(self, source: str) -> None: ...
+    def history(self): ...
+    def _history_event(self, name: str) -> None: ...
+    def _profile_mark(self, phase: str) -> None: ...
+    async def _ensure_local_panels(self) -> None: ...
+    def _start_library_scan(self) -> None: ...
+    def _scan_library(self) -> None: ...
+    def _update_library_tables(self, should_stop) -> None: ...
+    def _apply_mode_visibility(self, radio: bool) -> None: ...
     async def on_mount(self) -> None: ...
+    def on_ready(self) -> None: ...
+    async def action_quit(self) -> None: ...
+    def on_unmount(self) -> None: ...
     def update_volume_ui(self): ...
     def action_volume_up(self): ...
     def action_volume_down(self): ...
     def action_toggle_mute(self): ...
     async def load_stations(self, path: Path): ...
+    async def _refresh_remote_stations(self, url: str) -> None: ...
     async def on_radio_set_changed(self, event): ...
     async def load_local_files(self, path: Path): ...
-    async def load_m3u(self, path: Path): ...
+    async def _show_local_files(self, files: list): ...
+    async def _revalidate_local_files(self, path: Path): ...
+    async def load_m3u(self, path: Path, base = None): ...
+    async def open_playlist(self, source) -> None: ...
+    async def load_remote_playlist(self, url: str) -> None: ...
+    async def load_cue(self, path: Path) -> None: ...
+    async def _mount_batch(list_view, batch, current = None) -> bool: ...
+    async def _show_playlist_entries(self, entries, title: str, current = None) -> None: ...
+    def _smart_manager(self): ...
+    async def load_smart_playlist(self, path: Path) -> None: ...
+    def _leave_smart_view(self) -> None: ...
+    async def _show_smart_playlist(self, playlist) -> None: ...
+    def _refresh_smart_playlist(self) -> None: ...
+    async def _list_local_items(self, items) -> None: ...
+    async def _arrange_local_list(self) -> None: ...
+    def _build_sorter(self, items): ...
+    def _describe_group(sorter, group: str, rows) -> str: ...
+    def _start_enrichment(self, items, title: str = 'Local Music List') -> None: ...
+    def _stop_enrichment(self) -> None: ...
+    def _prioritise_enrichment(self) -> None: ...
+    def _apply_enrichment(self) -> None: ...
     async def on_button_pressed(self, event: Button.Pressed) -> None: ...
     async def on_list_view_selected(self, event: ListView.Selected) -> None: ...
     async def on_directory_tree_file_selected(self, event: DirectoryTree.FileSelected) -> None: ...
     async def load_stations_ui(self): ...
     def update_now_playing(self, title: str, source: str, state: str): ...
+    def _observe_metadata(self) -> bool: ...
+    def _on_mpv_metadata(self, value) -> None: ...
+    def on_stream_title_changed(self, message: StreamTitleChanged) -> None: ...
+    def _show_stream_title(self, title: str) -> None: ...
     def _refresh_metadata(self): ...
-    def update_progress(self) -> None: ...
+    def update_progress(self): ...
     def action_toggle_play(self): ...
     def action_play(self): ...
     def action_pause(self): ...
     def action_stop(self): ...
     def action_seek_forward(self): ...
     def action_seek_backward(self): ...
+    def action_go_live(self): ...
+    def _timeshift_active(self) -> bool: ...
+    def _timeshift_seek(self, delta: float | None = None, fraction: float | None = None) -> bool: ...
+    def action_toggle_recording(self) -> None: ...
+    def _stop_recording(self) -> None: ...
+    def _stop_timeshift(self) -> None: ...
     def _seek_to_percent(self, percent: float): ...
     def action_seek_to_10(self): ...
     def action_seek_to_50(self): ...
     def action_seek_to_90(self): ...
     async def play_station(self, station, idx): ...
-    def play_local(self, path): ...
+    def play_local(self, path, start: float | None = None): ...
+    def _play_cue_track(self, track, label = None, start = None, seek: bool = True) -> None: ...
+    def _watch_cue_track(self) -> None: ...
     def action_play_playlist(self) -> None: ...
+    def _queue_entry(data): ...
+    def _play_entry(self, entry) -> None: ...
+    def _advance_queue_if_finished(self) -> None: ...
+    def action_next_track(self) -> None: ...
+    def action_prev_track(self) -> None: ...
+    def action_toggle_shuffle(self) -> None: ...
+    def action_cycle_repeat(self) -> None: ...
+    def action_enqueue(self) -> None: ...
+    def _smart_entries(self, path: Path): ...
+    def _enqueue_stream(self, entries, name: str) -> None: ...
+    async def action_toggle_queue(self) -> None: ...
+    def action_focus_search(self) -> None: ...
+    def action_cycle_sort(self) -> None: ...
+    def action_cycle_grouping(self) -> None: ...
+    def _rearrange_local_list(self) -> None: ...
+    def on_input_changed(self, event) -> None: ...
+    def on_input_submitted(self, event) -> None: ...
+    async def _search_library(self, query: str) -> None: ...
+    async def _show_search_results(self, query: str, results: list) -> None: ...
+    async def action_toggle_duplicates(self) -> None: ...
+    def _find_duplicates(self) -> None: ...
+    def _set_duplicates_title(self, title: str) -> None: ...
+    async def _show_duplicates(self, groups) -> None: ...
+    def _stale_queue_view(self) -> ListView | None: ...
+    async def _refresh_queue_view(self) -> None: ...
+    def _mpv_play(self, source: str, start: float | None = None) -> None: ...
+    def _item_id(data): ...
+    def _restore_session(self, state) -> None: ...
+    def _session_state(self) -> dict: ...
+    def _save_session(self, wait: bool = False) -> None: ...
+    def _restore_list_position(self, list_id: str) -> None: ...
+    def _resume_playback(self) -> bool: ...
+    def _apply_normalization(self, source) -> None: ...
+    def _update_radio_gain(self) -> None: ...
+    def _show_waveform(self, path) -> None: ...
+    def _on_waveform_ready(self, path, waveform) -> None: ...
+    def _waveform_ready(self, path, waveform) -> None: ...
+    def _pcm_source(self): ...
+    def action_toggle_spectrum(self) -> None: ...
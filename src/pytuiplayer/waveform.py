@@ -0,0 +1,205 @@
+import hashlib
+import os
+import struct
+import threading
+from pathlib import Path
+
+from pytuiplayer.storage import atomic_write_bytes, cache_dir
+
+# Buckets stored per track; the progress bar resamples them to its width
+BUCKETS = 400
+
+_MAGIC = b"PTWF"
+_HEADER = struct.Struct("<4sBH")  # magic, version, bucket count
+_VERSION = 1
+
+
+def compute_waveform(path, buckets: int = BUCKETS):
+    """Decode `path` once and return `(peaks, rms)` as bytes, one value (0-255) per bucket.
+
+    Peak and energy are first collected per 100 ms block while decoding;
+    the blocks are then grouped into `buckets` equal parts. Returns None if
+    the file cannot be decoded. Runs in a worker process.
+    """
+    import numpy as np
+    from pytuiplayer.loudness import SAMPLE_RATE, iter_pcm
+    block = SAMPLE_RATE // 10
+    peaks, energy = [], []
+    rest = np.zeros(0, dtype=np.float32)
+    try:
+        for chunk in iter_pcm(path):
+            mono = np.concatenate([rest, chunk.mean(axis=1)])
+            count = len(mono) // block
+            rest = mono[count * block:]
+            blocks = mono[:count * block].reshape(count, block)
+            peaks.append(np.abs(blocks).max(axis=1))
+            energy.append((blocks * blocks).mean(axis=1))
+    except (OSError, ValueError) as exc:
+        print(f"[ERROR] Waveform failed for {path}: {exc}")
+        return None
+    if not peaks or not sum(len(p) for p in peaks):
+        return None
+    peaks, energy = np.concatenate(peaks), np.concatenate(energy)
+    groups = np.array_split(np.arange(len(peaks)), min(buckets, len(peaks)))
+    starts = np.array([g[0] for g in groups])
+    bucket_peak = np.maximum.reduceat(peaks, starts)
+    bucket_rms = np.sqrt(np.add.reduceat(energy, starts) / np.diff(np.append(starts, len(peaks))))
+    to_bytes = lambda values: np.clip(values * 255, 0, 255).astype(np.uint8).tobytes()  # noqa: E731
+    return to_bytes(bucket_peak), to_bytes(bucket_rms)
+
+
+def encode(peaks: bytes, rms: bytes) -> bytes:
+    return _HEADER.pack(_MAGIC, _VERSION, len(peaks)) + peaks + rms
+
+
+def decode(data: bytes):
+    """Return `(peaks, rms)` from `encode()` output, or None if it is not a valid entry."""
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION or len(data) != _HEADER.size + 2 * count:
+        return None
+    body = data[_HEADER.size:]
+    return body[:count], body[count:]
+
+
+class WaveformCache:
+    """Waveforms on disk, one small binary file per track, bounded to `max_bytes`.
+
+    Files are named after a hash of the track's path, size and mtime, so an
+    edited file gets a new entry and the stale one ages out. Reading an
+    entry bumps its mtime; `put()` evicts the least recently used entries
+    once the directory grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = 16 * 1024 * 1024):
+        self.directory = Path(directory) if directory is not None else cache_dir() / "waveforms"
+        self.max_bytes = max_bytes
+
+    def key(self, path) -> str | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        ident = f"{os.fspath(path)}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8", "surrogateescape")
+        return hashlib.blake2b(ident, digest_size=16).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.directory / f"{key}.wf"
+
+    def get(self, path):
+        key = self.key(path)
+        if key is None:
+            return None
+        file = self._file(key)
+        try:
+            data = file.read_bytes()
+            os.utime(file)
+        except OSError:
+            return None
+        return decode(data)
+
+    def put(self, path, peaks: bytes, rms: bytes) -> None:
+        key = self.key(path)
+        if key is None:
+            return
+        try:
+            atomic_write_bytes(self._file(key), encode(peaks, rms))
+        except OSError as exc:
+            print(f"[ERROR] Failed to cache waveform for {path}: {exc}")
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".wf"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                continue
+
+
+class WaveformScheduler:
+    """Generate missing waveforms in a worker process, most wanted first.
+
+    `request(paths)` takes the tracks in priority order (current track, then
+    the upcoming queue). Queued jobs for tracks no longer wanted are
+    cancelled; a job already decoding finishes and is cached. `on_ready(path,
+    waveform)` is called from a pool thread when a waveform is available.
+    """
+
+    def __init__(self, cache: WaveformCache, on_ready=None, workers: int = 1, compute=compute_waveform):
+        self.cache = cache
+        self.on_ready = on_ready
+        self.workers = workers
+        self.compute = compute
+        self._pool = None
+        self._jobs = {}  # path -> Future
+        self._failed = set()
+        # re-entrant: cancelling a future runs `_done` on the calling thread
+        self._lock = threading.RLock()
+
+    def request(self, paths) -> None:
+        wanted = [os.fspath(p) for p in paths]
+        with self._lock:
+            for path, future in list(self._jobs.items()):
+                if path not in wanted:
+                    # a job already decoding cannot be cancelled; it is cached when done
+                    future.cancel()
+            for path in wanted:
+                if path in self._jobs or path in self._failed:
+                    continue
+                if self.cache.get(path) is not None:
+                    continue
+                if self._pool is None:
+                    from pytuiplayer.loudness import process_pool
+                    self._pool = process_pool(self.workers)
+                try:
+                    future = self._pool.submit(self.compute, path)
+                except RuntimeError as exc:
+                    # the worker died (BrokenProcessPool); start a fresh pool next time
+                    print(f"[ERROR] Waveform pool unavailable: {exc}")
+                    self._pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = None
+                    return
+                future.add_done_callback(lambda f, path=path: self._done(path, f))
+                self._jobs[path] = future
+
+    def pending(self) -> list:
+        with self._lock:
+            return [path for path, future in self._jobs.items() if not future.done()]
+
+    def _done(self, path: str, future) -> None:
+        with self._lock:
+            self._jobs.pop(path, None)
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as exc:
+            print(f"[ERROR] Waveform worker failed for {path}: {exc}")
+            result = None
+        if result is None:
+            with self._lock:
+                self._failed.add(path)
+            return
+        self.cache.put(path, *result)
+        if self.on_ready is not None:
+            self.on_ready(path, result)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _simulated_backend(monkeypatch):
+    """Apps built in tests use the simulated backend so no audio is ever played."""
+    monkeypatch.setenv("PYTUIP_BACKEND", "sim")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_storage(monkeypatch, tmp_path_factory):
+    """Keep caches and user state written during tests out of the real home directory."""
+    monkeypatch.setenv("PYTUIP_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+    monkeypatch.setenv("PYTUIP_DATA_DIR", str(tmp_path_factory.mktemp("data")))
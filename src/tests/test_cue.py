@@ -0,0 +1,94 @@
+from pytuiplayer.cue import find_track, iter_cue, parse_cue
+from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+from pytuiplayer.sim_player import ManualClock, SimulatedMPV
+from pytuiplayer.smart_playlists import read_facts
+
+SHEET = """\
+REM GENRE Jazz
+REM DATE 1959
+PERFORMER "Miles Davis"
+TITLE "Kind of Blue"
+FILE "Kind of Blue.flac" WAVE
+  TRACK 01 AUDIO
+    TITLE "So What"
+    INDEX 01 00:00:00
+  TRACK 02 AUDIO
+    TITLE "Freddie Freeloader"
+    INDEX 00 09:20:00
+    INDEX 01 09:22:30
+  TRACK 03 AUDIO
+    TITLE "Blue in Green"
+    PERFORMER "Miles Davis & Bill Evans"
+    INDEX 01 19:01:00
+FILE "bonus.flac" WAVE
+  TRACK 04 AUDIO
+    TITLE "Flamenco Sketches"
+    INDEX 01 00:00:00
+"""
+
+
+def write_sheet(tmp_path, text=SHEET, encoding="utf-8"):
+    sheet = tmp_path / "Kind of Blue.cue"
+    sheet.write_bytes(text.encode(encoding))
+    return sheet
+
+
+def test_parse_tracks_offsets_and_tags(tmp_path):
+    sheet = write_sheet(tmp_path)
+    tracks = parse_cue(sheet)
+    assert [t.number for t in tracks] == [1, 2, 3, 4]
+    image = str(tmp_path / "Kind of Blue.flac")
+    assert [(t.file, t.start, t.end) for t in tracks] == [
+        (image, 0.0, 562.4), (image, 562.4, 1141.0), (image, 1141.0, None),
+        (str(tmp_path / "bonus.flac"), 0.0, None)]
+    assert tracks[0].label == "Miles Davis - So What"
+    assert tracks[2].performer == "Miles Davis & Bill Evans"
+    assert (tracks[1].album, tracks[1].genre, tracks[1].year) == ("Kind of Blue", "Jazz", 1959)
+    assert next(iter_cue(sheet)) == (f"{sheet}#1", "Miles Davis - So What")
+    assert find_track(f"{sheet}#3").title == "Blue in Green"
+    assert find_track(f"{sheet}#9") is None
+    assert find_track(str(tmp_path / "missing.cue#1")) is None
+
+    # sheets written by old rippers are often Latin-1
+    latin = write_sheet(tmp_path, SHEET.replace("So What", "Café"), encoding="latin-1")
+    assert parse_cue(latin)[0].title == "Café"
+
+
+def test_library_scan_indexes_cue_tracks(tmp_path):
+    sheet = write_sheet(tmp_path)
+    (tmp_path / "Kind of Blue.flac").write_bytes(b"\0" * 10)
+    index = LibraryIndex(tmp_path / "library.json")
+    LibraryWalker(index, duration_reader=lambda path: 1500.0).walk(tmp_path)
+    tracks = {source: duration for source, _, _, duration in index.cue_tracks()}
+    assert tracks == {f"{sheet}#1": 562.4, f"{sheet}#2": 578.6, f"{sheet}#3": 359.0, f"{sheet}#4": 1500.0}
+    assert index.summary(tmp_path)[2] == 1  # the sheet counts as a playlist
+    assert read_facts(f"{sheet}#2") == {
+        "title": "Freddie Freeloader", "artist": "Miles Davis", "album": "Kind of Blue",
+        "genre": "Jazz", "year": 1959, "track": 2}
+
+
+def test_cue_tracks_play_through_one_image(tmp_path):
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    sheet = write_sheet(tmp_path)
+    image = str(tmp_path / "Kind of Blue.flac")
+    clock = ManualClock()
+    app = MusicPlayerApp()
+    app.mpv.player = SimulatedMPV(clock=clock, default_duration=1500.0)
+    app.queue.replace(list(iter_cue(sheet)), start_index=1)
+    app._play_entry(app.queue.current())
+    assert app.mpv.get_time_pos() == 562.4
+    assert app.current_title == "Miles Davis - Freddie Freeloader"
+
+    # at the boundary the next track of the image goes on without a seek or a reload
+    clock.advance(1141.0 - 562.4)
+    app._watch_cue_track()
+    assert app.current_title == "Miles Davis & Bill Evans - Blue in Green"
+    assert app._playing["source"] == f"{sheet}#3"
+    assert app.mpv.get_time_pos() == 1141.0
+
+    # picking another track of the same image seeks instead of reloading
+    app._play_entry((f"{sheet}#1", None))
+    assert app.mpv.get_time_pos() == 0.0
+    starts = [e for e in app.mpv.player.events if e["event"] == "start-file"]
+    assert [e["source"] for e in starts] == [image]
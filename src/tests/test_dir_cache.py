@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+from pytuiplayer.dir_cache import DirectoryListingCache
+
+
+def bump_mtime(path: Path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_listing_is_filtered_case_insensitively_and_cached(tmp_path: Path):
+    (tmp_path / "a.mp3").write_text("")
+    (tmp_path / "B.MP3").write_text("")
+    (tmp_path / "notes.txt").write_text("")
+    (tmp_path / "dir.mp3").mkdir()
+
+    cache = DirectoryListingCache()
+    assert cache.peek(tmp_path) is None
+
+    files = cache.get(tmp_path)
+    assert sorted(f.name for f in files) == ["B.MP3", "a.mp3"]
+    assert tmp_path in cache
+
+    # a cache hit does not read the directory again
+    (tmp_path / "c.mp3").write_text("")
+    assert len(cache.peek(tmp_path)) == 2
+
+
+def test_refresh_rereads_only_when_mtime_changes(tmp_path: Path, monkeypatch):
+    (tmp_path / "a.mp3").write_text("")
+    cache = DirectoryListingCache()
+    cache.load(tmp_path)
+
+    scans = []
+    original = cache._scan
+    monkeypatch.setattr(cache, "_scan", lambda p: scans.append(p) or original(p))
+
+    files, changed = cache.refresh(tmp_path)
+    assert changed is False and scans == []
+    assert [f.name for f in files] == ["a.mp3"]
+
+    (tmp_path / "b.mp3").write_text("")
+    bump_mtime(tmp_path)
+    files, changed = cache.refresh(tmp_path)
+    assert changed is True and len(scans) == 1
+    assert sorted(f.name for f in files) == ["a.mp3", "b.mp3"]
+
+
+def test_lru_caps_number_of_directories(tmp_path: Path):
+    dirs = []
+    for i in range(4):
+        d = tmp_path / f"d{i}"
+        d.mkdir()
+        dirs.append(d)
+
+    cache = DirectoryListingCache(max_dirs=2)
+    cache.load(dirs[0])
+    cache.load(dirs[1])
+    cache.peek(dirs[0])  # d0 becomes most recently used
+    cache.load(dirs[2])
+
+    assert len(cache) == 2
+    assert dirs[0] in cache and dirs[2] in cache
+    assert dirs[1] not in cache
+
+
+def test_refresh_forgets_removed_directory(tmp_path: Path):
+    d = tmp_path / "gone"
+    d.mkdir()
+    cache = DirectoryListingCache()
+    cache.load(d)
+    d.rmdir()
+    assert cache.refresh(d) == ([], True)
+    assert d not in cache
@@ -0,0 +1,123 @@
+import threading
+import time
+
+from pytuiplayer.enrich import EnrichmentScheduler, display_label
+
+
+class GatedReader:
+    """Records the order of reads; each read waits until `release()`."""
+
+    def __init__(self):
+        self.order = []
+        self.gate = threading.Semaphore(0)
+
+    def __call__(self, source):
+        self.order.append(source)
+        self.gate.acquire(timeout=5)
+        return {"title": source.upper(), "duration": 61.0}
+
+    def release(self, n=1):
+        for _ in range(n):
+            self.gate.release()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_visible_rows_then_queue_then_the_rest():
+    read = GatedReader()
+    scheduler = EnrichmentScheduler(read=read, workers=1)
+    for row in range(10):
+        scheduler.add(row, f"s{row}")
+    scheduler.prioritise(visible=[7, 8], queued=[3, 8])
+    read.release(10)
+    wait_for(lambda: scheduler.pending() == 0)
+    # row 0 was already being read when the priorities arrived
+    assert read.order == ["s0", "s7", "s8", "s3", "s1", "s2", "s4", "s5", "s6", "s9"]
+    results = dict(scheduler.drain())
+    assert len(results) == 10 and results[7]["title"] == "S7"
+    assert scheduler.drain() == []
+    scheduler.close()
+
+
+def test_rows_scrolled_away_from_lose_their_priority():
+    read = GatedReader()
+    scheduler = EnrichmentScheduler(read=read, workers=1)
+    for row in range(10):
+        scheduler.add(row, f"s{row}")
+    scheduler.prioritise(visible=[5, 6, 7, 8])
+    read.release()
+    wait_for(lambda: len(read.order) == 2)
+    # scrolled to the bottom after one visible row was read
+    scheduler.prioritise(visible=[9])
+    read.release(10)
+    wait_for(lambda: scheduler.pending() == 0)
+    assert read.order[:3] == ["s0", "s5", "s9"]
+    assert read.order[3:] == ["s1", "s2", "s3", "s4", "s6", "s7", "s8"]
+    scheduler.close()
+
+
+def test_pool_is_bounded_and_close_drops_pending_work():
+    read = GatedReader()
+    scheduler = EnrichmentScheduler(read=read, workers=2)
+    for row in range(6):
+        scheduler.add(row, f"s{row}")
+    wait_for(lambda: len(read.order) == 2)
+    time.sleep(0.05)
+    assert len(read.order) == 2
+    scheduler.close()
+    read.release(6)
+    time.sleep(0.05)
+    assert len(read.order) == 2
+    assert scheduler.drain() == []
+
+
+def test_display_label():
+    info = {"title": "Song", "artist": "Band", "duration": 125.0}
+    assert display_label(info, "01.mp3") == "Band - Song  (2:05)"
+    assert display_label(info, "From playlist", tagged=True) == "From playlist  (2:05)"
+    assert display_label({"duration": 5.0}, "x.mp3") == "x.mp3  (0:05)"
+
+
+def test_playlist_rows_on_screen_are_read_first(tmp_path, monkeypatch):
+    import asyncio
+    from pytuiplayer import enrich
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    order = []
+
+    def read(path):
+        row = int(path.rsplit("/", 1)[1].split(".")[0])
+        order.append(row)
+        time.sleep(0.01)
+        return {"title": f"T{row}", "duration": 60.0}
+
+    monkeypatch.setattr(enrich, "read_track_info", read)
+    playlist = tmp_path / "big.m3u"
+    playlist.write_text("".join(f"{i}.mp3\n" for i in range(400)))
+
+    async def run():
+        app = MusicPlayerApp()
+        async with app.run_test(size=(120, 80)) as pilot:
+            await app._ensure_local_panels()
+            view = app.query_one("#local-list")
+            await app.load_m3u(playlist)
+            view.scroll_to(y=300, animate=False)
+            for _ in range(200):
+                await pilot.pause(0.05)
+                if app._enricher is None:
+                    break
+            assert app._enricher is None
+            height = view.scrollable_content_region.height
+            # once the list scrolled, the rows it shows jumped the queue
+            first_visible = min(order.index(row) for row in range(300, 300 + height))
+            assert sorted(order[first_visible:first_visible + height]) == list(range(300, 300 + height))
+            assert first_visible < 100
+            assert "T300  (1:00)" in str(view.children[300].query_one("Label").render())
+            assert view.border_title == "Local Music List · 400 · 6:40:00"
+
+    asyncio.run(run())
@@ -0,0 +1,165 @@
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+NOTES = {"C": 261.63, "E": 329.63, "G": 392.0, "A": 440.0, "D": 293.66, "F": 349.23, "B": 493.88}
+
+
+def song(chords, rate=48000, seconds=24.0, gain=0.3, noise=0.0, seed=0):
+    """A sequence of chords (strings of note names), evenly spread over `seconds`."""
+    t = np.arange(int(rate * seconds)) / rate
+    out = np.zeros_like(t)
+    for i, part in enumerate(np.array_split(np.arange(len(t)), len(chords))):
+        for note in chords[i]:
+            out[part] += np.sin(2 * np.pi * NOTES[note] * t[part])
+    out *= gain / np.abs(out).max()
+    if noise:
+        out += noise * np.random.default_rng(seed).standard_normal(len(out))
+    return out
+
+
+def write_wav(path, samples, rate=48000):
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+
+
+VERSE = ["CEG", "ACE", "FAC", "GBD"] * 2
+OTHER = ["DFA", "EGB", "CEG", "FAC", "DFA", "GBD", "ACE", "EGB"]
+
+
+def test_re_encoded_copy_matches_and_other_songs_do_not(tmp_path):
+    from pytuiplayer.fingerprint import chroma_vector, decode_window
+    write_wav(tmp_path / "a.wav", song(VERSE))
+    write_wav(tmp_path / "b.wav", song(VERSE, rate=44100, gain=0.8, noise=0.01), rate=44100)
+    write_wav(tmp_path / "c.wav", song(OTHER))
+    a, b, c = (chroma_vector(decode_window(tmp_path / f"{n}.wav", 0)) for n in "abc")
+    assert float(a @ b) > 0.95
+    assert float(a @ c) < 0.5
+    assert chroma_vector(np.zeros(11025 * 20, dtype=np.float32)) is None
+
+
+def test_library_run_is_incremental_and_groups_duplicates(tmp_path):
+    from pytuiplayer.fingerprint import FingerprintIndex, fingerprint_library
+    from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+
+    music = tmp_path / "music"
+    (music / "album").mkdir(parents=True)
+    write_wav(music / "album" / "01 song.wav", song(VERSE))
+    write_wav(music / "copy of song.wav", song(VERSE, gain=0.6, noise=0.005))
+    write_wav(music / "other.wav", song(OTHER))
+    index = LibraryIndex(tmp_path / "library.json")
+    LibraryWalker(index, duration_reader=lambda p: None).walk(music)
+
+    fingerprints = FingerprintIndex(tmp_path / "fp.sqlite")
+    assert fingerprint_library(index, fingerprints, workers=1) == 3
+    assert len(fingerprints) == 3
+    assert fingerprints.duplicates() == [[str(music / "album" / "01 song.wav"), str(music / "copy of song.wav")]]
+    similar = fingerprints.similar(music / "copy of song.wav")
+    assert [p for p, _ in similar] == [str(music / "album" / "01 song.wav")]
+
+    # nothing changed: nothing is decoded again, and results survive a reopen
+    fingerprints.close()
+    fingerprints = FingerprintIndex(tmp_path / "fp.sqlite")
+    assert fingerprint_library(index, fingerprints, workers=1) == 0
+
+    # removed files drop out of the index
+    (music / "copy of song.wav").unlink()
+    LibraryWalker(index, duration_reader=lambda p: None).walk(music)
+    assert fingerprint_library(index, fingerprints, workers=1) == 0
+    assert fingerprints.duplicates() == []
+    assert len(fingerprints) == 2
+    fingerprints.close()
+
+
+def test_interrupted_run_resumes(tmp_path):
+    from pytuiplayer.fingerprint import FingerprintIndex, fingerprint_library
+    from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+
+    music = tmp_path / "music"
+    music.mkdir()
+    for i, chords in enumerate([VERSE, OTHER, VERSE[::-1]]):
+        write_wav(music / f"{i}.wav", song(chords, seconds=12))
+    index = LibraryIndex(tmp_path / "library.json")
+    LibraryWalker(index, duration_reader=lambda p: None).walk(music)
+
+    fingerprints = FingerprintIndex(tmp_path / "fp.sqlite")
+    first = fingerprint_library(index, fingerprints, workers=1, should_stop=lambda: True)
+    assert 1 <= first < 3
+    assert fingerprint_library(index, fingerprints, workers=1) == 3 - first
+    fingerprints.close()
+
+
+def test_broken_pool_ends_the_run(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    import pytuiplayer.loudness
+    from pytuiplayer.fingerprint import FingerprintIndex, fingerprint_library
+    from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+
+    class BrokenPool:
+        """A pool whose first worker dies, after which it refuses jobs."""
+        broken = False
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, *args):
+            if self.broken:
+                raise BrokenProcessPool("a child process terminated abruptly")
+            self.broken = True
+            future = Future()
+            future.set_exception(BrokenProcessPool("a child process terminated abruptly"))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    music = tmp_path / "music"
+    music.mkdir()
+    for i in range(3):
+        write_wav(music / f"{i}.wav", song(VERSE, seconds=1))
+    index = LibraryIndex(tmp_path / "library.json")
+    LibraryWalker(index, duration_reader=lambda p: None).walk(music)
+    monkeypatch.setattr(pytuiplayer.loudness, "process_pool", lambda workers: BrokenPool())
+    fingerprints = FingerprintIndex(tmp_path / "fp.sqlite")
+    assert fingerprint_library(index, fingerprints, workers=1) == 0
+    fingerprints.close()
+
+
+def test_duplicates_view_lists_groups(tmp_path):
+    import asyncio
+    from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    write_wav(tmp_path / "a.wav", song(VERSE, seconds=12))
+    write_wav(tmp_path / "b.wav", song(VERSE, seconds=12, gain=0.5))
+    write_wav(tmp_path / "c.wav", song(OTHER, seconds=12))
+
+    async def run():
+        app = MusicPlayerApp()
+        app.library_index = LibraryIndex(tmp_path / "library.json")
+        LibraryWalker(app.library_index, duration_reader=lambda p: None).walk(tmp_path)
+        async with app.run_test() as pilot:
+            await pilot.press("d")
+            view = app.query_one("#duplicates-list")
+            for _ in range(100):
+                await pilot.pause(0.1)
+                if "groups" in str(view.border_title):
+                    break
+            assert view.border_title == "Duplicates (1 groups)"
+            assert [getattr(item, "data", None) for item in view.children] == [
+                None, str(tmp_path / "a.wav"), str(tmp_path / "b.wav")]
+            await pilot.press("d")
+            assert not view.display
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import json
+
+from pytuiplayer.history import HistoryLog, promote
+from pytuiplayer.sim_player import ManualClock
+
+
+def make_log(tmp_path, **kwargs):
+    clock = ManualClock()
+    log = HistoryLog(tmp_path / "history.jsonl", flush_interval=0.01, clock=clock, **kwargs)
+    return log.load(), clock
+
+
+def test_records_plays_and_listening_time_excluding_pauses(tmp_path):
+    log, clock = make_log(tmp_path)
+    log.start("http://radio/a", "Radio A", kind="radio")
+    clock.advance(60)
+    log.pause()
+    clock.advance(600)
+    log.resume()
+    clock.advance(30)
+    log.start("/music/song.mp3", "Song")  # ends the radio play
+    clock.advance(10)
+    log.close()
+
+    assert log.listening_time() == {"http://radio/a": 90.0}
+    assert log.listening_time(kind="local") == {"/music/song.mp3": 10.0}
+    lines = (tmp_path / "history.jsonl").read_text().splitlines()
+    assert [json.loads(line)["ev"] for line in lines] == ["start", "stop", "start", "stop"]
+
+
+def test_most_and_recently_played(tmp_path):
+    log, clock = make_log(tmp_path)
+    for source in ["a", "b", "a", "c", "a", "b"]:
+        log.start(source)
+        clock.advance(1)
+    log.close()
+
+    assert [src for src, _ in log.most_played(2)] == ["a", "b"]
+    assert log.recently_played(1)[0][0] == "b"
+    assert log.most_played(1)[0][1]["plays"] == 3
+    assert log.favourites(limit=1) == ["a", "b"]
+
+
+def test_reload_uses_snapshot_and_replays_tail_and_skips_torn_line(tmp_path):
+    log, clock = make_log(tmp_path, compact_every=2)
+    log.start("a")
+    log.start("b")
+    log.close()
+    index = json.loads((tmp_path / "history-index.json").read_text())
+    assert index["offset"] == (tmp_path / "history.jsonl").stat().st_size
+
+    # events written after the snapshot, then a crash mid-line
+    with open(tmp_path / "history.jsonl", "a") as f:
+        f.write(json.dumps({"ev": "start", "src": "c", "kind": "local", "t": 5}) + "\n")
+        f.write('{"ev": "start", "src": "d"')
+
+    reloaded = HistoryLog(tmp_path / "history.jsonl").load()
+    plays = {src: e["plays"] for src, e in reloaded.most_played(10)}
+    assert plays == {"a": 1, "b": 1, "c": 1}
+
+
+def test_promote_keeps_rest_in_original_order():
+    promoted, rest = promote(["x", "a", "y", "b", "z"], str, ["b", "a"])
+    assert promoted == ["b", "a"]
+    assert rest == ["x", "y", "z"]
+
+
+def test_torn_last_line_is_cut_before_appending(tmp_path):
+    path = tmp_path / "history.jsonl"
+    log, clock = make_log(tmp_path)
+    log.start("a")
+    log.close()
+    with open(path, "a") as f:
+        f.write('{"ev": "start", "src": "torn"')  # a crash mid-write
+
+    log, clock = make_log(tmp_path)
+    log.start("b")
+    log.close()
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["src"] for line in lines] == ["a", "a", "b", "b"]
+    plays = {src: e["plays"] for src, e in HistoryLog(path).load().most_played(10)}
+    assert plays == {"a": 1, "b": 1}
@@ -0,0 +1,126 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pytuiplayer.icy import IcyDemuxer, TitleHistory, parse_metadata
+from pytuiplayer.station_stream import StationStream
+
+METAINT = 100
+
+
+def icy_stream(titles):
+    """`(audio, stream)`: a block of audio before each metadata block of
+    `titles`; None sends an empty block (no change)."""
+    audio, stream = b"", b""
+    for i, title in enumerate(titles):
+        block = bytes([i]) * METAINT
+        meta = f"StreamTitle='{title}';StreamUrl='';".encode() if title is not None else b""
+        meta += b"\0" * (-len(meta) % 16)
+        audio += block
+        stream += block + bytes([len(meta) // 16]) + meta
+    return audio, stream
+
+
+def test_demuxer_splits_chunks_of_any_size_without_copying():
+    titles = ["Guns N' Roses - Don't Cry", None, "B - Two", "B - Two"]
+    audio, stream = icy_stream(titles)
+    for size in (1, 7, 101, 117, len(stream)):
+        demuxer = IcyDemuxer(METAINT)
+        pieces, seen = [], []
+        for start in range(0, len(stream), size):
+            chunk = bytearray(stream[start:start + size])
+            for piece, fields in demuxer.feed(chunk):
+                if piece is not None:
+                    assert piece.obj is chunk  # a view of the chunk, not a copy
+                    pieces.append(bytes(piece))
+                else:
+                    seen.append(fields["StreamTitle"])
+        assert b"".join(pieces) == audio
+        assert seen == [t for t in titles if t is not None]
+    assert parse_metadata(b"StreamTitle='';\0\0") == {"StreamTitle": ""}
+    # without metaint the stream is all audio
+    assert [bytes(p) for p, _ in IcyDemuxer(0).feed(b"abc")] == [b"abc"]
+
+
+def test_title_history_is_bounded():
+    history = TitleHistory(size=2, stations=2)
+    assert history.add("a", "One", when=1.0)
+    assert not history.add("a", "One")
+    history.add("a", "Two", when=2.0)
+    history.add("a", "Three", when=3.0)
+    assert history.titles("a") == [(2.0, "Two"), (3.0, "Three")]
+    history.add("b", "x")
+    history.add("a", "Four")  # "a" is the most recent station again
+    history.add("c", "y")
+    assert history.titles("b") == [] and history.current("a") == "Four"
+
+
+def test_stream_reports_each_title_change_once():
+    _, stream = icy_stream(["A - One", "A - One", None, "B - Two"])
+    go = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("icy-metaint", str(METAINT))
+            self.end_headers()
+            go.wait(5)
+            self.wfile.write(stream)
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    heard = []
+    done = threading.Event()
+    try:
+        station = StationStream(f"http://127.0.0.1:{httpd.server_address[1]}/")
+        station.add_listener(heard.append)
+        station.add_sink(type("Sink", (), {"start": lambda s, st: None, "write": lambda s, v: None,
+                                           "title": lambda s, t: None,
+                                           "stop": lambda s, e: done.set()})())
+        go.set()
+        assert done.wait(5)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert heard == ["A - One", "B - Two"]
+
+
+def test_app_shows_titles_from_mpv_events():
+    import asyncio
+    from pytuiplayer.mpv_player import MPVPlayer
+    from pytuiplayer.sim_player import ManualClock
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    clock = ManualClock()
+    url = "http://radio.test/stream"
+    app = MusicPlayerApp()
+    app.timeshift_minutes = 0
+
+    async def run():
+        async with app.run_test(size=(120, 40)) as pilot:
+            await pilot.pause()
+            app.mpv = MPVPlayer(backend="sim", clock=clock,
+                                manifest={url: {"titles": [[1, "A - One"], [2, "B - Two"]]}})
+            app.stations.mpv = app.mpv
+            app.stations.stations = [{"name": "Test FM", "url": url}]
+            await app.play_station(app.stations.stations[0], 0)
+            polled = []
+            app.mpv.player.get_property = lambda name: polled.append(name)
+            clock.advance(1.5)
+            app.mpv.get_time_pos()  # the simulation moves on when looked at
+            await pilot.pause(0.05)
+            assert app.current_title == "A - One"
+            clock.advance(1.0)
+            app.update_progress()
+            await pilot.pause(0.05)
+            app._refresh_metadata()
+            assert app.current_title == "B - Two"
+            assert [t for _, t in app.title_history.titles(url)] == ["A - One", "B - Two"]
+            # nothing asked mpv for the title; only the radio loudness poll may run
+            assert not [name for name in polled if name != "af-metadata/loudness"]
+
+    asyncio.run(run())
@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+
+from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+from pytuiplayer.music_tree import filter_music_paths, format_total
+
+
+def make_library(root: Path):
+    (root / "Jazz" / "Album").mkdir(parents=True)
+    (root / "Jazz" / "Album" / "01.mp3").write_bytes(b"x")
+    (root / "Jazz" / "Album" / "02.FLAC").write_bytes(b"x")
+    (root / "Jazz" / "list.m3u").write_text("01.mp3\n")
+    (root / "Code" / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "Code" / "node_modules" / "pkg" / "ding.mp3").write_bytes(b"x")
+    (root / "Code" / "main.py").write_text("")
+    (root / ".cache").mkdir()
+
+
+def bump_mtime(path: Path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_walk_aggregates_subtree_counts_and_skips_junk(tmp_path: Path):
+    make_library(tmp_path)
+    reads = []
+    index = LibraryIndex(tmp_path / "index.json")
+    LibraryWalker(index, duration_reader=lambda p: reads.append(p.name) or 60.0).walk(tmp_path)
+
+    assert index.summary(tmp_path / "Jazz") == (2, 120.0, 1)
+    assert index.summary(tmp_path) == (2, 120.0, 1)
+    assert index.summary(tmp_path / "Code") == (0, 0.0, 0)
+    assert index.get(tmp_path / "Code" / "node_modules") is None
+    assert sorted(reads) == ["01.mp3", "02.FLAC"]
+
+
+def test_rewalk_only_relists_changed_directories(tmp_path: Path):
+    make_library(tmp_path)
+    reads = []
+    index = LibraryIndex(tmp_path / "index.json")
+    walker = LibraryWalker(index, duration_reader=lambda p: reads.append(p.name) or 30.0)
+    walker.walk(tmp_path)
+    reads.clear()
+
+    walker.walk(tmp_path)
+    assert walker.rescanned == 0 and reads == []
+
+    album = tmp_path / "Jazz" / "Album"
+    (album / "03.mp3").write_bytes(b"x")
+    bump_mtime(album)
+    walker.walk(tmp_path)
+    assert walker.rescanned == 1
+    assert reads == ["03.mp3"]
+    assert index.summary(tmp_path)[0] == 3
+
+    # removed directories disappear from the index
+    for f in album.iterdir():
+        f.unlink()
+    album.rmdir()
+    walker.walk(tmp_path)
+    assert index.get(album) is None
+    assert index.summary(tmp_path)[0] == 0
+
+
+def test_cancelled_walk_keeps_what_it_did_not_reach(tmp_path: Path):
+    lib = tmp_path / "lib"
+    for name in "abc":
+        (lib / name).mkdir(parents=True)
+        (lib / name / "01.mp3").write_bytes(b"x")
+    index = LibraryIndex(tmp_path / "index.json")
+    walker = LibraryWalker(index, duration_reader=lambda p: 10.0)
+    walker.walk(lib)
+    assert index.summary(lib) == (3, 30.0, 0) and not walker.stopped
+    before = index.get(lib)
+
+    for name in "abc":
+        (lib / name / "02.mp3").write_bytes(b"x")
+        bump_mtime(lib / name)
+    visited = []
+    walker.duration_reader = lambda p: visited.append(p) or 10.0
+    walker.walk(lib, should_stop=lambda: len(visited) >= 1)
+    assert walker.stopped
+    assert all(index.get(lib / name) is not None for name in "abc")
+    # the unfinished totals were not written
+    assert index.get(lib) == before and index.summary(lib) == (3, 30.0, 0)
+
+
+def test_index_persists_between_runs(tmp_path: Path):
+    root = tmp_path / "music"
+    root.mkdir()
+    make_library(root)
+    path = tmp_path / "index.json"
+    index = LibraryIndex(path)
+    LibraryWalker(index, duration_reader=lambda p: 10.0).walk(root)
+    index.save()
+
+    reloaded = LibraryIndex(path).load()
+    assert reloaded.summary(root / "Jazz") == (2, 20.0, 1)
+    assert len(list(reloaded.tracks())) == 2
+
+    walker = LibraryWalker(reloaded, duration_reader=lambda p: 1 / 0)
+    walker.walk(root)
+    assert walker.rescanned == 0
+
+
+def test_music_tree_filters_non_music(tmp_path: Path):
+    make_library(tmp_path)
+    (tmp_path / "Unwalked").mkdir()
+    (tmp_path / "song.mp3").write_bytes(b"x")
+    (tmp_path / "notes.txt").write_text("")
+    index = LibraryIndex(tmp_path / "index.json")
+    LibraryWalker(index, duration_reader=lambda p: None).walk(tmp_path / "Jazz")
+    LibraryWalker(index, duration_reader=lambda p: None).walk(tmp_path / "Code")
+
+    shown = {p.name for p in filter_music_paths(tmp_path.iterdir(), index)}
+    assert shown == {"Jazz", "Unwalked", "song.mp3"}
+
+
+def test_format_total():
+    assert format_total(3, 0) == "3"
+    assert format_total(12, 2710) == "12 · 45:10"
+    assert format_total(200, 3 * 3600 + 5) == "200 · 3:00:05"
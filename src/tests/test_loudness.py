@@ -0,0 +1,165 @@
+import math
+import wave
+
+import pytest
+
+from pytuiplayer.loudness import RadioLoudness, track_gain
+from pytuiplayer.mpv_player import MPVPlayer
+from pytuiplayer.sim_player import ManualClock
+
+np = pytest.importorskip("numpy")
+
+
+def sine(dbfs, seconds=5.0, freq=997.0, rate=48000):
+    t = np.arange(int(seconds * rate)) / rate
+    return 10 ** (dbfs / 20) * np.sin(2 * np.pi * freq * t)
+
+
+def measure(samples, chunk=48000 * 3):
+    from pytuiplayer.loudness import LoudnessMeter
+    meter = LoudnessMeter()
+    for start in range(0, len(samples), chunk):
+        meter.feed(samples[start:start + chunk])
+    return meter
+
+
+def test_reference_sine_levels():
+    tone = sine(-20)
+    # BS.1770: a 997 Hz tone at -20 dBFS in one channel of two reads -23 LUFS
+    left_only = measure(np.stack([tone, np.zeros_like(tone)], axis=1))
+    assert left_only.integrated() == pytest.approx(-23.0, abs=0.1)
+    both = measure(np.stack([tone, tone], axis=1))
+    assert both.integrated() == pytest.approx(-20.0, abs=0.1)
+    assert both.peak == pytest.approx(0.1, abs=1e-3)
+
+
+def test_gating_ignores_silence_and_quiet_passages():
+    loud = sine(-20, seconds=20)
+    quiet = sine(-60)
+    signal = np.concatenate([loud, np.zeros(48000 * 5), quiet])
+    assert measure(signal).integrated() == pytest.approx(measure(loud).integrated(), abs=0.1)
+    assert measure(np.zeros(48000 * 2)).integrated() is None
+
+
+def test_track_gain_is_limited_by_peak_and_range():
+    assert track_gain(-23.0, 0.1) == pytest.approx(5.0)
+    assert track_gain(-23.0, 0.9) == pytest.approx(-20 * math.log10(0.9))
+    assert track_gain(-60.0, 0.0) == 12.0
+    assert track_gain(0.0, 1.0) == -12.0
+
+
+def test_radio_gain_moves_slowly_towards_target():
+    radio = RadioLoudness(target=-18.0, slew_db=0.5)
+    gains = [radio.update(-10.0) for _ in range(30)]
+    assert all(abs(b - a) <= 0.5 + 1e-9 for a, b in zip([0.0] + gains, gains))
+    assert gains[-1] == pytest.approx(-8.0)
+    assert radio.update(None) == gains[-1]
+    assert radio.update(-80.0) == gains[-1]
+
+
+def test_analyze_library_stores_loudness_in_index(tmp_path):
+    from pytuiplayer.library_index import LibraryIndex, LibraryWalker
+    from pytuiplayer.loudness import analyze_library
+
+    music = tmp_path / "music"
+    music.mkdir()
+    pcm = (np.stack([sine(-20, 2), sine(-20, 2)], axis=1) * 32767).astype("<i2")
+    with wave.open(str(music / "tone.wav"), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(48000)
+        w.writeframes(pcm.tobytes())
+
+    index = LibraryIndex(tmp_path / "library.json")
+    LibraryWalker(index, duration_reader=lambda p: None).walk(music)
+    assert analyze_library(index, workers=1) == 1
+    lufs, peak = index.get_loudness(music / "tone.wav")
+    assert lufs == pytest.approx(-20.0, abs=0.2)
+    assert list(index.missing_loudness()) == []
+
+    # unchanged files keep their analysis across re-walks
+    LibraryWalker(index, duration_reader=lambda p: None).walk(music)
+    assert index.get_loudness(music / "tone.wav") == (lufs, peak)
+
+
+def test_analyze_library_stops_without_a_backlog(monkeypatch):
+    from concurrent.futures import Future
+
+    import pytuiplayer.loudness
+    from pytuiplayer.loudness import analyze_library
+
+    class Pool:
+        submitted = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def submit(self, fn, path):
+            self.submitted += 1
+            future = Future()
+            future.set_result((-20.0, -1.0))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    class Index:
+        def __init__(self):
+            self.stored = []
+
+        def missing_loudness(self):
+            return [f"/music/{i}.wav" for i in range(1000)]
+
+        def set_loudness(self, path, result):
+            self.stored.append(path)
+
+        def save(self):
+            pass
+
+    pool, index = Pool(), Index()
+    monkeypatch.setattr(pytuiplayer.loudness, "process_pool", lambda workers: pool)
+    stored = analyze_library(index, workers=2, should_stop=lambda: bool(index.stored))
+    assert stored == len(index.stored) == pool.submitted == 8  # one window, nothing more
+
+
+def test_player_applies_gain_and_reads_radio_loudness():
+    mpv = MPVPlayer(backend="sim", clock=ManualClock(), manifest={"http://r": {"loudness": -12.0}})
+    mpv.set_volume(50)
+    mpv.set_gain(-6.0)
+    assert mpv.player.volume == pytest.approx(50 * 10 ** (-6 / 60))
+
+    mpv.play("http://r")
+    assert mpv.get_loudness() is None
+    mpv.enable_loudness_meter(True)
+    assert mpv.get_loudness() == -12.0
+
+
+def test_app_applies_track_gain_and_radio_gain(tmp_path):
+    from pytuiplayer.library_index import LibraryIndex
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    app = MusicPlayerApp()
+    app.mpv = MPVPlayer(backend="sim", clock=ManualClock(), manifest={"http://r": {"loudness": -8.0}})
+    app.update_now_playing = lambda *a, **k: None
+    app.query_one = lambda *a, **k: type("ListStub", (), {"index": None})()
+    app.mpv.set_volume(50)
+    app.library_index = LibraryIndex(tmp_path / "library.json")
+    app.library_index.put(str(tmp_path), {"mtime": 0, "files": {"a.mp3": [1, 1, 10.0, [-23.0, 0.1]]},
+                                          "subdirs": [], "playlists": 0, "total_tracks": 1,
+                                          "total_duration": 10.0, "total_playlists": 0})
+
+    app.play_local(tmp_path / "a.mp3")
+    assert app.mpv.gain_db == pytest.approx(5.0)
+
+    import asyncio
+    from pytuiplayer.station_player import StationPlayer
+    station = {"name": "R", "url": "http://r"}
+    app.stations = StationPlayer(app.mpv, stations=[station])
+    asyncio.run(app.play_station(station, 0))
+    assert app.mpv.gain_db == 0.0
+    app._update_radio_gain()
+    assert app.mpv.gain_db == pytest.approx(-0.5)
+    app.history.close()
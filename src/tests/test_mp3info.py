@@ -0,0 +1,120 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from pytuiplayer.mp3info import parse_mp3, read_mp3_info
+
+GTA = Path(__file__).resolve().parents[1] / "pytuiplayer" / "GTA.mp3"
+
+# MPEG-1 layer 3, 128 kbps, 44.1 kHz, joint stereo, no CRC
+HEADER_128 = 0xFFFB9044
+FRAME_128 = 417  # 144 * 128000 // 44100, unpadded
+
+
+def id3v2(size: int, footer: bool = False) -> bytes:
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    tag = b"ID3\x04\x00" + bytes([0x10 if footer else 0]) + syncsafe + b"\0" * size
+    return tag + (b"3DI" + b"\0" * 7 if footer else b"")
+
+
+def frames(count: int, header: int = HEADER_128, length: int = FRAME_128) -> bytes:
+    frame = struct.pack(">I", header) + b"\0" * (length - 4)
+    return frame * count
+
+
+def xing_frame(frame_count: int, tag: bytes = b"Xing", delay: int = 576, padding: int = 1000) -> bytes:
+    body = bytearray(FRAME_128 - 4)
+    # MPEG-1 stereo: side info is 32 bytes
+    fields = tag + struct.pack(">II", 0x1, frame_count)
+    lame = b"LAME3.100" + b"\0" * 12 + ((delay << 12) | padding).to_bytes(3, "big")
+    body[32:32 + len(fields) + len(lame)] = fields + lame
+    return struct.pack(">I", HEADER_128) + bytes(body)
+
+
+def test_bundled_file_matches_mutagen():
+    info = read_mp3_info(GTA)
+    assert info.sample_rate == 44100 and info.channels == 2
+    assert info.bitrate == 128000 and not info.vbr
+    assert (info.encoder_delay, info.encoder_padding) == (576, 1728)
+    assert info.encoder == "LAME3.97"
+    mutagen = pytest.importorskip("mutagen.mp3")
+    assert info.duration == pytest.approx(mutagen.MP3(GTA).info.length, abs=1e-6)
+
+
+def test_cbr_without_tag_is_estimated_from_size():
+    data = id3v2(300, footer=True) + frames(100) + b"TAG" + b"\0" * 125
+    info = parse_mp3(data)
+    assert info.bitrate == 128000 and not info.vbr
+    assert info.duration == pytest.approx(100 * FRAME_128 * 8 / 128000)
+
+
+def test_xing_frame_count_and_gapless_padding():
+    data = id3v2(10) + xing_frame(1000) + frames(20, header=0xFFFBB044, length=522)
+    info = parse_mp3(data)
+    assert info.vbr
+    assert info.duration == pytest.approx((1000 * 1152 - 576 - 1000) / 44100)
+    assert (info.encoder_delay, info.encoder_padding, info.encoder) == (576, 1000, "LAME3.100")
+    assert parse_mp3(id3v2(10) + xing_frame(1000, tag=b"Info") + frames(5)).vbr is False
+
+
+def test_vbri_tag():
+    body = bytearray(FRAME_128 - 4)
+    body[32:32 + 18] = b"VBRI" + struct.pack(">HHHII", 1, 500, 75, 123456, 2000)
+    data = struct.pack(">I", HEADER_128) + bytes(body) + frames(3)
+    info = parse_mp3(data)
+    assert info.vbr and info.encoder == "VBRI"
+    assert info.duration == pytest.approx((2000 * 1152 - 500) / 44100)
+
+
+def test_false_sync_before_first_frame_is_skipped():
+    # a plausible header whose "next frame" is garbage
+    data = b"\0\0" + struct.pack(">I", HEADER_128) + b"\x12" * 600 + frames(10)
+    info = parse_mp3(data)
+    assert info.duration == pytest.approx(10 * FRAME_128 * 8 / 128000)
+
+
+def test_mpeg2_layer3_and_non_mp3(tmp_path):
+    # MPEG-2 layer 3, 64 kbps, 22.05 kHz, mono: 72 * 64000 // 22050 = 208 bytes, 576 samples
+    info = parse_mp3(frames(50, header=0xFFF380C4, length=208))
+    assert (info.sample_rate, info.channels, info.bitrate) == (22050, 1, 64000)
+    assert info.duration == pytest.approx(50 * 208 * 8 / 64000)
+
+    (tmp_path / "empty.mp3").write_bytes(b"")
+    (tmp_path / "text.mp3").write_text("not audio at all " * 100)
+    assert read_mp3_info(tmp_path / "empty.mp3") is None
+    assert read_mp3_info(tmp_path / "text.mp3") is None
+    assert read_mp3_info(tmp_path / "missing.mp3") is None
+
+
+def test_library_walker_uses_the_parser(tmp_path):
+    from pytuiplayer.library_index import read_duration
+    (tmp_path / "a.mp3").write_bytes(id3v2(20) + frames(40))
+    assert read_duration(tmp_path / "a.mp3") == pytest.approx(40 * FRAME_128 * 8 / 128000)
+
+
+def test_m3u_view_shows_durations(tmp_path):
+    import asyncio
+    from textual.widgets import Label
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    (tmp_path / "a.mp3").write_bytes(frames(2000))
+    (tmp_path / "b.mp3").write_bytes(frames(1000))
+    playlist = tmp_path / "list.m3u"
+    playlist.write_text("#EXTINF:1,Song A\na.mp3\nb.mp3\nhttp://radio/stream\n")
+
+    async def run():
+        app = MusicPlayerApp()
+        async with app.run_test() as pilot:
+            await app._ensure_local_panels()
+            await app.load_m3u(playlist)
+            for _ in range(50):
+                await pilot.pause(0.05)
+                if app._enricher is None:
+                    break
+            view = app.query_one("#local-list")
+            labels = [str(item.query_one(Label).render()) for item in view.children]
+            assert labels == ["Song A  (0:52)", "b.mp3  (0:26)", "stream"]
+            assert view.border_title == "Local Music List · 2 · 1:18"
+
+    asyncio.run(run())
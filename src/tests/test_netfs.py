@@ -0,0 +1,91 @@
+import os
+
+from pytuiplayer.dir_cache import DirectoryListingCache
+from pytuiplayer.music_tree import filter_music_paths
+from pytuiplayer.netfs import DirectoryPrefetcher, SlowFS
+
+
+def make_tree(root):
+    for name in ("a", "b", "c"):
+        (root / name).mkdir()
+        (root / name / "song.mp3").write_bytes(b"x")
+    (root / "a" / "inner").mkdir()
+    (root / "top.flac").write_bytes(b"x")
+
+
+def test_each_directory_is_read_once(tmp_path):
+    make_tree(tmp_path)
+    fs = SlowFS(latency=0.001)
+    prefetcher = DirectoryPrefetcher(scandir=fs)
+
+    entries = prefetcher.listdir(tmp_path)
+    assert sorted(e.name for e in entries) == ["a", "b", "c", "top.flac"]
+    assert {e.name for e in entries if e.is_dir()} == {"a", "b", "c"}
+    prefetcher.listdir(tmp_path)
+    with prefetcher.scandir(tmp_path) as it:
+        assert len(list(it)) == 4
+    assert fs.calls == 1
+    prefetcher.shutdown()
+
+
+def test_prefetch_around_serves_children_and_siblings_from_memory(tmp_path):
+    make_tree(tmp_path)
+    fs = SlowFS(latency=0.001)
+    prefetcher = DirectoryPrefetcher(scandir=fs)
+
+    futures = prefetcher.prefetch_around(tmp_path / "a")
+    for future in futures:
+        future.result()
+    calls = fs.calls
+    # inner (child) plus a, b, c (siblings) are all cached now
+    for path in (tmp_path / "a" / "inner", tmp_path / "b", tmp_path / "c"):
+        prefetcher.listdir(path)
+    assert fs.calls == calls
+    prefetcher.shutdown()
+
+
+def test_unreadable_paths_are_negatively_cached_until_ttl(tmp_path):
+    now = [0.0]
+    fs = SlowFS(latency=0)
+    prefetcher = DirectoryPrefetcher(scandir=fs, negative_ttl=30, clock=lambda: now[0])
+    missing = tmp_path / "gone"
+
+    assert prefetcher.listdir(missing) == []
+    assert prefetcher.listdir(missing) == []
+    assert prefetcher.is_unreadable(missing)
+    assert fs.calls == 1
+
+    now[0] = 31
+    assert prefetcher.listdir(missing) == []
+    assert fs.calls == 2
+    prefetcher.shutdown()
+
+
+def test_directory_cache_reads_through_prefetcher(tmp_path):
+    make_tree(tmp_path)
+    fs = SlowFS(latency=0)
+    prefetcher = DirectoryPrefetcher(scandir=fs)
+    cache = DirectoryListingCache(prefetcher=prefetcher)
+
+    assert [p.name for p in cache.get(tmp_path)] == ["top.flac"]
+    prefetcher.listdir(tmp_path)
+    assert fs.calls == 1
+
+    (tmp_path / "new.mp3").write_bytes(b"x")
+    os.utime(tmp_path, ns=(0, 1))
+    files, changed = cache.refresh(tmp_path)
+    assert changed
+    assert sorted(p.name for p in files) == ["new.mp3", "top.flac"]
+    assert fs.calls == 2
+    prefetcher.shutdown()
+
+
+def test_filter_uses_cached_entry_types(tmp_path):
+    make_tree(tmp_path)
+    prefetcher = DirectoryPrefetcher(scandir=SlowFS(latency=0))
+    known_dirs = {e.path for e in prefetcher.listdir(tmp_path) if e.is_dir()}
+    paths = [tmp_path / name for name in ("a", "b", "top.flac", "notes.txt")]
+
+    shown = filter_music_paths(paths, is_dir=lambda p: str(p) in known_dirs)
+    assert [p.name for p in shown] == ["a", "b", "top.flac"]
+    prefetcher.shutdown()
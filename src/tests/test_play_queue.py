@@ -0,0 +1,98 @@
+import tracemalloc
+
+from pytuiplayer.play_queue import FeistelPermutation, PlayQueue, iter_directory_tracks
+
+
+def drain(queue):
+    played = [queue.current_index]
+    while queue.next() is not None:
+        played.append(queue.current_index)
+    return played
+
+
+def test_feistel_permutation_is_a_bijection_and_invertible():
+    for n in (1, 2, 3, 17, 1000, 4097):
+        perm = FeistelPermutation(n, seed=n)
+        values = [perm(i) for i in range(n)]
+        assert sorted(values) == list(range(n))
+        assert all(perm.inverse(v) == i for i, v in enumerate(values))
+    assert [FeistelPermutation(1000, 1)(i) for i in range(10)] != list(range(10))
+
+
+def test_next_prev_and_repeat_modes():
+    queue = PlayQueue()
+    queue.extend(["a", ("b", "Bee"), "c"])
+    assert queue.current() is None
+    assert queue.next() == ("a", None)
+    assert queue.next() == ("b", "Bee")
+    assert queue.prev() == ("a", None)
+    assert queue.prev() == ("a", None)
+
+    queue.jump(2)
+    assert queue.next() is None
+    queue.repeat = "all"
+    assert queue.next() == ("a", None)
+    assert queue.prev() == ("c", None)
+
+    queue.repeat = "one"
+    assert queue.next(auto=True) == ("c", None)
+    assert queue.next() == ("a", None)
+    assert queue.cycle_repeat() == "off"
+
+
+def test_shuffle_keeps_current_first_and_visits_every_entry_once():
+    queue = PlayQueue(seed=7)
+    queue.extend(str(i) for i in range(500))
+    queue.jump(42)
+    queue.set_shuffle(True)
+    assert queue.current_index == 42
+    played = drain(queue)
+    assert played[0] == 42
+    assert sorted(played) == list(range(500))
+    assert played != sorted(played)
+
+    queue.set_shuffle(False)
+    assert queue.current_index == played[-1]
+
+
+def test_entries_enqueued_while_shuffled_are_played_after_existing_ones():
+    queue = PlayQueue(seed=3)
+    queue.extend(str(i) for i in range(10))
+    queue.set_shuffle(True)
+    queue.next()
+    queue.extend(str(i) for i in range(10, 20))
+    played = drain(queue)
+    assert sorted(played) == list(range(20))
+    assert set(played[-10:]) == set(range(10, 20))
+
+
+def test_shuffling_a_large_queue_allocates_nothing_per_track():
+    queue = PlayQueue(seed=1)
+    queue.extend(f"/music/{i}.mp3" for i in range(200_000))
+    queue.next()
+    tracemalloc.start()
+    queue.set_shuffle(True)
+    for _ in range(1000):
+        queue.next()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 100_000
+
+
+def test_upcoming_lists_current_and_following_entries():
+    queue = PlayQueue()
+    queue.extend(["a", "b", "c"])
+    queue.next()
+    assert [source for _, source, _ in queue.upcoming(2)] == ["a", "b"]
+
+
+def test_iter_directory_tracks_streams_sorted_audio_files(tmp_path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / ".hidden").mkdir()
+    (tmp_path / "b" / "2.flac").write_bytes(b"")
+    (tmp_path / ".hidden" / "x.mp3").write_bytes(b"")
+    (tmp_path / "A.mp3").write_bytes(b"")
+    (tmp_path / "notes.txt").write_bytes(b"")
+
+    tracks = list(iter_directory_tracks(tmp_path))
+    assert tracks == [str(tmp_path / "A.mp3"), str(tmp_path / "b" / "2.flac")]
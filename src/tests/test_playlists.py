@@ -0,0 +1,111 @@
+import tracemalloc
+
+from pytuiplayer.playlists import (
+    PlaylistEntry, iter_m3u, iter_playlist, register_format, sniff_format, FORMATS)
+from pytuiplayer.station_player import StationPlayer
+
+M3U = """\
+#EXTM3U
+#EXTINF:-1 tvg-id="bbc1" tvg-logo="http://logo/bbc.png" group-title="News, UK",BBC World Service
+http://stream.example/bbc
+#EXTGRP:Jazz
+#EXTINF:212,Miles Davis - So What
+music/so what.mp3
+/abs/plain.mp3
+"""
+
+PLS = """\
+[playlist]
+NumberOfEntries=2
+File1=http://stream.example/one
+Title1=Radio One
+Length1=-1
+File2=local.ogg
+Length2=95
+Version=2
+"""
+
+XSPF = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<playlist version="1" xmlns="http://xspf.org/ns/0/">
+  <trackList>
+    <track><location>http://stream.example/x</location><title>X</title><creator>Y</creator>
+      <duration>1500</duration><image>http://logo/x.png</image></track>
+    <track><location>file:///music/a%20b.flac</location></track>
+    <track><title>no location</title></track>
+  </trackList>
+</playlist>
+"""
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_extended_m3u_attributes_and_groups(tmp_path):
+    entries = list(iter_playlist(write(tmp_path, "list.m3u8", M3U)))
+    assert entries[0] == PlaylistEntry(
+        "http://stream.example/bbc", "BBC World Service", None, "News, UK",
+        {"tvg-id": "bbc1", "tvg-logo": "http://logo/bbc.png", "group-title": "News, UK"})
+    assert entries[1] == PlaylistEntry(str(tmp_path / "music/so what.mp3"), "Miles Davis - So What", 212.0, "Jazz")
+    assert entries[2] == PlaylistEntry("/abs/plain.mp3")
+    assert list(iter_m3u(tmp_path / "list.m3u8", limit=2))[1] == (
+        str(tmp_path / "music/so what.mp3"), "Miles Davis - So What")
+    assert list(iter_m3u(tmp_path / "list.m3u8"))[2] == ("/abs/plain.mp3", "plain.mp3")
+
+
+def test_pls_and_xspf(tmp_path):
+    assert list(iter_playlist(write(tmp_path, "radio.pls", PLS))) == [
+        PlaylistEntry("http://stream.example/one", "Radio One"),
+        PlaylistEntry(str(tmp_path / "local.ogg"), None, 95.0)]
+    entries = list(iter_playlist(write(tmp_path, "list.xspf", XSPF)))
+    assert entries == [
+        PlaylistEntry("http://stream.example/x", "Y - X", 1.5, None, {"creator": "Y", "image": "http://logo/x.png"}),
+        PlaylistEntry("/music/a b.flac")]
+
+
+def test_format_is_sniffed_from_content(tmp_path):
+    # a PLS saved as .m3u, an XSPF without an extension
+    assert list(iter_m3u(write(tmp_path, "mislabelled.m3u", PLS)))[0] == ("http://stream.example/one", "Radio One")
+    assert len(list(iter_playlist(write(tmp_path, "download", XSPF)))) == 2
+    assert sniff_format(b"\xef\xbb\xbf#EXTM3U\n") == "m3u"
+    assert sniff_format(b"song.mp3\n", ".pls") == "pls"
+    assert sniff_format(b"song.mp3\n") == "m3u"
+
+    register_format("lines", lambda stream, base: (PlaylistEntry(line.decode().strip()) for line in stream),
+                    sniff=lambda head: head.startswith("!lines"))
+    try:
+        assert [e.source for e in iter_playlist(write(tmp_path, "x.txt", "!lines\na\n"))] == ["!lines", "a"]
+    finally:
+        del FORMATS["lines"]
+
+
+def test_large_xspf_streams_in_constant_memory(tmp_path):
+    path = tmp_path / "big.xspf"
+    with open(path, "w") as f:
+        f.write('<playlist version="1" xmlns="http://xspf.org/ns/0/"><trackList>')
+        for i in range(50000):
+            f.write(f"<track><location>http://s/{i}</location><title>Track number {i}</title></track>")
+        f.write("</trackList></playlist>")
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in iter_playlist(path))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 50000
+    assert peak < 2_000_000  # the whole tree would take tens of megabytes
+
+
+def test_station_catalog_from_playlists(tmp_path):
+    player = StationPlayer(mpv_player=None, stations=[{"name": "old", "url": "u"}])
+    assert player.update_stations(write(tmp_path, "radio.m3u", M3U))
+    # local files are not stations
+    assert player.stations == [{"name": "BBC World Service", "url": "http://stream.example/bbc",
+                                "group": "News, UK", "logo": "http://logo/bbc.png"}]
+    assert player.update_stations(write(tmp_path, "radio.pls", PLS))
+    assert player.stations == [{"name": "Radio One", "url": "http://stream.example/one"}]
+    assert not player.update_stations(write(tmp_path, "empty.xspf", '<playlist xmlns="http://xspf.org/ns/0/"/>'))
+    assert player.stations == [{"name": "Radio One", "url": "http://stream.example/one"}]
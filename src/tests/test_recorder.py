@@ -0,0 +1,125 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from pytuiplayer.recorder import StreamRecorder, split_title
+from pytuiplayer.station_stream import StationStream
+
+METAINT = 500
+
+
+class Station:
+    """An ICY station sending `blocks` (audio, title) pairs, then hanging up;
+    with `go`, only once that event is set."""
+
+    def __init__(self, blocks, go=None):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("icy-metaint", str(METAINT))
+                self.end_headers()
+                if go is not None:
+                    go.wait(5)
+                for audio, title in blocks:
+                    meta = f"StreamTitle='{title}';".encode()
+                    meta += b"\0" * (-len(meta) % 16)
+                    self.wfile.write(audio + bytes([len(meta) // 16]) + meta)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_recordings_split_at_title_changes_and_are_tagged(tmp_path):
+    from mutagen.id3 import ID3
+
+    # a title is sent after the audio it follows: blocks 0-3 are Waterloo
+    blocks = [(bytes([i]) * METAINT, "ABBA - Waterloo" if i < 3 else "Queen - Bicycle")
+              for i in range(6)]
+    station = Station(blocks)
+    recorder = StreamRecorder("Test FM", tmp_path)
+    stream = StationStream(station.url)
+    stream.add_sink(recorder)
+    try:
+        for _ in range(500):
+            if recorder._closed:
+                break
+            time.sleep(0.01)
+        recorder.close(wait=True)
+    finally:
+        station.close()
+    first, second = recorder.saved
+    assert first == tmp_path / "Test FM" / "001 - ABBA - Waterloo.mp3"
+    assert second.name == "002 - Queen - Bicycle.mp3"
+    # audio only, cut where the title changed; the ID3 tag comes first
+    tags = ID3(first)
+    assert first.read_bytes()[tags.size:] == b"".join(audio for audio, _ in blocks[:4])
+    assert str(tags["TIT2"]) == "Waterloo" and str(tags["TPE1"]) == "ABBA" and str(tags["TALB"]) == "Test FM"
+    assert second.read_bytes()[ID3(second).size:] == b"\4" * METAINT + b"\5" * METAINT
+    assert not list((tmp_path / "Test FM").glob(".*.part"))
+
+
+def test_recorder_sink_names_and_buffers(tmp_path):
+    recorder = StreamRecorder("a/b: radio", tmp_path)
+    recorder.start(SimpleNamespace(content_type="audio/aacp", title=None))
+    view = memoryview(bytearray(b"x" * 100))
+    recorder.write(view[:10])
+    recorder.title("AC/DC - T.N.T.")  # the first title names the audio before it
+    recorder.write(view[:20])
+    recorder.title("Untitled Song")
+    recorder.write(view[:5])
+    # nothing reached the disk yet: writes are gathered in a large buffer
+    part = next((tmp_path / "a_b_ radio").glob(".*.part"))
+    assert part.stat().st_size == 0
+    recorder.close(wait=True)
+    assert [(p.name, p.stat().st_size) for p in recorder.saved] == [
+        ("001 - AC_DC - T.N.T.aac", 30), ("002 - Untitled Song.aac", 5)]
+    assert split_title("Untitled Song") == (None, "Untitled Song")
+
+
+@pytest.mark.parametrize("timeshift", [False, True])
+def test_app_records_the_playing_station(tmp_path, monkeypatch, timeshift):
+    import asyncio
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    monkeypatch.setenv("PYTUIP_RECORD_DIR", str(tmp_path))
+    blocks = [(b"a" * METAINT, "One - Song")] * 40 + [(b"b" * METAINT, "Two - Song")] * 2
+    go = threading.Event()
+    station = Station(blocks, go)
+
+    async def run():
+        app = MusicPlayerApp()
+        app.timeshift_minutes = 1 if timeshift else 0
+        async with app.run_test(size=(120, 40)) as pilot:
+            await pilot.pause()
+            await app.play_station({"name": "Test FM", "url": station.url}, 0)
+            await pilot.press("R")
+            recorder = app._recorder
+            assert (app._record_stream is None) == timeshift
+            go.set()
+            for _ in range(500):
+                if recorder._closed:  # the station hung up
+                    break
+                await pilot.pause(0.01)
+            recorder.close(wait=True)
+            assert [p.name for p in recorder.saved] == ["001 - One - Song.mp3", "002 - Two - Song.mp3"]
+            await pilot.press("R")
+            assert app._recorder is None
+
+    try:
+        asyncio.run(run())
+    finally:
+        station.close()
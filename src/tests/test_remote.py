@@ -0,0 +1,153 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pytuiplayer.playlists import iter_m3u
+from pytuiplayer.remote import ConnectionPool, RemoteCache
+
+
+class Server:
+    """A local HTTP/1.1 server with keep-alive; `files` maps paths to
+    (body, content type), `requests` records (path, status, client port)."""
+
+    def __init__(self):
+        self.files = {}
+        self.etags = True
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/moved.m3u":
+                    return self.reply(302, b"", headers={"Location": "/list.m3u"})
+                if self.path not in server.files:
+                    return self.reply(404, b"missing")
+                body, content_type = server.files[self.path]
+                version = f'"{hash(body) & 0xffffffff:x}"'
+                modified = "Mon, 19 Oct 2026 10:00:00 GMT"
+                if server.etags and self.headers.get("If-None-Match") == version:
+                    return self.reply(304, b"")
+                if not server.etags and self.headers.get("If-Modified-Since") == modified:
+                    return self.reply(304, b"")
+                headers = {"Content-Type": content_type}
+                headers["ETag" if server.etags else "Last-Modified"] = version if server.etags else modified
+                self.reply(200, body, headers)
+
+            def reply(self, status, body, headers=None):
+                server.requests.append((self.path, status, self.client_address[1]))
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    yield server
+    server.close()
+
+
+def test_conditional_get_and_connection_reuse(server, tmp_path):
+    server.files["/list.m3u"] = (b"#EXTM3U\n#EXTINF:10,One\none.mp3\n", "audio/x-mpegurl")
+    cache = RemoteCache(tmp_path / "remote")
+    url = server.url + "/list.m3u"
+    assert cache.cached(url) is None
+
+    path, changed = cache.fetch(url)
+    assert changed and path.suffix == ".m3u"
+    assert list(iter_m3u(path, base=url)) == [(server.url + "/one.mp3", "One")]
+    assert cache.fetch(url) == (path, False)  # 304, body not sent again
+
+    server.files["/list.m3u"] = (b"two.mp3\n", "audio/x-mpegurl")
+    path, changed = cache.fetch(url)
+    assert changed and path.read_bytes() == b"two.mp3\n"
+    assert [status for _, status, _ in server.requests] == [200, 304, 200]
+    # every request went over one keep-alive connection
+    assert len({port for _, _, port in server.requests}) == 1
+
+    # a fresh cache (next start) serves the copy without the network
+    assert RemoteCache(tmp_path / "remote").cached(url) == path
+    cache.close()
+
+
+def test_last_modified_redirects_and_offline(server, tmp_path):
+    server.etags = False
+    server.files["/list.m3u"] = (b"a.mp3\n", "text/plain")
+    server.files["/stations"] = (json.dumps([{"name": "A", "url": "http://a"}]).encode(), "application/json")
+    cache = RemoteCache(tmp_path / "remote")
+    path, changed = cache.fetch(server.url + "/moved.m3u")
+    assert changed and path.read_bytes() == b"a.mp3\n"
+    assert cache.fetch(server.url + "/moved.m3u") == (path, False)
+    assert cache.fetch(server.url + "/stations")[0].suffix == ".json"
+
+    with pytest.raises(OSError):
+        cache.fetch(server.url + "/nothing.m3u")
+    url = server.url + "/list.m3u"
+    cache.fetch(url)
+    server.close()
+    cache.close()
+    # server gone: the cached copy is still served
+    assert cache.fetch(url) == (cache.cached(url), False)
+
+
+def test_pool_replaces_connections_closed_by_the_server(server):
+    server.files["/a"] = (b"x" * 100, "text/plain")
+    pool = ConnectionPool()
+    with pool.open(server.url + "/a") as response:
+        assert response.read() == b"x" * 100
+    # the idle connection is dropped behind the pool's back
+    for conns in pool._idle.values():
+        for conn in conns:
+            conn.sock.shutdown(socket.SHUT_RDWR)
+    with pool.open(server.url + "/a") as response:
+        assert response.status == 200 and response.read() == b"x" * 100
+    pool.close()
+
+
+def test_app_shows_cached_stations_then_refreshes(server, tmp_path, monkeypatch):
+    import asyncio
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    url = server.url + "/stations.json"
+    server.files["/stations.json"] = (json.dumps([{"name": "Old", "url": "http://old"}]).encode(), "application/json")
+    RemoteCache().fetch(url)
+    server.files["/stations.json"] = (json.dumps([{"name": "New", "url": "http://new"}]).encode(), "application/json")
+    monkeypatch.setenv("PYTUIP_STATIONS", url)
+
+    async def run():
+        app = MusicPlayerApp()
+        shown = []
+        original = app.load_stations_ui
+
+        async def load_stations_ui():
+            await original()
+            shown.append([station["name"] for station in app.stations.stations])
+
+        app.load_stations_ui = load_stations_ui
+        async with app.run_test(size=(120, 60)) as pilot:
+            for _ in range(60):
+                await pilot.pause(0.05)
+                if len(shown) == 2:
+                    break
+        assert shown == [["Old"], ["New"]]
+
+    asyncio.run(run())
@@ -0,0 +1,154 @@
+import pytest
+
+from pytuiplayer.search_index import SearchIndex, normalize
+
+TAGS = {
+    "/music/Björk/Homogenic/01 Hunter.mp3": {"title": "Hunter", "artist": "Björk", "album": "Homogenic"},
+    "/music/Björk/Homogenic/02 Jóga.mp3": {"title": "Jóga", "artist": "Björk", "album": "Homogenic"},
+    "/music/Various/Hunters/03 Night.mp3": {"title": "Night", "artist": "The Hunters", "album": "Hunters"},
+    "/music/Misc/hunting season.mp3": {},
+    "/music/Air/Moon Safari/01 La femme d'argent.mp3": {"title": "La femme d'argent", "artist": "Air"},
+}
+
+
+def tracks(tags, mtime=1):
+    return [(path, 100, mtime, 60.0) for path in tags]
+
+
+def build(tmp_path, tags=TAGS):
+    index = SearchIndex(tmp_path / "search.idx", read_tags=lambda path: tags.get(path, {}))
+    index.update(tracks(tags))
+    return index
+
+
+def test_normalize_folds_case_and_accents():
+    assert normalize("  Björk — Jóga (Live!) ") == "bjork joga live"
+
+
+def test_prefix_match_and_field_ranking(tmp_path):
+    index = build(tmp_path)
+    results = index.search("hunt")
+    paths = [path for path, _ in results]
+    # title beats artist beats album beats path
+    assert paths[0].endswith("01 Hunter.mp3")
+    assert paths[1].endswith("03 Night.mp3")
+    assert paths[2].endswith("hunting season.mp3")
+    assert [score for _, score in results] == [8, 6, 1]
+    # accents are ignored and every word must match
+    assert [p for p, _ in index.search("joga bjo")] == ["/music/Björk/Homogenic/02 Jóga.mp3"]
+    assert index.search("hunter joga") == []
+    # words are matched from their start only
+    assert index.search("unter") == []
+    assert index.search("a") == []
+
+
+def test_trigrams_from_different_words_do_not_match(tmp_path):
+    index = build(tmp_path)
+    # "femme d'argent" has the trigrams of "fear" neither as a word start
+    assert index.search("femar") == []
+    assert index.search("fem arg")[0][0].endswith("argent.mp3")
+
+
+def test_incremental_update_and_compaction(tmp_path):
+    read = []
+    tags = dict(TAGS)
+
+    def read_tags(path):
+        read.append(path)
+        return tags.get(path, {})
+
+    index = SearchIndex(tmp_path / "search.idx", read_tags=read_tags)
+    assert index.update(tracks(tags)) == 5
+    read.clear()
+    assert index.update(tracks(tags)) == 0 and read == []
+
+    changed = "/music/Björk/Homogenic/01 Hunter.mp3"
+    tags[changed] = {"title": "Bachelorette", "artist": "Björk"}
+    updated = [(p, 100, 2 if p == changed else 1, 60.0) for p in tags]
+    assert index.update(updated) == 1 and read == [changed]
+    assert index.search("bachelor")[0][0] == changed
+    # only its path still says "hunter"
+    assert dict(index.search("hunter"))[changed] == 1
+
+    # dropping files tombstones them, and enough tombstones rebuild the postings
+    remaining = [t for t in updated if "Björk" not in t[0]]
+    index.update(remaining)
+    assert len(index) == 3
+    assert len(index._docs) == 3
+    assert index.search("bjork") == []
+    assert index.search("hunt")[0][0].endswith("03 Night.mp3")
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build(tmp_path)
+    index.save()
+    loaded = SearchIndex(tmp_path / "search.idx", read_tags=lambda path: pytest.fail("re-read")).load()
+    assert len(loaded) == len(index)
+    for query in ("hunt", "bjork", "moon saf", "air"):
+        assert loaded.search(query) == index.search(query)
+    loaded.update(tracks(TAGS))
+
+    (tmp_path / "search.idx").write_bytes(b"garbage")
+    assert len(SearchIndex(tmp_path / "search.idx").load()) == 0
+
+
+def test_numpy_and_scan_paths_agree(tmp_path):
+    np = pytest.importorskip("numpy")
+    words = ["alpha", "alpine", "beta", "bet", "gamma", "gam", "delta", "del", "omega", "ome"]
+    rng = np.random.default_rng(3)
+    tags = {}
+    for i in range(3000):
+        pick = lambda n: " ".join(rng.choice(words, n))  # noqa: E731
+        tags[f"/music/{pick(1)}/{pick(2)}/{i} {pick(1)}.mp3"] = {
+            "title": pick(2), "artist": pick(1), "album": pick(2)}
+    index = build(tmp_path, tags)
+    for query in ("al", "alp", "alpha bet", "gam del", "omega alpine", "zz", "be ga de"):
+        tokens = [t for t in dict.fromkeys(normalize(query).split()) if len(t) > 1]
+        for limit in (1, 10, 100):
+            assert index._search_dense(tokens, limit) == index._search_scan(tokens, limit), (query, limit)
+
+
+def test_rescored_candidates_do_not_hide_better_ones(tmp_path):
+    pytest.importorskip("numpy")
+    # the decoys have every trigram of "hunter" in their (short) title, but
+    # only their path has the word: the one real title match ranks lower
+    # until rescored, beyond the first candidates checked
+    tags = {f"/m/hunter/d{i}.mp3": {"title": "hun unter"} for i in range(4)}
+    tags["/m/z/real.mp3"] = {"title": "hunter of the long and winding title"}
+    index = build(tmp_path, tags)
+    assert index._search_dense(["hunter"], 1) == [("/m/z/real.mp3", 8)]
+    assert index._search_dense(["hunter"], 1) == index._search_scan(["hunter"], 1)
+
+
+def test_search_box_filters_local_list(tmp_path):
+    import asyncio
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+
+    async def run():
+        app = MusicPlayerApp()
+        app._scan_library = lambda: None
+        app.search_index = SearchIndex(tmp_path / "search.idx", read_tags=lambda path: TAGS.get(path, {}))
+        app.search_index.update(tracks(TAGS))
+        async with app.run_test(size=(120, 60)) as pilot:
+            app.query_one("#local-option").value = True
+            await pilot.pause()
+            view = app.query_one("#local-list")
+            assert app.query_one("#search-box").display
+            await pilot.press("/")
+            assert app.focused.id == "search-box"
+            # typing keys that are app bindings ("q", "s") must not trigger them
+            await pilot.press(*"hu")
+            await pilot.press("q")
+            await pilot.press("backspace", "n", "t")
+            for _ in range(50):
+                await pilot.pause(0.05)
+                if view.border_title.startswith("Search “hunt”") and len(view.children) == 3:
+                    break
+            assert [item.data.name for item in view.children] == [
+                "01 Hunter.mp3", "03 Night.mp3", "hunting season.mp3"]
+            assert view.border_title == "Search “hunt” · 3 found"
+            await pilot.press("enter")
+            assert app.focused is view
+
+    asyncio.run(run())
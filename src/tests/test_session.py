@@ -0,0 +1,64 @@
+from pytuiplayer.mpv_player import MPVPlayer
+from pytuiplayer.play_queue import PlayQueue
+from pytuiplayer.session import SessionStore
+from pytuiplayer.sim_player import ManualClock
+from pytuiplayer.tui_app import MusicPlayerApp
+
+
+def test_store_round_trip_and_skips_unchanged_writes(tmp_path):
+    store = SessionStore(tmp_path / "session.json")
+    assert store.load() is None
+    assert store.save({"mode": "local", "volume": 30}) is True
+    assert store.save({"mode": "local", "volume": 30}) is False
+
+    loaded = SessionStore(tmp_path / "session.json").load()
+    assert loaded["mode"] == "local" and loaded["volume"] == 30
+
+    (tmp_path / "session.json").write_text("{not json")
+    assert SessionStore(tmp_path / "session.json").load() is None
+
+
+def test_queue_snapshot_restores_entries_current_and_modes():
+    queue = PlayQueue()
+    queue.extend(["a", ("b", "Bee"), "c", "d"])
+    queue.jump(1)
+    queue.repeat = "all"
+    data = queue.snapshot()
+
+    restored = PlayQueue()
+    restored.restore(data)
+    assert restored.current() == ("b", "Bee")
+    assert restored.repeat == "all"
+    assert len(restored) == 4
+
+    window = queue.snapshot(limit=2)
+    assert window["sources"] == ["b", "c"]
+    assert window["current"] == 0 and window["labels"] == {"0": "Bee"}
+
+
+def test_app_restores_mode_volume_queue_and_resumes_position():
+    def sim_app(clock):
+        app = MusicPlayerApp()
+        app.mpv = MPVPlayer(backend="sim", clock=clock, manifest={"/m/a.mp3": {"duration": 300}})
+        app.update_now_playing = lambda *a, **k: None
+        return app
+
+    clock = ManualClock()
+    first = sim_app(clock)
+    first.option_mode = "local"
+    first.volume = 35
+    first.queue.replace([("/m/a.mp3", "A"), ("/m/b.mp3", "B")], start_index=0)
+    first._play_entry(first.queue.current())
+    clock.advance(42)
+    first._save_session(wait=True)
+
+    second = sim_app(ManualClock())
+    assert second.option_mode == "local"
+    assert second.volume == 35
+    assert second.current_title == "A"
+    assert second.queue.current() == ("/m/a.mp3", "A")
+
+    second.action_play()
+    assert second.mpv.player.source == "/m/a.mp3"
+    assert second.mpv.get_time_pos() == 42
+    assert second.currently_playing == "local"
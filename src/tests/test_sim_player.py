@@ -0,0 +1,117 @@
+from pytuiplayer.mpv_player import MPVPlayer
+from pytuiplayer.sim_player import ManualClock, SimulatedMPV, SimTrack
+
+
+def make_player(manifest=None):
+    clock = ManualClock()
+    mpv = MPVPlayer(backend="sim", clock=clock, manifest=manifest or {})
+    return mpv, clock
+
+
+def test_sim_backend_advances_position_and_reaches_eof():
+    mpv, clock = make_player({"/music/a.mp3": {"duration": 10}})
+    assert isinstance(mpv.player, SimulatedMPV)
+    assert mpv.is_idle() is True
+
+    mpv.play("/music/a.mp3")
+    assert mpv.get_duration() == 10
+    clock.advance(4)
+    assert mpv.get_time_pos() == 4
+
+    # paused time does not count
+    mpv.pause()
+    clock.advance(100)
+    assert mpv.get_time_pos() == 4
+    mpv.unpause()
+
+    clock.advance(20)
+    assert mpv.get_time_pos() == 10
+    assert mpv.is_idle() is True
+    assert mpv.player.events[-1]["event"] == "end-file"
+    assert mpv.player.events[-1]["reason"] == "eof"
+
+
+def test_sim_backend_seek_volume_and_stop():
+    mpv, clock = make_player({"/music/a.mp3": {"duration": 100}})
+    mpv.play("/music/a.mp3")
+    clock.advance(10)
+    mpv.seek(5)
+    assert mpv.get_time_pos() == 15
+    mpv.seek_absolute(50)
+    assert mpv.get_time_pos() == 50
+
+    mpv.set_volume(30)
+    assert mpv.player.volume == 30
+
+    mpv.stop()
+    assert mpv.get_time_pos() is None
+    assert mpv.is_idle() is True
+
+
+def test_sim_backend_icy_titles_stalls_and_network_failure():
+    manifest = {
+        "http://radio/stream": SimTrack(
+            titles=[(0, "Artist - One"), (30, "Artist - Two")],
+            stalls=[(10, 5)],
+            fail_at=60,
+        )
+    }
+    mpv, clock = make_player(manifest)
+    mpv.play("http://radio/stream")
+    assert mpv.get_duration() is None
+    assert mpv.player.get_property("icy-title") == "Artist - One"
+
+    clock.advance(12)
+    # 10s played, then stalled for 2 of the 5 buffering seconds
+    assert mpv.get_time_pos() == 10
+    assert mpv.player.paused_for_cache is True
+
+    clock.advance(3 + 20)
+    assert mpv.get_time_pos() == 30
+    assert mpv.player.get_property("icy-title") == "Artist - Two"
+
+    clock.advance(100)
+    assert mpv.is_idle() is True
+    assert mpv.player.last_error == "network"
+    kinds = [e["event"] for e in mpv.player.events]
+    assert kinds.count("metadata") == 2
+    assert "buffering" in kinds
+
+
+def test_sim_backend_loads_json_manifest(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text('{"song.mp3": {"duration": 42}}')
+    player = SimulatedMPV(clock=ManualClock(), manifest=manifest)
+    player.play("song.mp3")
+    assert player.duration == 42
+    player.play("unknown.mp3")
+    assert player.duration == player.default_duration
+
+
+def test_seek_emits_metadata_only_when_title_changes():
+    mpv, clock = make_player({"http://radio/stream": {"titles": [[0, "One"], [30, "Two"]]}})
+    mpv.play("http://radio/stream")
+    clock.advance(5)
+    mpv.seek(5)
+    mpv.seek_absolute(20)
+    titles = [e["title"] for e in mpv.player.events if e["event"] == "metadata"]
+    assert titles == ["One"]
+
+    mpv.seek_absolute(40)
+    mpv.seek_absolute(10)
+    titles = [e["title"] for e in mpv.player.events if e["event"] == "metadata"]
+    assert titles == ["One", "Two", "One"]
+
+
+def test_missing_libmpv_raises_instead_of_simulating(monkeypatch):
+    import pytest
+    import pytuiplayer.mpv_player as mpv_player
+
+    def missing():
+        raise OSError("Cannot find libmpv")
+
+    monkeypatch.setattr(mpv_player, "_load_mpv", missing)
+    mpv = MPVPlayer()
+    with pytest.raises(OSError):
+        mpv.player
+    assert mpv.get_time_pos() is None
@@ -0,0 +1,260 @@
+import time
+
+import pytest
+
+from pytuiplayer.history import HistoryLog
+from pytuiplayer.smart_playlists import (
+    RuleError, SmartPlaylist, SmartPlaylists, TrackTable, matches, parse_rule)
+
+NOW = 1_700_000_000.0
+DAY = 86400
+
+FACTS = {
+    "/m/jazz/old.mp3": {"title": "So What", "artist": "Miles Davis", "genre": "Jazz", "bitrate": 320, "year": 1959},
+    "/m/jazz/new.mp3": {"title": "Blue", "artist": "Someone", "genre": "jazz", "bitrate": 128, "year": 2021},
+    "/m/rock/loud.mp3": {"title": "Loud", "artist": "Band", "genre": "Rock", "bitrate": 256},
+    "/m/misc/untagged.mp3": {},
+}
+ADDED = {"/m/jazz/old.mp3": 100, "/m/jazz/new.mp3": 2, "/m/rock/loud.mp3": 3, "/m/misc/untagged.mp3": 40}
+
+
+def tracks(facts=FACTS, added=ADDED, mtime_bump=()):
+    for path in facts:
+        mtime = int((NOW - added[path] * DAY) * 1e9) + (1 if path in mtime_bump else 0)
+        yield path, 1000, mtime, 200.0
+
+
+class FakeHistory:
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def stats(self, kind=None):
+        return dict(self.entries)
+
+    def entry(self, source):
+        return self.entries.get(source)
+
+
+class Clock:
+    def __init__(self):
+        self.now = NOW
+
+    def __call__(self):
+        return self.now
+
+
+def make(tmp_path, history=None, facts=FACTS):
+    table = TrackTable(tmp_path / "tracks.json", read_facts=lambda path: facts.get(path, {}))
+    table.update(tracks(facts))
+    clock = Clock()
+    return table, SmartPlaylists(table, history or FakeHistory(), clock=clock), clock
+
+
+def write(tmp_path, name, rule):
+    path = tmp_path / f"{name}.smart"
+    path.write_text(f"# {name}\n{rule}\n")
+    return path
+
+
+def test_parse_rules_and_errors():
+    assert parse_rule("genre=jazz and not played in 30 days") == (
+        "and", ("cmp", "genre", "=", "jazz"), ("not", ("played", 30 * DAY)))
+    assert parse_rule("added this week and bitrate ≥ 256k") == (
+        "and", ("added", 7 * DAY), ("cmp", "bitrate", ">=", 256.0))
+    assert parse_rule("artist = Miles Davis or (duration > 5:00)") == (
+        "or", ("cmp", "artist", "=", "miles davis"), ("cmp", "duration", ">", 300.0))
+    assert parse_rule('never played and path ~ "Live "') == (
+        "and", ("cmp", "plays", "=", 0.0), ("cmp", "path", "~", "live "))
+    for bad in ("", "colour = red", "genre > jazz", "year ~ 19", "played in many days", "(genre = a", "genre = a and"):
+        with pytest.raises(RuleError):
+            parse_rule(bad)
+
+
+def test_open_materialises_the_rule(tmp_path):
+    history = FakeHistory({"/m/jazz/new.mp3": {"plays": 2, "last": NOW - 3 * DAY, "kind": "local"}})
+    _, manager, _ = make(tmp_path, history)
+    jazz = manager.open(write(tmp_path, "jazz", "genre=jazz and not played in 30 days"))
+    assert jazz.paths() == ["/m/jazz/old.mp3"]
+    fresh = manager.open(write(tmp_path, "fresh", "added this week and bitrate >= 256"))
+    assert fresh.paths() == ["/m/rock/loud.mp3"]
+    # unknown tags never match comparisons, but do match "is not"
+    assert manager.open(write(tmp_path, "a", "year < 2000")).paths() == ["/m/jazz/old.mp3"]
+    assert "/m/misc/untagged.mp3" in manager.open(write(tmp_path, "b", "genre != rock"))
+    # opening again is free unless the file changed
+    assert manager.open(tmp_path / "jazz.smart") is jazz
+
+
+def test_numpy_and_row_evaluation_agree(tmp_path):
+    pytest.importorskip("numpy")
+    import random
+    rng = random.Random(5)
+    facts, added, stats = {}, {}, {}
+    for i in range(2000):
+        path = f"/m/{rng.choice('abc')}/{i}.mp3"
+        facts[path] = {k: v for k, v in {
+            "genre": rng.choice(["Jazz", "Rock", "", "Hip Hop"]), "artist": f"artist {i % 50}",
+            "title": f"song {i}", "bitrate": rng.choice([None, 128, 256, 320]),
+            "year": rng.choice([None, 1960, 1999, 2020])}.items() if v}
+        added[path] = rng.random() * 60
+        if rng.random() < 0.3:
+            stats[path] = {"plays": rng.randint(1, 9), "last": NOW - rng.random() * 90 * DAY}
+    table = TrackTable(tmp_path / "t.json", read_facts=facts.__getitem__)
+    table.update(tracks(facts, added))
+    manager = SmartPlaylists(table, FakeHistory(stats), clock=lambda: NOW)
+    for rule in ("genre = jazz and not played in 30 days", "added in 2 weeks or bitrate > 200",
+                 "not (genre != rock) and year != 1999", "title ~ 1 and plays >= 3", "path ~ /b/ and never played",
+                 "artist = artist 7 or duration <= 3:20"):
+        playlist = SmartPlaylist(tmp_path / "x.smart", rule, table)
+        manager.evaluate(playlist)
+        with table.lock:
+            expected = sorted(p for p in facts if matches(playlist.rule, manager._values(p), NOW))
+        assert playlist.paths() == expected, rule
+        assert len(playlist) == len(expected)
+
+
+def test_scanner_changes_update_only_the_changed_rows(tmp_path):
+    facts = dict(FACTS)
+    table, manager, _ = make(tmp_path, facts=facts)
+    jazz = manager.open(write(tmp_path, "jazz", "genre = jazz"))
+    assert len(jazz) == 2
+    version = jazz.version
+
+    read = []
+    facts["/m/rock/loud.mp3"] = {"genre": "Jazz"}
+    facts["/m/jazz/extra.mp3"] = {"genre": "Jazz"}
+    added = dict(ADDED, **{"/m/jazz/extra.mp3": 0})
+    del facts["/m/jazz/old.mp3"]
+    table.read_facts = lambda path: read.append(path) or facts[path]
+    changed, removed = table.update(tracks(facts, added, mtime_bump={"/m/rock/loud.mp3"}))
+    assert sorted(read) == ["/m/jazz/extra.mp3", "/m/rock/loud.mp3"]
+    assert removed == ["/m/jazz/old.mp3"]
+    manager.tracks_changed(changed, removed)
+    assert jazz.paths() == ["/m/jazz/extra.mp3", "/m/jazz/new.mp3", "/m/rock/loud.mp3"]
+    assert jazz.version > version
+    assert len(table) == 4
+
+
+def test_plays_and_time_windows_move_tracks(tmp_path):
+    history = FakeHistory()
+    _, manager, clock = make(tmp_path, history)
+    unplayed = manager.open(write(tmp_path, "unplayed", "genre = jazz and not played in 30 days"))
+    recent = manager.open(write(tmp_path, "recent", "added in 5 days"))
+    assert unplayed.paths() == ["/m/jazz/new.mp3", "/m/jazz/old.mp3"]
+    assert recent.paths() == ["/m/jazz/new.mp3", "/m/rock/loud.mp3"]
+
+    history.entries["/m/jazz/old.mp3"] = {"plays": 1, "last": NOW}
+    manager.played("/m/jazz/old.mp3", history.entries["/m/jazz/old.mp3"])
+    assert unplayed.paths() == ["/m/jazz/new.mp3"]
+
+    # day 4: "loud" (added 3 days ago) has left "added in 5 days"
+    clock.now = NOW + 2.5 * DAY
+    manager.expire()
+    assert recent.paths() == ["/m/jazz/new.mp3"]
+    # after 30 days the played track is "not played in 30 days" again
+    clock.now = NOW + 31 * DAY
+    manager.expire()
+    assert unplayed.paths() == ["/m/jazz/new.mp3", "/m/jazz/old.mp3"]
+    assert recent.paths() == []
+
+
+def test_history_listener_and_table_persistence(tmp_path):
+    history = HistoryLog(tmp_path / "history.jsonl")
+    table, manager, clock = make(tmp_path, history)
+    clock.now = time.time()
+    history.add_listener(manager.played)
+    never = manager.open(write(tmp_path, "never", "never played"))
+    assert len(never) == 4
+    history.start("/m/rock/loud.mp3")
+    history.stop()
+    assert "/m/rock/loud.mp3" not in never and len(never) == 3
+    history.close()
+
+    table.save()
+    loaded = TrackTable(tmp_path / "tracks.json", read_facts=lambda path: pytest.fail("re-read")).load()
+    assert len(loaded) == 4
+    with loaded.lock:
+        assert loaded.values("/m/jazz/old.mp3")["artist"] == "miles davis"
+    assert loaded.tags("/m/jazz/old.mp3") == {"title": "so what", "artist": "miles davis", "album": ""}
+    assert loaded.update(tracks()) == ([], [])
+
+
+def test_added_is_when_a_track_was_first_seen(tmp_path):
+    clock = Clock()
+    table = TrackTable(tmp_path / "tracks.json", read_facts=lambda path: FACTS.get(path, {}), clock=clock)
+    table.update(tracks())  # the first fill is dated by mtime
+    old = "/m/jazz/old.mp3"
+    assert table.added[table.rows[old]] == pytest.approx(NOW - 100 * DAY)
+
+    # a file copied with its times kept is new all the same
+    clock.now = NOW + DAY
+    copied = dict(ADDED, **{"/m/jazz/copy.mp3": 365})
+    table.read_facts = lambda path: {}
+    table.update(tracks(dict(FACTS, **{"/m/jazz/copy.mp3": {}}), copied, mtime_bump={old}))
+    assert table.added[table.rows["/m/jazz/copy.mp3"]] == NOW + DAY
+    # and a retagged file is not
+    assert table.added[table.rows[old]] == pytest.approx(NOW - 100 * DAY)
+
+    table.save()
+    loaded = TrackTable(tmp_path / "tracks.json").load()
+    assert list(loaded.added) == list(table.added)
+
+
+def test_smart_playlist_in_local_list(tmp_path):
+    import asyncio
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    definition = write(tmp_path, "Jazz", "genre = jazz")
+    table = TrackTable(tmp_path / "tracks.json", read_facts=lambda path: FACTS.get(path, {}))
+    table.update(tracks())
+
+    async def run():
+        app = MusicPlayerApp()
+        app._scan_library = lambda: None
+        async with app.run_test(size=(120, 60)) as pilot:
+            app.query_one("#local-option").value = True
+            await pilot.pause()
+            view = app.query_one("#local-list")
+            await app.load_smart_playlist(definition)
+            assert "waiting for the library scan" in view.border_title
+            app.track_table = table
+            for _ in range(60):
+                await pilot.pause(0.05)
+                if len(view.children) == 2:
+                    break
+            assert [item.data["source"] for item in view.children] == ["/m/jazz/new.mp3", "/m/jazz/old.mp3"]
+            assert view.border_title.startswith("Smart · Jazz")
+            # a scan that retags a track redraws the live view
+            FACTS_AFTER = dict(FACTS, **{"/m/rock/loud.mp3": {"genre": "jazz"}})
+            table.read_facts = lambda path: FACTS_AFTER[path]
+            changed, removed = table.update(tracks(mtime_bump={"/m/rock/loud.mp3"}))
+            app.smart_playlists.tracks_changed(changed, removed)
+            for _ in range(60):
+                await pilot.pause(0.05)
+                if len(view.children) == 3:
+                    break
+            assert len(view.children) == 3
+
+            bad = write(tmp_path, "Bad", "genre >> jazz")
+            await app.load_smart_playlist(bad)
+            for _ in range(60):
+                await pilot.pause(0.05)
+                if len(view.children) == 0:
+                    break
+            assert view.border_title.startswith("Smart · Bad ·")
+            assert len(view.children) == 0
+
+            # loading another list stops a redraw of the smart playlist
+            await app.load_smart_playlist(definition)
+            for _ in range(60):
+                await pilot.pause(0.05)
+                if len(view.children) == 3:
+                    break
+            app.smart_playlists.tracks_changed(*table.update(tracks()))
+            app._refresh_smart_playlist()
+            await app.load_local_files(tmp_path)
+            await pilot.pause(0.2)
+            assert app._smart_view is None
+            assert not any(w.group == "smart" and w.is_running for w in app.workers)
+            assert not view.border_title.startswith("Smart")
+
+    asyncio.run(run())
@@ -0,0 +1,127 @@
+from array import array
+from pathlib import Path
+
+from pytuiplayer import sorting
+from pytuiplayer.smart_playlists import TrackTable
+from pytuiplayer.sorting import ListSorter
+
+NAN = float("nan")
+ROWS = [
+    ({"title": "b-side", "artist": "zappa", "album": "hot rats", "track": 2.0, "duration": 300.0, "added": 50.0}, "x"),
+    ({"title": "peaches", "artist": "zappa", "album": "hot rats", "track": 1.0, "duration": NAN, "added": 90.0}, "y"),
+    (None, "Loose File.mp3"),
+    ({"title": "", "artist": "Ábba", "album": "arrival", "track": NAN, "duration": 200.0, "added": 10.0}, "Dancing.mp3"),
+    ({"title": "a-side", "artist": "abba", "album": "arrival", "track": 1.0, "duration": 100.0, "added": 90.0}, "z"),
+]
+
+
+def test_sort_orders_put_unknown_values_last():
+    sorter = ListSorter(ROWS)
+    assert sorter.order("order") == [0, 1, 2, 3, 4]
+    assert sorter.order("album") == [4, 3, 1, 0, 2]
+    assert sorter.order("track") == [4, 1, 0, 3, 2]
+    assert sorter.order("duration") == [4, 3, 0, 2, 1]
+    # newest first, then by title; the untagged file has no date at all
+    assert sorter.order("added") == [4, 1, 0, 3, 2]
+    # packed keys are compact when they fit in 64 bits
+    assert isinstance(sorter.keys("artist"), array)
+
+
+def test_collation_key_is_applied_once_per_distinct_value(monkeypatch):
+    calls = []
+
+    def collate(text):
+        calls.append(text)
+        return text.replace("á", "a")
+
+    monkeypatch.setattr(sorting, "_collate", collate)
+    sorter = ListSorter(ROWS)
+    # "Ábba" collates like "abba", so the track number decides
+    assert sorter.order("artist") == [4, 3, 1, 0, 2]
+    # once per distinct title (5), artist (4) and album (3), not per comparison
+    assert len(calls) == 12
+
+
+def test_groups_and_their_summaries():
+    sorter = ListSorter(ROWS)
+    order = sorter.order("track", "album")
+    assert order == [4, 3, 1, 0, 2]
+    groups = sorter.groups(order, "album")
+    assert groups == [(0, 2), (2, 4), (4, 5)]
+    assert [sorter.group_name("album", order[start]) for start, _ in groups] == [
+        "arrival", "hot rats", "Unknown album"]
+    assert sorter.total_duration(order[0:2]) == (2, 300.0)
+    assert sorter.groups([], "album") == []
+
+
+def test_track_numbers_are_read_and_saved(tmp_path):
+    facts = {"/m/a.mp3": {"title": "A", "track": 7}, "/m/b.mp3": {"title": "B"}}
+    table = TrackTable(tmp_path / "tracks.json", read_facts=facts.__getitem__)
+    table.update((path, 1, 1, 60.0) for path in facts)
+    table.save()
+    loaded = TrackTable(tmp_path / "tracks.json").load()
+    with loaded.lock:
+        assert loaded.values("/m/a.mp3")["track"] == 7
+        assert loaded.values("/m/a.mp3")["duration"] == 60.0
+        assert loaded.values("/m/b.mp3")["track"] != loaded.values("/m/b.mp3")["track"]  # NaN
+
+
+def test_local_list_sorting_and_grouping(tmp_path):
+    import asyncio
+    from pytuiplayer.tui_app import GroupHeader, MusicPlayerApp
+
+    facts = {
+        "/m/abba/2.mp3": {"artist": "ABBA", "album": "Arrival", "track": 2, "title": "Dancing Queen"},
+        "/m/zappa/1.mp3": {"artist": "Zappa", "album": "Hot Rats", "track": 1, "title": "Peaches"},
+        "/m/abba/1.mp3": {"artist": "ABBA", "album": "Arrival", "track": 1, "title": "When I Kissed"},
+    }
+    table = TrackTable(tmp_path / "tracks.json", read_facts=facts.__getitem__)
+    table.update((path, 1, 1, 120.0) for path in facts)
+
+    async def settle(pilot, check):
+        for _ in range(60):
+            await pilot.pause(0.05)
+            if check():
+                return
+        assert check()
+
+    async def run():
+        app = MusicPlayerApp()
+        app._scan_library = lambda: None
+        async with app.run_test(size=(120, 60)) as pilot:
+            app.query_one("#local-option").value = True
+            await pilot.pause()
+            app.track_table = table
+            view = app.query_one("#local-list")
+            view.clear()
+            await app._show_playlist_entries([(path, Path(path).name) for path in facts], "Test")
+            view.focus()
+
+            def sources():
+                return [item.data["source"] if item.data else "header" for item in view.children if item.display]
+
+            await pilot.press("o")  # by artist
+            await settle(pilot, lambda: sources() == ["/m/abba/1.mp3", "/m/abba/2.mp3", "/m/zappa/1.mp3"])
+            assert view.border_subtitle == "by artist"
+
+            await pilot.press("g")  # grouped by album, collapsed
+            await settle(pilot, lambda: sources() == ["header", "header"])
+            header = view.children[0]
+            assert isinstance(header, GroupHeader)
+            assert header.title() == "▸ arrival · 2 · 4:00"
+            view.index = 0
+            await pilot.press("enter")
+            await settle(pilot, lambda: sources() == ["header", "/m/abba/1.mp3", "/m/abba/2.mp3", "header"])
+
+            # selecting a track queues the list without the headers
+            view.index = 2
+            await pilot.press("enter")
+            await pilot.pause()
+            assert [app.queue.entry(i)[0] for i in range(len(app.queue))] == [
+                "/m/abba/1.mp3", "/m/abba/2.mp3", "/m/zappa/1.mp3"]
+            assert app.queue.current()[0] == "/m/abba/2.mp3"
+
+            await pilot.press("g", "g")  # back to ungrouped
+            await settle(pilot, lambda: sources() == ["/m/abba/1.mp3", "/m/abba/2.mp3", "/m/zappa/1.mp3"])
+
+    asyncio.run(run())
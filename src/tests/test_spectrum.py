@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from pytuiplayer.mpv_player import MPVPlayer
+from pytuiplayer.sim_player import ManualClock
+
+np = pytest.importorskip("numpy")
+
+
+def test_sine_lands_in_its_band_and_rms_is_reported():
+    from pytuiplayer.spectrum import SpectrumAnalyzer
+    analyzer = SpectrumAnalyzer(sample_rate=22050, fft_size=1024, bands=24, decay=0.0)
+    t = np.arange(2048) / 22050
+    levels, rms_db, peak = analyzer.analyze(np.sin(2 * np.pi * 1000 * t))
+    loudest = int(np.argmax(levels))
+    assert levels[loudest] > 0.9
+    assert levels[0] < 0.3
+    assert rms_db == pytest.approx(-3.0, abs=0.1)
+    assert peak == pytest.approx(1.0, abs=1e-3)
+
+
+def test_render_bars_draws_rows_from_levels():
+    from pytuiplayer.spectrum import render_bars
+    text = render_bars([0.0, 1.0, 0.5], rows=2, width=1)
+    assert text.split("\n") == [" █ ", " ██"]
+
+
+def test_pcm_ring_returns_latest_samples_across_wraparound():
+    from pytuiplayer.spectrum import PcmRing
+    ring = PcmRing(8)
+    assert ring.latest(4) is None
+    ring.write(np.arange(6, dtype=np.float32))
+    ring.write(np.arange(6, 12, dtype=np.float32))
+    assert ring.latest(5).tolist() == [7, 8, 9, 10, 11]
+    # a write larger than the ring keeps its tail, in order
+    ring.write(np.arange(12, 23, dtype=np.float32))
+    assert ring.latest(8).tolist() == list(range(15, 23))
+    ring.write(np.arange(23, 26, dtype=np.float32))
+    assert ring.latest(8).tolist() == list(range(18, 26))
+
+
+def test_sim_source_follows_playback():
+    from pytuiplayer.spectrum import SimPcmSource
+    clock = ManualClock()
+    mpv = MPVPlayer(backend="sim", clock=clock, manifest={"/a.mp3": {"duration": 10}})
+    source = SimPcmSource(mpv)
+    assert source.read(1024) is None
+    mpv.play("/a.mp3")
+    clock.advance(2)
+    first = source.read(1024)
+    assert first is not None and first.shape == (1024,)
+    assert np.array_equal(first, source.read(1024))
+    clock.advance(1)
+    assert not np.array_equal(first, source.read(1024))
+    clock.advance(20)
+    assert source.read(1024) is None
+
+
+def test_meter_renders_only_while_shown_and_drops_slow_frames():
+    from pytuiplayer.tui_app import MusicPlayerApp, SpectrumMeter
+
+    async def run():
+        app = MusicPlayerApp()
+        async with app.run_test() as pilot:
+            app.mpv.play("/music/a.mp3")
+            meter = app.query_one("#spectrum", SpectrumMeter)
+            await pilot.pause(0.3)
+            assert meter.frames == 0
+
+            await pilot.press("v")
+            await pilot.pause(0.5)
+            assert meter.display
+            assert meter.frames > 0
+            assert meter.frame_ms > 0
+
+            await pilot.press("v")
+            await pilot.pause(0.1)
+            frames = meter.frames
+            await pilot.pause(0.3)
+            assert meter.frames == frames
+
+            # a frame that overruns the budget makes the next ticks drop
+            meter._skip = 0
+            meter.frame_ms = 0
+            slow = meter.source.read
+
+            def slow_read(frames):
+                import time
+                time.sleep(0.15)
+                return slow(frames)
+
+            meter.source.read = slow_read
+            meter.display = True
+            await pilot.pause(0.6)
+            assert meter.dropped_frames > 0
+
+    asyncio.run(run())
@@ -0,0 +1,139 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from pytuiplayer.startup_profile import IMPORT_BUDGET_MS, LAZY_MODULES, ImportTimer, StartupProfiler
+
+SRC = Path(__file__).resolve().parents[1]
+
+
+def test_app_import_stays_within_budget_and_skips_lazy_modules():
+    code = (
+        "import sys, pytuiplayer.tui_app\n"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == ""
+
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "pytuiplayer.tui_app":
+            cumulative_us = int(parts[1])
+    assert cumulative_us is not None
+    assert cumulative_us / 1000 < IMPORT_BUDGET_MS
+
+
+def test_first_paint_with_a_saved_queue_skips_lazy_modules(tmp_path, monkeypatch):
+    import json
+
+    monkeypatch.setenv("PYTUIP_DATA_DIR", str(tmp_path))
+    (tmp_path / "session.json").write_text(json.dumps({
+        "version": 1, "mode": "radio",
+        "queue": {"sources": ["/m/a.mp3", "/m/b.mp3"], "labels": {"0": "A"}, "current": 1},
+    }))
+    code = (
+        "import sys\n"
+        "from pytuiplayer.startup_profile import StartupProfiler\n"
+        "from pytuiplayer.tui_app import MusicPlayerApp\n"
+        "app = MusicPlayerApp()\n"
+        "app.startup_profiler = StartupProfiler()\n"
+        "app.run(headless=True)\n"  # exits at first paint
+        f"print('lazy:' + ','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))\n"
+        "print(app._queue is None and app._session_queue['current'])\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 0, proc.stderr
+    lazy, pending = proc.stdout.strip().splitlines()[-2:]
+    assert lazy == "lazy:" and pending == "1"
+
+
+def test_import_timer_records_cumulative_and_self_time(tmp_path, monkeypatch):
+    (tmp_path / "pytuip_timed_child.py").write_text("X = 1\n")
+    (tmp_path / "pytuip_timed_parent.py").write_text("import pytuip_timed_child\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    timer = ImportTimer().install()
+    try:
+        import pytuip_timed_parent  # noqa: F401
+    finally:
+        timer.uninstall()
+        sys.modules.pop("pytuip_timed_parent", None)
+        sys.modules.pop("pytuip_timed_child", None)
+
+    parent = timer.timings["pytuip_timed_parent"]
+    child = timer.timings["pytuip_timed_child"]
+    assert parent[0] >= child[0]
+    assert parent[1] <= parent[0]
+    assert timer not in sys.meta_path
+
+
+def test_main_profile_startup_reports_phases(monkeypatch, capsys):
+    import pytuiplayer.tui_app
+    from pytuiplayer.__main__ import main
+
+    class FakeApp:
+        def __init__(self):
+            self.startup_profiler = None
+
+        def run(self):
+            self.startup_profiler.mark("first paint")
+
+    monkeypatch.setattr(pytuiplayer.tui_app, "MusicPlayerApp", FakeApp)
+
+    assert main(["--profile-startup"]) == 0
+    out = capsys.readouterr().out
+    assert "imports done" in out
+    assert "first paint" in out
+    assert "Slowest imports" in out
+
+
+def test_profiler_report_lists_marks_in_order():
+    profiler = StartupProfiler()
+    profiler.mark("a")
+    profiler.mark("b")
+    report = profiler.report()
+    assert report.index("a") < report.index("b")
+
+
+def test_app_marks_phases_and_exits_after_first_paint():
+    import asyncio
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    async def run():
+        app = MusicPlayerApp()
+        app.startup_profiler = StartupProfiler()
+        async with app.run_test() as pilot:
+            for _ in range(200):
+                if app.return_code is not None:
+                    break
+                await pilot.pause(0.01)
+        return app
+
+    app = asyncio.run(run())
+    phases = [name for name, _ in app.startup_profiler.phases]
+    assert phases == ["composed", "mounted", "first paint"]
+    assert app.return_code == 0
+
+
+def test_main_uninstalls_import_timer_when_app_fails(monkeypatch):
+    import pytest
+    import pytuiplayer.tui_app
+    from pytuiplayer.__main__ import main
+
+    class BrokenApp:
+        def run(self):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(pytuiplayer.tui_app, "MusicPlayerApp", BrokenApp)
+    before = list(sys.meta_path)
+    with pytest.raises(RuntimeError):
+        main(["--profile-startup"])
+    assert sys.meta_path == before
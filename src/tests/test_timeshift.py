@@ -0,0 +1,182 @@
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pytuiplayer.timeshift import RingBuffer, Timeshift
+
+METAINT = 1000
+
+
+def audio(start: int, n: int) -> bytes:
+    """The station's audio: byte i of the stream is i % 251."""
+    return bytes((start + i) % 251 for i in range(n))
+
+
+class Station:
+    """An endless ICY station at 8 kbit/s (1000 bytes/s) sending a metadata
+    block every `METAINT` bytes; the title changes every 3 blocks. Like
+    real servers it sends a burst (20 s) on connect, then keeps pace.
+    Without `announce`, the bitrate is not sent (no `icy-br`)."""
+
+    def __init__(self, announce=True):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200)
+                if announce:
+                    self.send_header("icy-br", "8")
+                if self.headers.get("Icy-MetaData") == "1":
+                    self.send_header("icy-metaint", str(METAINT))
+                self.end_headers()
+                sent = 0
+                try:
+                    while True:
+                        self.wfile.write(audio(sent, METAINT))
+                        sent += METAINT
+                        title = f"StreamTitle='Song {sent // (3 * METAINT)}';".encode()
+                        title += b"\0" * (-len(title) % 16)
+                        self.wfile.write(bytes([len(title) // 16]) + title)
+                        self.wfile.flush()
+                        if sent >= 20 * METAINT:
+                            time.sleep(1.0)
+                except OSError:
+                    return
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/stream"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def station():
+    station = Station()
+    yield station
+    station.close()
+
+
+def wait_for(check, seconds=5.0):
+    deadline = time.monotonic() + seconds
+    while not check():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_ring_keeps_the_last_capacity_bytes(tmp_path):
+    ring = RingBuffer(100, tmp_path)
+    ring.write(audio(0, 70))
+    ring.write(audio(70, 70))
+    assert (ring.written, ring.oldest) == (140, 40)
+    # a wrapped read comes back in two pieces
+    assert ring.read(90, 50) == (90, audio(90, 10))
+    assert ring.read(100, 50) == (100, audio(100, 40))
+    # an overwritten offset moves up to the oldest byte
+    assert ring.read(0, 10) == (40, audio(40, 10))
+    ring.write(audio(140, 250))
+    assert ring.read(0, 100) == (290, audio(290, 10))
+
+    # a reader at the end waits for the writer
+    threading.Timer(0.05, ring.write, [b"xyz"]).start()
+    assert ring.read(390, 10, timeout=5) == (390, b"xyz")
+    assert ring.read(393, 10, timeout=0.01) == (393, b"")
+    ring.close()
+    assert ring.read(393, 10, timeout=5) == (393, b"")
+
+
+def test_timeshift_records_and_serves_any_offset(station):
+    ts = Timeshift(station.url, window=5.0)  # 5000 bytes at 1000 bytes/s
+    try:
+        wait_for(lambda: ts.ring is not None and ts.ring.written >= 20000)
+        assert ts.byte_rate == 1000 and ts.ring.capacity == 5000
+        assert ts.buffered() == 5.0
+        ring = ts.ring
+        # metadata blocks are gone: the buffer is the plain audio
+        offset, data = ring.read(ring.oldest, 3000)
+        assert data == audio(offset, len(data))
+        # titles are known by offset, only as far back as the buffer goes
+        assert ts.titles[0][0] <= ring.oldest < ts.titles[1][0]
+        assert ts.title_at(ts.titles[1][0]) == ts.titles[1][1]
+        assert len(ts.titles) <= 3
+
+        # the local server streams the buffer from the offset asked for
+        start = ring.written - 2500
+        with urllib.request.urlopen(ts.url(start), timeout=5) as response:
+            assert response.read(2000) == audio(start, 2000)
+        assert ts.play_start == start
+        assert ts.position(1.5) == start + 1500
+        assert ts.offset_for(1.5, -100) == ring.oldest
+        with urllib.request.urlopen(ts.url(), timeout=5) as response:
+            response.read(10)
+        assert ring.written - ts.play_start >= 4000  # the live margin
+    finally:
+        ts.close()
+
+
+def test_byte_rate_is_measured_without_icy_br(monkeypatch):
+    import pytuiplayer.timeshift as timeshift
+
+    monkeypatch.setattr(timeshift, "RATE_MIN_SAMPLES", 3)
+    station = Station(announce=False)
+    ts = Timeshift(station.url, window=5.0)
+    try:
+        wait_for(lambda: ts.ring is not None)
+        assert ts.byte_rate == 320 * 125  # assumed until measured
+        wait_for(lambda: len(ts._rates) >= 3, seconds=10)
+        # the burst on connect does not count: the station's pace does
+        assert 800 <= ts.byte_rate <= 1250
+        ts.play_start = ts.ring.written - 3000
+        assert 2 <= ts.behind(0) <= 4
+    finally:
+        ts.close()
+        station.close()
+
+
+def test_radio_rewind_and_live(station):
+    import asyncio
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    app = MusicPlayerApp()
+    app.timeshift_minutes = 0.5
+
+    async def run():
+        async with app.run_test(size=(120, 40)) as pilot:
+            await pilot.pause()
+            station_info = {"name": "Test FM", "url": station.url}
+            app.stations.stations = [station_info]
+            await app.play_station(station_info, 0)
+            ts = app._timeshift
+            assert app.mpv.current_source == ts.url()
+            wait_for(lambda: ts.ring is not None and ts.ring.written >= 20000)
+            ts.play_start = ts.ring.written - 4000  # what serving "live" sets
+
+            app.action_seek_backward()
+            assert app.mpv.current_source != ts.url()
+            app.action_go_live()
+            assert app.mpv.current_source == ts.url()
+            app.action_seek_to_10()
+            offset = int(app.mpv.current_source.rsplit("/", 1)[1])
+            assert ts.ring.oldest <= offset < ts.ring.oldest + 0.2 * (ts.ring.written - ts.ring.oldest)
+
+            ts.play_start = ts.ring.written - 8000
+            app.update_progress()
+            behind, buffered = app.query_one("#progress").live
+            assert 7 <= behind <= 9 and buffered > 10
+            app._refresh_metadata()
+            assert app.current_title == ts.title_at(ts.play_start)
+
+            app.action_stop()
+            app.update_progress()
+            assert app._timeshift is None and app.query_one("#progress").live is None
+
+    asyncio.run(run())
@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from pytuiplayer.track_cache import TrackCache
+
+
+class TrackServer:
+    """Serves `files` (path -> bytes) with ETags and single `Range`/`If-Range`
+    requests; `/live` is an endless stream without a length."""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []  # (path, Range header, status)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/live":
+                    server.requests.append((self.path, None, 200))
+                    self.send_response(200)
+                    self.send_header("Content-Type", "audio/mpeg")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    try:
+                        for _ in range(200):
+                            self.wfile.write(b"\xff" * 1024)
+                            time.sleep(0.01)
+                    except OSError:
+                        pass
+                    return
+                body = server.files[self.path]
+                etag = f'"{len(body)}-{hash(body) & 0xffff:x}"'
+                wanted = self.headers.get("Range")
+                status, start = 200, 0
+                if wanted and self.headers.get("If-Range") == etag:
+                    status, start = 206, int(wanted[len("bytes="):].rstrip("-"))
+                server.requests.append((self.path, wanted, status))
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body) - start))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                self.end_headers()
+                self.wfile.write(body[start:])
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = TrackServer()
+    yield server
+    server.close()
+
+
+def settle(cache):
+    for _ in range(200):
+        with cache._lock:
+            if not cache._inflight:
+                return
+        time.sleep(0.02)
+    raise AssertionError("downloads did not finish")
+
+
+def test_prefetch_and_lru_eviction(server, tmp_path):
+    for name in "abcd":
+        server.files[f"/{name}.mp3"] = name.encode() * 1000
+    urls = [f"{server.url}/{name}.mp3" for name in "abcd"]
+    cache = TrackCache(tmp_path, max_bytes=2500, max_workers=2)
+    cache.max_track_bytes = 2500
+    cache.pin(urls[0])
+    cache.prefetch(urls[:2])
+    settle(cache)
+    assert cache.path(urls[0]).read_bytes() == b"a" * 1000
+    assert cache.path(urls[1]).suffix == ".mp3"
+
+    # c pushes the cache over its cap: b is evicted, a is playing
+    cache.prefetch(urls[2:3])
+    settle(cache)
+    assert cache.path(urls[1]) is None
+    assert cache.path(urls[0]) is not None and cache.path(urls[2]) is not None
+    assert cache.size == 2000
+
+    # the order survives a restart: c was used last, so a goes first
+    cache.path(urls[2])
+    cache.close(wait=True)
+    cache = TrackCache(tmp_path, max_bytes=2500)
+    cache.max_track_bytes = 2500
+    cache.prefetch(urls[3:])
+    settle(cache)
+    assert [cache.path(url) is not None for url in urls] == [False, False, True, True]
+    cache.close(wait=True)
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    body = bytes(range(256)) * 40
+    server.files["/t.flac"] = body
+    url = f"{server.url}/t.flac"
+    cache = TrackCache(tmp_path)
+    # what an interrupted download leaves behind
+    key = cache._key(url)
+    (tmp_path / f"{key}.part").write_bytes(body[:4000])
+    etag = f'"{len(body)}-{hash(body) & 0xffff:x}"'
+    (tmp_path / f"{key}.part.json").write_text(json.dumps({"url": url, "validator": etag}))
+    cache.prefetch([url])
+    settle(cache)
+    assert server.requests[-1] == ("/t.flac", "bytes=4000-", 206)
+    assert cache.path(url).read_bytes() == body
+    assert not (tmp_path / f"{key}.part").exists()
+
+    # the file changed on the server: If-Range fails and it starts over
+    other = f"{server.url}/u.flac"
+    server.files["/u.flac"] = b"new" * 100
+    (tmp_path / f"{cache._key(other)}.part").write_bytes(b"old")
+    (tmp_path / f"{cache._key(other)}.part.json").write_text(json.dumps({"url": other, "validator": '"stale"'}))
+    cache.prefetch([other])
+    settle(cache)
+    assert server.requests[-1] == ("/u.flac", "bytes=3-", 200)
+    assert cache.path(other).read_bytes() == b"new" * 100
+    cache.close(wait=True)
+
+
+def test_abandoned_parts_are_expired(tmp_path):
+    import os
+
+    from pytuiplayer.track_cache import PART_MAX_AGE
+
+    def part(key, size, age):
+        for name in (f"{key}.part", f"{key}.part.json"):
+            (tmp_path / name).write_bytes(b"x" * size)
+            then = time.time() - age
+            os.utime(tmp_path / name, (then, then))
+
+    part("old", 10, PART_MAX_AGE + 60)
+    part("new", 400, 0)
+    part("newer", 500, -60)  # the newest goes first into the budget
+    part("large", 2000, 120)
+    (tmp_path / "gone.part.json").write_text("{}")
+    cache = TrackCache(tmp_path, max_bytes=4000)  # 1000 bytes of parts
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "new.part", "new.part.json", "newer.part", "newer.part.json"]
+    assert cache.size == 0
+    cache.close(wait=True)
+
+
+def test_live_streams_are_not_cached(server, tmp_path):
+    cache = TrackCache(tmp_path)
+    started = time.monotonic()
+    cache.prefetch([f"{server.url}/live"])
+    settle(cache)
+    assert time.monotonic() - started < 1.5  # hung up instead of recording the stream
+    assert cache.path(f"{server.url}/live") is None
+    cache.prefetch([f"{server.url}/live"])
+    assert not cache.is_downloading(f"{server.url}/live")
+    assert [path for path, _, _ in server.requests] == ["/live"]
+    cache.close(wait=True)
+
+
+def test_app_plays_cached_copy_and_fetches_ahead(server):
+    from pytuiplayer.tui_app import MusicPlayerApp
+
+    for name in "abc":
+        server.files[f"/{name}.mp3"] = name.encode() * 100
+    urls = [f"{server.url}/{name}.mp3" for name in "abc"]
+    app = MusicPlayerApp()
+    app.queue.replace([(url, None) for url in urls], start_index=0)
+    app._play_entry(app.queue.current())
+    assert app.mpv.current_source == urls[0]  # not downloaded yet: streamed
+    settle(app.track_cache)
+    assert all(app.track_cache.path(url) is not None for url in urls)
+
+    app._play_entry((urls[1], None))
+    assert app.mpv.current_source == str(app.track_cache.path(urls[1]))
+    assert app._playing["source"] == urls[1]
+    app.track_cache.close(wait=True)
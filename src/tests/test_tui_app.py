@@ -65,8 +65,8 @@ def test_load_stations_ui_updates_list():
             self.items = []
         def clear(self):
             self.items.clear()
-        async def mount(self, item):
-            self.items.append(item)
+        async def mount(self, *items):
+            self.items.extend(items)
 
     fake = FakeListView()
     app.query_one = lambda *a, **k: fake
@@ -197,9 +197,9 @@ def test_visibility_toggle_hides_unused_widgets():
             self.disabled = None
         def clear(self):
             self.cleared = True
-        async def mount(self, item):
+        async def mount(self, *items):
             self.mounted = getattr(self, "mounted", [])
-            self.mounted.append(item)
+            self.mounted.extend(items)
 
     station = W()
     local = W()
@@ -361,8 +361,8 @@ song2.mp3
             self.items = []
         def clear(self):
             self.items.clear()
-        async def mount(self, item):
-            self.items.append(item)
+        async def mount(self, *items):
+            self.items.extend(items)
 
     fake = FakeList()
     app.query_one = lambda *a, **k: fake
@@ -398,8 +398,8 @@ def test_load_large_m3u_is_truncated_and_batched(tmp_path: Path, monkeypatch: Mo
             self.items = []
         def clear(self):
             self.items.clear()
-        async def mount(self, item):
-            self.items.append(item)
+        async def mount(self, *items):
+            self.items.extend(items)
 
     fake = FakeList()
     app.query_one = lambda *a, **k: fake
@@ -481,3 +481,152 @@ def test_play_playlist_starts_first_item():
 
     assert app.mpv.last == "/tmp/first.mp3"
     assert app.current_title == "First - Song"
+
+
+def test_local_panels_are_composed_lazily(monkeypatch: MonkeyPatch, tmp_path: Path):
+    import asyncio
+    from textual.css.query import NoMatches
+
+    monkeypatch.setenv("PYTUIP_BACKEND", "sim")
+    monkeypatch.setattr(Path, "home", classmethod(lambda cls: tmp_path))
+    (tmp_path / "a.mp3").write_text("")
+
+    async def run():
+        app = MusicPlayerApp()
+        async with app.run_test() as pilot:
+            # radio mode: hidden panels have not been built
+            try:
+                app.query_one("#directory-tree")
+                assert False, "directory tree composed eagerly"
+            except NoMatches:
+                pass
+
+            app.query_one("#local-option").value = True
+            await pilot.pause()
+            tree = app.query_one("#directory-tree")
+            local = app.query_one("#local-list")
+            assert tree.display and local.display
+            assert len(local.children) == 1
+
+            # switching back keeps the panels mounted but hidden
+            app.query_one("#radio-option").value = True
+            await pilot.pause()
+            assert app.query_one("#directory-tree") is tree
+            assert not tree.display
+
+            # coming back is served from the directory cache and revalidated
+            (tmp_path / "b.mp3").write_text("")
+            app.query_one("#local-option").value = True
+            await pilot.pause()
+            # wait for the refresh worker only (if still running): DirectoryTree's
+            # own loader worker never finishes
+            refresh = [w for w in app.workers if w.group == "dir-refresh"]
+            if refresh:
+                await app.workers.wait_for_complete(refresh)
+            await pilot.pause()
+            assert len(local.children) == 2
+
+    asyncio.run(run())
+
+
+def test_load_local_files_uses_directory_cache(tmp_path: Path, monkeypatch: MonkeyPatch):
+    import asyncio
+
+    (tmp_path / "one.mp3").write_text("")
+    (tmp_path / "two.MP3").write_text("")
+    (tmp_path / "skip.txt").write_text("")
+
+    app = MusicPlayerApp()
+
+    class FakeList:
+        def __init__(self):
+            self.items = []
+        def clear(self):
+            self.items.clear()
+        async def mount(self, *items):
+            self.items.extend(items)
+
+    fake = FakeList()
+    app.query_one = lambda *a, **k: fake
+
+    scans = []
+    original = app.dir_cache._scan
+    monkeypatch.setattr(app.dir_cache, "_scan", lambda p: scans.append(p) or original(p))
+
+    asyncio.run(app.load_local_files(tmp_path))
+    assert sorted(i.data.name for i in fake.items) == ["one.mp3", "two.MP3"]
+
+    # returning to the directory is served from the cache
+    asyncio.run(app.load_local_files(tmp_path))
+    assert len(fake.items) == 2
+    assert len(scans) == 1
+
+
+def test_queue_advances_when_track_ends_and_stop_does_not_advance():
+    import types, asyncio
+    from textual.widgets import ListItem, Label
+    from pytuiplayer.mpv_player import MPVPlayer
+    from pytuiplayer.sim_player import ManualClock
+
+    clock = ManualClock()
+    app = MusicPlayerApp()
+    app.mpv = MPVPlayer(backend="sim", clock=clock, manifest={"/m/a.mp3": {"duration": 10}})
+    app.update_now_playing = lambda *a, **k: None
+    app.option_mode = "local"
+
+    items = []
+    for name in ("a", "b", "c"):
+        item = ListItem(Label(name))
+        item.data = {"source": f"/m/{name}.mp3", "meta": name.upper()}
+        items.append(item)
+    list_view = types.SimpleNamespace(id="local-list", children=items)
+    asyncio.run(app.on_list_view_selected(types.SimpleNamespace(list_view=list_view, item=items[0])))
+    assert app.current_title == "A"
+
+    app._advance_queue_if_finished()
+    clock.advance(11)
+    app._advance_queue_if_finished()
+    assert app.current_title == "B"
+
+    app.action_next_track()
+    assert app.current_title == "C"
+    app.action_prev_track()
+    assert app.current_title == "B"
+
+    bar = type("B", (), {"progress": None, "duration": None})()
+    app.query_one = lambda *a, **k: bar
+    app.action_stop()
+    app._advance_queue_if_finished()
+    assert app.current_title == "Nothing playing"
+
+
+def test_played_stations_are_listed_first_and_selection_follows():
+    from pytuiplayer.station_player import StationPlayer
+    import asyncio
+
+    app = MusicPlayerApp()
+    app.mpv = FakeMPVPlayer()
+    app.mpv.play = lambda url: None
+    app.update_now_playing = lambda *a, **k: None
+    stations = [{"name": "One", "url": "u1"}, {"name": "Two", "url": "u2"}, {"name": "Three", "url": "u3"}]
+    app.stations = StationPlayer(app.mpv, stations=stations)
+
+    class FakeListView:
+        def __init__(self):
+            self.items = []
+            self.index = None
+        def clear(self):
+            self.items.clear()
+        async def mount(self, *items):
+            self.items.extend(items)
+
+    fake = FakeListView()
+    app.query_one = lambda *a, **k: fake
+
+    asyncio.run(app.play_station(stations[2], 2))
+    asyncio.run(app.load_stations_ui())
+    assert [item.data["name"] for item in fake.items] == ["Three", "One", "Two"]
+
+    asyncio.run(app.play_station(stations[2], 2))
+    assert fake.index == 0
+    app.history.close()
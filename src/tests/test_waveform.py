@@ -0,0 +1,117 @@
+import os
+import threading
+import wave
+
+import pytest
+
+from pytuiplayer.waveform import WaveformCache, WaveformScheduler, decode, encode
+
+np = pytest.importorskip("numpy")
+
+
+def write_wav(path, samples, rate=48000):
+    pcm = (np.stack([samples, samples], axis=1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+
+
+def test_compute_waveform_follows_the_envelope(tmp_path):
+    from pytuiplayer.waveform import compute_waveform
+    t = np.arange(48000 * 4) / 48000
+    tone = np.sin(2 * np.pi * 440 * t)
+    # silent first second, then half and full scale
+    tone[:48000] = 0
+    tone[48000:48000 * 2] *= 0.5
+    write_wav(tmp_path / "a.wav", tone)
+
+    peaks, rms = compute_waveform(tmp_path / "a.wav", buckets=4)
+    assert len(peaks) == len(rms) == 4
+    assert peaks[0] == 0
+    assert peaks[1] == pytest.approx(127, abs=2)
+    assert peaks[3] == pytest.approx(254, abs=2)
+    assert rms[3] == pytest.approx(255 / 2 ** 0.5, abs=2)
+    assert compute_waveform(tmp_path / "missing.wav") is None
+
+
+def test_encoding_round_trips_and_rejects_garbage():
+    data = encode(b"\x01\x02\x03", b"\x04\x05\x06")
+    assert decode(data) == (b"\x01\x02\x03", b"\x04\x05\x06")
+    assert decode(data[:-1]) is None
+    assert decode(b"nope") is None
+
+
+def test_cache_is_keyed_by_mtime_and_evicts_least_recently_used(tmp_path):
+    tracks = []
+    for name in "abc":
+        track = tmp_path / f"{name}.mp3"
+        track.write_bytes(b"x")
+        tracks.append(track)
+    entry = len(encode(b"\0" * 100, b"\0" * 100))
+    cache = WaveformCache(tmp_path / "wf", max_bytes=2 * entry)
+
+    cache.put(tracks[0], b"\1" * 100, b"\0" * 100)
+    cache.put(tracks[1], b"\2" * 100, b"\0" * 100)
+    # make `a` older, then read it so it becomes the most recently used
+    for file in (tmp_path / "wf").iterdir():
+        os.utime(file, (1, 1))
+    assert cache.get(tracks[0])[0] == b"\1" * 100
+    cache.put(tracks[2], b"\3" * 100, b"\0" * 100)
+    assert cache.get(tracks[1]) is None
+    assert cache.get(tracks[0]) is not None and cache.get(tracks[2]) is not None
+
+    # editing the file invalidates its entry
+    st = tracks[0].stat()
+    os.utime(tracks[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get(tracks[0]) is None
+
+
+def test_scheduler_runs_current_first_and_cancels_unwanted(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    cache = WaveformCache(tmp_path / "wf")
+    started, release = [], threading.Event()
+
+    def compute(path):
+        started.append(os.path.basename(path))
+        release.wait(5)
+        return b"\x80" * 4, b"\x40" * 4
+
+    ready = []
+    scheduler = WaveformScheduler(cache, on_ready=lambda path, wf: ready.append(os.path.basename(path)),
+                                  compute=compute)
+    scheduler._pool = ThreadPoolExecutor(max_workers=1)
+    paths = []
+    for name in "abcd":
+        (tmp_path / name).write_bytes(b"x")
+        paths.append(str(tmp_path / name))
+
+    scheduler.request(paths[:3])
+    # the current track changed: `b` and `c` are no longer wanted
+    scheduler.request([paths[3]])
+    assert scheduler.pending() == [paths[0], paths[3]]
+    release.set()
+    scheduler._pool.shutdown(wait=True)
+    assert started == ["a", "d"]
+    assert sorted(ready) == ["a", "d"]
+    assert cache.get(paths[3]) == (b"\x80" * 4, b"\x40" * 4)
+    # cached tracks are not generated again
+    scheduler._pool = ThreadPoolExecutor(max_workers=1)
+    scheduler.request([paths[3]])
+    assert scheduler.pending() == []
+
+
+def test_progress_bar_draws_waveform():
+    from pytuiplayer.tui_app import ProgressBar
+    bar = ProgressBar()
+    bar.duration = 100
+    bar.progress = 50
+    bar.waveform = bytes([0, 255])
+    text = bar.render()
+    plain = text.plain
+    assert plain.startswith("[" + "▁" * 80 + "█" * 80 + "]")
+    assert plain.endswith("00:50 / 01:40")
+    assert any(span.style == "dim" for span in text.spans)
+    bar.waveform = None
+    assert "░" in bar.render()